@@ -119,6 +119,9 @@ class SessionDependencies(BaseDependencies):
     agent_instance_id: Optional[int] = None  # Agent instance ID (for attribution)
     account_id: Optional[UUID] = None  # Account ID (for multi-tenant data isolation)
     
+    # Speculative vector search for the current turn (tools/vector_prefetch.py)
+    vector_prefetch: Optional[Any] = None
+    
     @classmethod
     async def create(
         cls,
@@ -167,6 +167,93 @@ def _calculate_fallback_costs(
         return 0.0, 0.0, 0.0
 
 
+def extract_cache_tokens(usage_data: Any) -> Dict[str, int]:
+    """
+    Extract provider prompt-cache token counts from Pydantic AI usage.
+    
+    pydantic-ai maps OpenRouter's `prompt_tokens_details.cached_tokens` to
+    RequestUsage.cache_read_tokens (and cache writes, where reported, to
+    cache_write_tokens).
+    
+    Args:
+        usage_data: Usage object from result.usage() (may be None)
+        
+    Returns:
+        Dict with "cache_read" and "cache_write" keys for LLMRequestTracker
+        tokens, or an empty dict if no usage is available
+        
+    Example:
+        >>> tokens = {"prompt": 900, "completion": 50, "total": 950, **extract_cache_tokens(result.usage())}
+    """
+    if usage_data is None:
+        return {}
+    return {
+        "cache_read": int(getattr(usage_data, 'cache_read_tokens', 0) or 0),
+        "cache_write": int(getattr(usage_data, 'cache_write_tokens', 0) or 0)
+    }
+
+
+# Average characters per token for English text across common BPE tokenizers.
+# Only used when the provider never reported usage (cancelled streams).
+CHARS_PER_TOKEN = 4
+
+
+def estimate_token_count(text: str) -> int:
+    """
+    Estimate the token count of a text locally (no tokenizer download).
+    
+    Args:
+        text: Text to estimate
+        
+    Returns:
+        Estimated number of tokens (ceil(len / CHARS_PER_TOKEN))
+    """
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_partial_usage(
+    request_messages: list,
+    partial_text: str,
+    requested_model: str,
+    session_id: str
+) -> Dict[str, Any]:
+    """
+    Estimate token usage and cost of a stream that was cancelled mid-generation.
+    
+    When a stream is cancelled the provider never sends its final usage chunk,
+    so prompt tokens are estimated from the request messages and completion
+    tokens from the text received so far. Costs then go through the normal
+    genai-prices / fallback pricing path.
+    
+    Args:
+        request_messages: Messages sent to the LLM (build_request_messages format)
+        partial_text: Assistant text received before cancellation
+        requested_model: Full model identifier (may include provider prefix)
+        session_id: Session ID for logging context
+        
+    Returns:
+        Dict with prompt_tokens, completion_tokens, total_tokens, prompt_cost,
+        completion_cost and total_cost
+    """
+    from pydantic_ai.usage import RequestUsage
+    
+    prompt_tokens = sum(estimate_token_count(str(m.get("content") or "")) for m in request_messages)
+    completion_tokens = estimate_token_count(partial_text)
+    usage = RequestUsage(input_tokens=prompt_tokens, output_tokens=completion_tokens)
+    prompt_cost, completion_cost, total_cost = calculate_streaming_costs(usage, requested_model, session_id)
+    
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_cost": prompt_cost,
+        "completion_cost": completion_cost,
+        "total_cost": total_cost
+    }
+
+
 def extract_costs_from_provider_details(
     result: Any,
     requested_model: str
@@ -0,0 +1,296 @@
+"""
+Hedged requests and latency-based model fallback.
+
+Some OpenRouter upstreams have long tail latencies: with a single model per
+instance a stalled provider keeps the user waiting until the client timeout.
+With `model_settings.fallbacks` configured, the agent uses a HedgedModel:
+
+- The request starts on the primary model
+- If no first token arrives within first_token_timeout_ms (streaming) or no
+  response within request_timeout_ms (non-streaming), the same request is
+  started on the next model; both keep running
+- Whichever attempt streams first wins; the others are cancelled (their
+  HTTP streams are closed)
+- An attempt that fails (HTTP error, empty stream) starts the next model
+  right away, regardless of the hedging deadline
+- Every attempt is recorded in `attempts` so the caller can track the losers
+  in llm_requests (see simple_chat._track_hedge_attempts); the winner is
+  tracked by the normal path with the model that actually served it
+
+Configuration (instance config.yaml):
+    model_settings:
+      model: "openai/gpt-4o-mini"
+      fallbacks: ["google/gemini-2.5-flash"]   # Tried in order
+      hedging:
+        enabled: true                  # false = fall back on errors only
+        first_token_timeout_ms: 4000   # Start the next model after this long without a first token
+        request_timeout_ms: 20000      # Same for non-streaming requests (whole response)
+        max_attempts: 2                # Models started by the deadline (errors may use the rest)
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Sequence
+
+import logfire
+from pydantic_ai.exceptions import FallbackExceptionGroup
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import Model, ModelRequestParameters, StreamedResponse
+from pydantic_ai.models.fallback import FallbackModel
+from pydantic_ai.settings import ModelSettings
+
+
+@dataclass(frozen=True)
+class HedgingPolicy:
+    """Hedging settings from model_settings.hedging."""
+    enabled: bool = True
+    first_token_timeout_ms: int = 4000
+    request_timeout_ms: int = 20000
+    max_attempts: int = 2
+
+    @classmethod
+    def from_model_settings(cls, model_settings: Optional[Mapping[str, Any]]) -> "HedgingPolicy":
+        section = (model_settings or {}).get("hedging", {}) or {}
+        return cls(
+            enabled=bool(section.get("enabled", cls.enabled)),
+            first_token_timeout_ms=int(section.get("first_token_timeout_ms", cls.first_token_timeout_ms)),
+            request_timeout_ms=int(section.get("request_timeout_ms", cls.request_timeout_ms)),
+            max_attempts=max(1, int(section.get("max_attempts", cls.max_attempts)))
+        )
+
+
+@dataclass
+class HedgeAttempt:
+    """One model attempt of a hedged request."""
+    model_name: str
+    streaming: bool
+    started_ms: int  # Offset from the start of the request
+    ready_ms: Optional[int] = None  # First token (streaming) or full response received
+    ended_ms: Optional[int] = None  # Won, failed or cancelled
+    outcome: str = "running"  # won | cancelled | failed
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "streaming": self.streaming,
+            "started_ms": self.started_ms,
+            "ready_ms": self.ready_ms,
+            "ended_ms": self.ended_ms,
+            "outcome": self.outcome,
+            "error": self.error
+        }
+
+
+class _Running:
+    """An attempt in flight: `ready` resolves when it has produced something usable."""
+
+    def __init__(self, record: HedgeAttempt, task: "asyncio.Task[Any]", ready: "asyncio.Future[Any]", release: Optional[asyncio.Event] = None):
+        self.record = record
+        self.task = task
+        self.ready = ready
+        self.release = release
+
+
+class HedgedModel(FallbackModel):
+    """
+    FallbackModel that also hedges slow attempts on a first-token deadline.
+    """
+
+    def __init__(self, models: Sequence[Model], policy: Optional[HedgingPolicy] = None):
+        """
+        Args:
+            models: Primary model followed by the fallbacks, in order
+            policy: Hedging policy (defaults apply when omitted)
+        """
+        super().__init__(models[0], *models[1:])
+        self.policy = policy or HedgingPolicy()
+        self.attempts: List[HedgeAttempt] = []
+        self.served_model: Optional[str] = None
+
+    @property
+    def model_name(self) -> str:
+        return f'hedged:{",".join(model.model_name for model in self.models)}'
+
+    async def _race(self, start: Callable[[Model, HedgeAttempt], _Running], streaming: bool) -> _Running:
+        """
+        Start attempts per the policy until one is ready; cancel the others.
+
+        Returns:
+            The winning attempt
+        """
+        began = time.monotonic()
+        deadline_s = (self.policy.first_token_timeout_ms if streaming else self.policy.request_timeout_ms) / 1000
+        running: List[_Running] = []
+        exceptions: List[Exception] = []
+        next_index = 0
+        hedged = 0
+
+        def elapsed_ms() -> int:
+            return int((time.monotonic() - began) * 1000)
+
+        def launch() -> None:
+            nonlocal next_index
+            model = self.models[next_index]
+            next_index += 1
+            record = HedgeAttempt(model.model_name, streaming, started_ms=elapsed_ms())
+            self.attempts.append(record)
+            running.append(start(model, record))
+
+        launch()
+        deadline = time.monotonic() + deadline_s
+        winner: Optional[_Running] = None
+        try:
+            while winner is None:
+                timeout = None
+                if self.policy.enabled and hedged + 1 < self.policy.max_attempts and next_index < len(self.models):
+                    timeout = max(0.0, deadline - time.monotonic())
+                done, _ = await asyncio.wait([r.ready for r in running], timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Deadline passed without a first token: race the next model
+                    hedged += 1
+                    logfire.info(
+                        'agent.hedge.started',
+                        slow_model=running[-1].record.model_name,
+                        next_model=self.models[next_index].model_name,
+                        after_ms=elapsed_ms(),
+                        streaming=streaming
+                    )
+                    launch()
+                    deadline = time.monotonic() + deadline_s
+                    continue
+
+                for attempt in [r for r in running if r.ready in done]:
+                    running.remove(attempt)
+                    attempt.record.ready_ms = attempt.record.ended_ms = elapsed_ms()
+                    if attempt.ready.cancelled() or attempt.ready.exception() is not None:
+                        error = attempt.ready.exception() if not attempt.ready.cancelled() else RuntimeError("attempt cancelled")
+                        attempt.record.outcome = "failed"
+                        attempt.record.error = f"{type(error).__name__}: {error}"
+                        exceptions.append(error)
+                        logfire.warn('agent.hedge.attempt_failed', model=attempt.record.model_name, error=attempt.record.error)
+                    elif winner is None:
+                        winner = attempt
+                    else:
+                        # Ready in the same instant as the winner: treat as a loser
+                        running.append(attempt)
+
+                if winner is None and not running:
+                    if next_index >= len(self.models):
+                        raise FallbackExceptionGroup('All models from HedgedModel failed', exceptions)
+                    launch()
+                    deadline = time.monotonic() + deadline_s
+        finally:
+            for attempt in running:
+                attempt.record.outcome = "cancelled"
+                attempt.record.ended_ms = elapsed_ms()
+                attempt.task.cancel()
+            if running:
+                await asyncio.gather(*(r.task for r in running), return_exceptions=True)
+            if winner is None:
+                # Our own request was cancelled while racing
+                for attempt in self.attempts:
+                    if attempt.outcome == "running":
+                        attempt.outcome = "cancelled"
+                        attempt.ended_ms = elapsed_ms()
+
+        winner.record.outcome = "won"
+        self.served_model = winner.record.model_name
+        logfire.info(
+            'agent.hedge.winner',
+            model=winner.record.model_name,
+            ready_ms=winner.record.ready_ms,
+            attempts=next_index,
+            streaming=streaming
+        )
+        return winner
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        """Race whole responses; the first complete response wins."""
+        def start(model: Model, record: HedgeAttempt) -> _Running:
+            task = asyncio.ensure_future(model.request(messages, model_settings, model_request_parameters))
+            return _Running(record, task, task)
+
+        winner = await self._race(start, streaming=False)
+        return winner.task.result()
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+        run_context: Any = None,
+    ) -> AsyncIterator[StreamedResponse]:
+        """Race streams on their first token; the first stream to produce one is yielded."""
+        loop = asyncio.get_running_loop()
+
+        def start(model: Model, record: HedgeAttempt) -> _Running:
+            ready: "asyncio.Future[StreamedResponse]" = loop.create_future()
+            release = asyncio.Event()
+
+            async def hold() -> None:
+                # Entering request_stream() returns once the first chunk has arrived;
+                # the stream stays open in this task until released or cancelled
+                try:
+                    async with model.request_stream(messages, model_settings, model_request_parameters, run_context) as stream:
+                        ready.set_result(stream)
+                        await release.wait()
+                except Exception as e:
+                    if not ready.done():
+                        ready.set_exception(e)
+                    else:
+                        logfire.warn('agent.hedge.stream_close_failed', model=record.model_name, error=str(e))
+                finally:
+                    if not ready.done():
+                        ready.cancel()
+
+            return _Running(record, asyncio.ensure_future(hold()), ready, release)
+
+        winner = await self._race(start, streaming=True)
+        try:
+            yield winner.ready.result()
+        finally:
+            winner.release.set()
+            await winner.task
+
+
+def build_hedged_model(
+    primary: Model,
+    model_settings: Mapping[str, Any],
+    create_model: Callable[[str], Model]
+) -> Model:
+    """
+    Wrap the primary model in a HedgedModel when model_settings.fallbacks is set.
+
+    Args:
+        primary: Model for model_settings.model
+        model_settings: Instance model settings
+        create_model: Builds a model for a fallback model id
+
+    Returns:
+        HedgedModel, or the primary model unchanged when no fallbacks are configured
+    """
+    fallbacks = [name for name in (model_settings.get("fallbacks") or []) if name and name != primary.model_name]
+    if not fallbacks:
+        return primary
+    return HedgedModel([primary, *(create_model(name) for name in fallbacks)], HedgingPolicy.from_model_settings(model_settings))
+
+
+def hedged_model_of(agent: Any) -> Optional[HedgedModel]:
+    """The agent's HedgedModel, if it uses one."""
+    model = getattr(agent, "model", None)
+    return model if isinstance(model, HedgedModel) else None
@@ -2,7 +2,19 @@
 OpenRouter-specific model implementation with cost tracking.
 
 Extends OpenAIChatModel to extract OpenRouter-specific data including
-cost information from responses and store it in vendor_details.
+cost information from responses and store it in vendor_details, and to mark
+prompt-cache breakpoints for providers that need explicit ones.
+
+Prompt caching:
+- Anthropic and Gemini models on OpenRouter only cache content marked with
+  `cache_control` breakpoints. OpenRouterModel marks the end of the system
+  prompt (tools + system prompt form a stable prefix across turns) and the
+  end of the conversation history before the current user message.
+- OpenAI, DeepSeek, Grok, Moonshot etc. cache prompt prefixes automatically;
+  no markers are sent for them.
+- Either way cached prompt tokens are reported in usage
+  (RequestUsage.cache_read_tokens) and stored in llm_requests.
+- Disable per instance with `model_settings.prompt_cache: false`.
 
 Based on pydantic-ai Issue #1849: "Store OpenRouter provider metadata in ModelResponse vendor details"
 """
@@ -13,16 +25,82 @@ Unauthorized copying of this file is strictly prohibited.
 
 
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 import os
 
 from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletion
-from pydantic_ai.messages import ModelResponse
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import ModelRequestParameters
 from pydantic_ai.models.openai import OpenAIChatModel
 from pydantic_ai.providers.openrouter import OpenRouterProvider
 
 
+# Model families that only cache explicitly marked prefixes (cache_control breakpoints)
+CACHE_BREAKPOINT_MODEL_PREFIXES = ("anthropic/", "google/gemini")
+
+_EPHEMERAL = {"type": "ephemeral"}
+
+
+def supports_cache_breakpoints(model_name: str) -> bool:
+    """Whether the model needs explicit cache_control breakpoints for prompt caching."""
+    return model_name.lower().startswith(CACHE_BREAKPOINT_MODEL_PREFIXES)
+
+
+def _mark_cache_breakpoint(message: Dict[str, Any]) -> bool:
+    """Convert a message's string content into a text part carrying cache_control."""
+    content = message.get("content")
+    if isinstance(content, str) and content:
+        message["content"] = [{"type": "text", "text": content, "cache_control": _EPHEMERAL}]
+        return True
+    if isinstance(content, list) and content and isinstance(content[-1], dict) and content[-1].get("type") == "text":
+        content[-1] = {**content[-1], "cache_control": _EPHEMERAL}
+        return True
+    return False
+
+
+def apply_cache_breakpoints(openai_messages: List[Dict[str, Any]], cache_history: bool = True) -> int:
+    """
+    Mark prompt-cache breakpoints on mapped chat completion messages (in place).
+    
+    Breakpoints:
+    1. End of the leading system prompt - tools and system prompt are identical
+       across turns, so every turn of every session of an instance shares them
+    2. (cache_history) Last user/assistant message before the current user
+       message - the conversation so far is a stable prefix for the next turn
+    
+    Args:
+        openai_messages: Messages as sent to chat.completions.create
+        cache_history: Also mark the end of the conversation history
+        
+    Returns:
+        Number of breakpoints placed (Anthropic allows at most 4)
+    """
+    placed = 0
+    
+    system_index = next(
+        (i for i, m in enumerate(openai_messages) if m.get("role") in ("system", "developer")),
+        None
+    )
+    if system_index is not None and _mark_cache_breakpoint(openai_messages[system_index]):
+        placed += 1
+    
+    if cache_history:
+        current_user = next(
+            (i for i in range(len(openai_messages) - 1, -1, -1) if openai_messages[i].get("role") == "user"),
+            None
+        )
+        if current_user is not None:
+            for i in range(current_user - 1, -1, -1):
+                if i == system_index:
+                    break
+                if openai_messages[i].get("role") in ("user", "assistant") and _mark_cache_breakpoint(openai_messages[i]):
+                    placed += 1
+                    break
+    
+    return placed
+
+
 class OpenRouterAsyncClient(AsyncOpenAI):
     """
     Custom AsyncOpenAI client configured for OpenRouter.
@@ -90,8 +168,32 @@ class OpenRouterModel(OpenAIChatModel):
     - Any other OpenRouter-specific metadata
     
     Cost data is stored in ModelResponse.vendor_details for easy access.
+    
+    For Anthropic/Gemini models the outgoing messages get cache_control
+    breakpoints (see apply_cache_breakpoints) unless prompt_cache is False.
     """
     
+    def __init__(self, model_name: str, *, prompt_cache: bool = True, cache_history: bool = True, **kwargs: Any):
+        """
+        Args:
+            model_name: OpenRouter model identifier (e.g. "anthropic/claude-3.5-sonnet")
+            prompt_cache: Send cache breakpoints for models that need them
+            cache_history: Also cache the conversation history prefix
+            **kwargs: Passed to OpenAIChatModel (provider, profile, settings)
+        """
+        super().__init__(model_name, **kwargs)
+        self.prompt_cache = prompt_cache and supports_cache_breakpoints(model_name)
+        self.cache_history = cache_history
+    
+    async def _map_messages(
+        self, messages: list[ModelMessage], model_request_parameters: ModelRequestParameters
+    ) -> list:
+        """Map messages as OpenAIChatModel does, then add prompt-cache breakpoints."""
+        openai_messages = await super()._map_messages(messages, model_request_parameters)
+        if self.prompt_cache:
+            apply_cache_breakpoints(openai_messages, cache_history=self.cache_history)
+        return openai_messages
+    
     def _process_response(self, response: ChatCompletion | str) -> ModelResponse:
         """
         Process OpenRouter response and extract cost/provider metadata.
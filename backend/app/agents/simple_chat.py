@@ -25,21 +25,27 @@ Unauthorized copying of this file is strictly prohibited.
 
 
 from pydantic_ai import Agent
-from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse, SystemPromptPart, UserPromptPart, TextPart
+from pydantic_ai.messages import ModelMessage
 from .openrouter import OpenRouterModel, create_openrouter_provider_with_cost_tracking
+from .hedged_model import HedgedModel, build_hedged_model, hedged_model_of
 from .base.dependencies import SessionDependencies
 from ..config import load_config
 from .config_loader import get_agent_config  # Fixed: correct function name
 from ..services.message_service import get_message_service
+from ..services.message_history import HistoryStorageSettings, to_model_messages
 from ..services.llm_request_tracker import LLMRequestTracker
 from ..services.prompt_breakdown_service import PromptBreakdownService
+from ..services.response_cache import get_response_cache
 from .chat_helpers import build_request_messages, build_response_body, extract_session_account_info, save_message_pair
-from .cost_calculator import calculate_streaming_costs, track_chat_request
+from .cost_calculator import calculate_streaming_costs, extract_cache_tokens, track_chat_request
 from .tools.toolsets import get_enabled_toolsets
 from .tools.directory_tools import get_available_directories, search_directory
 from .tools.vector_tools import vector_search
+from .tools.vector_prefetch import start_vector_prefetch
+from .tools.tool_router import DIRECTORY, VECTOR_SEARCH, RouteDecision
 from .tools.email_tools import send_conversation_summary
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
+import asyncio
 import uuid
 from uuid import UUID
 from datetime import datetime, UTC
@@ -47,6 +53,9 @@ import time
 import os
 import logfire
 
+if TYPE_CHECKING:
+    from ..services.chat_bootstrap import ChatBootstrap
+
 # Global agent instance (lazy loaded)
 # Global caching disabled for production reliability
 # _chat_agent = None  # Removed: Always create fresh agents
@@ -88,37 +97,14 @@ async def load_conversation_history(session_id: str, max_messages: Optional[int]
     if not db_messages:
         return []
     
-    # Convert database messages to Pydantic AI ModelMessage format
-    pydantic_messages = []
-    for msg in db_messages:
-        # Convert based on role
-        if msg.role in ("human", "user"):
-            # Create user request message
-            pydantic_message = ModelRequest(
-                parts=[UserPromptPart(
-                    content=msg.content,
-                    timestamp=msg.created_at or datetime.now(UTC)
-                )]
-            )
-        elif msg.role == "assistant":
-            # Create assistant response message  
-            pydantic_message = ModelResponse(
-                parts=[TextPart(content=msg.content)],
-                usage=None,  # Historical messages don't have usage data
-                model_name="simple-chat",  # Agent name for historical messages
-                timestamp=msg.created_at or datetime.now(UTC)
-            )
-        else:
-            # Skip system messages and unknown roles (Pydantic AI handles system messages)
-            continue
-            
-        pydantic_messages.append(pydantic_message)
-    
-    return pydantic_messages
+    # Convert database messages to Pydantic AI ModelMessage format (stored turns
+    # replay their tool calls and returns)
+    return to_model_messages(db_messages, model_name="simple-chat")
 
 async def create_simple_chat_agent(
     instance_config: Optional[dict] = None,
-    account_id: Optional[UUID] = None
+    account_id: Optional[UUID] = None,
+    route: Optional[RouteDecision] = None
 ) -> tuple[Agent, dict, str]:  # Return agent, prompt_breakdown, and assembled system_prompt
     """
     Create a simple chat agent with OpenRouter provider for cost tracking.
@@ -128,6 +114,8 @@ async def create_simple_chat_agent(
         account_id: Optional account ID for multi-tenant directory documentation generation
                         instead of loading the global config. This enables multi-tenant
                         support where each instance can have different model settings.
+        route: Optional per-turn RouteDecision (tools.router); limits the retrieval
+            tools and directory sections exposed for this turn
     
     Returns:
         tuple: (agent, prompt_breakdown, system_prompt)
@@ -172,11 +160,11 @@ async def create_simple_chat_agent(
         tools_config = (instance_config or {}).get("tools", {})
         
         # Add directory tools if enabled
-        if tools_config.get("directory", {}).get("enabled", False):
+        if tools_config.get("directory", {}).get("enabled", False) and (route is None or route.allows(DIRECTORY)):
             tools_list.extend([get_available_directories, search_directory])
         
         # Add vector search tool if enabled
-        if tools_config.get("vector_search", {}).get("enabled", False):
+        if tools_config.get("vector_search", {}).get("enabled", False) and (route is None or route.allows(VECTOR_SEARCH)):
             tools_list.append(vector_search)
         
         # Add email summary tool if enabled
@@ -257,12 +245,49 @@ async def create_simple_chat_agent(
     # Construct prompt with critical rules at the top
     system_prompt = critical_rules + base_system_prompt
     
+    # Load remaining prompt modules (Phase 4A) - skip tool_selection_hints (already loaded at top)
+    from .tools.prompt_modules import load_modules_for_agent, load_prompt_module
+    
+    # Initialize module tracking for prompt breakdown
+    other_modules = []
+    
+    # Load other modules (excluding tool_selection_hints which is already at the top)
+    prompting_config = (instance_config or {}).get('prompting', {}).get('modules', {})
+    if prompting_config.get('enabled', False):
+        selected_modules = prompting_config.get('selected', [])
+        other_modules = [m for m in selected_modules if m != 'tool_selection_hints']
+        
+        if other_modules:
+            other_module_contents = []
+            for module_name in other_modules:
+                module_content = load_prompt_module(module_name, account_slug)
+                if module_content:
+                    other_module_contents.append(module_content)
+            
+            if other_module_contents:
+                combined = "\n\n---\n\n".join(other_module_contents)
+                system_prompt = system_prompt + "\n\n" + combined
+                logfire.info(
+                    'agent.prompt_modules.loaded',
+                    module_count=len(other_modules),
+                    modules=other_modules,
+                    content_length=len(combined),
+                    final_prompt_length=len(system_prompt),
+                    note='tool_selection_hints loaded at top'
+                )
+    
+    # Directory docs go LAST: they are generated from directory data (change on import),
+    # while everything above comes from config files. Keeping the file-based sections
+    # first gives providers a longer stable prefix for prompt caching.
     # Initialize variables for prompt breakdown tracking
     directory_docs = ""
     directory_result = None  # Will hold DirectoryDocsResult if directory tools enabled
     
     # Auto-generate directory tool documentation if enabled
     directory_config = (instance_config or {}).get("tools", {}).get("directory", {})
+    if route is not None and not route.allows(DIRECTORY):
+        # Routed away this turn: no directory tools, so no directory docs either
+        directory_config = {}
     if directory_config.get("enabled", False) and account_id is not None:
         logfire.info('agent.directory.docs.generating')
         
@@ -274,7 +299,8 @@ async def create_simple_chat_agent(
             directory_result = await generate_directory_tool_docs(
                 agent_config=instance_config or {},
                 account_id=account_id,
-                db_session=db_session
+                db_session=db_session,
+                only_lists=route.list_filter if route is not None else None
             )
             
             # Extract full_text from DirectoryDocsResult for prompt assembly
@@ -303,37 +329,6 @@ async def create_simple_chat_agent(
             reason='no_account_id'
         )
     
-    # Load remaining prompt modules (Phase 4A) - skip tool_selection_hints (already loaded at top)
-    from .tools.prompt_modules import load_modules_for_agent, load_prompt_module
-    
-    # Initialize module tracking for prompt breakdown
-    other_modules = []
-    
-    # Load other modules (excluding tool_selection_hints which is already at the top)
-    prompting_config = (instance_config or {}).get('prompting', {}).get('modules', {})
-    if prompting_config.get('enabled', False):
-        selected_modules = prompting_config.get('selected', [])
-        other_modules = [m for m in selected_modules if m != 'tool_selection_hints']
-        
-        if other_modules:
-            other_module_contents = []
-            for module_name in other_modules:
-                module_content = load_prompt_module(module_name, account_slug)
-                if module_content:
-                    other_module_contents.append(module_content)
-            
-            if other_module_contents:
-                combined = "\n\n---\n\n".join(other_module_contents)
-                system_prompt = system_prompt + "\n\n" + combined
-                logfire.info(
-                    'agent.prompt_modules.loaded',
-                    module_count=len(other_modules),
-                    modules=other_modules,
-                    content_length=len(combined),
-                    final_prompt_length=len(system_prompt),
-                    note='tool_selection_hints loaded at top'
-                )
-    
     # Capture prompt breakdown for admin debugging
     prompt_breakdown = PromptBreakdownService.capture_breakdown(
         base_prompt=base_system_prompt,
@@ -371,7 +366,8 @@ async def create_simple_chat_agent(
     provider = create_openrouter_provider_with_cost_tracking(api_key)
     model = OpenRouterModel(
         model_name,  # Now properly uses agent-first cascade
-        provider=provider
+        provider=provider,
+        prompt_cache=model_settings.get("prompt_cache", True)  # cache_control breakpoints (Anthropic/Gemini)
     )
     
     logfire.info(
@@ -380,19 +376,31 @@ async def create_simple_chat_agent(
         provider_type="OpenRouterProvider_CustomClient", 
         api_key_masked=f"{api_key[:10]}..." if api_key else "none",
         cost_tracking="enabled_via_custom_asyncopenai_client",
-        usage_tracking="always_included"
+        usage_tracking="always_included",
+        prompt_cache_breakpoints=model.prompt_cache
+    )
+    
+    # Optional fallback models, raced when the primary is slow to first token (model_settings.fallbacks)
+    model = build_hedged_model(
+        model,
+        model_settings,
+        lambda fallback_name: OpenRouterModel(
+            fallback_name,
+            provider=provider,
+            prompt_cache=model_settings.get("prompt_cache", True)
+        )
     )
     
     # Build tools list based on agent configuration
     tools_list = []
     tools_config = (instance_config or {}).get("tools", {})
     
-    # Add directory tools if enabled
-    if tools_config.get("directory", {}).get("enabled", False):
+    # Add directory tools if enabled (and not routed away this turn, see tools.router)
+    if tools_config.get("directory", {}).get("enabled", False) and (route is None or route.allows(DIRECTORY)):
         tools_list.extend([get_available_directories, search_directory])
     
     # Add vector search tool if enabled
-    if tools_config.get("vector_search", {}).get("enabled", False):
+    if tools_config.get("vector_search", {}).get("enabled", False) and (route is None or route.allows(VECTOR_SEARCH)):
         tools_list.append(vector_search)
     
     # Add email summary tool if enabled
@@ -426,7 +434,8 @@ async def create_simple_chat_agent(
 
 async def get_chat_agent(
     instance_config: Optional[dict] = None,
-    account_id: Optional[UUID] = None
+    account_id: Optional[UUID] = None,
+    route: Optional[RouteDecision] = None
 ) -> tuple[Agent, dict, str, list]:  # Return agent, prompt_breakdown, system_prompt, and tools_list
     """
     Create a fresh chat agent instance.
@@ -438,6 +447,7 @@ async def get_chat_agent(
     Args:
         instance_config: Optional instance-specific configuration for multi-tenant support
         account_id: Optional account ID for multi-tenant directory documentation generation
+        route: Optional per-turn RouteDecision from the tool router
         
     Returns:
         tuple: (Agent instance, prompt_breakdown dict, system_prompt str, tools_list)
@@ -446,7 +456,8 @@ async def get_chat_agent(
     # This ensures config changes work reliably in production
     agent, prompt_breakdown, system_prompt, tools_list = await create_simple_chat_agent(
         instance_config=instance_config,
-        account_id=account_id
+        account_id=account_id,
+        route=route
     )
     return agent, prompt_breakdown, system_prompt, tools_list
 
@@ -456,7 +467,8 @@ async def simple_chat(
     agent_instance_id: Optional[int] = None,  # Multi-tenant: agent instance ID for message attribution
     account_id: Optional[UUID] = None,  # Multi-tenant: account ID for data isolation
     message_history: Optional[List[ModelMessage]] = None,  # Fixed: proper type annotation
-    instance_config: Optional[dict] = None  # Multi-tenant: instance-specific configuration
+    instance_config: Optional[dict] = None,  # Multi-tenant: instance-specific configuration
+    bootstrap: Optional["ChatBootstrap"] = None  # Pre-resolved per-turn context from the endpoint
 ) -> dict:
     """
     Simple chat function using Pydantic AI agent with YAML configuration.
@@ -470,6 +482,9 @@ async def simple_chat(
         agent_instance_id: Agent instance ID for multi-tenant message attribution
         message_history: Optional pre-loaded message history
         instance_config: Optional instance-specific config for multi-tenant support
+        bootstrap: Optional ChatBootstrap from bootstrap_chat(); supplies history,
+            instance config, model settings and session account info so none of
+            them are loaded again here
     
     Returns:
         dict with response, messages, new_messages, and usage data
@@ -478,6 +493,15 @@ async def simple_chat(
     from ..services.agent_execution_service import get_agent_execution_service
     
     execution_service = get_agent_execution_service()
+    
+    # Speculative vector search overlaps agent setup (tools.vector_search.prefetch)
+    prefetch = start_vector_prefetch(
+        message,
+        bootstrap.instance_config if bootstrap is not None else instance_config,
+        history_length=len(bootstrap.history) if bootstrap is not None else len(message_history or []),
+        session_id=session_id
+    )
+    
     agent, session_deps, prompt_breakdown, system_prompt, tools_list, message_history, requested_model = \
         await execution_service.setup_execution_context(
             session_id=session_id,
@@ -485,12 +509,21 @@ async def simple_chat(
             agent_instance_id=agent_instance_id,
             account_id=account_id,
             instance_config=instance_config,
-            message_history=message_history
+            message_history=message_history,
+            bootstrap=bootstrap,
+            message=message
         )
+    if instance_config is None and bootstrap is not None:
+        instance_config = session_deps.agent_config
+    session_deps.vector_prefetch = prefetch
+    agent_prompt = await prefetch.prompt(message) if prefetch is not None else message
     
     # Load model_settings for cost tracking (still needed for LLM request tracking)
-    from .config_loader import get_agent_model_settings
-    model_settings = await get_agent_model_settings("simple_chat")
+    if bootstrap is not None:
+        model_settings = dict(bootstrap.model_settings)
+    else:
+        from .config_loader import get_agent_model_settings
+        model_settings = await get_agent_model_settings("simple_chat")
     
     # Get database session for tools (directory_search, etc.) - wrap execution in context manager
     from ..database import get_database_service
@@ -506,14 +539,19 @@ async def simple_chat(
         
         try:
             # REFACTOR (CHUNK-0026-010-003): Use AgentExecutionService for execution
-            result, latency_ms = await execution_service.execute_agent(
-                agent=agent,
-                message=message,
-                session_deps=session_deps,
-                message_history=message_history,
-                session_id=session_id,
-                streaming=False
-            )
+            try:
+                result, latency_ms = await execution_service.execute_agent(
+                    agent=agent,
+                    message=agent_prompt,
+                    session_deps=session_deps,
+                    message_history=message_history,
+                    session_id=session_id,
+                    streaming=False
+                )
+            finally:
+                if prefetch is not None:
+                    prefetch.finish()
+            hedge = hedged_model_of(agent)
             
             # Extract response and usage data
             try:
@@ -585,6 +623,7 @@ async def simple_chat(
                 prompt_tokens=prompt_tokens,
                 completion_tokens=completion_tokens,
                 total_tokens=total_tokens,
+                cache_read_tokens=extract_cache_tokens(usage_data).get("cache_read", 0),
                 real_cost=real_cost,
                 method="openrouter_model_vendor_details",
                 cost_tracking="enabled",
@@ -615,6 +654,9 @@ async def simple_chat(
                         source='cascade',
                         tracking_model=tracking_model
                     )
+                # Hedged request: attribute the turn to the fallback model that actually served it
+                if hedge is not None and hedge.served_model:
+                    tracking_model = requested_model = hedge.served_model
             
                 # Build full request body with actual messages sent to LLM (using helper)
                 request_messages = build_request_messages(message_history or [], message)
@@ -630,7 +672,10 @@ async def simple_chat(
                 )
             
                 # Load session to extract denormalized fields for cost attribution (using helper)
-                account_id, account_slug = await extract_session_account_info(UUID(session_id))
+                if bootstrap is not None:
+                    account_id, account_slug = bootstrap.account_id, bootstrap.account_slug
+                else:
+                    account_id, account_slug = await extract_session_account_info(UUID(session_id))
                 
                 # Validate session exists (account_id/account_slug will be None if session not found)
                 if account_id is None and account_slug is None:
@@ -690,7 +735,7 @@ async def simple_chat(
                         "tools": tools_for_tracking
                     },
                     response_body=response_body_full,
-                    tokens={"prompt": prompt_tokens, "completion": completion_tokens, "total": total_tokens},
+                    tokens={"prompt": prompt_tokens, "completion": completion_tokens, "total": total_tokens, **extract_cache_tokens(usage_data)},
                     cost_data={
                         "prompt_cost": prompt_cost,
                         "completion_cost": completion_cost,
@@ -707,6 +752,19 @@ async def simple_chat(
                     meta={"prompt_breakdown": prompt_breakdown},  # Admin debugging
                     assembled_prompt=system_prompt  # Complete assembled prompt as sent to LLM
                 )
+            
+            # Losing / failed hedge attempts get their own llm_requests rows
+            await _track_hedge_attempts(
+                hedge,
+                session_id=session_id,
+                agent_instance_id=agent_instance_id,
+                message=message,
+                message_history=message_history,
+                model_settings=model_settings,
+                instance_config=instance_config,
+                bootstrap=bootstrap,
+                winner_llm_request_id=llm_request_id
+            )
         
             # Save messages to database for multi-tenant message attribution
             if agent_instance_id is not None:
@@ -721,7 +779,8 @@ async def simple_chat(
                         llm_request_id=llm_request_id,
                         user_message=message,
                         assistant_message=response_text,
-                        result=result  # Automatically extracts tool calls
+                        result=result,  # Automatically extracts tool calls
+                        history_storage=HistoryStorageSettings.from_instance_config(instance_config)
                     )
                     
                     logfire.info(
@@ -733,6 +792,9 @@ async def simple_chat(
                         user_message_length=len(message),
                         assistant_message_length=len(response_text)
                     )
+                    
+                    # Opt-in per instance (response_cache in config.yaml); first turns only
+                    await get_response_cache().store(bootstrap, message, response_text, result, llm_request_id)
                 except Exception as msg_error:
                     logfire.exception(
                         'agent.messages.save_failed',
@@ -798,13 +860,251 @@ async def simple_chat(
         }
 
 
+# Strong references to persistence tasks that outlive a cancelled stream
+_background_tasks: set = set()
+
+
+def _on_persist_done(task: "asyncio.Task") -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logfire.error(
+            'agent.streaming.cancelled_persist_failed',
+            error=str(task.exception()),
+            error_type=type(task.exception()).__name__
+        )
+
+
+async def _persist_cancelled_stream(
+    *,
+    session_id: str,
+    agent_instance_id: UUID,
+    message: str,
+    partial_text: str,
+    message_history: Optional[List[ModelMessage]],
+    requested_model: str,
+    model_settings: dict,
+    instance_config: Optional[dict],
+    bootstrap: Optional["ChatBootstrap"],
+    latency_ms: int,
+    chunks_sent: int,
+    reason: str,
+    prompt_breakdown: Optional[dict] = None,
+    system_prompt: Optional[str] = None
+) -> None:
+    """
+    Record a stream that was cancelled before completion (client disconnect).
+    
+    The provider's final usage chunk never arrives for a cancelled stream, so
+    tokens and cost are estimated locally (see estimate_partial_usage) and the
+    LLM request is tracked with completion_status="partial". The user message
+    and the partial assistant text are saved if any text was streamed.
+    
+    Args:
+        session_id: Session ID
+        agent_instance_id: Agent instance ID for attribution
+        message: User message of this turn
+        partial_text: Assistant text streamed before cancellation
+        message_history: History sent to the LLM (system prompt included)
+        requested_model: Model identifier used for the request
+        model_settings: Resolved model settings (temperature, max_tokens)
+        instance_config: Instance config (instance_name, agent_type)
+        bootstrap: Optional ChatBootstrap (account attribution without a DB read)
+        latency_ms: Time from stream start to cancellation
+        chunks_sent: Number of text chunks streamed before cancellation
+        reason: Why the stream stopped (e.g. "client_disconnected")
+        prompt_breakdown: Prompt breakdown for admin debugging
+        system_prompt: Assembled system prompt
+    """
+    from .cost_calculator import estimate_partial_usage
+    
+    request_messages = build_request_messages(message_history or [], message)
+    usage = estimate_partial_usage(request_messages, partial_text, requested_model, session_id)
+    
+    if bootstrap is not None:
+        account_id, account_slug = bootstrap.account_id, bootstrap.account_slug
+    else:
+        account_id, account_slug = await extract_session_account_info(UUID(session_id))
+    
+    tracker = LLMRequestTracker()
+    llm_request_id = await tracker.track_llm_request(
+        session_id=UUID(session_id),
+        provider="openrouter",
+        model=model_settings.get("model", requested_model),
+        request_body={
+            "messages": request_messages,
+            "model": requested_model,
+            "temperature": model_settings.get("temperature"),
+            "max_tokens": model_settings.get("max_tokens"),
+            "stream": True
+        },
+        response_body={
+            "content": partial_text,
+            "streaming_chunks": chunks_sent,
+            "cancelled": reason
+        },
+        tokens={
+            "prompt": usage["prompt_tokens"],
+            "completion": usage["completion_tokens"],
+            "total": usage["total_tokens"]
+        },
+        cost_data={
+            "prompt_cost": usage["prompt_cost"],
+            "completion_cost": usage["completion_cost"],
+            "total_cost": usage["total_cost"]
+        },
+        latency_ms=latency_ms,
+        agent_instance_id=agent_instance_id,
+        account_id=account_id,
+        account_slug=account_slug,
+        agent_instance_slug=instance_config.get("instance_name", "unknown") if instance_config else "simple_chat",
+        agent_type=instance_config.get("agent_type", "simple_chat") if instance_config else "simple_chat",
+        completion_status="partial",
+        meta={"prompt_breakdown": prompt_breakdown, "usage_estimated": True, "cancel_reason": reason},
+        assembled_prompt=system_prompt
+    )
+    
+    if partial_text:
+        message_service = get_message_service()
+        await message_service.save_message(
+            session_id=UUID(session_id),
+            agent_instance_id=agent_instance_id,
+            llm_request_id=llm_request_id,
+            role="human",
+            content=message
+        )
+        await message_service.save_message(
+            session_id=UUID(session_id),
+            agent_instance_id=agent_instance_id,
+            llm_request_id=llm_request_id,
+            role="assistant",
+            content=partial_text,
+            metadata={
+                "partial": True,
+                "completion_status": "partial",
+                "cancel_reason": reason,
+                "chunks_received": chunks_sent
+            }
+        )
+    
+    logfire.info(
+        'agent.streaming.cancelled_persisted',
+        session_id=session_id,
+        llm_request_id=str(llm_request_id) if llm_request_id else None,
+        reason=reason,
+        partial_response_length=len(partial_text),
+        estimated_prompt_tokens=usage["prompt_tokens"],
+        estimated_completion_tokens=usage["completion_tokens"],
+        estimated_cost=usage["total_cost"]
+    )
+
+
+async def _track_hedge_attempts(
+    hedge: Optional[HedgedModel],
+    *,
+    session_id: str,
+    agent_instance_id: Optional[UUID],
+    message: str,
+    message_history: Optional[List[ModelMessage]],
+    model_settings: dict,
+    instance_config: Optional[dict],
+    bootstrap: Optional["ChatBootstrap"],
+    winner_llm_request_id: Optional[UUID]
+) -> None:
+    """
+    Record the attempts of a hedged turn that did not produce the answer.
+    
+    The winning attempt is tracked by the normal completion path. Every other
+    attempt gets its own llm_requests row, linked to the winner in meta.hedge:
+    - cancelled: lost the race; upstream may bill the prompt, so prompt tokens
+      and cost are estimated (no completion tokens were received)
+    - failed: the provider returned an error; tracked with zero cost
+    
+    Args:
+        hedge: HedgedModel of the agent (None = no fallbacks configured)
+        session_id: Session ID
+        agent_instance_id: Agent instance ID for attribution
+        message: User message of this turn
+        message_history: History sent to the LLM
+        model_settings: Resolved model settings (temperature, max_tokens)
+        instance_config: Instance config (instance_name, agent_type)
+        bootstrap: Optional ChatBootstrap (account attribution without a DB read)
+        winner_llm_request_id: llm_requests row of the winning attempt
+    """
+    if hedge is None:
+        return
+    attempts = [attempt for attempt in hedge.attempts if attempt.outcome in ("cancelled", "failed")]
+    hedge.attempts.clear()
+    if not attempts:
+        return
+    
+    from decimal import Decimal
+    from .cost_calculator import estimate_partial_usage
+    
+    try:
+        request_messages = build_request_messages(message_history or [], message)
+        if bootstrap is not None:
+            account_id, account_slug = bootstrap.account_id, bootstrap.account_slug
+        else:
+            account_id, account_slug = await extract_session_account_info(UUID(session_id))
+        
+        tracker = LLMRequestTracker()
+        for attempt in attempts:
+            if attempt.outcome == "cancelled":
+                usage = estimate_partial_usage(request_messages, "", attempt.model_name, session_id)
+            else:
+                usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+                         "prompt_cost": 0.0, "completion_cost": 0.0, "total_cost": Decimal("0")}
+            await tracker.track_llm_request(
+                session_id=UUID(session_id),
+                provider="openrouter",
+                model=attempt.model_name,
+                request_body={
+                    "messages": request_messages,
+                    "model": attempt.model_name,
+                    "temperature": model_settings.get("temperature"),
+                    "max_tokens": model_settings.get("max_tokens"),
+                    "stream": attempt.streaming
+                },
+                response_body={"content": "", "hedge_outcome": attempt.outcome, "error": attempt.error},
+                tokens={
+                    "prompt": usage["prompt_tokens"],
+                    "completion": usage["completion_tokens"],
+                    "total": usage["total_tokens"]
+                },
+                cost_data={
+                    "prompt_cost": usage["prompt_cost"],
+                    "completion_cost": usage["completion_cost"],
+                    "total_cost": usage["total_cost"]
+                },
+                latency_ms=max(0, (attempt.ended_ms or attempt.started_ms) - attempt.started_ms),
+                agent_instance_id=agent_instance_id,
+                account_id=account_id,
+                account_slug=account_slug,
+                agent_instance_slug=instance_config.get("instance_name", "unknown") if instance_config else "simple_chat",
+                agent_type=instance_config.get("agent_type", "simple_chat") if instance_config else "simple_chat",
+                completion_status="cancelled" if attempt.outcome == "cancelled" else "error",
+                meta={
+                    "hedge": {
+                        **attempt.to_dict(),
+                        "winner_llm_request_id": str(winner_llm_request_id) if winner_llm_request_id else None
+                    },
+                    "usage_estimated": attempt.outcome == "cancelled"
+                }
+            )
+        logfire.info('agent.hedge.attempts_tracked', session_id=session_id, attempts=len(attempts))
+    except Exception as e:
+        logfire.exception('agent.hedge.attempts_tracking_failed', session_id=session_id, error=str(e))
+
+
 async def simple_chat_stream(
     message: str,
     session_id: str,
     agent_instance_id: UUID,
     account_id: UUID,  # Multi-tenant: account ID for data isolation
     message_history: Optional[List[ModelMessage]] = None,
-    instance_config: Optional[dict] = None
+    instance_config: Optional[dict] = None,
+    bootstrap: Optional["ChatBootstrap"] = None,
+    progress_events: bool = False
 ):
     """
     Streaming version of simple_chat using Pydantic AI agent.run_stream().
@@ -817,9 +1117,12 @@ async def simple_chat_stream(
         agent_instance_id: Agent instance ID for message attribution
         message_history: Optional pre-loaded message history
         instance_config: Optional instance-specific config for multi-tenant support
+        bootstrap: Optional ChatBootstrap from bootstrap_chat() (see simple_chat)
+        progress_events: Yield a progress event once agent setup has finished
         
     Yields:
         dict: SSE events with format:
+            - {"event": "progress", "data": json.dumps({"stage": "agent_ready"})} - Setup done (opt-in)
             - {"event": "message", "data": chunk} - Text chunks
             - {"event": "done", "data": ""} - Completion
             - {"event": "error", "data": json.dumps({"message": "..."})} - Errors
@@ -830,6 +1133,15 @@ async def simple_chat_stream(
     from ..services.agent_execution_service import get_agent_execution_service
     
     execution_service = get_agent_execution_service()
+    
+    # Speculative vector search overlaps agent setup (tools.vector_search.prefetch)
+    prefetch = start_vector_prefetch(
+        message,
+        bootstrap.instance_config if bootstrap is not None else instance_config,
+        history_length=len(bootstrap.history) if bootstrap is not None else len(message_history or []),
+        session_id=session_id
+    )
+    
     agent, session_deps, prompt_breakdown, system_prompt, tools_list, message_history, requested_model = \
         await execution_service.setup_execution_context(
             session_id=session_id,
@@ -837,39 +1149,32 @@ async def simple_chat_stream(
             agent_instance_id=agent_instance_id,
             account_id=account_id,
             instance_config=instance_config,
-            message_history=message_history
+            message_history=message_history,
+            bootstrap=bootstrap,
+            message=message
         )
+    if instance_config is None and bootstrap is not None:
+        instance_config = session_deps.agent_config
+    session_deps.vector_prefetch = prefetch
+    agent_prompt = await prefetch.prompt(message) if prefetch is not None else message
     
     # Load model_settings for cost tracking (still needed for LLM request tracking)
-    from .config_loader import get_agent_model_settings
-    model_settings = await get_agent_model_settings("simple_chat")
-    
-    # CRITICAL FIX: Inject system prompt into message history (same as non-streaming path)
-    # When Pydantic AI sees message_history, it expects the first ModelRequest to include SystemPromptPart
-    # Our database doesn't store system prompts, so we must inject it here
-    if message_history and len(message_history) > 0:
-        first_msg = message_history[0]
-        if isinstance(first_msg, ModelRequest):
-            # Check if SystemPromptPart is already present
-            has_system_prompt = any(isinstance(part, SystemPromptPart) for part in first_msg.parts)
-            
-            if not has_system_prompt:
-                # Inject SystemPromptPart at the beginning of the first message
-                system_prompt_part = SystemPromptPart(content=system_prompt)
-                # Create new ModelRequest with SystemPromptPart prepended
-                new_parts = [system_prompt_part] + list(first_msg.parts)
-                message_history[0] = ModelRequest(parts=new_parts)
-                
-                logfire.info(
-                    'agent.message_history.system_prompt_injected',
-                    session_id=session_id,
-                    original_parts_count=len(first_msg.parts),
-                    new_parts_count=len(new_parts),
-                    streaming=True
-                )
+    if bootstrap is not None:
+        model_settings = dict(bootstrap.model_settings)
+    else:
+        from .config_loader import get_agent_model_settings
+        model_settings = await get_agent_model_settings("simple_chat")
+    
+    # System prompt injection into message_history is done by setup_execution_context()
+    
+    if progress_events:
+        yield {"event": "progress", "data": json.dumps({"stage": "agent_ready", "tools": len(tools_list or [])})}
     
     chunks = []
     start_time = datetime.now(UTC)
+    stream_opened = False  # Request sent upstream (tokens are being billed)
+    completion: Optional[asyncio.Future] = None  # Saving of the completed turn (tracking + messages)
+    llm_request_id = None
     
     try:
         # NOTE: Streaming execution uses agent.run_stream() directly with async context manager
@@ -882,7 +1187,8 @@ async def simple_chat_stream(
             message_length=len(message)
         )
         
-        async with agent.run_stream(message, deps=session_deps, message_history=message_history) as result:
+        async with agent.run_stream(agent_prompt, deps=session_deps, message_history=message_history) as result:
+            stream_opened = True
             logfire.info(
                 'agent.streaming.context_entered',
                 session_id=session_id,
@@ -940,6 +1246,11 @@ async def simple_chat_stream(
                 }
                 return  # Exit early, don't try to save messages
             
+            # Hedged request: price and attribute the turn to the model that actually served it
+            hedge = hedged_model_of(agent)
+            if hedge is not None and hedge.served_model:
+                requested_model = hedge.served_model
+            
             # Track cost after stream completes
             usage_data = result.usage()
             
@@ -1075,162 +1386,191 @@ async def simple_chat_stream(
                 prompt_tokens=prompt_tokens,
                 completion_tokens=completion_tokens,
                 total_tokens=total_tokens,
+                cache_read_tokens=extract_cache_tokens(usage_data).get("cache_read", 0),
                 real_cost=cost_data["total_cost"],
                 latency_ms=latency_ms,
                 completion_status="complete"
             )
             
-            # Store cost data using LLMRequestTracker
-            llm_request_id = None
-            if prompt_tokens > 0 or completion_tokens > 0:
-                from decimal import Decimal
+            async def persist_turn():
+                """Track the LLM request(s) and save the turn; returns the saved message ids."""
+                nonlocal llm_request_id, model_settings
                 
-                tracker = LLMRequestTracker()
+                # Store cost data using LLMRequestTracker
+                llm_request_id = None
+                if prompt_tokens > 0 or completion_tokens > 0:
+                    from decimal import Decimal
                 
-                # Get tracking model from instance_config (multi-tenant) or cascade (single-tenant)
-                if instance_config is not None:
-                    # Multi-tenant mode: use the instance-specific config
-                    model_settings = instance_config.get("model_settings", {})
-                    tracking_model = model_settings.get("model", requested_model)
-                    logfire.info(
-                        'agent.streaming.model_config_loaded',
-                        source="instance_config",
-                        tracking_model=tracking_model,
-                        temperature=model_settings.get("temperature"),
-                        max_tokens=model_settings.get("max_tokens"),
-                        session_id=session_id
-                    )
-                else:
-                    # Single-tenant mode: use the centralized cascade
-                    from .config_loader import get_agent_model_settings
-                    model_settings = await get_agent_model_settings("simple_chat")
-                    tracking_model = model_settings["model"]
-                    logfire.info(
-                        'agent.streaming.model_config_loaded',
-                        source="cascade",
-                        tracking_model=tracking_model,
-                        temperature=model_settings.get("temperature"),
-                        max_tokens=model_settings.get("max_tokens"),
-                        session_id=session_id
-                    )
+                    tracker = LLMRequestTracker()
                 
-                # Build full request body with actual messages sent to LLM (using helper)
-                request_messages = build_request_messages(message_history or [], message)
+                    # Get tracking model from instance_config (multi-tenant) or cascade (single-tenant)
+                    if instance_config is not None:
+                        # Multi-tenant mode: use the instance-specific config
+                        model_settings = instance_config.get("model_settings", {})
+                        tracking_model = model_settings.get("model", requested_model)
+                        logfire.info(
+                            'agent.streaming.model_config_loaded',
+                            source="instance_config",
+                            tracking_model=tracking_model,
+                            temperature=model_settings.get("temperature"),
+                            max_tokens=model_settings.get("max_tokens"),
+                            session_id=session_id
+                        )
+                    else:
+                        # Single-tenant mode: use the centralized cascade (already loaded above)
+                        tracking_model = model_settings["model"]
+                        logfire.info(
+                            'agent.streaming.model_config_loaded',
+                            source="cascade",
+                            tracking_model=tracking_model,
+                            temperature=model_settings.get("temperature"),
+                            max_tokens=model_settings.get("max_tokens"),
+                            session_id=session_id
+                        )
+                    if hedge is not None and hedge.served_model:
+                        tracking_model = hedge.served_model
                 
-                # Build full response body with actual LLM response (using helper)
-                response_body_full = build_response_body(
-                    response_text=response_text,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                    total_tokens=total_tokens,
-                    requested_model=requested_model,
-                    result=result,
-                    streaming_chunks=len(chunks)
-                )
+                    # Build full request body with actual messages sent to LLM (using helper)
+                    request_messages = build_request_messages(message_history or [], message)
                 
-                # Load session to extract denormalized fields for cost attribution (using helper)
-                account_id, account_slug = await extract_session_account_info(UUID(session_id))
+                    # Build full response body with actual LLM response (using helper)
+                    response_body_full = build_response_body(
+                        response_text=response_text,
+                        prompt_tokens=prompt_tokens,
+                        completion_tokens=completion_tokens,
+                        total_tokens=total_tokens,
+                        requested_model=requested_model,
+                        result=result,
+                        streaming_chunks=len(chunks)
+                    )
                 
-                # Validate session exists (account_id/account_slug will be None if session not found)
-                if account_id is None and account_slug is None:
-                    from ..database import get_database_service
-                    from ..models.session import Session
-                    db_service = get_database_service()
-                    async with db_service.get_session() as db_session:
-                        session_record = await db_session.get(Session, UUID(session_id))
-                        if not session_record:
-                            logfire.error(
-                                'agent.streaming.session_not_found',
-                                session_id=session_id
-                            )
-                            raise ValueError(f"Session not found: {session_id}")
+                    # Load session to extract denormalized fields for cost attribution (using helper)
+                    if bootstrap is not None:
+                        account_id, account_slug = bootstrap.account_id, bootstrap.account_slug
+                    else:
+                        account_id, account_slug = await extract_session_account_info(UUID(session_id))
                 
-                agent_instance_slug = instance_config.get("instance_name", "unknown") if instance_config else "simple_chat"
-                agent_type = instance_config.get("agent_type", "simple_chat") if instance_config else "simple_chat"
+                    # Validate session exists (account_id/account_slug will be None if session not found)
+                    if account_id is None and account_slug is None:
+                        from ..database import get_database_service
+                        from ..models.session import Session
+                        db_service = get_database_service()
+                        async with db_service.get_session() as db_session:
+                            session_record = await db_session.get(Session, UUID(session_id))
+                            if not session_record:
+                                logfire.error(
+                                    'agent.streaming.session_not_found',
+                                    session_id=session_id
+                                )
+                                raise ValueError(f"Session not found: {session_id}")
                 
-                # Log tracking attempt for debugging
-                # All values are now Python primitives (no SQLAlchemy expressions)
-                logfire.debug(
-                    'agent.streaming.llm_tracking_start',
-                    session_id=session_id,
-                    tracking_model=tracking_model,
-                    requested_model=requested_model,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                    total_tokens=total_tokens,
-                    cost=cost_data.get("total_cost", 0.0),
-                    has_model_settings=model_settings is not None,
-                    model_settings_keys=list(model_settings.keys()) if model_settings else [],
-                    account_slug=account_slug,
-                    agent_instance_slug=agent_instance_slug,
-                    agent_type=agent_type
-                )
+                    agent_instance_slug = instance_config.get("instance_name", "unknown") if instance_config else "simple_chat"
+                    agent_type = instance_config.get("agent_type", "simple_chat") if instance_config else "simple_chat"
                 
-                # Format tools for request_body (capture tool names sent to LLM)
-                tools_for_tracking = None
-                if tools_list:
-                    tools_for_tracking = [{"type": "function", "function": {"name": tool.__name__}} for tool in tools_list]
+                    # Log tracking attempt for debugging
+                    # All values are now Python primitives (no SQLAlchemy expressions)
+                    logfire.debug(
+                        'agent.streaming.llm_tracking_start',
+                        session_id=session_id,
+                        tracking_model=tracking_model,
+                        requested_model=requested_model,
+                        prompt_tokens=prompt_tokens,
+                        completion_tokens=completion_tokens,
+                        total_tokens=total_tokens,
+                        cost=cost_data.get("total_cost", 0.0),
+                        has_model_settings=model_settings is not None,
+                        model_settings_keys=list(model_settings.keys()) if model_settings else [],
+                        account_slug=account_slug,
+                        agent_instance_slug=agent_instance_slug,
+                        agent_type=agent_type
+                    )
                 
-                llm_request_id = await tracker.track_llm_request(
-                    session_id=UUID(session_id),
-                    provider="openrouter",
-                    model=tracking_model,
-                    request_body={
-                        "messages": request_messages,
-                        "model": requested_model,
-                        "temperature": model_settings.get("temperature"),
-                        "max_tokens": model_settings.get("max_tokens"),
-                        "stream": True,
-                        "tools": tools_for_tracking
-                    },
-                    response_body=response_body_full,
-                    tokens={
-                        "prompt": prompt_tokens,
-                        "completion": completion_tokens,
-                        "total": total_tokens
-                    },
-                    cost_data=cost_data,
-                    latency_ms=latency_ms,
+                    # Format tools for request_body (capture tool names sent to LLM)
+                    tools_for_tracking = None
+                    if tools_list:
+                        tools_for_tracking = [{"type": "function", "function": {"name": tool.__name__}} for tool in tools_list]
+                
+                    llm_request_id = await tracker.track_llm_request(
+                        session_id=UUID(session_id),
+                        provider="openrouter",
+                        model=tracking_model,
+                        request_body={
+                            "messages": request_messages,
+                            "model": requested_model,
+                            "temperature": model_settings.get("temperature"),
+                            "max_tokens": model_settings.get("max_tokens"),
+                            "stream": True,
+                            "tools": tools_for_tracking
+                        },
+                        response_body=response_body_full,
+                        tokens={
+                            "prompt": prompt_tokens,
+                            "completion": completion_tokens,
+                            "total": total_tokens,
+                            **extract_cache_tokens(usage_data)
+                        },
+                        cost_data=cost_data,
+                        latency_ms=latency_ms,
+                        agent_instance_id=agent_instance_id,
+                        # Denormalized fields for fast billing queries (no JOINs)
+                        account_id=account_id,
+                        account_slug=account_slug,
+                        agent_instance_slug=agent_instance_slug,
+                        agent_type=agent_type,
+                        completion_status="complete",
+                        meta={"prompt_breakdown": prompt_breakdown},  # Admin debugging
+                        assembled_prompt=system_prompt  # Complete assembled prompt as sent to LLM
+                    )
+                
+                    logfire.info(
+                        'agent.streaming.llm_tracked',
+                        session_id=session_id,
+                        llm_request_id=str(llm_request_id),
+                        model=tracking_model,
+                        total_cost=cost_data.get("total_cost", 0.0)
+                    )
+            
+                # Losing / failed hedge attempts get their own llm_requests rows
+                await _track_hedge_attempts(
+                    hedge,
+                    session_id=session_id,
                     agent_instance_id=agent_instance_id,
-                    # Denormalized fields for fast billing queries (no JOINs)
-                    account_id=account_id,
-                    account_slug=account_slug,
-                    agent_instance_slug=agent_instance_slug,
-                    agent_type=agent_type,
-                    completion_status="complete",
-                    meta={"prompt_breakdown": prompt_breakdown},  # Admin debugging
-                    assembled_prompt=system_prompt  # Complete assembled prompt as sent to LLM
+                    message=message,
+                    message_history=message_history,
+                    model_settings=model_settings,
+                    instance_config=instance_config,
+                    bootstrap=bootstrap,
+                    winner_llm_request_id=llm_request_id
                 )
-                
+            
+                # Save messages to database
                 logfire.info(
-                    'agent.streaming.llm_tracked',
+                    'agent.streaming.messages_saving',
                     session_id=session_id,
-                    llm_request_id=str(llm_request_id),
-                    model=tracking_model,
-                    total_cost=cost_data.get("total_cost", 0.0)
+                    agent_instance_id=str(agent_instance_id),
+                    user_message_length=len(message),
+                    assistant_message_length=len(response_text),
+                    completion_status="complete"
                 )
             
-            # Save messages to database
-            logfire.info(
-                'agent.streaming.messages_saving',
-                session_id=session_id,
-                agent_instance_id=str(agent_instance_id),
-                user_message_length=len(message),
-                assistant_message_length=len(response_text),
-                completion_status="complete"
-            )
+                message_service = get_message_service()
             
-            message_service = get_message_service()
+                # REFACTOR (CHUNK-0026-010-002): Use new save_message_pair() method
+                user_msg_id, assistant_msg_id = await message_service.save_message_pair(
+                    session_id=UUID(session_id),
+                    agent_instance_id=agent_instance_id,
+                    llm_request_id=llm_request_id,
+                    user_message=message,
+                    assistant_message=response_text,
+                    result=result,  # Automatically extracts tool calls
+                    history_storage=HistoryStorageSettings.from_instance_config(instance_config)
+                )
+                return user_msg_id, assistant_msg_id
             
-            # REFACTOR (CHUNK-0026-010-002): Use new save_message_pair() method
-            user_msg_id, assistant_msg_id = await message_service.save_message_pair(
-                session_id=UUID(session_id),
-                agent_instance_id=agent_instance_id,
-                llm_request_id=llm_request_id,
-                user_message=message,
-                assistant_message=response_text,
-                result=result  # Automatically extracts tool calls
-            )
+            # Runs as its own task: a disconnect while the turn is being saved must
+            # neither interrupt the writes nor record the turn again as partial
+            completion = asyncio.ensure_future(persist_turn())
+            user_msg_id, assistant_msg_id = await asyncio.shield(completion)
             
             logfire.info(
                 'agent.streaming.messages_saved',
@@ -1238,8 +1578,56 @@ async def simple_chat_stream(
                 assistant_message_id=str(assistant_msg_id)
             )
             
+            # Opt-in per instance (response_cache in config.yaml); first turns only
+            await get_response_cache().store(bootstrap, message, response_text, result, llm_request_id)
+            
             # Yield completion event
             yield {"event": "done", "data": ""}
+    
+    except (asyncio.CancelledError, GeneratorExit) as e:
+        # Client disconnected: leaving run_stream() closed the upstream HTTP stream,
+        # so no further tokens are generated. Record what was produced so far.
+        reason = "client_disconnected" if isinstance(e, asyncio.CancelledError) else "stream_closed"
+        logfire.info(
+            'agent.streaming.cancelled',
+            session_id=session_id,
+            reason=reason,
+            chunks_sent=len(chunks),
+            stream_opened=stream_opened
+        )
+        persist = None
+        if completion is not None:
+            # Stream finished; the completed turn is (being) saved, never record it again
+            if not completion.done():
+                persist = completion
+        elif stream_opened:
+            latency_ms = int((datetime.now(UTC) - start_time).total_seconds() * 1000)
+            persist = asyncio.ensure_future(_persist_cancelled_stream(
+                session_id=session_id,
+                agent_instance_id=agent_instance_id,
+                message=message,
+                partial_text="".join(chunks),
+                message_history=message_history,
+                requested_model=requested_model,
+                model_settings=model_settings,
+                instance_config=instance_config,
+                bootstrap=bootstrap,
+                latency_ms=latency_ms,
+                chunks_sent=len(chunks),
+                reason=reason,
+                prompt_breakdown=prompt_breakdown,
+                system_prompt=system_prompt
+            ))
+        if persist is not None:
+            _background_tasks.add(persist)
+            persist.add_done_callback(_on_persist_done)
+            if isinstance(e, asyncio.CancelledError):
+                # Shielded so a second cancellation doesn't abort the write
+                try:
+                    await asyncio.shield(persist)
+                except (asyncio.CancelledError, Exception):
+                    pass  # Failures are logged by _on_persist_done
+        raise
             
     except Exception as e:
         import traceback
@@ -1301,3 +1689,7 @@ async def simple_chat_stream(
         
         # Yield error event
         yield {"event": "error", "data": json.dumps({"message": str(e)})}
+    
+    finally:
+        if prefetch is not None:
+            prefetch.finish()
@@ -14,12 +14,16 @@ Provides natural language search across multi-tenant directory lists
 
 from pydantic_ai import RunContext
 from ..base.dependencies import SessionDependencies
-from ...services.directory_service import DirectoryService
-from ...services.directory_importer import DirectoryImporter
+from ...services.directory_service import DEFAULT_FUZZY_THRESHOLD, DirectoryService
+from ...services.directory_catalog import get_directory_catalog
+from ...services.directory_filters import common_filter_fields
+from ...services.directory_memory_index import MemoryIndexSettings
+from ...services.directory_projection import MergedProjection, projection_for_list
+from ...services.directory_synonyms import synonyms_for_schema_file, synonyms_for_schema_files
 from ...database import get_database_service
-from ...models.directory import DirectoryList, DirectoryEntry
-from typing import Optional, Dict
-from sqlalchemy import select, func
+from ...services.data_versions import get_data_versions
+from .tool_cache import get_tool_cache, normalize_filters, normalize_text
+from typing import Optional, Dict, List
 import logfire
 import json
 
@@ -78,98 +82,43 @@ async def get_available_directories(
             "message": "No directories configured for this account"
         })
     
-    # Create independent database session for this tool call
+    # Create independent database session for this tool call (only used when the catalog reloads)
     db_service = get_database_service()
     async with db_service.get_session() as session:
-        # Get list metadata from database
-        result = await session.execute(
-            select(DirectoryList).where(
-                DirectoryList.account_id == account_id,
-                DirectoryList.list_name.in_(accessible_lists)
-            )
-        )
-        lists_metadata = result.scalars().all()
-        
-        if not lists_metadata:
-            logfire.warn('directory.no_lists_found', account_id=str(account_id))
-            return json.dumps({
-                "directories": [],
-                "total_count": 0,
-                "message": f"No directories found for account {account_id}"
-            })
-        
-        directories_info = []
-        
-        for list_meta in lists_metadata:
-            try:
-                # Get entry count
-                count_result = await session.execute(
-                    select(func.count(DirectoryEntry.id)).where(
-                        DirectoryEntry.directory_list_id == list_meta.id
-                    )
-                )
-                entry_count = count_result.scalar_one()
-                
-                # Load YAML schema
-                schema = DirectoryImporter.load_schema(list_meta.schema_file)
-                purpose = schema.get('directory_purpose', {})
-                
-                # Extract searchable fields
-                searchable_fields = []
-                if schema.get('searchable_fields'):
-                    searchable_fields = list(schema['searchable_fields'].keys())
-                
-                # Build directory info
-                directory_info = {
-                    "list_name": list_meta.list_name,
-                    "entry_type": list_meta.entry_type,
-                    "entry_count": entry_count,
-                    "description": purpose.get('description', ''),
-                    "use_cases": purpose.get('use_for', []),
-                    "searchable_fields": searchable_fields,
-                    "example_queries": purpose.get('example_queries', []),
-                    "not_for": purpose.get('not_for', [])
-                }
-                
-                directories_info.append(directory_info)
-                
-                logfire.info(
-                    'directory.metadata_loaded',
-                    list_name=list_meta.list_name,
-                    entry_count=entry_count
-                )
-                
-            except Exception as e:
-                logfire.error(
-                    'directory.metadata_load_error',
-                    list_name=list_meta.list_name,
-                    error=str(e)
-                )
-                # Continue with other directories even if one fails
-                continue
-        
-        result = {
-            "directories": directories_info,
-            "total_count": len(directories_info)
-        }
-        
-        logfire.info(
-            'directory.get_available_complete',
-            directories_count=len(directories_info)
-        )
-        
-        return json.dumps(result, indent=2)
+        directories = await get_directory_catalog().directories(session, account_id, accessible_lists)
+    
+    if not directories:
+        logfire.warn('directory.no_lists_found', account_id=str(account_id))
+        return json.dumps({
+            "directories": [],
+            "total_count": 0,
+            "message": f"No directories found for account {account_id}"
+        })
+    
+    directories_info = [directory.to_dict() for directory in directories]
+    result = {
+        "directories": directories_info,
+        "total_count": len(directories_info)
+    }
+    
+    logfire.info(
+        'directory.get_available_complete',
+        directories_count=len(directories_info)
+    )
+    
+    return json.dumps(result, indent=2)
 
 
 async def search_directory(
     ctx: RunContext[SessionDependencies],
-    list_name: str,
+    list_name: Optional[str] = None,
     query: Optional[str] = None,
     tag: Optional[str] = None,
     filters: Optional[Dict[str, str]] = None,
+    list_names: Optional[List[str]] = None,
 ) -> str:
     """
-    Search a directory for structured data entries with exact fields.
+    Search one or several directories for structured data entries with exact fields.
     
     **IMPORTANT**: Call get_available_directories() FIRST to see what directories exist
     and choose the right one for your query.
@@ -182,16 +131,26 @@ async def search_directory(
         list_name: Directory name (get from get_available_directories())
         query: Natural language search across all text fields
         tag: Filter by tag (if directory supports tags)
-        filters: Exact field matches (e.g., {"specialty": "Cardiology"})
+        filters: Field matches by word start (e.g., {"specialty": "Cardio"} matches "Interventional Cardiology")
+        list_names: Search several directories in ONE call (e.g., ["doctors", "contact_information"]).
+            Omit both list_name and list_names to search all available directories.
+    
+    Several Directories:
+        When a question may be answered by more than one directory, search them together
+        instead of calling this tool once per directory:
+            search_directory(list_names=["doctors", "contact_information"], query="cardiology")
+        Each directory returns its best matches (up to max_results each); every entry
+        includes its "list_name".
     
     Search Strategies:
         1. query parameter: Searches across ALL text fields (names, descriptions, etc.)
            - Best for: "Find X", "Who is...", "Search for..."
            - Example: query="cardiology" searches names, specialties, departments
         
-        2. filters parameter: Exact field matches (case-insensitive)
+        2. filters parameter: Field value matches at the start of a word (case-insensitive)
            - Best for: Structured queries with known field names
            - Example: filters={"department_name": "Billing"}
+           - "Pediatric" matches "Pediatrics"; "diatrics" (not a word start) does not
         
         3. Combined: Use both for precision
            - Example: query="heart", filters={"language": "Spanish"}
@@ -202,6 +161,7 @@ async def search_directory(
     logfire.info(
         'directory.search_called',
         list_name=list_name,
+        list_names=list_names,
         query=query,
         tag=tag,
         filters=filters
@@ -221,16 +181,78 @@ async def search_directory(
     if not accessible_lists:
         return "Directory not configured"
     
-    # Validate list_name is accessible
-    if list_name not in accessible_lists:
-        return f"List '{list_name}' not accessible. Available: {', '.join(accessible_lists)}"
+    # Requested lists: list_names, list_name, or all accessible lists
+    requested = list(dict.fromkeys(list_names)) if list_names else [list_name] if list_name else list(accessible_lists)
+    
+    # Validate requested lists are accessible
+    for name in requested:
+        if name not in accessible_lists:
+            return f"List '{name}' not accessible. Available: {', '.join(accessible_lists)}"
+    
+    # Get search mode from config (default: substring for backward compatibility)
+    search_mode = directory_config.get("search_mode", "substring")
+    max_results = directory_config.get("max_results", 5)
+    fuzzy_threshold = float(directory_config.get("fuzzy_threshold", DEFAULT_FUZZY_THRESHOLD))
+    memory_index = MemoryIndexSettings.from_instance_config(agent_config)
+    
+    if len(requested) == 1:
+        async def call() -> str:
+            return await _execute_directory_search(
+                account_id, requested[0], query, tag, filters, search_mode, max_results, fuzzy_threshold,
+                memory_index
+            )
+    else:
+        # max_results per list; max_total_results caps the merged result
+        max_total_results = int(directory_config.get("max_total_results", max_results * len(requested)))
+        async def call() -> str:
+            return await _execute_multi_list_search(
+                account_id, requested, query, tag, filters, search_mode, max_results, max_total_results,
+                fuzzy_threshold, memory_index
+            )
     
+    # Memoized per instance/session; directory imports change the data version (tool_cache)
+    return await get_tool_cache().get_or_call(
+        "search_directory",
+        ctx.deps,
+        args={
+            "list_name": requested[0] if len(requested) == 1 else None,
+            "list_names": requested if len(requested) > 1 else None,
+            # Exact mode compares names case-sensitively
+            "query": normalize_text(query, casefold=search_mode != "exact"),
+            "tag": normalize_text(tag, casefold=False),
+            "filters": normalize_filters(filters),
+            "search_mode": search_mode,
+            "max_results": max_results,
+            "fuzzy_threshold": fuzzy_threshold
+        },
+        data_version=lambda: get_data_versions().directory_version(account_id),
+        call=call
+    )
+
+
+async def _execute_directory_search(
+    account_id,
+    list_name: str,
+    query: Optional[str],
+    tag: Optional[str],
+    filters: Optional[Dict[str, str]],
+    search_mode: str,
+    max_results: int,
+    fuzzy_threshold: float = DEFAULT_FUZZY_THRESHOLD,
+    memory_index: Optional[MemoryIndexSettings] = None
+) -> str:
+    """Run a validated search_directory call against the database and format the results."""
     # Create independent database session for this tool call (BUG-0023-001)
     db_service = get_database_service()
     async with db_service.get_session() as session:
         service = DirectoryService()
-        list_ids = await service.get_accessible_lists(session, account_id, [list_name])
-    
+        directory_list = await service.get_list(session, account_id, list_name)
+        
+        if directory_list is None:
+            logfire.warn('directory.list_not_found', list_name=list_name, account_id=str(account_id))
+            return f"List '{list_name}' not found"
+        
+        list_ids = [directory_list.id]
         logfire.info(
             'directory.lists_resolved',
             list_name=list_name,
@@ -238,16 +260,8 @@ async def search_directory(
             account_id=str(account_id)
         )
         
-        if not list_ids:
-            logfire.warn('directory.list_not_found', list_name=list_name)
-            return f"List '{list_name}' not found"
-        
         tags = [tag] if tag else None
         
-        # Get search mode from config (default: substring for backward compatibility)
-        search_mode = directory_config.get("search_mode", "substring")
-        max_results = directory_config.get("max_results", 5)
-        
         logfire.info(
             'directory.search_executing',
             list_ids=[str(lid) for lid in list_ids],
@@ -255,332 +269,120 @@ async def search_directory(
             tags=tags,
             jsonb_filters=filters,
             search_mode=search_mode,
-            limit=max_results
+            limit=max_results,
+            fuzzy_threshold=fuzzy_threshold,
+            memory_index=memory_index.enabled if memory_index else False
         )
         
-        entries = await service.search(
+        # Result fields and output names from the list's schema (result_fields), compiled once
+        projection = projection_for_list(directory_list.schema_file, directory_list.entry_type)
+        
+        rows = await service.search(
             session=session,
             accessible_list_ids=list_ids,
             name_query=query,
             tags=tags,
             jsonb_filters=filters,
             search_mode=search_mode,
-            limit=max_results
+            limit=max_results,
+            fuzzy_threshold=fuzzy_threshold,
+            # Already loaded with the list (no get_filter_fields() round trip)
+            filter_fields=directory_list.filter_fields or (),
+            account_id=account_id,
+            memory_index=memory_index,
+            projection=projection,
+            # Schema synonyms / abbreviations as tsquery OR-groups (compiled once per schema)
+            synonyms=synonyms_for_schema_file(directory_list.schema_file)
         )
         
         logfire.info(
             'directory.search_complete',
-            entries_found=len(entries),
+            entries_found=len(rows),
             list_name=list_name
         )
         
-        if not entries:
+        if not rows:
             return json.dumps({"entries": [], "total": 0, "message": "No entries found"})
         
-        # Format results as JSON (flattened structure)
-        results = []
+        # Flattened JSON written straight from the selected values
+        return projection.serialize_results(rows)
+
+
+async def _execute_multi_list_search(
+    account_id,
+    list_names: List[str],
+    query: Optional[str],
+    tag: Optional[str],
+    filters: Optional[Dict[str, str]],
+    search_mode: str,
+    per_list_limit: int,
+    max_results: int,
+    fuzzy_threshold: float = DEFAULT_FUZZY_THRESHOLD,
+    memory_index: Optional[MemoryIndexSettings] = None
+) -> str:
+    """Search several lists in one query (ranked per list, merged) and format the results."""
+    db_service = get_database_service()
+    async with db_service.get_session() as session:
+        # Lists, schema files and filter fields from the directory catalog (no directory_lists query)
+        directories = await get_directory_catalog().directories(session, account_id, list_names)
+        
+        if not directories:
+            logfire.warn('directory.list_not_found', list_names=list_names, account_id=str(account_id))
+            return f"Lists not found: {', '.join(list_names)}"
         
-        for entry in entries:
-            # Start with base fields (always included)
-            result = {
-                "name": entry.name,
-                "entry_type": entry.directory_list.entry_type
-            }
-            
-            # Add tags if present
-            if entry.tags:
-                result["tags"] = entry.tags
-            
-            # Add contact info fields (flatten from contact_info JSONB)
-            if entry.contact_info.get('phone'):
-                result["phone"] = entry.contact_info['phone']
-            if entry.contact_info.get('email'):
-                result["email"] = entry.contact_info['email']
-            if entry.contact_info.get('fax'):
-                result["fax"] = entry.contact_info['fax']
-            if entry.contact_info.get('location'):
-                result["location"] = entry.contact_info['location']
-            if entry.contact_info.get('product_url'):
-                result["url"] = entry.contact_info['product_url']
-            
-            # Add type-specific fields from entry_data (flatten based on entry_type)
-            entry_type = entry.directory_list.entry_type
-            
-            if entry_type == "medical_professional":
-                if entry.entry_data.get('department'):
-                    result["department"] = entry.entry_data['department']
-                if entry.entry_data.get('specialty'):
-                    result["specialty"] = entry.entry_data['specialty']
-                if entry.entry_data.get('education'):
-                    result["education"] = entry.entry_data['education']
-                if entry.entry_data.get('board_certifications'):
-                    result["board_certifications"] = entry.entry_data['board_certifications']
-                if entry.entry_data.get('gender'):
-                    result["gender"] = entry.entry_data['gender']
-            
-            elif entry_type == "contact_information":
-                if entry.entry_data.get('service_type'):
-                    result["service_type"] = entry.entry_data['service_type']
-                if entry.entry_data.get('hours_of_operation'):
-                    result["hours"] = entry.entry_data['hours_of_operation']
-                if entry.entry_data.get('description'):
-                    result["description"] = entry.entry_data['description']
-            
-            elif entry_type == "pharmaceutical":
-                if entry.entry_data.get('drug_class'):
-                    result["drug_class"] = entry.entry_data['drug_class']
-                if entry.entry_data.get('generic_name'):
-                    result["generic_name"] = entry.entry_data['generic_name']
-                if entry.entry_data.get('brand_names'):
-                    result["brand_names"] = entry.entry_data['brand_names']
-                if entry.entry_data.get('dosage_forms'):
-                    result["dosage_forms"] = entry.entry_data['dosage_forms']
-                if entry.entry_data.get('strengths'):
-                    result["strengths"] = entry.entry_data['strengths']
-                if entry.entry_data.get('indications'):
-                    result["indications"] = entry.entry_data['indications']
-                if entry.entry_data.get('contraindications'):
-                    result["contraindications"] = entry.entry_data['contraindications']
-                if entry.entry_data.get('side_effects'):
-                    result["side_effects"] = entry.entry_data['side_effects']
-            
-            elif entry_type == "product":
-                if entry.entry_data.get('category'):
-                    result["category"] = entry.entry_data['category']
-                if entry.entry_data.get('subcategory'):
-                    result["subcategory"] = entry.entry_data['subcategory']
-                if entry.entry_data.get('price') is not None:
-                    result["price"] = entry.entry_data['price']
-                if entry.entry_data.get('in_stock') is not None:
-                    result["in_stock"] = entry.entry_data['in_stock']
-                if entry.entry_data.get('manufacturer'):
-                    result["manufacturer"] = entry.entry_data['manufacturer']
-                if entry.entry_data.get('model_number'):
-                    result["model_number"] = entry.entry_data['model_number']
-                if entry.entry_data.get('features'):
-                    result["features"] = entry.entry_data['features']
-                if entry.entry_data.get('warranty'):
-                    result["warranty"] = entry.entry_data['warranty']
-            
-            elif entry_type == "department":
-                if entry.entry_data.get('department_function'):
-                    result["department_function"] = entry.entry_data['department_function']
-                if entry.entry_data.get('manager_name'):
-                    result["manager"] = entry.entry_data['manager_name']
-                if entry.entry_data.get('staff_count') is not None:
-                    result["staff_count"] = entry.entry_data['staff_count']
-                if entry.entry_data.get('budget'):
-                    result["budget"] = entry.entry_data['budget']
-                if entry.entry_data.get('key_responsibilities'):
-                    result["responsibilities"] = entry.entry_data['key_responsibilities']
-            
-            elif entry_type == "service":
-                if entry.entry_data.get('service_type'):
-                    result["service_type"] = entry.entry_data['service_type']
-                if entry.entry_data.get('service_category'):
-                    result["category"] = entry.entry_data['service_category']
-                if entry.entry_data.get('duration'):
-                    result["duration"] = entry.entry_data['duration']
-                if entry.entry_data.get('cost'):
-                    result["cost"] = entry.entry_data['cost']
-                if entry.entry_data.get('insurance_accepted'):
-                    result["insurance_accepted"] = entry.entry_data['insurance_accepted']
-                if entry.entry_data.get('preparation_required') is not None:
-                    result["preparation_required"] = entry.entry_data['preparation_required']
-                if entry.entry_data.get('preparation_instructions'):
-                    result["preparation"] = entry.entry_data['preparation_instructions']
-                if entry.entry_data.get('recovery_time'):
-                    result["recovery_time"] = entry.entry_data['recovery_time']
-            
-            elif entry_type == "location":
-                if entry.entry_data.get('location_type'):
-                    result["location_type"] = entry.entry_data['location_type']
-                if entry.entry_data.get('building_name'):
-                    result["building"] = entry.entry_data['building_name']
-                if entry.entry_data.get('floor'):
-                    result["floor"] = entry.entry_data['floor']
-                if entry.entry_data.get('room_number'):
-                    result["room"] = entry.entry_data['room_number']
-                if entry.entry_data.get('directions'):
-                    result["directions"] = entry.entry_data['directions']
-                if entry.entry_data.get('parking_info'):
-                    result["parking"] = entry.entry_data['parking_info']
-                if entry.entry_data.get('accessibility_features'):
-                    result["accessibility"] = entry.entry_data['accessibility_features']
-                if entry.entry_data.get('hours'):
-                    result["hours"] = entry.entry_data['hours']
-            
-            elif entry_type == "faq":
-                if entry.entry_data.get('question'):
-                    result["question"] = entry.entry_data['question']
-                if entry.entry_data.get('answer'):
-                    result["answer"] = entry.entry_data['answer']
-                if entry.entry_data.get('category'):
-                    result["category"] = entry.entry_data['category']
-                if entry.entry_data.get('related_links'):
-                    result["related_links"] = entry.entry_data['related_links']
-            
-            elif entry_type == "cross_sell":
-                if entry.entry_data.get('primary_item'):
-                    result["primary_item"] = entry.entry_data['primary_item']
-                if entry.entry_data.get('suggested_item'):
-                    result["suggested_item"] = entry.entry_data['suggested_item']
-                if entry.entry_data.get('relationship'):
-                    result["relationship"] = entry.entry_data['relationship']
-                if entry.entry_data.get('reason'):
-                    result["reason"] = entry.entry_data['reason']
-                if entry.entry_data.get('bundle_discount'):
-                    result["bundle_discount"] = entry.entry_data['bundle_discount']
-                if entry.entry_data.get('frequently_bought_together') is not None:
-                    result["frequently_bought_together"] = entry.entry_data['frequently_bought_together']
-            
-            elif entry_type == "up_sell":
-                if entry.entry_data.get('base_item'):
-                    result["base_item"] = entry.entry_data['base_item']
-                if entry.entry_data.get('premium_item'):
-                    result["premium_item"] = entry.entry_data['premium_item']
-                if entry.entry_data.get('additional_features'):
-                    result["additional_features"] = entry.entry_data['additional_features']
-                if entry.entry_data.get('price_difference'):
-                    result["price_difference"] = entry.entry_data['price_difference']
-                if entry.entry_data.get('value_proposition'):
-                    result["value_proposition"] = entry.entry_data['value_proposition']
-                if entry.entry_data.get('benefits'):
-                    result["benefits"] = entry.entry_data['benefits']
-            
-            elif entry_type == "competitive_sell":
-                if entry.entry_data.get('competitor_product'):
-                    result["competitor_product"] = entry.entry_data['competitor_product']
-                if entry.entry_data.get('our_product'):
-                    result["our_product"] = entry.entry_data['our_product']
-                if entry.entry_data.get('differentiators'):
-                    result["differentiators"] = entry.entry_data['differentiators']
-                if entry.entry_data.get('price_comparison'):
-                    result["price_comparison"] = entry.entry_data['price_comparison']
-                if entry.entry_data.get('value_proposition'):
-                    result["value_proposition"] = entry.entry_data['value_proposition']
-                if entry.entry_data.get('certifications'):
-                    result["certifications"] = entry.entry_data['certifications']
-            
-            elif entry_type == "classes":
-                # Event identification
-                if entry.entry_data.get('event_type'):
-                    result["event_type"] = entry.entry_data['event_type']
-                if entry.entry_data.get('program_name'):
-                    result["program_name"] = entry.entry_data['program_name']
-                
-                # Scheduling
-                if entry.entry_data.get('start_date'):
-                    result["start_date"] = entry.entry_data['start_date']
-                if entry.entry_data.get('end_date'):
-                    result["end_date"] = entry.entry_data['end_date']
-                if entry.entry_data.get('days_of_week'):
-                    result["days_of_week"] = entry.entry_data['days_of_week']
-                if entry.entry_data.get('time_of_day'):
-                    result["time"] = entry.entry_data['time_of_day']
-                if entry.entry_data.get('duration'):
-                    result["duration"] = entry.entry_data['duration']
-                if entry.entry_data.get('timezone'):
-                    result["timezone"] = entry.entry_data['timezone']
-                if entry.entry_data.get('session_count') is not None:
-                    result["session_count"] = entry.entry_data['session_count']
-                
-                # Cost
-                if entry.entry_data.get('cost_type'):
-                    result["cost_type"] = entry.entry_data['cost_type']
-                if entry.entry_data.get('price') is not None:
-                    result["price"] = entry.entry_data['price']
-                if entry.entry_data.get('early_bird_price') is not None:
-                    result["early_bird_price"] = entry.entry_data['early_bird_price']
-                if entry.entry_data.get('registration_fee') is not None:
-                    result["registration_fee"] = entry.entry_data['registration_fee']
-                if entry.entry_data.get('payment_required') is not None:
-                    result["payment_required"] = entry.entry_data['payment_required']
-                
-                # Logistics
-                if entry.entry_data.get('instructor_name'):
-                    result["instructor"] = entry.entry_data['instructor_name']
-                if entry.entry_data.get('delivery_format'):
-                    result["format"] = entry.entry_data['delivery_format']
-                if entry.entry_data.get('venue'):
-                    result["venue"] = entry.entry_data['venue']
-                if entry.entry_data.get('capacity') is not None:
-                    result["capacity"] = entry.entry_data['capacity']
-                if entry.entry_data.get('registration_required') is not None:
-                    result["registration_required"] = entry.entry_data['registration_required']
-                if entry.entry_data.get('registration_deadline'):
-                    result["registration_deadline"] = entry.entry_data['registration_deadline']
-                if entry.entry_data.get('enrollment_status'):
-                    result["enrollment_status"] = entry.entry_data['enrollment_status']
-                
-                # Content
-                if entry.entry_data.get('description'):
-                    result["description"] = entry.entry_data['description']
-                if entry.entry_data.get('target_audience'):
-                    result["target_audience"] = entry.entry_data['target_audience']
-                if entry.entry_data.get('prerequisites'):
-                    result["prerequisites"] = entry.entry_data['prerequisites']
-                if entry.entry_data.get('learning_objectives'):
-                    result["learning_objectives"] = entry.entry_data['learning_objectives']
-                if entry.entry_data.get('materials_provided'):
-                    result["materials_provided"] = entry.entry_data['materials_provided']
-                if entry.entry_data.get('materials_required'):
-                    result["materials_required"] = entry.entry_data['materials_required']
-                if entry.entry_data.get('certificate_offered') is not None:
-                    result["certificate_offered"] = entry.entry_data['certificate_offered']
-                if entry.entry_data.get('continuing_education_credits'):
-                    result["ce_credits"] = entry.entry_data['continuing_education_credits']
-            
-            elif entry_type == "experts":
-                # Provider identification
-                if entry.entry_data.get('provider_type'):
-                    result["provider_type"] = entry.entry_data['provider_type']
-                if entry.entry_data.get('expertise'):
-                    result["expertise"] = entry.entry_data['expertise']
-                
-                # Experience
-                if entry.entry_data.get('years_of_experience') is not None:
-                    result["years_of_experience"] = entry.entry_data['years_of_experience']
-                
-                # Pricing
-                if entry.entry_data.get('hourly_rate') is not None:
-                    result["hourly_rate"] = entry.entry_data['hourly_rate']
-                if entry.entry_data.get('fixed_price') is not None:
-                    result["fixed_price"] = entry.entry_data['fixed_price']
-                if entry.entry_data.get('retainer') is not None:
-                    result["retainer"] = entry.entry_data['retainer']
-                if entry.entry_data.get('per_session_cost') is not None:
-                    result["per_session_cost"] = entry.entry_data['per_session_cost']
-                
-                # Availability and location
-                if entry.entry_data.get('availability'):
-                    result["availability"] = entry.entry_data['availability']
-                if entry.entry_data.get('location_type'):
-                    result["location_type"] = entry.entry_data['location_type']
-                
-                # Credentials
-                if entry.entry_data.get('certifications'):
-                    result["certifications"] = entry.entry_data['certifications']
-                if entry.entry_data.get('education'):
-                    result["education"] = entry.entry_data['education']
-                if entry.entry_data.get('professional_associations'):
-                    result["professional_associations"] = entry.entry_data['professional_associations']
-                
-                # Tutor-specific fields
-                if entry.entry_data.get('subjects'):
-                    result["subjects"] = entry.entry_data['subjects']
-                if entry.entry_data.get('levels'):
-                    result["levels"] = entry.entry_data['levels']
-                
-                # Additional info
-                if entry.entry_data.get('bio'):
-                    result["bio"] = entry.entry_data['bio']
-                if entry.entry_data.get('portfolio'):
-                    result["portfolio"] = entry.entry_data['portfolio']
-                if entry.entry_data.get('languages'):
-                    result["languages"] = entry.entry_data['languages']
-            
-            results.append(result)
+        found = {directory.list_name for directory in directories}
+        missing = [name for name in list_names if name not in found]
+        if missing:
+            logfire.warn('directory.list_not_found', list_names=missing, account_id=str(account_id))
         
-        return json.dumps({"entries": results, "total": len(results)}, indent=2)
-
+        projection = MergedProjection(tuple(
+            (directory.list_id, directory.list_name, projection_for_list(directory.schema_file, directory.entry_type))
+            for directory in directories
+        ))
+        tags = [tag] if tag else None
+        
+        logfire.info(
+            'directory.search_executing',
+            list_names=[directory.list_name for directory in directories],
+            name_query=query,
+            tags=tags,
+            jsonb_filters=filters,
+            search_mode=search_mode,
+            limit=max_results,
+            per_list_limit=per_list_limit,
+            fuzzy_threshold=fuzzy_threshold,
+            memory_index=memory_index.enabled if memory_index else False
+        )
+        
+        rows = await DirectoryService.search(
+            session=session,
+            accessible_list_ids=[directory.list_id for directory in directories],
+            name_query=query,
+            tags=tags,
+            jsonb_filters=filters,
+            search_mode=search_mode,
+            limit=max_results,
+            fuzzy_threshold=fuzzy_threshold,
+            filter_fields=common_filter_fields(directory.filter_fields for directory in directories),
+            account_id=account_id,
+            memory_index=memory_index,
+            projection=projection,
+            per_list_limit=per_list_limit,
+            synonyms=synonyms_for_schema_files(tuple(directory.schema_file for directory in directories))
+        )
+        
+        logfire.info(
+            'directory.search_complete',
+            entries_found=len(rows),
+            list_names=[directory.list_name for directory in directories]
+        )
+        
+        if not rows:
+            return json.dumps({
+                "entries": [],
+                "total": 0,
+                "lists_searched": [directory.list_name for directory in directories],
+                "message": "No entries found"
+            })
+        
+        return projection.serialize_results(rows)
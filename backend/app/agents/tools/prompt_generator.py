@@ -19,6 +19,7 @@ from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
 from pydantic import BaseModel, Field
 from ...models.directory import DirectoryList
+from ...services.directory_facets import facet_values_docs, get_directory_facets
 from ...services.directory_importer import DirectoryImporter
 from .prompt_modules import load_prompt_module
 import logfire
@@ -79,10 +80,35 @@ class DirectoryDocsResult(BaseModel):
     directory_sections: List[DirectorySection] = Field(default_factory=list, description="Individual directory docs")
 
 
+def multi_list_search_docs(list_names: List[str]) -> str:
+    """
+    Prompt text advertising multi-list search_directory calls.
+    
+    Without it, models call search_directory once per directory for the same
+    question (one tool round trip and LLM continuation each).
+    
+    Args:
+        list_names: Accessible directory names
+        
+    Returns:
+        Markdown paragraph with an example call over the given lists
+    """
+    names = ", ".join(f'"{name}"' for name in list_names[:3])
+    return (
+        "**Searching several directories**: when a question may be answered by more than one "
+        "directory, search them in ONE call instead of one call per directory:\n"
+        f"`search_directory(list_names=[{names}], query=\"...\")`\n"
+        "Omit `list_name` and `list_names` to search all directories. Each directory contributes "
+        "its best matches and every entry includes its `list_name`. Only chain separate calls when "
+        "the second search needs a value from the first (e.g. a doctor's department)."
+    )
+
+
 async def generate_directory_tool_docs(
     agent_config: Dict,
     account_id: UUID,
-    db_session: AsyncSession
+    db_session: AsyncSession,
+    only_lists: Optional[List[str]] = None
 ) -> DirectoryDocsResult:
     """
     Auto-generate system prompt documentation for directory tool with structured breakdown.
@@ -91,12 +117,16 @@ async def generate_directory_tool_docs(
         agent_config: Agent configuration dict from config.yaml
         account_id: Account UUID for multi-tenant filtering
         db_session: Async database session
+        only_lists: Optional subset of accessible_lists to document (per-turn
+            routing, see tool_router.py); None documents every accessible list
     
     Returns:
         DirectoryDocsResult with full_text (for prompt) and sections (for breakdown)
     """
     directory_config = agent_config.get("tools", {}).get("directory", {})
     accessible_lists = directory_config.get("accessible_lists", [])
+    if only_lists is not None:
+        accessible_lists = [name for name in accessible_lists if name in only_lists]
     
     if not accessible_lists:
         logfire.info('directory.no_accessible_lists_configured')
@@ -252,6 +282,18 @@ async def generate_directory_tool_docs(
                 if strategy_parts:
                     search_strategy_text = '\n'.join(strategy_parts)
             
+            # Most frequent facet values, so filters use values that exist (opt-in)
+            prompt_facet_values = directory_config.get("prompt_facet_values", 0)
+            if prompt_facet_values and list_meta.facet_fields:
+                facets = await get_directory_facets().get(
+                    db_session, account_id, list_meta.id, list_meta.facet_fields
+                )
+                facet_text = facet_values_docs(facets, prompt_facet_values)
+                if facet_text:
+                    search_strategy_text = (
+                        f"{search_strategy_text}\n{facet_text}" if search_strategy_text else facet_text.lstrip("\n")
+                    )
+            
             # Create Pydantic model for structured logging (using empty list for query_examples since we're using full text now)
             list_docs = DirectoryListDocs(
                 list_name=list_meta.list_name,
@@ -321,10 +363,15 @@ async def generate_directory_tool_docs(
             )
             all_text_parts.append(selection_hints_text)
         
-        # 2. Schema summary section (auto-generated + Available line)
+        # 2. Schema summary section (auto-generated + Available line + multi-list search)
         if list_summaries:
             summary_text = "\n**Available**: " + ", ".join(list_summaries) + "\n"
             schema_summary_parts.append(summary_text)
+        if len(list_summaries) > 1:
+            # Only lists that made it into the prompt (a schema may fail to load)
+            schema_summary_parts.append(multi_list_search_docs(
+                [list_docs.list_name for list_docs in documented_lists]
+            ))
         
         schema_summary_text = '\n'.join(schema_summary_parts)
         schema_summary_section = DirectorySection(
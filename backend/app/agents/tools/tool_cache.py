@@ -0,0 +1,236 @@
+"""
+Tool result memoization for read-only agent tools.
+
+Within a session, and across sessions of the same instance, the LLM often
+repeats search_directory / vector_search calls with identical arguments
+(retries, follow-up turns). Each call opens a DB session or runs an embedding
+plus a Pinecone query. This module memoizes their results.
+
+Key Features:
+- Per-tool TTL (app.yaml tools.cache.<tool>.ttl_seconds, overridable per agent)
+- Key normalization: whitespace collapsed, case-folded text, sorted filters
+- Scope per agent: "instance" (shared by all sessions of an instance) or
+  "session" (private to one chat session)
+- Data versions in keys: directory imports (DB-derived version) and vector
+  upserts (VectorService bumps the namespace) invalidate entries
+- Off by default. Directory results follow imports from any process within
+  the data version's re-read interval (30s); vector results only follow
+  upserts from this process, so upserts from other workers or ingestion
+  scripts are served stale for up to the vector_search TTL
+- Hit/miss recorded on the current tool span and in logfire events
+
+Configuration:
+    app.yaml:
+        tools:
+          cache:
+            enabled: false    # opt in
+            scope: instance
+            max_entries: 2000
+            search_directory: {ttl_seconds: 300}
+            vector_search: {ttl_seconds: 600}
+
+    Agent config.yaml (overrides):
+        tools:
+          directory:
+            cache: {enabled: true, ttl_seconds: 120, scope: session}
+          vector_search:
+            cache: {enabled: false}
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+
+import logfire
+from opentelemetry import trace
+
+# Agent config section that holds each memoized tool's settings
+TOOL_CONFIG_SECTIONS = {
+    "search_directory": "directory",
+    "vector_search": "vector_search",
+}
+
+DEFAULT_TTL_SECONDS = {
+    "search_directory": 300,
+    "vector_search": 600,
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class ToolCacheSettings:
+    """Effective cache settings for one tool of one agent."""
+    enabled: bool = False
+    ttl_seconds: int = 300
+    scope: str = "instance"  # instance | session
+    max_entries: int = 2000
+
+    @classmethod
+    def for_tool(cls, tool_name: str, agent_config: Optional[Mapping[str, Any]]) -> "ToolCacheSettings":
+        """
+        Resolve settings: agent config → app.yaml tools.cache → code defaults.
+
+        Args:
+            tool_name: Tool function name (search_directory, vector_search)
+            agent_config: Agent instance config
+
+        Returns:
+            ToolCacheSettings for this tool
+        """
+        from ...config import load_config
+
+        global_cache = (load_config().get("tools", {}) or {}).get("cache", {}) or {}
+        global_tool = global_cache.get(tool_name, {}) or {}
+        tools_config = (agent_config or {}).get("tools", {}) or {}
+        agent_cache = (tools_config.get(TOOL_CONFIG_SECTIONS.get(tool_name, tool_name), {}) or {}).get("cache", {}) or {}
+
+        def pick(key, default):
+            for source in (agent_cache, global_tool, global_cache):
+                if key in source:
+                    return source[key]
+            return default
+
+        scope = str(pick("scope", cls.scope))
+        return cls(
+            enabled=bool(pick("enabled", cls.enabled)),
+            ttl_seconds=int(pick("ttl_seconds", DEFAULT_TTL_SECONDS.get(tool_name, cls.ttl_seconds))),
+            scope=scope if scope in ("instance", "session") else cls.scope,
+            max_entries=int(global_cache.get("max_entries", cls.max_entries))
+        )
+
+
+def normalize_text(value: Optional[str], casefold: bool = True) -> Optional[str]:
+    """
+    Normalize free text for cache keys.
+
+    Example:
+        >>> normalize_text("  Heart   Doctor ")
+        'heart doctor'
+    """
+    if value is None:
+        return None
+    text = _WHITESPACE.sub(" ", value).strip()
+    return text.casefold() if casefold else text
+
+
+def normalize_filters(filters: Optional[Mapping[str, Any]]) -> Optional[Tuple[Tuple[str, Any], ...]]:
+    """Normalize field filters (sorted keys, case-folded values - filters match case-insensitively)."""
+    if not filters:
+        return None
+    return tuple(sorted(
+        (str(key).strip(), normalize_text(value) if isinstance(value, str) else value)
+        for key, value in filters.items()
+    ))
+
+
+def _record_span(tool_name: str, outcome: str) -> None:
+    """Attach the cache outcome to the active tool span (if tracing is on)."""
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.set_attribute("tool_cache.outcome", outcome)
+        span.set_attribute("tool_cache.hit", outcome == "hit")
+
+
+class ToolResultCache:
+    """
+    In-process LRU + TTL cache of tool results.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, tool_name: str, outcome: str) -> None:
+        counters = self.stats.setdefault(tool_name, {"hit": 0, "miss": 0, "bypass": 0})
+        counters[outcome] += 1
+
+    @staticmethod
+    def make_key(tool_name: str, scope_id: str, data_version: str, args: Mapping[str, Any]) -> str:
+        payload = json.dumps([tool_name, scope_id, data_version, args], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get_or_call(
+        self,
+        tool_name: str,
+        deps: Any,
+        args: Mapping[str, Any],
+        data_version: Callable[[], Awaitable[str]],
+        call: Callable[[], Awaitable[str]],
+        cacheable: Callable[[str], bool] = lambda result: True
+    ) -> str:
+        """
+        Return a memoized tool result, or run the tool and remember it.
+
+        Args:
+            tool_name: Tool function name
+            deps: SessionDependencies of the run (agent_config, session_id)
+            args: Normalized tool arguments plus any config that shapes the result
+            data_version: Coroutine factory returning the current data version
+            call: Coroutine factory running the tool uncached
+            cacheable: Predicate deciding whether a result may be stored
+
+        Returns:
+            Tool result string
+        """
+        agent_config = getattr(deps, "agent_config", None) or {}
+        settings = ToolCacheSettings.for_tool(tool_name, agent_config)
+        if not settings.enabled:
+            self._count(tool_name, "bypass")
+            _record_span(tool_name, "bypass")
+            return await call()
+
+        if settings.scope == "session":
+            scope_id = f"session:{getattr(deps, 'session_id', None)}"
+        else:
+            instance_id = getattr(deps, "agent_instance_id", None) or f"{agent_config.get('account')}/{agent_config.get('instance_name')}"
+            scope_id = f"instance:{instance_id}"
+
+        key = self.make_key(tool_name, scope_id, await data_version(), args)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            self._count(tool_name, "hit")
+            _record_span(tool_name, "hit")
+            logfire.info('agent.tool.cache.hit', tool=tool_name, scope=settings.scope)
+            return entry[1]
+
+        self._count(tool_name, "miss")
+        _record_span(tool_name, "miss")
+        result = await call()
+        stored = cacheable(result)
+        if stored:
+            self._entries[key] = (now + settings.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.max_entries:
+                self._entries.popitem(last=False)
+        logfire.info('agent.tool.cache.miss', tool=tool_name, scope=settings.scope, stored=stored)
+        return result
+
+    def clear(self) -> None:
+        """Drop all memoized results."""
+        self._entries.clear()
+
+
+_tool_cache: ToolResultCache | None = None
+
+
+def get_tool_cache() -> ToolResultCache:
+    """
+    Get the process-wide ToolResultCache (singleton pattern).
+
+    Returns:
+        ToolResultCache shared by all agent runs in this worker
+    """
+    global _tool_cache
+    if _tool_cache is None:
+        _tool_cache = ToolResultCache()
+    return _tool_cache
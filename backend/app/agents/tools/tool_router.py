@@ -0,0 +1,367 @@
+"""
+Per-turn router for retrieval tools and directory documentation.
+
+create_simple_chat_agent registers every enabled tool and appends the full
+directory documentation whatever the user asked. With the router enabled the
+incoming message is classified first and only the relevant parts are exposed
+for that turn:
+
+- Candidates: vector_search (its purpose lines, plus optional
+  tools.vector_search.purpose) and every accessible directory list (its
+  schema's directory_purpose, tag examples and synonym terms)
+- Each candidate's purpose phrases are embedded once and cached; the message
+  is embedded per turn and scored against every phrase (best phrase wins)
+- If the best score is below min_confidence the turn falls back to exposing
+  everything (short follow-ups such as "tell me more" land here)
+- Otherwise candidates scoring at least keep_ratio x the best score are kept
+  and the directory docs only cover the kept lists
+- Tools are only removed when the route is confident (best score at least
+  exclusive_confidence): vector_search is dropped if not kept, and directory
+  tools are dropped if no list is kept. Below that, every enabled tool stays
+  and only the directory sections are narrowed (all lists if none is kept)
+
+Non-retrieval tools (email summary, profile capture) are never routed.
+
+The default "local" embedder is a hashed bag of words + character trigrams:
+no network round trip, so routing costs well under a millisecond. "openai"
+uses the EmbeddingService (one embedding call per turn, phrases cached).
+
+Note: a routed turn sends a different tool list and system prompt than an
+unrouted one, so provider prompt caching only shares prefixes between turns
+that route the same way.
+
+Configuration (instance config.yaml):
+    tools:
+      router:
+        enabled: true
+        embedder: local        # local | openai
+        min_confidence: 0.3    # Below this best score: expose everything
+        exclusive_confidence: 0.6  # From this best score on, unselected tools are removed too
+        keep_ratio: 0.75       # Keep candidates scoring >= keep_ratio x best score
+      vector_search:
+        purpose: ["visiting hours and hospital policies", "patient services"]  # Optional extra phrases
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+import hashlib
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+import logfire
+
+Vector = Union[Dict[int, float], List[float]]
+
+VECTOR_SEARCH = "vector_search"
+DIRECTORY = "directory"
+
+_WORD = re.compile(r"\w+")
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "about", "any", "can", "do", "does", "for", "from", "have", "how", "i", "in",
+    "is", "it", "me", "my", "need", "of", "on", "or", "please", "tell", "the", "there", "to", "what",
+    "when", "where", "which", "who", "why", "with", "you", "your"
+})
+_LOCAL_DIMENSIONS = 2048
+
+# Purpose phrases of vector_search when the instance config doesn't add its own
+_VECTOR_SEARCH_PURPOSE = (
+    "what is, tell me about, explain",
+    "general information from documents and web pages",
+    "product and service descriptions and capabilities",
+    "organization policies, procedures and guidelines",
+    "educational content, guides and frequently asked questions",
+    "technical documentation and explanations",
+)
+
+
+@dataclass(frozen=True)
+class RouterSettings:
+    """Router settings from tools.router of an instance config."""
+    enabled: bool = False
+    embedder: str = "local"  # local | openai
+    min_confidence: float = 0.3
+    exclusive_confidence: float = 0.6
+    keep_ratio: float = 0.75
+
+    @classmethod
+    def from_instance_config(cls, instance_config: Optional[Mapping[str, Any]]) -> "RouterSettings":
+        section = ((instance_config or {}).get("tools", {}) or {}).get("router", {}) or {}
+        embedder = section.get("embedder", cls.embedder)
+        return cls(
+            enabled=bool(section.get("enabled", cls.enabled)),
+            embedder=embedder if embedder in ("local", "openai") else cls.embedder,
+            min_confidence=float(section.get("min_confidence", cls.min_confidence)),
+            exclusive_confidence=float(section.get("exclusive_confidence", cls.exclusive_confidence)),
+            keep_ratio=float(section.get("keep_ratio", cls.keep_ratio))
+        )
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """Which retrieval tools and directory lists one turn exposes."""
+    routed: bool  # False = fallback, everything is exposed
+    tools: frozenset = frozenset()
+    directory_lists: Tuple[str, ...] = ()
+    top_score: float = 0.0
+    scores: Dict[str, float] = field(default_factory=dict)
+
+    def allows(self, tool: str) -> bool:
+        """Whether a routable tool (vector_search, directory) is exposed this turn."""
+        return not self.routed or tool in self.tools
+
+    @property
+    def list_filter(self) -> Optional[List[str]]:
+        """Directory lists to document (None = all accessible lists)."""
+        return list(self.directory_lists) if self.routed else None
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """One routable target and the phrases describing what it is for."""
+    key: str  # "vector_search" or "directory:<list_name>"
+    phrases: Tuple[str, ...]
+
+
+def _terms(text: str) -> List[str]:
+    words = []
+    for word in _WORD.findall(text.casefold()):
+        if word in _STOPWORDS or len(word) < 2:
+            continue
+        # Light stemming so "doctors"/"doctor" share a feature
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def _bucket(feature: str) -> Tuple[int, float]:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "big")
+    return value % _LOCAL_DIMENSIONS, 1.0 if value & (1 << 63) else -1.0
+
+
+def local_embedding(text: str) -> Dict[int, float]:
+    """
+    Hashed bag-of-words + character-trigram embedding (sparse, L2-normalized).
+
+    Words carry most of the weight; trigrams let related word forms match
+    ("cardiologist" / "cardiology").
+    """
+    features: Counter = Counter()
+    for word in _terms(text):
+        features["w:" + word] += 2.0
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            features["c:" + padded[i:i + 3]] += 0.5
+    vector: Dict[int, float] = {}
+    for feature, weight in features.items():
+        index, sign = _bucket(feature)
+        vector[index] = vector.get(index, 0.0) + sign * weight
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {k: v / norm for k, v in vector.items()} if norm else {}
+
+
+def cosine(a: Vector, b: Vector) -> float:
+    """Cosine similarity of two embeddings of the same kind."""
+    if isinstance(a, dict):
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(value * b.get(index, 0.0) for index, value in a.items())
+    dot = sum(x * y for x, y in zip(a, b, strict=True))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def directory_candidate(list_name: str, schema: Mapping[str, Any]) -> Candidate:
+    """Purpose phrases of a directory list from its schema YAML."""
+    purpose = schema.get("directory_purpose", {}) or {}
+    phrases: List[str] = []
+    if purpose.get("description"):
+        phrases.append(purpose["description"])
+    phrases.extend(purpose.get("use_for", []) or [])
+    phrases.extend(purpose.get("example_queries", []) or [])
+    if not phrases and schema.get("description"):
+        phrases.append(schema["description"])
+    phrases.extend((schema.get("tags_usage", {}) or {}).get("examples", []) or [])
+    for mapping in ((schema.get("search_strategy", {}) or {}).get("synonym_mappings", []) or []):
+        terms = list(mapping.get("lay_terms", []) or []) + list(mapping.get("formal_terms", []) or [])
+        if terms:
+            phrases.append(" ".join(terms))
+    phrases.append(list_name.replace("_", " "))
+    return Candidate(f"{DIRECTORY}:{list_name}", tuple(p for p in phrases if isinstance(p, str) and p.strip()))
+
+
+def vector_search_candidate(vector_config: Mapping[str, Any]) -> Candidate:
+    """Purpose phrases of vector_search (built-in lines plus tools.vector_search.purpose)."""
+    extra = vector_config.get("purpose") or []
+    if isinstance(extra, str):
+        extra = [extra]
+    return Candidate(VECTOR_SEARCH, tuple(_VECTOR_SEARCH_PURPOSE) + tuple(extra))
+
+
+class ToolRouter:
+    """
+    Scores a message against routable tools and directory lists.
+    """
+
+    def __init__(self, max_cached_phrases: int = 5000, candidate_ttl_seconds: float = 300.0):
+        self.max_cached_phrases = max_cached_phrases
+        self.candidate_ttl_seconds = candidate_ttl_seconds
+        self._phrases: "OrderedDict[Tuple[str, str], Vector]" = OrderedDict()
+        self._directory_candidates: Dict[Tuple[str, Tuple[str, ...]], Tuple[float, List[Candidate]]] = {}
+
+    async def _embed(self, embedder: str, texts: Sequence[str]) -> List[Vector]:
+        missing = [text for text in dict.fromkeys(texts) if (embedder, text) not in self._phrases]
+        if missing:
+            if embedder == "openai":
+                from ...services.embedding_service import get_embedding_service
+                vectors: List[Vector] = await get_embedding_service().embed_texts(missing)
+            else:
+                vectors = [local_embedding(text) for text in missing]
+            for text, vector in zip(missing, vectors, strict=True):
+                self._phrases[(embedder, text)] = vector
+        result = []
+        for text in texts:
+            self._phrases.move_to_end((embedder, text))
+            result.append(self._phrases[(embedder, text)])
+        while len(self._phrases) > self.max_cached_phrases:
+            self._phrases.popitem(last=False)
+        return result
+
+    async def _load_directory_candidates(self, account_id: UUID, list_names: Sequence[str]) -> List[Candidate]:
+        """Directory candidates for the accessible lists (schema files from the DB, cached)."""
+        cache_key = (str(account_id), tuple(list_names))
+        cached = self._directory_candidates.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < self.candidate_ttl_seconds:
+            return cached[1]
+
+        from sqlalchemy import select
+        from ...database import get_database_service
+        from ...models.directory import DirectoryList
+        from ...services.directory_importer import DirectoryImporter
+
+        async with get_database_service().get_session() as session:
+            rows = (await session.execute(
+                select(DirectoryList.list_name, DirectoryList.schema_file).where(
+                    DirectoryList.account_id == account_id,
+                    DirectoryList.list_name.in_(list(list_names))
+                )
+            )).all()
+
+        candidates = []
+        for list_name, schema_file in rows:
+            try:
+                candidates.append(directory_candidate(list_name, DirectoryImporter.load_schema(schema_file)))
+            except Exception as e:
+                logfire.warn('agent.router.schema_load_failed', list_name=list_name, error=str(e))
+                candidates.append(Candidate(f"{DIRECTORY}:{list_name}", (list_name.replace("_", " "),)))
+        self._directory_candidates[cache_key] = (time.monotonic(), candidates)
+        return candidates
+
+    async def candidates(self, instance_config: Mapping[str, Any], account_id: Optional[UUID]) -> List[Candidate]:
+        """Routable candidates of an instance (enabled retrieval tools only)."""
+        tools_config = instance_config.get("tools", {}) or {}
+        result: List[Candidate] = []
+        vector_config = tools_config.get("vector_search", {}) or {}
+        if vector_config.get("enabled", False):
+            result.append(vector_search_candidate(vector_config))
+        directory_config = tools_config.get("directory", {}) or {}
+        accessible_lists = directory_config.get("accessible_lists", []) or []
+        if directory_config.get("enabled", False) and accessible_lists and account_id is not None:
+            result.extend(await self._load_directory_candidates(account_id, accessible_lists))
+        return result
+
+    def decide(self, scores: Dict[str, float], settings: RouterSettings) -> RouteDecision:
+        """Turn candidate scores into a route (or the fallback)."""
+        top_score = max(scores.values(), default=0.0)
+        rounded = {key: round(score, 3) for key, score in scores.items()}
+        if len(scores) < 2 or top_score < settings.min_confidence:
+            return RouteDecision(routed=False, top_score=top_score, scores=rounded)
+
+        kept = [key for key, score in scores.items() if score >= top_score * settings.keep_ratio]
+        all_lists = tuple(key.split(":", 1)[1] for key in scores if key.startswith(f"{DIRECTORY}:"))
+        lists = tuple(key.split(":", 1)[1] for key in kept if key.startswith(f"{DIRECTORY}:"))
+        if top_score >= settings.exclusive_confidence:
+            tools = {key for key in kept if key == VECTOR_SEARCH}
+            if lists:
+                tools.add(DIRECTORY)
+        else:
+            # Not sure enough to remove tools: narrow the directory sections only
+            tools = {key for key in scores if key == VECTOR_SEARCH}
+            if all_lists:
+                tools.add(DIRECTORY)
+                lists = lists or all_lists
+        return RouteDecision(routed=True, tools=frozenset(tools), directory_lists=lists, top_score=top_score, scores=rounded)
+
+    async def route(
+        self,
+        message: str,
+        instance_config: Optional[Mapping[str, Any]],
+        account_id: Optional[UUID] = None
+    ) -> Optional[RouteDecision]:
+        """
+        Route one turn.
+
+        Args:
+            message: User message
+            instance_config: Instance config (tools.router, enabled tools)
+            account_id: Account of the instance (directory lists)
+
+        Returns:
+            RouteDecision, or None when the router is disabled for the instance
+        """
+        settings = RouterSettings.from_instance_config(instance_config)
+        if not settings.enabled:
+            return None
+
+        started = time.perf_counter()
+        try:
+            candidates = await self.candidates(instance_config, account_id)
+            phrases = [phrase for candidate in candidates for phrase in candidate.phrases]
+            if len(candidates) < 2 or not message.strip():
+                decision = RouteDecision(routed=False)
+            else:
+                vectors = await self._embed(settings.embedder, [message, *phrases])
+                message_vector, phrase_vectors = vectors[0], iter(vectors[1:])
+                scores = {
+                    candidate.key: max(cosine(message_vector, next(phrase_vectors)) for _ in candidate.phrases)
+                    for candidate in candidates
+                }
+                decision = self.decide(scores, settings)
+        except Exception as e:
+            logfire.warn('agent.router.failed', error=str(e), error_type=type(e).__name__)
+            decision = RouteDecision(routed=False)
+
+        logfire.info(
+            'agent.router.decision',
+            routed=decision.routed,
+            tools=sorted(decision.tools),
+            directory_lists=list(decision.directory_lists),
+            top_score=round(decision.top_score, 3),
+            scores=decision.scores,
+            embedder=settings.embedder,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
+        return decision
+
+
+_tool_router: ToolRouter | None = None
+
+
+def get_tool_router() -> ToolRouter:
+    """
+    Get the process-wide ToolRouter (singleton pattern).
+
+    Returns:
+        ToolRouter with phrase embeddings cached for this worker
+    """
+    global _tool_router
+    if _tool_router is None:
+        _tool_router = ToolRouter()
+    return _tool_router
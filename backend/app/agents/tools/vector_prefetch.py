@@ -0,0 +1,277 @@
+"""
+Speculative vector search prefetch for first turns.
+
+On vector-enabled instances almost every first turn ends with the model
+calling vector_search: model call → tool → model call again. With prefetch
+enabled, the user message is embedded and queried against Pinecone while the
+agent is being set up, and the result is used in one of two ways:
+
+- mode "serve":  the model's vector_search call is answered from the prefetched
+                 results when its query closely matches the user message
+                 (no embedding or Pinecone round trip inside the tool)
+- mode "inject": the top results are added to the first model call as context,
+                 so the model can answer without calling the tool at all
+
+Every prefetch ends with one outcome, logged as agent.vector_prefetch.outcome
+and counted in get_prefetch_stats():
+    served   - a vector_search call was answered from the prefetch
+    injected - results were added to the prompt
+    wasted   - prefetch finished but was never used
+    late     - inject mode: results were not ready within max_wait_ms
+    failed   - the prefetch query raised
+    cancelled- the run ended before the prefetch finished
+
+Configuration (instance config.yaml):
+    tools:
+      vector_search:
+        prefetch:
+          enabled: true
+          mode: serve            # serve | inject
+          match_threshold: 0.6   # share of tool-query words found in the user message
+          max_wait_ms: 1500      # inject mode: wait this long after setup
+          first_turn_only: true
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+import asyncio
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, List, Mapping, Optional, Union
+
+import logfire
+
+from ...services.agent_pinecone_config import get_cached_pinecone_client, load_agent_pinecone_config
+from ...services.vector_service import VectorQueryResponse, VectorService
+from .vector_tools import format_vector_results, resolve_search_params
+
+_WORD = re.compile(r"\w+")
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "about", "can", "do", "does", "for", "how", "i", "in", "is",
+    "me", "my", "of", "on", "or", "tell", "the", "to", "what", "when", "where", "which",
+    "who", "why", "you", "your"
+})
+
+_outcomes: Counter = Counter()
+
+
+@dataclass(frozen=True)
+class VectorPrefetchSettings:
+    """Prefetch settings from tools.vector_search.prefetch of an instance config."""
+    enabled: bool = False
+    mode: str = "serve"  # serve | inject
+    match_threshold: float = 0.6
+    max_wait_ms: int = 1500
+    first_turn_only: bool = True
+
+    @classmethod
+    def from_instance_config(cls, instance_config: Optional[Mapping[str, Any]]) -> "VectorPrefetchSettings":
+        vector_config = ((instance_config or {}).get("tools", {}) or {}).get("vector_search", {}) or {}
+        section = vector_config.get("prefetch", {}) or {}
+        mode = section.get("mode", cls.mode)
+        return cls(
+            enabled=bool(vector_config.get("enabled", False) and section.get("enabled", cls.enabled)),
+            mode=mode if mode in ("serve", "inject") else cls.mode,
+            match_threshold=float(section.get("match_threshold", cls.match_threshold)),
+            max_wait_ms=int(section.get("max_wait_ms", cls.max_wait_ms)),
+            first_turn_only=bool(section.get("first_turn_only", cls.first_turn_only))
+        )
+
+
+def _terms(text: str) -> set:
+    return {word for word in _WORD.findall(text.casefold()) if word not in _STOPWORDS}
+
+
+def query_match(message: str, query: str) -> float:
+    """
+    Share of the tool query's words that appear in the user message (0.0-1.0).
+
+    Example:
+        >>> query_match("What are your visiting hours?", "visiting hours")
+        1.0
+    """
+    query_terms = _terms(query)
+    if not query_terms:
+        return 0.0
+    return len(query_terms & _terms(message)) / len(query_terms)
+
+
+def get_prefetch_stats() -> dict:
+    """Prefetch outcome counts for this worker (served, injected, wasted, ...)."""
+    return dict(_outcomes)
+
+
+class VectorPrefetch:
+    """
+    One speculative vector search for the current turn.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        settings: VectorPrefetchSettings,
+        task: "asyncio.Task[VectorQueryResponse]",
+        top_k: int,
+        similarity_threshold: float,
+        session_id: Optional[str] = None
+    ):
+        self.message = message
+        self.settings = settings
+        self.task = task
+        self.top_k = top_k
+        self.similarity_threshold = similarity_threshold
+        self.session_id = session_id
+        self.outcome: Optional[str] = None
+        self.started_at = time.monotonic()
+        self._finished = False
+
+    def _response(self) -> Optional[VectorQueryResponse]:
+        if not self.task.done() or self.task.cancelled() or self.task.exception() is not None:
+            return None
+        return self.task.result()
+
+    async def prompt(self, message: str) -> Union[str, List[str]]:
+        """
+        Agent prompt for this turn (inject mode adds the prefetched results as context).
+
+        Args:
+            message: User message
+
+        Returns:
+            The message itself, or [message, context] for the agent run
+        """
+        if self.settings.mode != "inject":
+            return message
+        try:
+            await asyncio.wait_for(asyncio.shield(self.task), self.settings.max_wait_ms / 1000)
+        except asyncio.TimeoutError:
+            self.outcome = "late"
+            return message
+        except Exception:
+            return message
+
+        response = self._response()
+        if response is None or not response.results:
+            return message
+        self.outcome = "injected"
+        context = format_vector_results(response, message)
+        return [
+            message,
+            "Knowledge base results retrieved for this question (use them if relevant; "
+            f"call vector_search only if they are not sufficient):\n\n{context}"
+        ]
+
+    async def serve(self, query: str, top_k: int, similarity_threshold: float) -> Optional[str]:
+        """
+        Answer a vector_search call from the prefetch if it matches closely.
+
+        Args:
+            query: Query the model passed to vector_search
+            top_k: Resolved result count for the call
+            similarity_threshold: Resolved similarity threshold for the call
+
+        Returns:
+            Formatted results, or None to run the search normally
+        """
+        if self.settings.mode != "serve" or self.outcome is not None:
+            return None
+        if similarity_threshold != self.similarity_threshold:
+            return None
+        match = query_match(self.message, query)
+        if match < self.settings.match_threshold:
+            logfire.info('agent.vector_prefetch.mismatch', session_id=self.session_id, match=round(match, 2))
+            return None
+
+        if self.task.cancelled():
+            return None
+        try:
+            response = await asyncio.shield(self.task)
+        except Exception:
+            return None
+        # Fewer results than requested means every match above the threshold is already here
+        if top_k > self.top_k and response.total_results >= self.top_k:
+            return None
+
+        self.outcome = "served"
+        results = response.results[:top_k]
+        trimmed = response.model_copy(update={"results": results, "total_results": len(results)})
+        logfire.info('agent.vector_prefetch.served', session_id=self.session_id, match=round(match, 2), results_count=len(results))
+        return format_vector_results(trimmed, query)
+
+    def finish(self) -> str:
+        """
+        Record the prefetch outcome and cancel the query if still running.
+
+        Returns:
+            Final outcome
+        """
+        if self._finished:
+            return self.outcome
+        self._finished = True
+        if self.outcome is None:
+            if not self.task.done():
+                self.outcome = "cancelled"
+            elif self.task.cancelled() or self.task.exception() is not None:
+                self.outcome = "failed"
+            else:
+                self.outcome = "wasted"
+        if not self.task.done():
+            self.task.cancel()
+        _outcomes[self.outcome] += 1
+        logfire.info(
+            'agent.vector_prefetch.outcome',
+            session_id=self.session_id,
+            outcome=self.outcome,
+            mode=self.settings.mode,
+            elapsed_ms=int((time.monotonic() - self.started_at) * 1000)
+        )
+        return self.outcome
+
+
+def start_vector_prefetch(
+    message: str,
+    instance_config: Optional[Mapping[str, Any]],
+    history_length: int = 0,
+    session_id: Optional[str] = None
+) -> Optional[VectorPrefetch]:
+    """
+    Start a speculative vector search for the user message, if enabled.
+
+    Called before agent setup so embedding + Pinecone query overlap with it.
+
+    Args:
+        message: User message
+        instance_config: Instance config (tools.vector_search.prefetch)
+        history_length: Messages already in the conversation
+        session_id: Session ID (for logging)
+
+    Returns:
+        VectorPrefetch, or None when prefetch doesn't apply
+    """
+    settings = VectorPrefetchSettings.from_instance_config(instance_config)
+    if not settings.enabled or (settings.first_turn_only and history_length > 0) or not message.strip():
+        return None
+
+    pinecone_config = load_agent_pinecone_config(dict(instance_config))
+    if not pinecone_config:
+        return None
+    vector_config = instance_config["tools"]["vector_search"]
+    top_k, similarity_threshold = resolve_search_params(vector_config)
+
+    async def query() -> VectorQueryResponse:
+        vector_service = VectorService(pinecone_client=get_cached_pinecone_client(pinecone_config))
+        return await vector_service.query_similar(
+            query_text=message,
+            top_k=top_k,
+            similarity_threshold=similarity_threshold,
+            namespace=pinecone_config.namespace
+        )
+
+    task = asyncio.create_task(query())
+    # Outcome is recorded in finish(); don't log "exception never retrieved"
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    logfire.info('agent.vector_prefetch.started', session_id=session_id, mode=settings.mode, top_k=top_k)
+    return VectorPrefetch(message, settings, task, top_k, similarity_threshold, session_id)
@@ -10,7 +10,7 @@ Unauthorized copying of this file is strictly prohibited.
 
 
 from pydantic_ai import RunContext
-from typing import Optional
+from typing import Optional, Tuple
 import logfire
 
 from ..base.dependencies import SessionDependencies
@@ -19,6 +19,8 @@ from ...services.agent_pinecone_config import (
     load_agent_pinecone_config,
     get_cached_pinecone_client
 )
+from ...services.data_versions import get_data_versions, vector_namespace
+from .tool_cache import get_tool_cache, normalize_text
 
 
 async def vector_search(
@@ -80,24 +82,7 @@ async def vector_search(
         )
         return "Vector search configuration error."
     
-    # Get cached PineconeClient (reuses connection pool per Pinecone best practices)
-    pinecone_client = get_cached_pinecone_client(pinecone_config)
-    vector_service = VectorService(pinecone_client=pinecone_client)
-    
-    # Query parameters: Configuration cascade (LLM param → agent → app.yaml → code)
-    from ...config import load_config
-    app_config = load_config()
-    global_vector_config = app_config.get("vector", {}).get("search", {})
-    
-    top_k = (
-        max_results or  # LLM parameter (highest priority)
-        vector_config.get("max_results") or  # Agent config
-        global_vector_config.get("max_results", 5)  # app.yaml → code default
-    )
-    similarity_threshold = (
-        vector_config.get("similarity_threshold") or  # Agent config
-        global_vector_config.get("similarity_threshold", 0.7)  # app.yaml → code default
-    )
+    top_k, similarity_threshold = resolve_search_params(vector_config, max_results)
     
     logfire.info(
         'agent.tool.vector_search.start',
@@ -109,47 +94,30 @@ async def vector_search(
         threshold=similarity_threshold
     )
     
-    # Perform search
+    # Speculative prefetch of the user message started before the first model call (vector_prefetch)
+    prefetch = getattr(ctx.deps, "vector_prefetch", None)
+    if prefetch is not None:
+        served = await prefetch.serve(query, top_k, similarity_threshold)
+        if served is not None:
+            return served
+    
+    # Perform search (memoized per instance/session; upserts bump the namespace version)
     try:
-        response: VectorQueryResponse = await vector_service.query_similar(
-            query_text=query,
-            top_k=top_k,
-            similarity_threshold=similarity_threshold,
-            namespace=pinecone_config.namespace
+        version_namespace = vector_namespace(pinecone_config.index_name, pinecone_config.namespace)
+        return await get_tool_cache().get_or_call(
+            "vector_search",
+            ctx.deps,
+            args={
+                "query": normalize_text(query),
+                "index": pinecone_config.index_name,
+                "namespace": pinecone_config.namespace,
+                "top_k": top_k,
+                "threshold": similarity_threshold
+            },
+            data_version=lambda: _namespace_version(version_namespace),
+            call=lambda: _execute_vector_search(pinecone_config, query, top_k, similarity_threshold, session_id)
         )
         
-        logfire.info(
-            'agent.tool.vector_search.complete',
-            session_id=session_id,
-            results_count=response.total_results,
-            query_time_ms=response.query_time_ms
-        )
-        
-        # Format results for LLM consumption
-        if not response.results:
-            return f"No relevant information found in knowledge base for query: '{query}'"
-        
-        formatted_lines = [
-            f"Found {response.total_results} relevant result(s) in knowledge base:\n"
-        ]
-        
-        for i, result in enumerate(response.results, 1):
-            formatted_lines.append(f"{i}. {result.text}")
-            formatted_lines.append(f"   Relevance Score: {result.score:.3f}")
-            
-            # Include metadata if present (e.g., page title, URL, category from WordPress)
-            if result.metadata:
-                metadata_str = ", ".join(
-                    f"{k}: {v}" for k, v in result.metadata.items() 
-                    if k not in ["text", "created_at", "embedding_model"]
-                )
-                if metadata_str:
-                    formatted_lines.append(f"   Details: {metadata_str}")
-            
-            formatted_lines.append("")  # Blank line between results
-        
-        return "\n".join(formatted_lines)
-        
     except Exception as e:
         logfire.exception(
             'agent.tool.vector_search.error',
@@ -158,3 +126,91 @@ async def vector_search(
         )
         return "Vector search encountered an error. Please try rephrasing your query."
 
+
+async def _namespace_version(namespace: str) -> str:
+    return str(get_data_versions().get(namespace))
+
+
+async def _execute_vector_search(
+    pinecone_config,
+    query: str,
+    top_k: int,
+    similarity_threshold: float,
+    session_id: str
+) -> str:
+    """Query Pinecone and format the results for the LLM (errors propagate to vector_search)."""
+    # Get cached PineconeClient (reuses connection pool per Pinecone best practices)
+    pinecone_client = get_cached_pinecone_client(pinecone_config)
+    vector_service = VectorService(pinecone_client=pinecone_client)
+    
+    response: VectorQueryResponse = await vector_service.query_similar(
+        query_text=query,
+        top_k=top_k,
+        similarity_threshold=similarity_threshold,
+        namespace=pinecone_config.namespace
+    )
+    
+    logfire.info(
+        'agent.tool.vector_search.complete',
+        session_id=session_id,
+        results_count=response.total_results,
+        query_time_ms=response.query_time_ms
+    )
+    
+    return format_vector_results(response, query)
+
+
+def resolve_search_params(vector_config: dict, max_results: Optional[int] = None) -> Tuple[int, float]:
+    """
+    Resolve top_k and similarity threshold for a vector search.
+    
+    Configuration cascade: LLM param → agent config → app.yaml → code default.
+    
+    Args:
+        vector_config: Agent's tools.vector_search config
+        max_results: Result count requested by the LLM (optional)
+    
+    Returns:
+        Tuple of (top_k, similarity_threshold)
+    """
+    from ...config import load_config
+    app_config = load_config()
+    global_vector_config = app_config.get("vector", {}).get("search", {})
+    
+    top_k = (
+        max_results or  # LLM parameter (highest priority)
+        vector_config.get("max_results") or  # Agent config
+        global_vector_config.get("max_results", 5)  # app.yaml → code default
+    )
+    similarity_threshold = (
+        vector_config.get("similarity_threshold") or  # Agent config
+        global_vector_config.get("similarity_threshold", 0.7)  # app.yaml → code default
+    )
+    return top_k, similarity_threshold
+
+
+def format_vector_results(response: VectorQueryResponse, query: str) -> str:
+    """Format vector search results for LLM consumption."""
+    if not response.results:
+        return f"No relevant information found in knowledge base for query: '{query}'"
+    
+    formatted_lines = [
+        f"Found {response.total_results} relevant result(s) in knowledge base:\n"
+    ]
+    
+    for i, result in enumerate(response.results, 1):
+        formatted_lines.append(f"{i}. {result.text}")
+        formatted_lines.append(f"   Relevance Score: {result.score:.3f}")
+        
+        # Include metadata if present (e.g., page title, URL, category from WordPress)
+        if result.metadata:
+            metadata_str = ", ".join(
+                f"{k}: {v}" for k, v in result.metadata.items() 
+                if k not in ["text", "created_at", "embedding_model"]
+            )
+            if metadata_str:
+                formatted_lines.append(f"   Details: {metadata_str}")
+        
+        formatted_lines.append("")  # Blank line between results
+    
+    return "\n".join(formatted_lines)
@@ -19,6 +19,7 @@ Endpoints:
 - POST /accounts/{account}/agents/{instance}/chat - Non-streaming chat
 - GET  /accounts/{account}/agents/{instance}/stream - Streaming chat (SSE)
 - GET  /accounts/{account}/agents/health - Health check for router
+- GET  /accounts/{account}/agents/{instance}/directories/{list}/facets - Directory facet value counts
 
 Dependencies:
 - instance_loader: Load agent instances from DB + config files
@@ -44,6 +45,14 @@ from ..agents.instance_loader import load_agent_instance, list_account_instances
 from ..middleware.simple_session_middleware import get_current_session
 from ..database import get_database_service
 from ..services.message_service import get_message_service
+from ..services.chat_bootstrap import bootstrap_chat
+from ..services.directory_catalog import get_directory_catalog
+from ..services.directory_facets import facets_to_dict, get_directory_facets, top_facets
+from ..services.admission_control import AdmissionRejected, AdmissionSettings, get_admission_controller
+from ..services.response_cache import get_response_cache
+from ..services.singleflight import get_singleflight, singleflight_enabled
+from ..services.sse_stream import CoalesceSettings, cancel_on_disconnect, coalesce_sse_events, encode_sse
+from ..services.stream_replay import ReplayGapError, ReplaySettings, get_stream_replay_registry, parse_event_id
 
 # Create router instance with prefix and tags
 router = APIRouter(
@@ -166,6 +175,32 @@ class AgentListResponse(BaseModel):
         }
 
 
+class FacetValue(BaseModel):
+    """One facet value and the number of entries having it."""
+    value: str = Field(..., description="Field value as stored in the entries")
+    count: int = Field(..., description="Number of entries with this value")
+
+
+class DirectoryFacetsResponse(BaseModel):
+    """Response model for directory facets endpoint."""
+    list_name: str = Field(..., description="Directory list name")
+    entry_type: str = Field(..., description="Entry type of the list (e.g., medical_professional)")
+    entry_count: int = Field(..., description="Number of entries in the list")
+    facets: Dict[str, List[FacetValue]] = Field(..., description="Values per facet field, most frequent first")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "list_name": "doctors",
+                "entry_type": "medical_professional",
+                "entry_count": 318,
+                "facets": {
+                    "department": [{"value": "Surgery", "count": 41}, {"value": "Cardiology", "count": 18}],
+                    "tags": [{"value": "English", "count": 318}, {"value": "Spanish", "count": 52}]
+                }
+            }
+        }
+
 # ============================================================================
 # HEALTH CHECK ENDPOINT
 # ============================================================================
@@ -322,9 +357,8 @@ async def chat_endpoint(
     message persistence, cost tracking, and error handling.
     
     Flow:
-    1. Load agent instance (DB + config file)
-    2. Get/create session with account/instance context
-    3. Load conversation history
+    1-3. Bootstrap (chat_bootstrap.bootstrap_chat): load agent instance, history and
+         model settings concurrently; get/create session with account/instance context
     4. Route to appropriate agent based on agent_type
     5. Save user message and assistant response
     6. Track LLM request costs
@@ -361,12 +395,11 @@ async def chat_endpoint(
     logfire.info('api.account.chat.request', account=account_slug, instance=instance_slug, message_preview=message_preview)
     
     # ========================================================================
-    # STEP 1: LOAD AGENT INSTANCE
+    # STEPS 1-3: BOOTSTRAP (INSTANCE + SESSION + HISTORY, RESOLVED CONCURRENTLY)
     # ========================================================================
     
     try:
-        instance = await load_agent_instance(account_slug, instance_slug)
-        logfire.debug('api.account.chat.instance_loaded', instance_id=str(instance.id), agent_type=instance.agent_type, display_name=instance.display_name)
+        bootstrap = await bootstrap_chat(request, account_slug, instance_slug, log_scope="chat")
     except ValueError as e:
         # Account or instance not found
         logfire.warn('api.account.chat.instance_not_found', account=account_slug, instance=instance_slug, error=str(e))
@@ -375,110 +408,22 @@ async def chat_endpoint(
         logfire.exception('api.account.chat.instance_load_failed', account=account_slug, instance=instance_slug, error=str(e), error_type=type(e).__name__)
         raise HTTPException(status_code=500, detail="Failed to load agent instance")
     
-    # ========================================================================
-    # STEP 2: GET/CREATE SESSION WITH CONTEXT UPDATE
-    # ========================================================================
-    
-    session = get_current_session(request)
-    
-    # BUG-0026-0003 FIX: Create session if it doesn't exist (user is actively chatting)
-    # This is different from read-only endpoints (metadata/history) which don't create sessions
-    if not session:
-        from ..services.session_service import SessionService
-        from ..models.session import Session
-        from datetime import datetime, timezone
-        import secrets
-        import string
-        
-        logfire.info('api.account.chat.creating_session', account=account_slug, instance=instance_slug)
-        
-        async with get_database_service().get_session() as db_session:
-            # Generate secure session key
-            alphabet = string.ascii_letters + string.digits + "-_"
-            session_key = ''.join(secrets.choice(alphabet) for _ in range(32))
-            
-            # Create session WITH account/agent context from the start
-            session = Session(
-                session_key=session_key,
-                account_id=instance.account_id,
-                account_slug=instance.account_slug,
-                agent_instance_id=instance.id,
-                agent_instance_slug=instance.instance_slug,
-                email=None,
-                is_anonymous=True,
-                created_at=datetime.now(timezone.utc),
-                last_activity_at=datetime.now(timezone.utc),
-                meta={}
-            )
-            
-            db_session.add(session)
-            await db_session.commit()
-            await db_session.refresh(session)
-            
-            # Store in request state for this request
-            request.state.session = session
-            
-            logfire.info(
-                'api.account.chat.session_created',
-                session_id=str(session.id),
-                account_id=str(session.account_id),
-                agent_instance_id=str(session.agent_instance_id)
-            )
-    
-    session_key_prefix = session.session_key[:8] + "..." if session.session_key else None
-    account_id_str = str(session.account_id) if session.account_id else None
-    logfire.debug('api.account.chat.session_retrieved', session_id=str(session.id), session_key_prefix=session_key_prefix, account_id=account_id_str)
-    
-    # Update session context if NULL (progressive context flow - for old sessions)
-    if session.account_id is None:
-        from ..services.session_service import SessionService
-        from sqlalchemy import select
-        from ..models.session import Session
-        
-        async with get_database_service().get_session() as db_session:
-            session_service = SessionService(db_session)
-            await session_service.update_session_context(
-                session_id=session.id,
-                account_id=instance.account_id,
-                account_slug=instance.account_slug,
-                agent_instance_id=instance.id,
-                agent_instance_slug=instance.instance_slug
-            )
-            
-            # Reload session from database to get fresh values
-            # This ensures we have the committed values from update_session_context()
-            stmt = select(Session).where(Session.id == session.id)
-            result = await db_session.execute(stmt)
-            fresh_session = result.scalar_one()
-            
-            # Update request state with fresh session object
-            # This prevents middleware from overwriting with stale detached object
-            request.state.session = fresh_session
-            session = fresh_session
-            
-        logfire.info(
-            'api.account.chat.session_context_updated',
-            session_id=str(session.id),
-            account_id=str(session.account_id),
-            agent_instance_id=str(session.agent_instance_id)
-        )
-    
-    # ========================================================================
-    # STEP 3: LOAD CONVERSATION HISTORY
-    # ========================================================================
-    
-    # Get history_limit from instance config
-    context_management = instance.config.get("context_management", {})
-    history_limit = context_management.get("history_limit", 50)
+    instance = bootstrap.instance
+    session_id = bootstrap.session_id
     
-    # Load conversation history for this session
-    from ..services.agent_session import load_agent_conversation
-    message_history = await load_agent_conversation(
-        session_id=str(session.id),
-        max_messages=history_limit
-    )
-    
-    logfire.debug('api.account.chat.history_loaded', session_id=str(session.id), history_count=len(message_history), history_limit=history_limit)
+    # Opt-in response cache (response_cache in instance config.yaml): repeated first
+    # questions are answered without running the agent, recorded as a zero-cost request
+    cached = await get_response_cache().lookup(bootstrap, user_message)
+    if cached is not None:
+        llm_request_id = await get_response_cache().record_hit(bootstrap, user_message, cached)
+        logfire.info('api.account.chat.response_cached', session_id=session_id, account=account_slug, instance=instance_slug, llm_request_id=str(llm_request_id))
+        return JSONResponse({
+            "response": cached.response,
+            "usage": {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "requests": 0},
+            "llm_request_id": str(llm_request_id) if llm_request_id else None,
+            "cost_tracking": {"real_cost": 0.0, "method": "response_cache", "provider": "response_cache", "cost_found": False, "status": "enabled"},
+            "model": cached.model
+        })
     
     # ========================================================================
     # STEP 4: ROUTE TO APPROPRIATE AGENT
@@ -486,34 +431,44 @@ async def chat_endpoint(
     
     agent_type = instance.agent_type
     
-    try:
-        if agent_type == "simple_chat":
+    # Per-account / per-model admission control (chat.admission in app.yaml, admission in config.yaml)
+    from ..config import load_config
+    admission_settings = AdmissionSettings.resolve(load_config(), bootstrap.instance_config)
+    
+    async def run_agent() -> dict:
+        async with get_admission_controller().admit(account_slug, bootstrap.requested_model, admission_settings):
             # Import and call simple_chat agent with pre-loaded history
             from ..agents.simple_chat import simple_chat
             
-            # Build complete instance config with system_prompt
-            full_instance_config = instance.config.copy()
-            if instance.system_prompt:
-                full_instance_config['system_prompt'] = instance.system_prompt
-            
             # instance.id and instance.account_id are already Python UUID primitives (converted in load_agent_instance)
             # No conversion needed - they're safe to pass directly to simple_chat and Logfire
-            result = await simple_chat(
+            # History, instance config (with system_prompt) and model settings travel in bootstrap
+            return await simple_chat(
                 message=user_message,
-                session_id=str(session.id),
+                session_id=session_id,
                 agent_instance_id=instance.id,  # Multi-tenant: pass agent instance ID (already Python UUID from dataclass)
                 account_id=instance.account_id,  # Multi-tenant: pass account ID (already Python UUID from dataclass)
-                message_history=message_history,  # Pass pre-loaded history
-                instance_config=full_instance_config  # Pass instance-specific config with system_prompt
+                bootstrap=bootstrap
             )
-            
+    
+    try:
+        if agent_type == "simple_chat":
+            # Identical concurrent first turns share one agent run (chat.singleflight)
+            flight_key = None
+            if singleflight_enabled(load_config(), bootstrap.instance_config):
+                flight_key = get_singleflight().key(bootstrap, user_message, "chat")
+            if flight_key is None:
+                result = await run_agent()
+            else:
+                result, _ = await get_singleflight().call(flight_key, bootstrap, user_message, run_agent)
+        
         # Future agent types can be added here:
         # elif agent_type == "sales_agent":
         #     from ..agents.sales_agent import sales_agent
         #     result = await sales_agent(
         #         message=user_message,
-        #         session_id=str(session.id),
-        #         message_history=message_history
+        #         session_id=session_id,
+        #         bootstrap=bootstrap
         #     )
         
         else:
@@ -523,7 +478,7 @@ async def chat_endpoint(
                 detail=f"Unknown agent type: {agent_type}. Supported types: simple_chat"
             )
         
-        logfire.info('api.account.chat.agent_response_generated', session_id=str(session.id), agent_type=agent_type, response_length=len(result['response']), llm_request_id=result.get('llm_request_id'))
+        logfire.info('api.account.chat.agent_response_generated', session_id=session_id, agent_type=agent_type, response_length=len(result['response']), llm_request_id=result.get('llm_request_id'))
         
         # NOTE: Messages and cost tracking are handled by the agent (simple_chat)
         # which uses Pydantic AI's native tracking and saves via MessageService
@@ -531,9 +486,11 @@ async def chat_endpoint(
     except HTTPException:
         # Re-raise HTTPExceptions
         raise
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         import traceback
-        logfire.exception('api.account.chat.agent_call_failed', session_id=str(session.id), agent_type=agent_type, error=str(e), error_type=type(e).__name__, traceback=traceback.format_exc())
+        logfire.exception('api.account.chat.agent_call_failed', session_id=session_id, agent_type=agent_type, error=str(e), error_type=type(e).__name__, traceback=traceback.format_exc())
         raise HTTPException(
             status_code=500,
             detail=f"Agent processing failed: {str(e)}"
@@ -566,7 +523,7 @@ async def chat_endpoint(
         "model": model
     }
     
-    logfire.info('api.account.chat.response_complete', session_id=str(session.id), account=account_slug, instance=instance_slug, response_length=len(result['response']), llm_request_id=result.get('llm_request_id'))
+    logfire.info('api.account.chat.response_complete', session_id=session_id, account=account_slug, instance=instance_slug, response_length=len(result['response']), llm_request_id=result.get('llm_request_id'))
     
     return JSONResponse(response_data)
 
@@ -580,7 +537,8 @@ async def stream_endpoint(
     request: Request,
     message: str = Query(..., description="User message to send to agent", min_length=1),
     account_slug: str = Path(..., description="Account identifier slug"),
-    instance_slug: str = Path(..., description="Agent instance identifier slug")
+    instance_slug: str = Path(..., description="Agent instance identifier slug"),
+    last_event_id: Optional[str] = Query(None, description="Resume after this SSE event id (alternative to the Last-Event-ID header)")
 ):
     """
     Streaming chat endpoint using Server-Sent Events (SSE).
@@ -588,15 +546,32 @@ async def stream_endpoint(
     Streams agent responses in real-time as they're generated, providing
     a better user experience for longer responses.
     
-    SSE Event Format:
+    SSE Event Format (each frame carries `id: <request_id>:<seq>` when chat.stream.replay is enabled):
+        - event: start, data: {"session_id": "...", "request_id": "..."}
+        - event: progress, data: {"stage": "..."} (only if chat.stream.progress_events)
         - event: message, data: <text chunk>
         - event: done, data: ""
-        - event: error, data: {"message": "<error>"}
+        - event: error, data: {"message": "<error>", "status": <code>, "request_id": "..."}
+    
+    Resuming (chat.stream.replay.enabled):
+        A reconnect with `Last-Event-ID: <request_id>:<seq>` (or ?last_event_id=) replays
+        the frames after <seq> from the replay buffer and stays attached to the live
+        generation if it is still running. Unknown/expired streams, and clients that
+        fell more than max_frames behind, get an error event with status 410; the
+        message is never re-sent to the agent.
+    
+    Disconnects:
+        The connection is polled with request.is_disconnected(). Once the client is
+        gone (and, with replay, hasn't resumed within abandon_grace_seconds) the agent
+        stream is cancelled, closing the upstream LLM connection. The partial answer
+        is saved and its LLM request recorded with completion_status="partial" and a
+        locally estimated token cost.
     
     Flow:
-    1. Load agent instance (DB + config file)
-    2. Get/create session with account/instance context
-    3. Load conversation history
+    1. Send headers and `start` immediately (existing sessions)
+    2-3. Bootstrap (chat_bootstrap.bootstrap_chat): load agent instance, history and
+         model settings concurrently; get/create session with account/instance context.
+         New/legacy sessions are bootstrapped before the response (cookie + context).
     4. Route to streaming agent based on agent_type
     5. Yield SSE events as chunks arrive
     6. Save messages and track costs after completion
@@ -607,18 +582,19 @@ async def stream_endpoint(
         message: User message from query parameter
         account_slug: Account identifier from URL
         instance_slug: Agent instance identifier from URL
+        last_event_id: Optional event id to resume from (query alternative to Last-Event-ID)
         
     Returns:
         StreamingResponse with SSE events
         
     Raises:
-        HTTPException 404: Account or instance not found
-        HTTPException 400: Invalid agent type or bad request
-        HTTPException 500: Internal server error
+        HTTPException 404: Account or instance not found (new sessions only; otherwise an error event)
+        HTTPException 500: Internal server error (new sessions only; otherwise an error event)
         
     Example:
         GET /accounts/default_account/agents/simple_chat1/stream?message=Hello
         
+        -> event: start\ndata: {"session_id": "...", "request_id": "..."}\n\n
         -> event: message\ndata: Hello\n\n
         -> event: message\ndata: ! How can\n\n
         -> event: message\ndata:  I help you?\n\n
@@ -626,201 +602,217 @@ async def stream_endpoint(
     """
     from fastapi.responses import StreamingResponse
     import json
+    import uuid
+    from ..config import load_config
     
     message_preview = message[:100] + "..." if len(message) > 100 else message
-    logfire.info('api.account.stream.request', account=account_slug, instance=instance_slug, message_preview=message_preview)
+    request_id = str(uuid.uuid4())
+    logfire.info('api.account.stream.request', account=account_slug, instance=instance_slug, message_preview=message_preview, request_id=request_id)
     
-    # ========================================================================
-    # STEP 1: LOAD AGENT INSTANCE
-    # ========================================================================
+    stream_config = load_config().get("chat", {}).get("stream", {})
+    progress_events = bool(stream_config.get("progress_events", False))
+    coalesce_settings = CoalesceSettings.from_config(stream_config)
+    replay_settings = ReplaySettings.from_config(stream_config)
     
-    try:
-        instance = await load_agent_instance(account_slug, instance_slug)
-        logfire.debug('api.account.stream.instance_loaded', instance_id=str(instance.id), agent_type=instance.agent_type, display_name=instance.display_name)
-    except ValueError as e:
-        logfire.warn('api.account.stream.instance_not_found', account=account_slug, instance=instance_slug, error=str(e))
-        raise HTTPException(status_code=404, detail=f"Agent instance not found: {account_slug}/{instance_slug}")
-    except Exception as e:
-        logfire.exception('api.account.stream.instance_load_failed', account=account_slug, instance=instance_slug, error=str(e), error_type=type(e).__name__)
-        raise HTTPException(status_code=500, detail="Failed to load agent instance")
+    def watch_disconnect(body, response_id: str):
+        # Closing the generation on disconnect stops upstream token billing; with
+        # replay enabled this only ends the subscription and the buffer decides
+        # (after abandon_grace_seconds) whether to cancel the generation
+        if not stream_config.get("cancel_on_disconnect", True):
+            return body
+        return cancel_on_disconnect(
+            body,
+            request.is_disconnected,
+            poll_interval_ms=int(stream_config.get("disconnect_poll_ms", 500)),
+            log_context={"request_id": response_id, "account": account_slug, "instance": instance_slug}
+        )
+    sse_headers = {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+        "X-Accel-Buffering": "no",  # Disable nginx buffering
+    }
     
     # ========================================================================
-    # STEP 2: GET/CREATE SESSION WITH CONTEXT UPDATE
+    # RESUME: RECONNECT WITH Last-Event-ID REPLAYS / ATTACHES INSTEAD OF RE-RUNNING
     # ========================================================================
     
-    session = get_current_session(request)
-    
-    # BUG-0026-0003 FIX: Create session if it doesn't exist (user is actively chatting)
-    # This is different from read-only endpoints (metadata/history) which don't create sessions
-    if not session:
-        from ..services.session_service import SessionService
-        from ..models.session import Session
-        from datetime import datetime, timezone
-        import secrets
-        import string
-        
-        logfire.info('api.account.stream.creating_session', account=account_slug, instance=instance_slug)
-        
-        async with get_database_service().get_session() as db_session:
-            # Generate secure session key
-            alphabet = string.ascii_letters + string.digits + "-_"
-            session_key = ''.join(secrets.choice(alphabet) for _ in range(32))
-            
-            # Create session WITH account/agent context from the start
-            session = Session(
-                session_key=session_key,
-                account_id=instance.account_id,
-                account_slug=instance.account_slug,
-                agent_instance_id=instance.id,
-                agent_instance_slug=instance.instance_slug,
-                email=None,
-                is_anonymous=True,
-                created_at=datetime.now(timezone.utc),
-                last_activity_at=datetime.now(timezone.utc),
-                meta={}
-            )
-            
-            db_session.add(session)
-            await db_session.commit()
-            await db_session.refresh(session)
-            
-            # Store in request state for this request
-            request.state.session = session
-            
-            logfire.info(
-                'api.account.stream.session_created',
-                session_id=str(session.id),
-                account_id=str(session.account_id),
-                agent_instance_id=str(session.agent_instance_id)
-            )
-    
-    session_key_prefix = session.session_key[:8] + "..." if session.session_key else None
-    account_id_str = str(session.account_id) if session.account_id else None
-    logfire.debug('api.account.stream.session_retrieved', session_id=str(session.id), session_key_prefix=session_key_prefix, account_id=account_id_str)
-    
-    # Update session context if NULL (progressive context flow)
-    if session.account_id is None:
-        from ..services.session_service import SessionService
-        from sqlalchemy import select
-        from ..models.session import Session
-        
-        async with get_database_service().get_session() as db_session:
-            session_service = SessionService(db_session)
-            await session_service.update_session_context(
-                session_id=session.id,
-                account_id=instance.account_id,
-                account_slug=instance.account_slug,
-                agent_instance_id=instance.id,
-                agent_instance_slug=instance.instance_slug
-            )
-            
-            # Reload session from database to get fresh values
-            # This ensures we have the committed values from update_session_context()
-            stmt = select(Session).where(Session.id == session.id)
-            result = await db_session.execute(stmt)
-            fresh_session = result.scalar_one()
-            
-            # Update request state with fresh session object
-            # This prevents middleware from overwriting with stale detached object
-            request.state.session = fresh_session
-            session = fresh_session
-            
-        logfire.info(
-            'api.account.stream.session_context_updated',
-            session_id=str(session.id),
-            account_id=str(session.account_id),
-            agent_instance_id=str(session.agent_instance_id)
+    resume_from = parse_event_id(request.headers.get("last-event-id") or last_event_id) if replay_settings.enabled else None
+    if resume_from is not None:
+        response_id, after_seq = resume_from
+        resume_session = get_current_session(request)
+        logfire.info('api.account.stream.resume', response_id=response_id, after_seq=after_seq, account=account_slug, instance=instance_slug)
+        return StreamingResponse(
+            watch_disconnect(
+                get_stream_replay_registry(replay_settings).resume(
+                    response_id,
+                    str(resume_session.id) if resume_session else None,
+                    after_seq
+                ),
+                response_id
+            ),
+            media_type="text/event-stream",
+            headers={**sse_headers, "X-Request-ID": response_id}
         )
     
     # ========================================================================
-    # STEP 3: LOAD CONVERSATION HISTORY
+    # STEPS 1-3: BOOTSTRAP (DEFERRED INTO THE STREAM WHEN POSSIBLE)
     # ========================================================================
     
-    # Get history_limit from instance config
-    context_management = instance.config.get("context_management", {})
-    history_limit = context_management.get("history_limit", 50)
+    # An existing session only needs its id for the `start` event, so instance/history
+    # loading is deferred into the generator and headers go out immediately.
+    # New and legacy (no account context) sessions are bootstrapped before we return:
+    # the session middleware sets the cookie and persists request.state.session right
+    # after the endpoint returns, i.e. before the generator runs.
+    bootstrap = None
+    current_session = get_current_session(request)
+    if current_session is None or current_session.account_id is None:
+        try:
+            bootstrap = await bootstrap_chat(request, account_slug, instance_slug, log_scope="stream")
+        except ValueError as e:
+            # Account or instance not found
+            logfire.warn('api.account.stream.instance_not_found', account=account_slug, instance=instance_slug, error=str(e))
+            raise HTTPException(status_code=404, detail=f"Agent instance not found: {account_slug}/{instance_slug}")
+        except Exception as e:
+            logfire.exception('api.account.stream.instance_load_failed', account=account_slug, instance=instance_slug, error=str(e), error_type=type(e).__name__)
+            raise HTTPException(status_code=500, detail="Failed to load agent instance")
+        session_id = bootstrap.session_id
+    else:
+        session_id = str(current_session.id)
     
-    # Load conversation history for this session
-    from ..services.agent_session import load_agent_conversation
-    message_history = await load_agent_conversation(
-        session_id=str(session.id),
-        max_messages=history_limit
-    )
+    # Fail fast (before any bytes are sent) when the account's admission queue is full;
+    # the turn itself is admitted (and may queue) inside the generator
+    try:
+        get_admission_controller().check(
+            account_slug, AdmissionSettings.resolve(load_config(), bootstrap.instance_config if bootstrap else None)
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     
-    logfire.debug('api.account.stream.history_loaded', session_id=str(session.id), history_count=len(message_history), history_limit=history_limit)
+    def error_sse(error_message: str, status: int) -> bytes:
+        return encode_sse("error", json.dumps({"message": error_message, "status": status, "request_id": request_id}))
     
     # ========================================================================
     # STEP 4: STREAMING GENERATOR FUNCTION
     # ========================================================================
     
     async def event_generator():
-        """Generate SSE events from agent stream."""
-        agent_type = instance.agent_type
+        """Generate SSE events: start first, then setup, then agent stream."""
+        nonlocal bootstrap
+        agent_type = None
+        
+        # Flushed before any agent setup so time-to-first-byte doesn't include it
+        yield encode_sse("start", json.dumps({"session_id": session_id, "request_id": request_id}))
         
         try:
+            if bootstrap is None:
+                try:
+                    bootstrap = await bootstrap_chat(request, account_slug, instance_slug, log_scope="stream")
+                except ValueError as e:
+                    logfire.warn('api.account.stream.instance_not_found', account=account_slug, instance=instance_slug, error=str(e), request_id=request_id)
+                    yield error_sse(f"Agent instance not found: {account_slug}/{instance_slug}", 404)
+                    return
+                except Exception as e:
+                    logfire.exception('api.account.stream.instance_load_failed', account=account_slug, instance=instance_slug, error=str(e), error_type=type(e).__name__, request_id=request_id)
+                    yield error_sse("Failed to load agent instance", 500)
+                    return
+            
+            if progress_events:
+                yield encode_sse("progress", json.dumps({"stage": "context_loaded", "history_count": len(bootstrap.history)}))
+            
+            instance = bootstrap.instance
+            agent_type = instance.agent_type
+            
+            # Opt-in response cache: a repeated first question is sent as one message frame
+            cached = await get_response_cache().lookup(bootstrap, message)
+            if cached is not None:
+                await get_response_cache().record_hit(bootstrap, message, cached)
+                logfire.info('api.account.stream.response_cached', session_id=session_id, account=account_slug, instance=instance_slug, request_id=request_id)
+                yield encode_sse("message", cached.response)
+                yield encode_sse("done", "")
+                return
+            
             if agent_type == "simple_chat":
                 # Import streaming function
                 from ..agents.simple_chat import simple_chat_stream
                 
-                # Build complete instance config with system_prompt
-                full_instance_config = instance.config.copy()
-                if instance.system_prompt:
-                    full_instance_config['system_prompt'] = instance.system_prompt
+                admission_settings = AdmissionSettings.resolve(load_config(), bootstrap.instance_config)
+                
+                async def agent_events():
+                    # Admission is held for the whole run; queued turns wait here (after `start` was sent)
+                    try:
+                        async with get_admission_controller().admit(account_slug, bootstrap.requested_model, admission_settings):
+                            # instance.id and instance.account_id are already Python UUID primitives (converted in load_agent_instance)
+                            # No conversion needed - they're safe to pass directly to simple_chat_stream and Logfire
+                            async for event in simple_chat_stream(
+                                message=message,
+                                session_id=session_id,
+                                agent_instance_id=instance.id,  # Multi-tenant: pass agent instance ID (already Python UUID from dataclass)
+                                account_id=instance.account_id,  # Multi-tenant: pass account ID (already Python UUID from dataclass)
+                                bootstrap=bootstrap,
+                                progress_events=progress_events
+                            ):
+                                yield event
+                    except AdmissionRejected as e:
+                        yield {"event": "error", "data": json.dumps({"message": str(e), "status": 429, "retry_after": e.retry_after})}
+                
+                # Identical concurrent first turns share one generation (chat.singleflight)
+                flight_key = None
+                if singleflight_enabled(load_config(), bootstrap.instance_config):
+                    flight_key = get_singleflight().key(bootstrap, message, "stream")
+                if flight_key is None:
+                    events = agent_events()
+                else:
+                    events, _ = get_singleflight().stream(flight_key, bootstrap, message, agent_events)
                 
-                # instance.id and instance.account_id are already Python UUID primitives (converted in load_agent_instance)
-                # No conversion needed - they're safe to pass directly to simple_chat_stream and Logfire
-                async for event in simple_chat_stream(
-                    message=message,
-                    session_id=str(session.id),
-                    agent_instance_id=instance.id,  # Multi-tenant: pass agent instance ID (already Python UUID from dataclass)
-                    account_id=instance.account_id,  # Multi-tenant: pass account ID (already Python UUID from dataclass)
-                    message_history=message_history,
-                    instance_config=full_instance_config
-                ):
-                    # Format as SSE
-                    event_type = event.get("event", "message")
-                    event_data = event.get("data", "")
-                    
-                    # SSE format: "event: <type>\ndata: <data>\n\n"
-                    # For multi-line data, each line must be prefixed with "data: "
-                    if '\n' in event_data:
-                        # Split lines and prefix each with "data: "
-                        data_lines = event_data.split('\n')
-                        formatted_data = '\n'.join(f"data: {line}" for line in data_lines)
-                        yield f"event: {event_type}\n{formatted_data}\n\n"
-                    else:
-                        yield f"event: {event_type}\ndata: {event_data}\n\n"
+                # Text deltas are merged into larger pre-encoded frames (chat.stream.coalesce)
+                async for frame in coalesce_sse_events(events, coalesce_settings):
+                    yield frame
                 
             # Future agent types can be added here:
             # elif agent_type == "sales_agent":
             #     from ..agents.sales_agent import sales_agent_stream
-            #     async for event in sales_agent_stream(...):
-            #         yield f"event: {event['event']}\ndata: {event['data']}\n\n"
+            #     async for frame in coalesce_sse_events(sales_agent_stream(...), coalesce_settings):
+            #         yield frame
             
             else:
                 logfire.error('api.account.stream.unknown_agent_type', agent_type=agent_type, instance=instance_slug)
-                error_data = json.dumps({"message": f"Unknown agent type: {agent_type}"})
-                yield f"event: error\ndata: {error_data}\n\n"
+                yield error_sse(f"Unknown agent type: {agent_type}", 400)
                 
         except Exception as e:
-            logfire.exception('api.account.stream.streaming_exception', session_id=str(session.id), agent_type=agent_type, error=str(e), error_type=type(e).__name__)
-            error_data = json.dumps({"message": f"Streaming failed: {str(e)}"})
-            yield f"event: error\ndata: {error_data}\n\n"
+            logfire.exception('api.account.stream.streaming_exception', session_id=session_id, agent_type=agent_type, error=str(e), error_type=type(e).__name__, request_id=request_id)
+            yield error_sse(f"Streaming failed: {str(e)}", 500)
     
     # ========================================================================
     # STEP 5: RETURN STREAMING RESPONSE
     # ========================================================================
     
-    logfire.info('api.account.stream.initiated', session_id=str(session.id), account=account_slug, instance=instance_slug)
+    logfire.info('api.account.stream.initiated', session_id=session_id, account=account_slug, instance=instance_slug, request_id=request_id, resumable=replay_settings.enabled)
+    
+    if replay_settings.enabled:
+        # Generation runs in its own task and writes numbered frames into the replay
+        # buffer; this connection is just the first subscriber
+        import asyncio
+        replay_buffer = get_stream_replay_registry(replay_settings).create(request_id, session_id)
+        replay_buffer.producer = asyncio.create_task(replay_buffer.produce(event_generator()))
+        
+        async def live_frames():
+            # The producer doesn't wait for slow clients; one that falls more than
+            # max_frames behind can't be served (nor resumed) from the buffer
+            try:
+                async for frame in replay_buffer.subscribe(0):
+                    yield frame
+            except ReplayGapError as e:
+                logfire.warn('api.account.stream.replay_gap', request_id=request_id, session_id=session_id, error=str(e))
+                yield error_sse("Stream fell behind the replay buffer; please retry", 410)
+        
+        body = live_frames()
+    else:
+        body = event_generator()
     
     return StreamingResponse(
-        event_generator(),
+        watch_disconnect(body, request_id),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"  # Disable nginx buffering
-        }
+        headers={**sse_headers, "X-Request-ID": request_id}
     )
 
 
@@ -1140,3 +1132,109 @@ async def metadata_endpoint(
             detail=f"Failed to retrieve agent instance metadata: {str(e)}"
         )
 
+
+# ============================================================================
+# DIRECTORY FACETS ENDPOINT
+# ============================================================================
+
+@router.get(
+    "/{account_slug}/agents/{instance_slug}/directories/{list_name}/facets",
+    response_model=DirectoryFacetsResponse
+)
+async def directory_facets_endpoint(
+    account_slug: str = Path(..., description="Account identifier slug"),
+    instance_slug: str = Path(..., description="Agent instance identifier slug"),
+    list_name: str = Path(..., description="Directory list name"),
+    field: Optional[List[str]] = Query(None, description="Facet fields to return (default: all of the list's)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Most frequent values per field (default: all)")
+) -> DirectoryFacetsResponse:
+    """
+    Get value counts of a directory list's facet fields ("browse by department / language").
+    
+    Counts come from directory_facet_counts (trigger-maintained, see
+    services/directory_facets.py), cached per worker until the account's
+    directory data changes. Only lists in the instance's
+    tools.directory.accessible_lists are served.
+    
+    Args:
+        account_slug: Account identifier from URL path
+        instance_slug: Agent instance identifier from URL path
+        list_name: Directory list name from URL path
+        field: Optional facet fields (repeatable query parameter)
+        limit: Optional cap on values per field
+        
+    Returns:
+        DirectoryFacetsResponse with values per field, most frequent first
+        
+    Raises:
+        HTTPException: 404 if account/instance/list not found or list not accessible
+        HTTPException: 400 if a requested field is not a facet field of the list
+        HTTPException: 500 for unexpected errors
+    """
+    logfire.info('api.account.facets.request', account=account_slug, instance=instance_slug, list_name=list_name)
+    
+    try:
+        instance = await load_agent_instance(account_slug, instance_slug)
+        
+        directory_config = (instance.config or {}).get("tools", {}).get("directory", {})
+        if list_name not in directory_config.get("accessible_lists", []):
+            logfire.warn('api.account.facets.list_not_accessible', account=account_slug, instance=instance_slug, list_name=list_name)
+            raise HTTPException(
+                status_code=404,
+                detail=f"Directory '{list_name}' not found for agent instance '{instance_slug}'"
+            )
+        
+        db_service = get_database_service()
+        async with db_service.get_session() as session:
+            directory = await get_directory_catalog().get(session, instance.account_id, list_name)
+            if directory is None:
+                logfire.warn('api.account.facets.list_not_found', account=account_slug, instance=instance_slug, list_name=list_name)
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Directory '{list_name}' not found for agent instance '{instance_slug}'"
+                )
+            
+            unknown = [name for name in field or () if name not in directory.facet_fields]
+            if unknown:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Not a facet field of '{list_name}': {', '.join(unknown)}. "
+                           f"Facet fields: {', '.join(directory.facet_fields) or 'none'}"
+                )
+            
+            facets = await get_directory_facets().get(
+                session, instance.account_id, directory.list_id, directory.facet_fields
+            )
+        
+        facets = top_facets(facets, fields=field or directory.facet_fields, limit=limit)
+        logfire.info(
+            'api.account.facets.retrieved',
+            account=account_slug,
+            instance=instance_slug,
+            list_name=list_name,
+            fields=len(facets)
+        )
+        
+        return DirectoryFacetsResponse(
+            list_name=list_name,
+            entry_type=directory.entry_type,
+            entry_count=directory.entry_count,
+            facets=facets_to_dict(facets)
+        )
+        
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
+    except ValueError as e:
+        # ValueError from load_agent_instance means invalid/nonexistent account/instance
+        logfire.warn('api.account.facets.invalid_account_instance', account_slug=account_slug, instance_slug=instance_slug, error=str(e))
+        raise HTTPException(
+            status_code=404,
+            detail=f"Agent instance '{instance_slug}' not found for account '{account_slug}'"
+        )
+    except Exception as e:
+        logfire.exception('api.account.facets.error', account=account_slug, instance=instance_slug, error=str(e), error_type=type(e).__name__)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve directory facets: {str(e)}"
+        )
@@ -14,6 +14,7 @@ from sqlalchemy.orm import selectinload
 import logfire
 
 from ..models.session import Session
+from ..models.session_stats import SessionStats
 from ..models.message import Message
 from ..models.llm_request import LLMRequest
 from ..database import get_database_service
@@ -32,24 +33,22 @@ async def list_sessions(
     """
     List sessions with optional filtering by account or agent.
     
-    Returns paginated list of sessions with message counts for debugging.
+    Returns paginated list of sessions with message counts, tokens and cost
+    (from the session_stats counters) for debugging.
     """
     db_service = get_database_service()
     
     async with db_service.get_session() as db_session:
         try:
             # Build query with optional filters and eager load relationships
+            # Counters come from session_stats (trigger-maintained) - no per-request COUNT over messages
             query = (
-                select(
-                    Session,
-                    func.count(Message.id).label('message_count')
-                )
+                select(Session, SessionStats)
                 .options(
                     selectinload(Session.account),
                     selectinload(Session.agent_instance)
                 )
-                .outerjoin(Message, Message.session_id == Session.id)
-                .group_by(Session.id)
+                .outerjoin(SessionStats, SessionStats.session_id == Session.id)
             )
             
             # Apply filters
@@ -60,7 +59,7 @@ async def list_sessions(
             if agent:
                 query = query.where(Session.agent_instance_slug == agent)
             
-            # Count total matching records
+            # Count total matching records (the stats join is 1:1)
             count_query = select(func.count()).select_from(query.subquery())
             total_result = await db_session.execute(count_query)
             total = total_result.scalar()
@@ -73,14 +72,18 @@ async def list_sessions(
             
             # Format response
             sessions_list = []
-            for session, message_count in sessions_with_counts:
+            for session, stats in sessions_with_counts:
                 sessions_list.append({
                     "id": str(session.id),
                     # Use denormalized slug fields directly (handles NULL relationship gracefully)
                     "account_slug": session.account_slug,
                     "agent_instance_slug": session.agent_instance_slug,
                     "created_at": session.created_at.isoformat(),
-                    "message_count": message_count
+                    "message_count": stats.message_count if stats else 0,
+                    "message_breakdown": dict(stats.role_counts or {}) if stats else {},
+                    "last_message_at": stats.last_message_at.isoformat() if stats and stats.last_message_at else None,
+                    "total_tokens": stats.total_tokens if stats else 0,
+                    "total_cost": float(stats.total_cost or 0) if stats else 0.0
                 })
             
             logfire.info(
@@ -13,6 +13,7 @@ Key Features:
 
 Models:
 - Session: Browser session tracking and user continuity
+- SessionStats: Trigger-maintained per-session counters
 - Message: Complete chat history with role-based messages
 - LLMRequest: LLM usage tracking for cost analysis
 - Profile: Incremental customer profile data collection
@@ -26,21 +27,24 @@ Base = declarative_base()
 
 # Import all models to make them available
 from .session import Session
+from .session_stats import SessionStats
 from .message import Message
 from .llm_request import LLMRequest
 from .profile import Profile
 from .account import Account
 from .agent_instance import AgentInstanceModel
-from .directory import DirectoryList, DirectoryEntry
+from .directory import DirectoryList, DirectoryEntry, DirectoryFacetCount
 
 __all__ = [
     "Base",
     "Session", 
+    "SessionStats",
     "Message",
     "LLMRequest", 
     "Profile",
     "Account",
     "AgentInstanceModel",
     "DirectoryList",
-    "DirectoryEntry"
+    "DirectoryEntry",
+    "DirectoryFacetCount"
 ]
@@ -7,10 +7,11 @@ SQLAlchemy models for the multi-purpose directory service.
 Models:
     DirectoryList: Account-level collections (doctors, drugs, products, etc.)
     DirectoryEntry: Individual entries within directory lists
+    DirectoryFacetCount: Per-list value counts of facet fields (trigger-maintained)
 """
 from __future__ import annotations
 
-from sqlalchemy import Column, String, ARRAY, Text, TIMESTAMP, ForeignKey, func
+from sqlalchemy import BigInteger, Column, Integer, String, ARRAY, Text, TIMESTAMP, ForeignKey, func, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from datetime import datetime
@@ -41,6 +42,19 @@ class DirectoryList(Base):
     list_description: Mapped[Optional[str]] = mapped_column(Text)
     entry_type: Mapped[str] = mapped_column(String, nullable=False, index=True)
     schema_file: Mapped[Optional[str]] = mapped_column(String)
+    # entry_data fields mirrored into DirectoryEntry.filter_data (from the schema, set on seeding)
+    filter_fields: Mapped[Optional[List[str]]] = mapped_column(ARRAY(String), nullable=True)
+    # {entry_data field: A-D} composing DirectoryEntry.search_vector (from the schema, set on seeding)
+    search_weights: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    # entry_data fields (or "tags") counted in DirectoryFacetCount (from the schema, set on seeding)
+    facet_fields: Mapped[Optional[List[str]]] = mapped_column(ARRAY(String), nullable=True)
+    # Trigger-maintained: entry count, and a change version bumped on every update of the list
+    entry_count: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("nextval('directory_lists_version_seq')"),
+        nullable=False
+    )
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), 
         default=func.now()
@@ -68,7 +82,7 @@ class DirectoryList(Base):
             "list_description": self.list_description,
             "entry_type": self.entry_type,
             "schema_file": self.schema_file,
-            "entry_count": len(self.entries) if self.entries else 0,
+            "entry_count": self.entry_count or 0,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -100,6 +114,8 @@ class DirectoryEntry(Base):
     contact_info: Mapped[dict] = mapped_column(JSONB, default=dict)
     entry_data: Mapped[dict] = mapped_column(JSONB, default=dict)
     search_vector: Mapped[Optional[str]] = mapped_column(TSVECTOR, nullable=True)
+    # Normalized filterable fields, maintained by trigger (see services/directory_filters.py)
+    filter_data: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), 
         default=func.now()
@@ -126,3 +142,20 @@ class DirectoryEntry(Base):
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
+
+class DirectoryFacetCount(Base):
+    """Number of entries in a directory list having a facet field value.
+    
+    Maintained by statement-level triggers on directory_entries (migration
+    b9c0d1e2f3a4) for the list's facet_fields; read by services/directory_facets.py.
+    """
+    __tablename__ = "directory_facet_counts"
+    
+    directory_list_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("directory_lists.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    field: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[str] = mapped_column(String, primary_key=True)
+    entry_count: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -39,6 +39,7 @@ class LLMRequest(Base):
     - model: Model identifier for cost calculation
     - request_body/response_body: Sanitized request/response data
     - Token usage: prompt_tokens, completion_tokens, total_tokens
+    - Prompt caching: cache_read_tokens, cache_write_tokens
     - Cost tracking: unit costs and computed total cost
     - Performance: latency_ms for monitoring
     
@@ -86,6 +87,10 @@ class LLMRequest(Base):
     completion_tokens = Column(Integer, nullable=True) 
     total_tokens = Column(Integer, nullable=True)
     
+    # Provider prompt caching (subset of prompt_tokens)
+    cache_read_tokens = Column(Integer, nullable=True, comment="Prompt tokens served from the provider prompt cache")
+    cache_write_tokens = Column(Integer, nullable=True, comment="Prompt tokens written to the provider prompt cache")
+    
     # Cost tracking - actual costs from LLM provider (e.g., OpenRouter)
     # Stored as NUMERIC(12, 8) for high precision (handles costs like $0.0000408)
     prompt_cost = Column(Numeric(12, 8), nullable=True)  # Cost for prompt/input tokens (e.g., 0.0000408)
@@ -131,6 +136,8 @@ class LLMRequest(Base):
             "prompt_tokens": self.prompt_tokens,
             "completion_tokens": self.completion_tokens,
             "total_tokens": self.total_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
             "prompt_cost": float(self.prompt_cost) if self.prompt_cost else None,
             "completion_cost": float(self.completion_cost) if self.completion_cost else None,
             "total_cost": float(self.total_cost) if self.total_cost else None,
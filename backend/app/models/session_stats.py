@@ -0,0 +1,70 @@
+"""
+SessionStats model for O(1) per-session counters.
+
+Rows are maintained by database triggers on messages (count by role, last
+message time) and llm_requests (request count, tokens, cost), see migration
+c4d5e6f7a8b9. Application code only reads them: session stats and the admin
+session listing no longer count or scan messages per request.
+"""
+"""
+Copyright (c) 2025 Ape4, Inc. All rights reserved.
+Unauthorized copying of this file is strictly prohibited.
+"""
+
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class SessionStats(Base):
+    """
+    Incremental message and usage counters for one session (trigger-maintained).
+    
+    Attributes:
+        session_id: Session these counters belong to (primary key)
+        message_count: Total messages in the session
+        role_counts: Message count by role, e.g. {"human": 3, "assistant": 3}
+        last_message_at: Timestamp of the latest message
+        llm_request_count: LLM requests tracked for the session
+        total_tokens: Sum of llm_requests.total_tokens
+        total_cost: Sum of llm_requests.total_cost (USD)
+        last_llm_request_at: Timestamp of the latest LLM request
+    """
+    
+    __tablename__ = "session_stats"
+    
+    session_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("sessions.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    message_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    role_counts: Mapped[Dict[str, int]] = mapped_column(JSONB, nullable=False, default=dict)
+    last_message_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    llm_request_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    total_cost: Mapped[Decimal] = mapped_column(Numeric(14, 8), nullable=False, default=0)
+    last_llm_request_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert counters to a JSON-serializable dictionary."""
+        return {
+            "session_id": str(self.session_id),
+            "message_count": self.message_count or 0,
+            "role_counts": dict(self.role_counts or {}),
+            "last_message_at": self.last_message_at.isoformat() if self.last_message_at else None,
+            "llm_request_count": self.llm_request_count or 0,
+            "total_tokens": self.total_tokens or 0,
+            "total_cost": float(self.total_cost or 0),
+            "last_llm_request_at": self.last_llm_request_at.isoformat() if self.last_llm_request_at else None
+        }
+    
+    def __repr__(self) -> str:
+        return f"<SessionStats(session_id={self.session_id}, messages={self.message_count}, tokens={self.total_tokens})>"
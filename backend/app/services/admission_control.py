@@ -0,0 +1,353 @@
+"""
+Admission control for agent runs (per account and per upstream model).
+
+Nothing else limits how many agent.run / run_stream calls one tenant can start;
+a burst from one widget can exhaust the DB pool and the OpenRouter rate limits
+for everyone. Every chat turn passes through two limiters before the agent
+runs: one for its account and one for its upstream model.
+
+Each limiter combines:
+- Token bucket: rate_per_second sustained, burst short-term (0 = unlimited)
+- Concurrency cap: max_concurrent runs in flight (0 = unlimited)
+- Bounded wait queue: up to max_queue turns wait up to max_wait_ms for capacity,
+  admitted in arrival order (freed capacity is handed to the oldest waiter)
+
+A turn that can't be admitted raises AdmissionRejected with a Retry-After
+estimate; the endpoints turn it into HTTP 429 (or an SSE error with status 429
+once a stream has started).
+
+Metrics (logfire):
+- admission.queue_wait_ms (histogram) - time spent waiting for admission
+- admission.rejected (counter) - rejections, attributes scope and reason
+- admission.in_flight (up-down counter) - admitted runs in progress
+
+Configuration:
+    app.yaml:
+        chat:
+          admission:
+            enabled: false
+            account: {rate_per_second: 2, burst: 10, max_concurrent: 8, max_queue: 20, max_wait_ms: 5000}
+            model: {rate_per_second: 10, burst: 30, max_concurrent: 40, max_queue: 100, max_wait_ms: 5000}
+
+    Instance config.yaml (overrides for the instance's account / model):
+        admission:
+          account: {max_concurrent: 4}
+
+Notes:
+- Off by default; enable once the limits are sized for the deployment's traffic
+- Limits are enforced per worker process
+- Limiters shared by several instances use the most recently applied limits
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Mapping, Optional
+
+import logfire
+
+_queue_wait_ms = logfire.metric_histogram('admission.queue_wait_ms', unit='ms', description='Time chat turns waited for admission')
+_rejected = logfire.metric_counter('admission.rejected', description='Chat turns rejected by admission control')
+_in_flight = logfire.metric_up_down_counter('admission.in_flight', description='Admitted agent runs in progress')
+
+
+class AdmissionRejected(Exception):
+    """Raised when a turn can't be admitted (queue full or wait deadline passed)."""
+
+    def __init__(self, scope: str, key: str, reason: str, retry_after: int):
+        super().__init__(f"Too many requests for {scope} '{key}' ({reason}); retry after {retry_after}s")
+        self.scope = scope
+        self.key = key
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class Limits:
+    """Limits of one limiter (0 = unlimited for rate and concurrency)."""
+    rate_per_second: float = 0.0
+    burst: int = 1
+    max_concurrent: int = 0
+    max_queue: int = 0
+    max_wait_ms: int = 5000
+
+    @classmethod
+    def from_dict(cls, data: Optional[Mapping[str, Any]]) -> "Limits":
+        data = data or {}
+        return cls(
+            rate_per_second=float(data.get("rate_per_second", cls.rate_per_second)),
+            burst=max(1, int(data.get("burst", cls.burst))),
+            max_concurrent=int(data.get("max_concurrent", cls.max_concurrent)),
+            max_queue=int(data.get("max_queue", cls.max_queue)),
+            max_wait_ms=int(data.get("max_wait_ms", cls.max_wait_ms))
+        )
+
+
+@dataclass(frozen=True)
+class AdmissionSettings:
+    """Effective admission settings for one instance."""
+    enabled: bool = False
+    account: Limits = Limits()
+    model: Limits = Limits()
+
+    @classmethod
+    def resolve(cls, app_config: Mapping[str, Any], instance_config: Optional[Mapping[str, Any]] = None) -> "AdmissionSettings":
+        """
+        Merge chat.admission from app.yaml with the instance's admission overrides.
+
+        Args:
+            app_config: Loaded app.yaml
+            instance_config: Instance config (optional `admission` section)
+
+        Returns:
+            AdmissionSettings
+        """
+        base = ((app_config or {}).get("chat", {}) or {}).get("admission", {}) or {}
+        override = (instance_config or {}).get("admission", {}) or {}
+        return cls(
+            enabled=bool(override.get("enabled", base.get("enabled", cls.enabled))),
+            account=Limits.from_dict({**(base.get("account") or {}), **(override.get("account") or {})}),
+            model=Limits.from_dict({**(base.get("model") or {}), **(override.get("model") or {})})
+        )
+
+
+class Limiter:
+    """
+    Token bucket + concurrency cap + bounded wait queue for one key.
+    """
+
+    def __init__(self, scope: str, key: str, limits: Limits):
+        self.scope = scope
+        self.key = key
+        self.limits = limits
+        self.tokens = float(limits.burst)
+        self.updated = time.monotonic()
+        self.active = 0
+        self.waiting = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self, now: float) -> None:
+        if self.limits.rate_per_second > 0:
+            self.tokens = min(float(self.limits.burst), self.tokens + (now - self.updated) * self.limits.rate_per_second)
+        self.updated = now
+
+    def _token_wait(self, now: float) -> float:
+        """Seconds until a token is available (0 = available now)."""
+        if self.limits.rate_per_second <= 0:
+            return 0.0
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.limits.rate_per_second
+
+    def _slot_free(self) -> bool:
+        return self.limits.max_concurrent <= 0 or self.active < self.limits.max_concurrent
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait before retrying."""
+        token_wait = self._token_wait(time.monotonic())
+        if not self._slot_free():
+            token_wait = max(token_wait, self.limits.max_wait_ms / 1000)
+        return max(1, math.ceil(token_wait))
+
+    def would_reject(self) -> bool:
+        """True if a new turn would be rejected right away (queue full, no capacity now)."""
+        available = self._capacity_now() and not self._waiters
+        return not available and self.waiting >= self.limits.max_queue
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        _rejected.add(1, {"scope": self.scope, "reason": reason})
+        logfire.warn('service.admission.rejected', scope=self.scope, key=self.key, reason=reason, active=self.active, waiting=self.waiting)
+        return AdmissionRejected(self.scope, self.key, reason, self.retry_after())
+
+    def _capacity_now(self) -> bool:
+        """True if a slot and a token are available right now."""
+        return self._slot_free() and self._token_wait(time.monotonic()) == 0
+
+    def _take(self) -> None:
+        """Consume a token and a slot."""
+        if self.limits.rate_per_second > 0:
+            self.tokens -= 1
+        self.active += 1
+
+    def _give_back(self) -> None:
+        """Return a token and a slot granted to a turn that didn't use them."""
+        if self.limits.rate_per_second > 0:
+            self.tokens = min(float(self.limits.burst), self.tokens + 1)
+        self.active = max(0, self.active - 1)
+        self._dispatch()
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """
+        Hand free capacity to queued turns, oldest first.
+
+        Capacity is taken on the waiter's behalf before it is woken, so a new
+        arrival can't take it first. If only a token is missing, a timer
+        dispatches again once the bucket has refilled.
+        """
+        while self._waiters:
+            waiter = self._waiters[0]
+            if waiter.done():
+                # Timed out or cancelled; skip it
+                self._waiters.popleft()
+                continue
+            if not self._slot_free():
+                return
+            token_wait = self._token_wait(time.monotonic())
+            if token_wait > 0:
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(token_wait, self._on_timer)
+                return
+            self._waiters.popleft()
+            self._take()
+            waiter.set_result(None)
+
+    async def acquire(self) -> None:
+        """
+        Wait for a token and a concurrency slot (FIFO behind queued turns).
+
+        Raises:
+            AdmissionRejected: Queue full, or not admitted within max_wait_ms
+        """
+        if self.would_reject():
+            raise self._reject("queue_full")
+
+        # New arrivals don't overtake turns that are already queued
+        if not self._waiters and self._capacity_now():
+            self._take()
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.waiting += 1
+        try:
+            self._dispatch()
+            done, _ = await asyncio.wait((waiter,), timeout=self.limits.max_wait_ms / 1000)
+            if not done:
+                waiter.cancel()
+                raise self._reject("wait_timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted but cancelled before it could run: pass the capacity on
+                self._give_back()
+            waiter.cancel()
+            raise
+        finally:
+            self.waiting -= 1
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        """Free a concurrency slot and hand it to the oldest waiter."""
+        self.active = max(0, self.active - 1)
+        self._dispatch()
+
+
+class AdmissionController:
+    """
+    Per-account and per-model limiters for this worker.
+    """
+
+    def __init__(self):
+        self._limiters: Dict[tuple, Limiter] = {}
+
+    def _limiter(self, scope: str, key: str, limits: Limits) -> Limiter:
+        limiter = self._limiters.get((scope, key))
+        if limiter is None:
+            limiter = self._limiters[(scope, key)] = Limiter(scope, key, limits)
+        elif limiter.limits != limits:
+            limiter.limits = limits
+        return limiter
+
+    def check(self, account: str, settings: AdmissionSettings, model: Optional[str] = None) -> None:
+        """
+        Fail fast without queueing (used before a stream response is started).
+
+        Raises:
+            AdmissionRejected: If the account (or model) queue is already full
+        """
+        if not settings.enabled:
+            return
+        checks = [("account", account, settings.account)]
+        if model:
+            checks.append(("model", model, settings.model))
+        for scope, key, limits in checks:
+            limiter = self._limiter(scope, key, limits)
+            if limiter.would_reject():
+                raise limiter._reject("queue_full")
+
+    @asynccontextmanager
+    async def admit(self, account: str, model: str, settings: AdmissionSettings) -> AsyncIterator[float]:
+        """
+        Hold an admission for one agent run.
+
+        Args:
+            account: Account slug
+            model: Upstream model id
+            settings: Effective admission settings
+
+        Yields:
+            Milliseconds spent waiting for admission
+
+        Raises:
+            AdmissionRejected: If the turn can't be admitted
+        """
+        if not settings.enabled:
+            yield 0.0
+            return
+
+        started = time.monotonic()
+        account_limiter = self._limiter("account", account, settings.account)
+        model_limiter = self._limiter("model", model, settings.model)
+        await account_limiter.acquire()
+        try:
+            await model_limiter.acquire()
+        except BaseException:
+            account_limiter.release()
+            raise
+
+        wait_ms = (time.monotonic() - started) * 1000
+        _queue_wait_ms.record(wait_ms, {"account": account})
+        _in_flight.add(1)
+        if wait_ms >= 1:
+            logfire.info('service.admission.queued', account=account, model=model, wait_ms=round(wait_ms, 1))
+        try:
+            yield wait_ms
+        finally:
+            _in_flight.add(-1)
+            model_limiter.release()
+            account_limiter.release()
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Current active/waiting counts per limiter (for diagnostics)."""
+        return {
+            f"{scope}:{key}": {"active": limiter.active, "waiting": limiter.waiting}
+            for (scope, key), limiter in self._limiters.items()
+        }
+
+
+_admission_controller: AdmissionController | None = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """
+    Get the process-wide AdmissionController (singleton pattern).
+
+    Returns:
+        AdmissionController shared by the chat endpoints in this worker
+    """
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController()
+    return _admission_controller
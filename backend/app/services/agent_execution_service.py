@@ -27,7 +27,7 @@ Dependencies:
 from __future__ import annotations
 
 from datetime import datetime, UTC
-from typing import Any, List, Optional, Dict
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence, Union
 from uuid import UUID
 
 import logfire
@@ -36,6 +36,9 @@ from pydantic_ai.messages import ModelMessage, ModelRequest, SystemPromptPart
 
 from ..agents.base.dependencies import SessionDependencies
 
+if TYPE_CHECKING:
+    from .chat_bootstrap import ChatBootstrap
+
 
 class AgentExecutionService:
     """
@@ -71,7 +74,9 @@ class AgentExecutionService:
         agent_instance_id: Optional[int] = None,
         account_id: Optional[UUID] = None,
         instance_config: Optional[dict] = None,
-        message_history: Optional[List[ModelMessage]] = None
+        message_history: Optional[List[ModelMessage]] = None,
+        bootstrap: Optional[ChatBootstrap] = None,
+        message: Optional[str] = None
     ) -> tuple[Agent, SessionDependencies, dict, str, list, List[ModelMessage], str]:
         """
         Setup complete execution context for agent.
@@ -93,6 +98,12 @@ class AgentExecutionService:
             account_id: Account UUID for multi-tenant data isolation
             instance_config: Instance-specific configuration overrides
             message_history: Optional pre-loaded message history
+            bootstrap: Optional ChatBootstrap resolved by the endpoint. When given,
+                its history limit, history and instance config are used as-is
+                instead of being re-derived from the config cascade.
+            message: Optional user message of the turn; when the instance enables
+                tools.router, only the retrieval tools and directory sections
+                relevant to it are exposed
         
         Returns:
             Tuple of (agent, session_deps, prompt_breakdown, system_prompt,
@@ -112,12 +123,21 @@ class AgentExecutionService:
         - System prompt injection is critical for Pydantic AI history handling
         - account_id is converted to primitive UUID to prevent serialization errors
         - If message_history is None, it will be loaded from database
+        - bootstrap history is copied, so the endpoint's context stays untouched
         """
-        # Load agent configuration via cascade
-        from ..agents.config_loader import get_agent_history_limit, get_agent_model_settings
         from ..config import load_config
         
-        default_history_limit = await get_agent_history_limit(agent_name)
+        if bootstrap is not None:
+            # Everything below was already resolved once by bootstrap_chat()
+            default_history_limit = bootstrap.history_limit
+            if message_history is None:
+                message_history = bootstrap.history_list()
+            if instance_config is None:
+                instance_config = bootstrap.config_dict()
+        else:
+            # Load agent configuration via cascade
+            from ..agents.config_loader import get_agent_history_limit
+            default_history_limit = await get_agent_history_limit(agent_name)
         
         # Create session dependencies with agent config for tools
         session_deps = await SessionDependencies.create(
@@ -137,9 +157,6 @@ class AgentExecutionService:
         else:
             session_deps.account_id = None
         
-        # Load model settings using centralized cascade
-        model_settings = await get_agent_model_settings(agent_name)
-        
         # Load conversation history if not provided
         if message_history is None:
             from ..agents.simple_chat import load_conversation_history
@@ -148,11 +165,18 @@ class AgentExecutionService:
                 max_messages=None  # Uses agent history limit internally
             )
         
+        # Per-turn routing of retrieval tools / directory sections (tools.router, opt-in)
+        route = None
+        if message is not None and instance_config is not None:
+            from ..agents.tools.tool_router import get_tool_router
+            route = await get_tool_router().route(message, instance_config, account_id)
+        
         # Get the agent (pass instance_config and account_id for multi-tenant support)
         from ..agents.simple_chat import get_chat_agent
         agent, prompt_breakdown, system_prompt, tools_list = await get_chat_agent(
             instance_config=instance_config,
-            account_id=account_id
+            account_id=account_id,
+            route=route
         )
         
         # CRITICAL FIX: Inject system prompt into message history
@@ -182,8 +206,11 @@ class AgentExecutionService:
                     )
         
         # Extract requested model for logging
-        config_to_use = instance_config if instance_config is not None else load_config()
-        requested_model = config_to_use.get("model_settings", {}).get("model", "unknown")
+        if bootstrap is not None:
+            requested_model = bootstrap.requested_model
+        else:
+            config_to_use = instance_config if instance_config is not None else load_config()
+            requested_model = config_to_use.get("model_settings", {}).get("model", "unknown")
         
         logfire.info(
             'service.agent_execution.context_setup_complete',
@@ -208,7 +235,7 @@ class AgentExecutionService:
     @staticmethod
     async def execute_agent(
         agent: Agent,
-        message: str,
+        message: Union[str, Sequence[str]],
         session_deps: SessionDependencies,
         message_history: List[ModelMessage],
         session_id: str,
@@ -222,7 +249,7 @@ class AgentExecutionService:
         
         Args:
             agent: Pydantic AI Agent instance to execute
-            message: User message to process
+            message: User message to process (or [message, context] when vector prefetch injects results)
             session_deps: SessionDependencies for tool access
             message_history: Conversation history with injected system prompt
             session_id: Session ID for logging
@@ -258,7 +285,7 @@ class AgentExecutionService:
         logfire.info(
             'service.agent_execution.executing',
             session_id=session_id,
-            message_preview=message[:100],
+            message_preview=(message if isinstance(message, str) else message[0])[:100],
             message_history_length=len(message_history),
             message_history_types=[type(m).__name__ for m in message_history],
             message_history_first_parts=[
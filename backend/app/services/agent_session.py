@@ -7,8 +7,9 @@ and convert it to Pydantic AI ModelMessage format for agent consumption.
 Key Features:
 - Load conversation history from any endpoint (legacy /chat or /agents/simple-chat/chat)
 - Convert database message roles to Pydantic AI ModelMessage types
+- Replay stored tool calls and returns (see message_history)
 - Cross-endpoint conversation continuity
-- Session statistics and monitoring
+- Session statistics and monitoring (O(1) reads of trigger-maintained counters)
 
 Business Context:
 Enables agents to load conversation history from the database, maintaining
@@ -17,6 +18,7 @@ continuity for users.
 
 Dependencies:
 - MessageService for database message retrieval
+- SessionStats counters for session statistics
 - Pydantic AI message types for proper agent integration
 - UUID handling for session identification
 """
@@ -29,8 +31,10 @@ Unauthorized copying of this file is strictly prohibited.
 
 from typing import List, Dict, Any, Optional
 from .message_service import get_message_service
-from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse, UserPromptPart, TextPart
-from datetime import datetime, UTC
+from .message_history import to_model_messages
+from ..database import get_database_service
+from ..models.session_stats import SessionStats
+from pydantic_ai.messages import ModelMessage
 import uuid
 
 
@@ -73,51 +77,77 @@ async def load_agent_conversation(session_id: str, max_messages: Optional[int] =
     if not db_messages:
         return []
     
-    # Convert DB messages to Pydantic AI ModelMessage format
-    pydantic_messages = []
-    for msg in db_messages:
-        if msg.role in ("human", "user"):
-            # Create user request message
-            pydantic_message = ModelRequest(
-                parts=[UserPromptPart(
-                    content=msg.content,
-                    timestamp=msg.created_at or datetime.now(UTC)
-                )]
-            )
-        elif msg.role == "assistant":
-            # Create assistant response message
-            pydantic_message = ModelResponse(
-                parts=[TextPart(content=msg.content)],
-                usage=None,  # Historical messages don't have usage data
-                model_name="agent-session",  # Identifier for loaded session messages
-                timestamp=msg.created_at or datetime.now(UTC)
-            )
-        else:
-            # Skip system messages and unknown roles
-            continue
-            
-        pydantic_messages.append(pydantic_message)
+    # Convert DB messages to Pydantic AI ModelMessage format; turns saved with their
+    # model messages are replayed losslessly (tool calls and returns included)
+    return to_model_messages(db_messages, model_name="agent-session")
+
+
+async def load_session_stats(session_id: uuid.UUID) -> Optional[SessionStats]:
+    """Read the trigger-maintained counters for a session (single primary key lookup)."""
+    db_service = get_database_service()
+    async with db_service.get_session() as db_session:
+        return await db_session.get(SessionStats, session_id)
+
+
+def format_session_stats(session_id: str, stats: Optional[SessionStats]) -> Dict[str, Any]:
+    """
+    Build the session statistics payload from a SessionStats row.
+    
+    Args:
+        session_id: Session UUID string the counters belong to
+        stats: Counters row, or None for a session without messages or requests
+    
+    Returns:
+        Session statistics dictionary (see get_session_stats)
+    """
+    message_breakdown = dict(stats.role_counts or {}) if stats else {}
+    message_breakdown = {role: count for role, count in message_breakdown.items() if count}
+    total_messages = stats.message_count if stats else 0
+    humans = message_breakdown.get("human", 0) + message_breakdown.get("user", 0)
+    assistants = message_breakdown.get("assistant", 0)
     
-    return pydantic_messages
+    return {
+        "total_messages": total_messages,
+        "session_id": session_id,
+        "cross_endpoint_continuity": total_messages > 0,
+        "message_breakdown": message_breakdown,
+        "recent_activity": {
+            "last_message_at": stats.last_message_at.isoformat() if stats and stats.last_message_at else None,
+            "last_llm_request_at": stats.last_llm_request_at.isoformat() if stats and stats.last_llm_request_at else None
+        },
+        "usage": {
+            "llm_requests": stats.llm_request_count if stats else 0,
+            "total_tokens": stats.total_tokens if stats else 0,
+            "total_cost": float(stats.total_cost or 0) if stats else 0.0
+        },
+        "analytics": {
+            "has_conversation": humans > 0 and assistants > 0,
+            "conversation_turns": min(humans, assistants),
+            "session_health": "active" if total_messages > 0 else "empty",
+            "bridging_capable": True  # Agent session service is available
+        }
+    }
 
 
 async def get_session_stats(session_id: str) -> Dict[str, Any]:
     """
-    Get comprehensive session statistics for monitoring conversation continuity.
+    Get session statistics for monitoring conversation continuity.
     
-    Provides detailed analytics and debugging information about session message counts,
-    cross-endpoint continuity status, message distribution, and recent activity.
+    Reads the session_stats counters, which database triggers keep up to date as
+    messages and LLM requests are saved - an O(1) lookup instead of counting and
+    scanning the session's messages on every turn.
     
     Args:
         session_id: Session UUID string to get statistics for
         
     Returns:
-        Dictionary with comprehensive session statistics including:
+        Dictionary with session statistics including:
         - total_messages: Total message count in session
         - session_id: The session ID
         - cross_endpoint_continuity: Whether session has any messages
-        - message_breakdown: Counts by role (human, assistant, system, etc.)
-        - recent_activity: Information about most recent messages
+        - message_breakdown: Counts by role for the whole session (human, assistant, ...)
+        - recent_activity: Latest message and LLM request timestamps
+        - usage: LLM request count, total tokens and total cost
         - analytics: Additional metrics for monitoring
         
     Example:
@@ -125,55 +155,5 @@ async def get_session_stats(session_id: str) -> Dict[str, Any]:
         >>> print(f"Session has {stats['total_messages']} messages")
         >>> print(f"Message breakdown: {stats['message_breakdown']}")
     """
-    message_service = get_message_service()
-    
-    # Get total message count for this session
-    total_messages = await message_service.get_message_count(
-        session_id=uuid.UUID(session_id)
-    )
-    
-    # Get recent messages for detailed analysis
-    recent_messages = await message_service.get_session_messages(
-        session_id=uuid.UUID(session_id),
-        limit=10  # Last 10 messages for analysis
-    )
-    
-    # Analyze message breakdown by role
-    message_breakdown = {}
-    recent_sources = set()
-    
-    for msg in recent_messages:
-        # Count by role
-        role = msg.role
-        if role not in message_breakdown:
-            message_breakdown[role] = 0
-        message_breakdown[role] += 1
-        
-        # Track sources for cross-endpoint analysis
-        if msg.meta and "source" in msg.meta:
-            recent_sources.add(msg.meta["source"])
-    
-    # Determine if there's evidence of cross-endpoint usage
-    cross_endpoint_evidence = len(recent_sources) > 1
-    
-    # Calculate conversation metrics
-    has_conversation = message_breakdown.get("human", 0) > 0 and message_breakdown.get("assistant", 0) > 0
-    conversation_turns = min(message_breakdown.get("human", 0), message_breakdown.get("assistant", 0))
-    
-    return {
-        "total_messages": total_messages,
-        "session_id": session_id,
-        "cross_endpoint_continuity": total_messages > 0,
-        "message_breakdown": message_breakdown,
-        "recent_activity": {
-            "recent_message_count": len(recent_messages),
-            "sources_detected": list(recent_sources),
-            "cross_endpoint_evidence": cross_endpoint_evidence
-        },
-        "analytics": {
-            "has_conversation": has_conversation,
-            "conversation_turns": conversation_turns,
-            "session_health": "active" if total_messages > 0 else "empty",
-            "bridging_capable": True  # Agent session service is available
-        }
-    }
+    stats = await load_session_stats(uuid.UUID(session_id))
+    return format_session_stats(session_id, stats)
@@ -0,0 +1,267 @@
+"""
+Chat bootstrap for multi-tenant chat endpoints.
+
+Resolves everything a chat turn needs before the agent runs - agent instance,
+session, conversation history, history limit and model settings - and hands
+it to the agent as a single immutable ChatBootstrap object.
+
+Key Features:
+- Instance, history and model settings resolved concurrently (asyncio.gather)
+- Each concurrent branch uses its own database connection
+- Session creation / progressive context update shared by chat and stream
+- Result is frozen so downstream code cannot re-derive or mutate it
+
+Business Context:
+Previously chat_endpoint and stream_endpoint resolved instance, session and
+history sequentially (three DB round trips before the agent started), and
+AgentExecutionService re-derived history limit and model settings on top of
+that. Bootstrapping once removes the duplicate work from every turn.
+
+Dependencies:
+- instance_loader for agent instance resolution
+- agent_session for history conversion
+- config_loader cascade for history limit and model settings
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+from __future__ import annotations
+
+import asyncio
+import secrets
+import string
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, List, Mapping, Optional
+from uuid import UUID
+
+import logfire
+from fastapi import Request
+from pydantic_ai.messages import ModelMessage
+
+from ..agents.instance_loader import AgentInstance, load_agent_instance
+from ..database import get_database_service
+from ..middleware.simple_session_middleware import get_current_session
+from ..models.session import Session
+from .response_cache import instance_config_version
+
+
+@dataclass(frozen=True)
+class ChatBootstrap:
+    """
+    Immutable per-turn chat context resolved once by the endpoint.
+
+    Attributes:
+        instance: Loaded agent instance (DB metadata + config files)
+        session_id: Session UUID string
+        account_id: Account UUID of the session (denormalized for cost tracking)
+        account_slug: Account slug of the session (denormalized for cost tracking)
+        history: Conversation history, oldest first (tuple - never mutated)
+        history_limit: History limit used to load `history`
+        instance_config: Instance config with system_prompt merged in (read-only)
+        model_settings: Resolved model settings (model, temperature, max_tokens)
+        config_version: Hash of the instance config and its prompt modules
+            (response cache and singleflight keys, see response_cache.instance_config_version)
+    """
+    instance: AgentInstance
+    session_id: str
+    account_id: Optional[UUID]
+    account_slug: Optional[str]
+    history: tuple[ModelMessage, ...]
+    history_limit: int
+    instance_config: Mapping[str, Any]
+    model_settings: Mapping[str, Any]
+    config_version: str = ""
+
+    @property
+    def requested_model(self) -> str:
+        """Model identifier requested for this turn."""
+        return self.model_settings.get("model", "unknown")
+
+    def history_list(self) -> List[ModelMessage]:
+        """Return a fresh mutable copy of the history (safe for system prompt injection)."""
+        return list(self.history)
+
+    def config_dict(self) -> dict:
+        """Return a mutable copy of the instance config for agent construction."""
+        return dict(self.instance_config)
+
+
+async def _resolve_history_limit(account_slug: str, instance_slug: str, agent_type: str = "simple_chat") -> int:
+    """Resolve context_management.history_limit from the instance config file (no DB access)."""
+    from ..agents.config_loader import get_agent_parameter
+
+    return await get_agent_parameter(
+        agent_name=agent_type,
+        parameter_path="context_management.history_limit",
+        fallback=50,
+        global_path="chat.history_limit",
+        account_slug=account_slug,
+        instance_slug=instance_slug
+    )
+
+
+async def _create_session(instance: AgentInstance) -> Session:
+    """Create an anonymous session already attributed to the agent instance."""
+    async with get_database_service().get_session() as db_session:
+        # Generate secure session key
+        alphabet = string.ascii_letters + string.digits + "-_"
+        session_key = ''.join(secrets.choice(alphabet) for _ in range(32))
+
+        session = Session(
+            session_key=session_key,
+            account_id=instance.account_id,
+            account_slug=instance.account_slug,
+            agent_instance_id=instance.id,
+            agent_instance_slug=instance.instance_slug,
+            email=None,
+            is_anonymous=True,
+            created_at=datetime.now(timezone.utc),
+            last_activity_at=datetime.now(timezone.utc),
+            meta={}
+        )
+
+        db_session.add(session)
+        await db_session.commit()
+        await db_session.refresh(session)
+        return session
+
+
+async def _attach_session_context(session: Session, instance: AgentInstance) -> Session:
+    """Fill NULL account/instance context on a legacy session and return the fresh row."""
+    from sqlalchemy import select
+    from .session_service import SessionService
+
+    async with get_database_service().get_session() as db_session:
+        session_service = SessionService(db_session)
+        await session_service.update_session_context(
+            session_id=session.id,
+            account_id=instance.account_id,
+            account_slug=instance.account_slug,
+            agent_instance_id=instance.id,
+            agent_instance_slug=instance.instance_slug
+        )
+
+        # Reload to get the committed values from update_session_context()
+        result = await db_session.execute(select(Session).where(Session.id == session.id))
+        return result.scalar_one()
+
+
+async def bootstrap_chat(
+    request: Request,
+    account_slug: str,
+    instance_slug: str,
+    log_scope: str = "chat"
+) -> ChatBootstrap:
+    """
+    Resolve instance, session, history and model settings for one chat turn.
+
+    For an existing session the instance load, history load and model settings
+    cascade run concurrently on independent connections. A new session has no
+    history, so only the instance is loaded before the session row is created.
+
+    Args:
+        request: FastAPI request (session middleware state is read and updated)
+        account_slug: Account identifier from URL
+        instance_slug: Agent instance identifier from URL
+        log_scope: Logfire event scope ("chat" or "stream")
+
+    Returns:
+        ChatBootstrap with everything the agent needs for this turn
+
+    Raises:
+        ValueError: If the account/instance doesn't exist or is inactive
+        Exception: Any other instance/history loading failure
+
+    Example:
+        >>> ctx = await bootstrap_chat(request, "default_account", "simple_chat1")
+        >>> result = await simple_chat(message, session_id=ctx.session_id, bootstrap=ctx)
+    """
+    from ..agents.config_loader import get_agent_model_settings
+    from .agent_session import load_agent_conversation
+
+    session = get_current_session(request)
+
+    # History limit comes from the instance config file, so it's known before any DB access
+    history_limit = await _resolve_history_limit(account_slug, instance_slug)
+
+    if session is not None:
+        instance_result, history_result, settings_result = await asyncio.gather(
+            load_agent_instance(account_slug, instance_slug),
+            load_agent_conversation(session_id=str(session.id), max_messages=history_limit),
+            get_agent_model_settings("simple_chat", account_slug=account_slug, instance_slug=instance_slug),
+            return_exceptions=True
+        )
+        # Instance errors take precedence (404 semantics), then history/settings failures
+        for outcome in (instance_result, history_result, settings_result):
+            if isinstance(outcome, BaseException):
+                raise outcome
+        instance: AgentInstance = instance_result
+        message_history: List[ModelMessage] = history_result
+        model_settings: dict = settings_result
+    else:
+        instance, model_settings = await asyncio.gather(
+            load_agent_instance(account_slug, instance_slug),
+            get_agent_model_settings("simple_chat", account_slug=account_slug, instance_slug=instance_slug)
+        )
+        message_history = []
+
+    logfire.debug(
+        f'api.account.{log_scope}.instance_loaded',
+        instance_id=str(instance.id),
+        agent_type=instance.agent_type,
+        display_name=instance.display_name
+    )
+
+    # BUG-0026-0003 FIX: Create session if it doesn't exist (user is actively chatting)
+    if session is None:
+        logfire.info(f'api.account.{log_scope}.creating_session', account=account_slug, instance=instance_slug)
+        session = await _create_session(instance)
+        request.state.session = session
+        logfire.info(
+            f'api.account.{log_scope}.session_created',
+            session_id=str(session.id),
+            account_id=str(session.account_id),
+            agent_instance_id=str(session.agent_instance_id)
+        )
+    elif session.account_id is None:
+        # Progressive context flow for old sessions. Update request state with the fresh
+        # row so the middleware doesn't overwrite it with a stale detached object.
+        session = await _attach_session_context(session, instance)
+        request.state.session = session
+        logfire.info(
+            f'api.account.{log_scope}.session_context_updated',
+            session_id=str(session.id),
+            account_id=str(session.account_id),
+            agent_instance_id=str(session.agent_instance_id)
+        )
+
+    # Build complete instance config with system_prompt
+    full_instance_config = instance.config.copy()
+    if instance.system_prompt:
+        full_instance_config['system_prompt'] = instance.system_prompt
+
+    config_version = await instance_config_version(f"{account_slug}/{instance_slug}", full_instance_config)
+    
+    bootstrap = ChatBootstrap(
+        instance=instance,
+        session_id=str(session.id),
+        account_id=session.account_id,
+        account_slug=session.account_slug,
+        history=tuple(message_history),
+        history_limit=history_limit,
+        instance_config=MappingProxyType(full_instance_config),
+        model_settings=MappingProxyType(dict(model_settings)),
+        config_version=config_version
+    )
+
+    logfire.debug(
+        f'api.account.{log_scope}.history_loaded',
+        session_id=bootstrap.session_id,
+        history_count=len(bootstrap.history),
+        history_limit=history_limit
+    )
+
+    return bootstrap
@@ -0,0 +1,181 @@
+"""
+Data version tracking for cache invalidation.
+
+Caches of derived results (tool results, cached responses) include a data
+version in their keys. When the underlying data changes, the version changes
+and old entries are simply never looked up again.
+
+Key Features:
+- In-process counters per namespace, bumped by writers in this process
+  (e.g. VectorService upserts bump "vector:<index>:<namespace>")
+- Directory version derived from the database (list count + highest
+  directory_lists.version per account), so imports from
+  scripts/seed_directory.py running in another process are picked up;
+  re-read at most every max_age_seconds
+
+- VersionedCache: per-worker LRU of values loaded at a data version, shared
+  by the directory catalog, facets and memory index
+
+Namespaces:
+    directory:<account_id>          - directory lists/entries of an account
+    vector:<index_name>:<namespace> - Pinecone index namespace
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+import asyncio
+import time
+from collections import OrderedDict, defaultdict
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+from uuid import UUID
+
+import logfire
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+def directory_namespace(account_id: UUID) -> str:
+    """Version namespace for an account's directory data."""
+    return f"directory:{account_id}"
+
+
+def vector_namespace(index_name: str, namespace: Optional[str]) -> str:
+    """Version namespace for a Pinecone index namespace."""
+    return f"vector:{index_name}:{namespace or '__default__'}"
+
+
+class DataVersions:
+    """
+    Per-namespace data versions (in-process counters + DB-derived directory versions).
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._directory_versions: Dict[UUID, Tuple[str, float]] = {}
+
+    def bump(self, namespace: str) -> int:
+        """
+        Mark data in a namespace as changed.
+
+        Returns:
+            New counter value
+        """
+        self._counters[namespace] += 1
+        if namespace.startswith("directory:"):
+            # Force a DB re-read for the next directory_version() call
+            self._directory_versions.clear()
+        logfire.info('service.data_versions.bumped', namespace=namespace, version=self._counters[namespace])
+        return self._counters[namespace]
+
+    def get(self, namespace: str) -> int:
+        """In-process version counter of a namespace (0 until first bump)."""
+        return self._counters.get(namespace, 0)
+
+    async def directory_version(self, account_id: UUID, max_age_seconds: float = 30) -> str:
+        """
+        Version of an account's directory data.
+
+        Combines the in-process counter with the list count and highest list
+        version from directory_lists. The version comes from a sequence and is
+        bumped by trigger whenever a list or its entry count changes, so every
+        import or delete changes it, including ones from another process.
+
+        Args:
+            account_id: Account UUID
+            max_age_seconds: Reuse the DB-derived part for this long
+
+        Returns:
+            Opaque version string
+        """
+        now = time.monotonic()
+        cached = self._directory_versions.get(account_id)
+        if cached is None or now - cached[1] >= max_age_seconds:
+            from sqlalchemy import func, select
+            from ..database import get_database_service
+            from ..models.directory import DirectoryList
+
+            async with get_database_service().get_session() as db_session:
+                row = (await db_session.execute(
+                    select(func.count(DirectoryList.id), func.max(DirectoryList.version))
+                    .where(DirectoryList.account_id == account_id)
+                )).one()
+            cached = (f"{row[0]}:{row[1] if row[1] is not None else '-'}", now)
+            self._directory_versions[account_id] = cached
+        return f"{self.get(directory_namespace(account_id))}:{cached[0]}"
+
+
+class VersionedCache(Generic[K, V]):
+    """
+    Per-worker LRU of values loaded at a data version.
+
+    A value is reloaded when it is looked up at another version than it was
+    loaded at; concurrent misses on a key share one load. Least recently
+    used keys are evicted above max_size.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        # key -> (data version, value)
+        self._entries: "OrderedDict[K, Tuple[str, V]]" = OrderedDict()
+        self._locks: Dict[K, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Drop all cached values."""
+        self._entries.clear()
+
+    async def get(
+        self,
+        key: K,
+        version: str,
+        load: Callable[[], Awaitable[V]],
+        stale: Optional[Callable[[V], bool]] = None
+    ) -> V:
+        """
+        Value of a key at a data version (loaded on first use / after a change).
+
+        Args:
+            key: Cache key (account or list id)
+            version: Current data version
+            load: Loads the value on a miss
+            stale: Also reload a cached value of this version when it returns True
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        def fresh(cached: Optional[Tuple[str, V]]) -> bool:
+            return cached is not None and cached[0] == version and not (stale and stale(cached[1]))
+
+        cached = self._entries.get(key)
+        if not fresh(cached):
+            async with self._locks[key]:
+                cached = self._entries.get(key)
+                if not fresh(cached):
+                    cached = (version, await load())
+                    self._entries[key] = cached
+                    while len(self._entries) > self.max_size:
+                        evicted, _ = self._entries.popitem(last=False)
+                        self._locks.pop(evicted, None)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        return cached[1]
+
+
+_data_versions: DataVersions | None = None
+
+
+def get_data_versions() -> DataVersions:
+    """
+    Get the process-wide DataVersions (singleton pattern).
+
+    Returns:
+        DataVersions shared by all caches in this worker
+    """
+    global _data_versions
+    if _data_versions is None:
+        _data_versions = DataVersions()
+    return _data_versions
@@ -0,0 +1,215 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Set-based bulk import of directory entries (COPY + INSERT ... SELECT).
+
+scripts/seed_directory.py used to add one ORM DirectoryEntry per CSV row:
+one INSERT per row, and per row the search_vector and filter_data triggers
+looked up the list and rebuilt both columns. Large lists took minutes and
+held their locks for as long. The bulk path instead:
+
+1. COPYs the parsed rows into a temporary staging table
+   (asyncpg copy_records_to_table, binary protocol, one round trip)
+2. Inserts them with one INSERT ... SELECT that joins directory_lists once
+   and computes search_vector / filter_data in SQL, with the same functions
+   the triggers use. The transaction sets directory.bulk_import, so the row
+   triggers pass the rows through (migration c0d1e2f3a4b5); the
+   statement-level entry count and facet triggers run once
+3. Optionally drops the secondary indexes of directory_entries first and
+   recreates them afterwards (full reloads): one index build instead of
+   one index update per row. DROP INDEX locks the whole table until
+   commit, so only use it when the directory is not being served
+
+Everything runs in the caller's transaction (the caller commits), so a
+failed import leaves the table and its indexes unchanged.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Iterable, List, Tuple
+from uuid import UUID
+
+import logfire
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.directory import DirectoryEntry
+
+STAGING_TABLE = "directory_entries_staging"
+STAGING_COLUMNS = ("id", "name", "tags", "contact_info", "entry_data")
+
+# Memory for rebuilding deferred indexes (this transaction only)
+INDEX_BUILD_MEMORY = "256MB"
+
+# Staging rows keep the JSON as text; the INSERT ... SELECT casts it to jsonb
+StagingRecord = Tuple[UUID, str, List[str], str, str]
+
+
+@dataclass(frozen=True)
+class BulkImportResult:
+    """Outcome of one bulk_import_entries() call."""
+    rows: int
+    copy_seconds: float
+    insert_seconds: float
+    index_seconds: float = 0.0
+    deferred_indexes: int = 0
+
+    @property
+    def seconds(self) -> float:
+        """Total time spent in the database."""
+        return self.copy_seconds + self.insert_seconds + self.index_seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        """Import throughput."""
+        return self.rows / max(self.seconds, 1e-6)
+
+
+def staging_records(entries: Iterable[DirectoryEntry]) -> List[StagingRecord]:
+    """
+    COPY records of parsed (not yet persisted) entries.
+
+    Args:
+        entries: DirectoryEntry instances from DirectoryImporter.parse_csv()
+
+    Returns:
+        (id, name, tags, contact_info JSON, entry_data JSON) tuples in STAGING_COLUMNS order
+    """
+    return [
+        (
+            entry.id or uuid.uuid7(),
+            entry.name,
+            list(entry.tags or ()),
+            json.dumps(entry.contact_info or {}),
+            json.dumps(entry.entry_data or {}),
+        )
+        for entry in entries
+    ]
+
+
+_BULK_MODE_SQL = text("SET LOCAL directory.bulk_import = 'on'")
+
+_CREATE_STAGING_SQL = text(f"""
+    CREATE TEMP TABLE {STAGING_TABLE} (
+        id uuid NOT NULL,
+        name text NOT NULL,
+        tags text[],
+        contact_info text,
+        entry_data text
+    ) ON COMMIT DROP
+""")
+
+# Same computations as the search_vector / filter_data row triggers
+_INSERT_SQL = text(f"""
+    INSERT INTO directory_entries (
+        id, directory_list_id, name, tags, contact_info, entry_data,
+        search_vector, filter_data, created_at, updated_at
+    )
+    SELECT s.id, l.id, s.name, coalesce(s.tags, '{{}}'), s.contact_info::jsonb, s.entry_data::jsonb,
+           directory_entry_search_vector(s.name, s.tags, s.entry_data::jsonb, l.search_weights),
+           directory_entry_filter_data(s.entry_data::jsonb, l.filter_fields::text[]),
+           now(), now()
+    FROM {STAGING_TABLE} s
+    JOIN directory_lists l ON l.id = CAST(:list_id AS uuid)
+""")
+
+# Plain indexes only: primary key / unique constraint indexes stay
+_SECONDARY_INDEXES_SQL = text("""
+    SELECT i.indexname, i.indexdef
+    FROM pg_indexes i
+    WHERE i.schemaname = current_schema()
+      AND i.tablename = 'directory_entries'
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_constraint c
+          WHERE c.conname = i.indexname AND c.conrelid = 'directory_entries'::regclass
+      )
+    ORDER BY i.indexname
+""")
+
+
+async def drop_secondary_indexes(session: AsyncSession) -> List[Tuple[str, str]]:
+    """
+    Drop the non-constraint indexes of directory_entries (caller recreates them).
+
+    Returns:
+        (index name, CREATE INDEX statement) pairs for create_indexes()
+    """
+    indexes = [tuple(row) for row in (await session.execute(_SECONDARY_INDEXES_SQL)).all()]
+    for name, _ in indexes:
+        await session.execute(text(f'DROP INDEX "{name}"'))
+    return indexes
+
+
+async def create_indexes(session: AsyncSession, indexes: Iterable[Tuple[str, str]]) -> None:
+    """Recreate indexes dropped by drop_secondary_indexes()."""
+    await session.execute(text(f"SET LOCAL maintenance_work_mem = '{INDEX_BUILD_MEMORY}'"))
+    for _, definition in indexes:
+        await session.execute(text(definition))
+
+
+async def bulk_import_entries(
+    session: AsyncSession,
+    list_id: UUID,
+    entries: Iterable[DirectoryEntry],
+    defer_indexes: bool = False
+) -> BulkImportResult:
+    """
+    Insert parsed entries into a directory list with COPY and one INSERT ... SELECT (caller commits).
+
+    Args:
+        session: Database session (asyncpg driver)
+        list_id: Target directory list (must exist; its search_weights /
+            filter_fields / facet_fields apply)
+        entries: DirectoryEntry instances from DirectoryImporter.parse_csv()
+        defer_indexes: Drop the secondary indexes of directory_entries for the
+            load and rebuild them after (full reloads only: locks the table)
+
+    Returns:
+        BulkImportResult with row count and timings
+    """
+    records = staging_records(entries)
+
+    started = time.perf_counter()
+    await session.execute(_BULK_MODE_SQL)
+    await session.execute(text(f"DROP TABLE IF EXISTS pg_temp.{STAGING_TABLE}"))
+    await session.execute(_CREATE_STAGING_SQL)
+    # Same connection and transaction as the session
+    connection = await (await session.connection()).get_raw_connection()
+    await connection.driver_connection.copy_records_to_table(
+        STAGING_TABLE, records=records, columns=STAGING_COLUMNS
+    )
+    copied = time.perf_counter()
+
+    indexes: List[Tuple[str, str]] = []
+    if defer_indexes:
+        indexes = await drop_secondary_indexes(session)
+    result = await session.execute(_INSERT_SQL, {"list_id": str(list_id)})
+    inserted = time.perf_counter()
+
+    if indexes:
+        await create_indexes(session, indexes)
+    finished = time.perf_counter()
+
+    outcome = BulkImportResult(
+        rows=result.rowcount,
+        copy_seconds=copied - started,
+        insert_seconds=inserted - copied,
+        index_seconds=finished - inserted,
+        deferred_indexes=len(indexes),
+    )
+    logfire.info(
+        'service.directory.bulk_import.complete',
+        list_id=str(list_id),
+        rows=outcome.rows,
+        deferred_indexes=outcome.deferred_indexes,
+        copy_seconds=round(outcome.copy_seconds, 3),
+        insert_seconds=round(outcome.insert_seconds, 3),
+        index_seconds=round(outcome.index_seconds, 3),
+        rows_per_second=round(outcome.rows_per_second)
+    )
+    return outcome
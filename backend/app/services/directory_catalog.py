@@ -0,0 +1,186 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+In-process catalog of an account's directory lists.
+
+get_available_directories used to run one query for the lists, then a
+COUNT(*) and a YAML schema load per list, on every call. The catalog keeps
+what the tool reports per list in the worker instead:
+
+- Entry counts come from directory_lists.entry_count, maintained by
+  triggers on directory_entries inserts / deletes (migration a8b9c0d1e2f3)
+- Schema purpose and searchable fields are parsed once per schema file
+- An account's catalog is reloaded with a single query when its directory
+  data version changes (directory_lists.version, see data_versions), so
+  imports from scripts/seed_directory.py in another process are picked up
+- Lists whose schema cannot be loaded are logged and left out
+- Multi-list search_directory calls resolve their lists (ids, schema
+  files, filter fields) here instead of querying directory_lists, and the
+  facets endpoint its list id and facet fields
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import logfire
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.directory import DirectoryList
+from .data_versions import VersionedCache, get_data_versions
+from .directory_filters import searchable_fields
+from .directory_importer import cached_schema
+
+MAX_CACHED_ACCOUNTS = 256
+
+
+@dataclass(frozen=True)
+class SchemaPurpose:
+    """The parts of a directory schema reported by get_available_directories."""
+    description: str = ""
+    use_cases: Tuple[Any, ...] = ()
+    searchable_fields: Tuple[str, ...] = ()
+    example_queries: Tuple[Any, ...] = ()
+    not_for: Tuple[Any, ...] = ()
+
+
+def purpose_for_schema_file(schema_file: str) -> SchemaPurpose:
+    """
+    Parsed purpose of a schema file.
+
+    Raises:
+        FileNotFoundError / yaml.YAMLError: If the schema cannot be loaded
+    """
+    schema = cached_schema(schema_file)
+    purpose = schema.get('directory_purpose') or {}
+    if isinstance(purpose, str):
+        # Free-text purpose (classes.yaml): the whole text is the description
+        purpose = {'description': purpose.strip()}
+    return SchemaPurpose(
+        description=purpose.get('description', ''),
+        use_cases=tuple(purpose.get('use_for') or ()),
+        searchable_fields=tuple(searchable_fields(schema)),
+        example_queries=tuple(purpose.get('example_queries') or ()),
+        not_for=tuple(purpose.get('not_for') or ()),
+    )
+
+
+@dataclass(frozen=True)
+class DirectoryInfo:
+    """Catalog entry for one directory list."""
+    list_id: UUID
+    list_name: str
+    entry_type: str
+    entry_count: int
+    purpose: SchemaPurpose
+    schema_file: Optional[str] = None
+    filter_fields: Tuple[str, ...] = ()
+    facet_fields: Tuple[str, ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Metadata as returned by get_available_directories."""
+        return {
+            "list_name": self.list_name,
+            "entry_type": self.entry_type,
+            "entry_count": self.entry_count,
+            "description": self.purpose.description,
+            "use_cases": list(self.purpose.use_cases),
+            "searchable_fields": list(self.purpose.searchable_fields),
+            "example_queries": list(self.purpose.example_queries),
+            "not_for": list(self.purpose.not_for),
+        }
+
+
+class DirectoryCatalog:
+    """
+    Per-worker cache of directory list metadata, keyed by account and directory data version.
+    """
+
+    def __init__(self, max_accounts: int = MAX_CACHED_ACCOUNTS):
+        # account id -> {list_name: DirectoryInfo}
+        self._accounts: VersionedCache[UUID, Dict[str, DirectoryInfo]] = VersionedCache(max_accounts)
+
+    def clear(self) -> None:
+        """Drop all cached catalogs."""
+        self._accounts.clear()
+
+    @staticmethod
+    async def _load(session: AsyncSession, account_id: UUID) -> Dict[str, DirectoryInfo]:
+        """All lists of an account, with counts and parsed schema purpose (one query)."""
+        rows = (await session.execute(
+            select(
+                DirectoryList.id,
+                DirectoryList.list_name,
+                DirectoryList.entry_type,
+                DirectoryList.schema_file,
+                DirectoryList.entry_count,
+                DirectoryList.filter_fields,
+                DirectoryList.facet_fields
+            ).where(DirectoryList.account_id == account_id)
+        )).all()
+
+        lists = {}
+        for list_id, list_name, entry_type, schema_file, entry_count, filter_fields, facet_fields in rows:
+            try:
+                purpose = purpose_for_schema_file(schema_file)
+            except Exception as e:
+                logfire.error('directory.metadata_load_error', list_name=list_name, error=str(e))
+                continue
+            lists[list_name] = DirectoryInfo(
+                list_id=list_id,
+                list_name=list_name,
+                entry_type=entry_type,
+                entry_count=entry_count or 0,
+                purpose=purpose,
+                schema_file=schema_file,
+                filter_fields=tuple(filter_fields or ()),
+                facet_fields=tuple(facet_fields or ())
+            )
+        logfire.info('service.directory.catalog.loaded', account_id=str(account_id), lists=len(lists))
+        return lists
+
+    async def get_lists(self, session: AsyncSession, account_id: UUID) -> Dict[str, DirectoryInfo]:
+        """
+        The account's catalog at its current directory data version (loaded on first use / after a change).
+
+        Returns:
+            {list_name: DirectoryInfo}
+        """
+        version = await get_data_versions().directory_version(account_id)
+        return await self._accounts.get(account_id, version, lambda: self._load(session, account_id))
+
+    async def directories(
+        self,
+        session: AsyncSession,
+        account_id: UUID,
+        list_names: Iterable[str]
+    ) -> List[DirectoryInfo]:
+        """
+        Catalog entries for the given list names, in that order (unknown names are skipped).
+        """
+        lists = await self.get_lists(session, account_id)
+        return [lists[name] for name in list_names if name in lists]
+
+    async def get(self, session: AsyncSession, account_id: UUID, list_name: str) -> Optional[DirectoryInfo]:
+        """Catalog entry for one list, or None."""
+        return (await self.get_lists(session, account_id)).get(list_name)
+
+
+_directory_catalog: DirectoryCatalog | None = None
+
+
+def get_directory_catalog() -> DirectoryCatalog:
+    """
+    Get the process-wide DirectoryCatalog (singleton pattern).
+
+    Returns:
+        DirectoryCatalog shared by all agents in this worker
+    """
+    global _directory_catalog
+    if _directory_catalog is None:
+        _directory_catalog = DirectoryCatalog()
+    return _directory_catalog
@@ -0,0 +1,180 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Facet value counts for directory lists ("browse by department / specialty / language").
+
+Counting values of entry_data fields per request would mean scanning every
+entry of the list. The database keeps the counts instead, in
+directory_facet_counts (migration b9c0d1e2f3a4):
+
+- Statement-level triggers on directory_entries apply the deltas of each
+  insert / delete / update, so a bulk import costs one upsert per statement
+- Counted fields are the list's facet_fields, set from the schema when the
+  list is seeded; changing them recounts the list (refresh_directory_facets)
+- Array fields count each element; "tags" counts the tags column
+
+Schema (config/directory_schemas/*.yaml):
+    searchable_fields:
+      specialty:
+        type: string
+        facet: true           # count values of this field
+    tags_usage:
+      facet: true             # count tags (e.g. languages)
+
+Facets are served from a per-worker cache keyed by the account's directory
+data version, to the facets endpoint (api/account_agents.py) and optionally
+to the generated tool docs (tools.directory.prompt_facet_values), so the
+model uses filter values that exist.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from uuid import UUID
+
+import logfire
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.directory import DirectoryFacetCount
+from .data_versions import VersionedCache, get_data_versions
+from .directory_filters import searchable_fields
+from .directory_importer import cached_schema
+
+# Facet name for the tags column
+TAGS_FACET = "tags"
+
+MAX_CACHED_LISTS = 512
+
+# {field: ((value, entry count), ...)}, most frequent first
+Facets = Dict[str, Tuple[Tuple[str, int], ...]]
+
+
+def facet_fields_from_schema(schema: Optional[Mapping[str, Any]]) -> List[str]:
+    """
+    Facet fields declared by a directory schema.
+
+    Args:
+        schema: Loaded schema YAML
+
+    Returns:
+        searchable_fields marked facet: true (schema order), then "tags" if
+        tags_usage is marked facet: true
+    """
+    fields = [name for name, definition in searchable_fields(schema).items() if definition.get("facet")]
+    if ((schema or {}).get("tags_usage") or {}).get("facet"):
+        fields.append(TAGS_FACET)
+    return fields
+
+
+def facet_fields_for_schema_file(schema_file: str) -> tuple:
+    """facet_fields_from_schema() for a schema file."""
+    return tuple(facet_fields_from_schema(cached_schema(schema_file)))
+
+
+def top_facets(facets: Facets, fields: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> Facets:
+    """
+    Restrict facets to some fields and to the most frequent values.
+
+    Args:
+        facets: Facets of a list
+        fields: Fields to keep, in this order (default: all)
+        limit: Values per field (default: all)
+    """
+    names = list(facets) if fields is None else list(fields)
+    return {name: facets.get(name, ())[:limit] for name in names}
+
+
+def facets_to_dict(facets: Facets) -> Dict[str, List[Dict[str, Any]]]:
+    """JSON form: {field: [{"value": ..., "count": ...}]}."""
+    return {
+        name: [{"value": value, "count": count} for value, count in values]
+        for name, values in facets.items()
+    }
+
+
+def facet_values_docs(facets: Facets, limit: int) -> str:
+    """
+    Prompt text listing the most frequent values of each facet field.
+
+    Example:
+        **Common filter values** (entry counts):
+          • specialty: "Cardiology" (12), "Pediatrics" (9)
+    """
+    lines = []
+    for name, values in top_facets(facets, limit=limit).items():
+        if values:
+            listed = ", ".join(f'"{value}" ({count})' for value, count in values)
+            label = "tag" if name == TAGS_FACET else name
+            lines.append(f"  • {label}: {listed}")
+    if not lines:
+        return ""
+    return "\n**Common filter values** (entry counts):\n" + "\n".join(lines)
+
+
+class DirectoryFacets:
+    """
+    Per-worker cache of directory facet counts, keyed by list and directory data version.
+    """
+
+    def __init__(self, max_lists: int = MAX_CACHED_LISTS):
+        self._lists: VersionedCache[UUID, Facets] = VersionedCache(max_lists)
+
+    def clear(self) -> None:
+        """Drop all cached facets."""
+        self._lists.clear()
+
+    @staticmethod
+    async def _load(session: AsyncSession, list_id: UUID, fields: Iterable[str]) -> Facets:
+        """Facet counts of one list (one query on directory_facet_counts)."""
+        rows = (await session.execute(
+            select(DirectoryFacetCount.field, DirectoryFacetCount.value, DirectoryFacetCount.entry_count)
+            .where(DirectoryFacetCount.directory_list_id == list_id)
+            .order_by(DirectoryFacetCount.field, DirectoryFacetCount.entry_count.desc(), DirectoryFacetCount.value)
+        )).all()
+
+        # Declared fields first (schema order), even when no entry has a value
+        grouped: Dict[str, List[Tuple[str, int]]] = {name: [] for name in fields}
+        for field, value, count in rows:
+            grouped.setdefault(field, []).append((value, count))
+        logfire.info('service.directory.facets.loaded', list_id=str(list_id), fields=len(grouped), values=len(rows))
+        return {name: tuple(values) for name, values in grouped.items()}
+
+    async def get(
+        self,
+        session: AsyncSession,
+        account_id: UUID,
+        list_id: UUID,
+        fields: Iterable[str] = ()
+    ) -> Facets:
+        """
+        Facet counts of a list at the account's current directory data version.
+
+        Args:
+            session: Database session (used on a cache miss)
+            account_id: Account owning the list
+            list_id: Directory list id
+            fields: The list's facet_fields (reported even without values)
+
+        Returns:
+            {field: ((value, entry count), ...)}, most frequent values first
+        """
+        version = await get_data_versions().directory_version(account_id)
+        return await self._lists.get(list_id, version, lambda: self._load(session, list_id, fields))
+
+
+_directory_facets: DirectoryFacets | None = None
+
+
+def get_directory_facets() -> DirectoryFacets:
+    """
+    Get the process-wide DirectoryFacets (singleton pattern).
+
+    Returns:
+        DirectoryFacets shared by all agents in this worker
+    """
+    global _directory_facets
+    if _directory_facets is None:
+        _directory_facets = DirectoryFacets()
+    return _directory_facets
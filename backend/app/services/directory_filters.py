@@ -0,0 +1,183 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Schema-driven, index-friendly filters for directory search.
+
+search_directory(filters={"specialty": "Cardiology"}) used to compile to a
+case-insensitive regex over entry_data->>'specialty', evaluated per row. For
+fields declared filterable in the list's schema, the database now keeps a
+normalized copy in directory_entries.filter_data (trigger-maintained, see
+migration e6f7a8b9c0d1):
+
+    {"specialty": ["car", "card", ..., "cardiology", "int", ..., "interventional"]}
+
+- Each value becomes its distinct lower-cased words plus their prefixes of
+  FILTER_PREFIX_MIN_LENGTH+ characters, so filters keep the word-prefix
+  semantics of the regex ("Cardio" matches "Cardiology")
+- filter_data has a GIN jsonb_path_ops index, so a filter compiles to a
+  containment lookup: filter_data @> '{"specialty": ["cardio"]}'
+- Multi-word values require all words via the index, then the original
+  word-boundary regex re-checks phrase order on the few remaining rows
+- Shorter prefixes ("Ca") and fields that are not filterable in every
+  searched list keep the regex
+
+Schema (config/directory_schemas/*.yaml):
+    searchable_fields:
+      specialty:
+        type: string          # string and array fields are filterable by default
+        filter_index: true    # optional: true / false to override the default
+
+The list's filterable fields are stored in directory_lists.filter_fields when
+the list is seeded (the trigger reads them from there).
+
+Normalization here must stay in line with directory_filter_terms() in the
+migrations (e6f7a8b9c0d1, d1e2f3a4b5c6): lower(), split on runs of
+non-alphanumeric characters, prefixes from FILTER_PREFIX_MIN_LENGTH.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+
+from sqlalchemy import and_, cast, literal
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql.elements import ColumnElement
+
+from ..models.directory import DirectoryEntry
+from .directory_importer import cached_schema
+
+# Field types filterable by default (long free text is left to the regex / FTS)
+DEFAULT_FILTERABLE_TYPES = frozenset({"string", "array"})
+
+# Shortest word prefix stored in filter_data (shorter prefixes use the regex)
+FILTER_PREFIX_MIN_LENGTH = 3
+
+_NON_ALNUM = re.compile(r"[\W_]+")
+
+
+def searchable_fields(schema: Optional[Mapping[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    A schema's searchable_fields as {name: definition}, in schema order.
+
+    Schemas declare them either as a mapping of field definitions or as a
+    plain list of field names (classes.yaml); list entries get an empty definition.
+    """
+    declared = (schema or {}).get("searchable_fields") or {}
+    if isinstance(declared, Mapping):
+        return {name: dict(definition or {}) for name, definition in declared.items()}
+    return {str(name): {} for name in declared}
+
+
+def filter_fields_from_schema(schema: Optional[Mapping[str, Any]]) -> List[str]:
+    """
+    Filterable entry_data fields declared by a directory schema.
+
+    Args:
+        schema: Loaded schema YAML
+
+    Returns:
+        Field names, in schema order
+    """
+    fields = []
+    for name, definition in searchable_fields(schema).items():
+        indexed = definition.get("filter_index")
+        if indexed is None:
+            indexed = definition.get("type", "string") in DEFAULT_FILTERABLE_TYPES
+        if indexed:
+            fields.append(name)
+    return fields
+
+
+def filter_fields_for_schema_file(schema_file: str) -> tuple:
+    """filter_fields_from_schema() for a schema file."""
+    return tuple(filter_fields_from_schema(cached_schema(schema_file)))
+
+
+def filter_words(value: Any) -> List[str]:
+    """Lower-cased words of a filter value (same split as the database)."""
+    return [word for word in _NON_ALNUM.split(str(value).lower()) if word]
+
+
+def filter_terms(value: Any) -> List[str]:
+    """Terms stored in filter_data for one value: its distinct words and their prefixes, sorted."""
+    terms = set()
+    for word in filter_words(value):
+        terms.add(word)
+        terms.update(word[:length] for length in range(FILTER_PREFIX_MIN_LENGTH, len(word)))
+    return sorted(terms)
+
+
+def filter_lookup_terms(value: Any) -> List[str]:
+    """
+    Terms an entry's filter_data must contain to match regex_filter(value).
+
+    Words followed by more of the value are whole words; the last word may be
+    the prefix of a longer one, so it is only looked up when it is at least
+    FILTER_PREFIX_MIN_LENGTH characters long.
+    """
+    words = filter_words(value)
+    if words and len(words[-1]) < FILTER_PREFIX_MIN_LENGTH:
+        words = words[:-1]
+    return words
+
+
+def lookup_is_exact(value: Any, terms: List[str]) -> bool:
+    """True if the containment lookup alone matches like the regex (one plain word)."""
+    return terms == [str(value).lower()]
+
+
+def common_filter_fields(field_sets: Iterable[Optional[Iterable[str]]]) -> Set[str]:
+    """Fields indexed in every one of the searched lists (a missing set means none)."""
+    common: Optional[Set[str]] = None
+    for fields in field_sets:
+        current = set(fields or ())
+        common = current if common is None else common & current
+    return common or set()
+
+
+def regex_filter(key: str, value: str) -> ColumnElement:
+    """Word-boundary, case-insensitive match on entry_data (no index)."""
+    # \m = start of a word: "Cardiology" matches "Interventional Cardiology" but not "Neurocardiology"
+    return DirectoryEntry.entry_data[key].astext.op('~*')(f"\\m{re.escape(value)}")
+
+
+def compile_filter(key: str, value: Any, indexed_fields: Set[str]) -> ColumnElement:
+    """
+    Compile one jsonb_filters item into a predicate.
+
+    Args:
+        key: entry_data field name
+        value: Requested value
+        indexed_fields: Fields with filter_data in every searched list
+
+    Returns:
+        Containment predicate on filter_data (indexed fields) or the regex fallback
+    """
+    value = str(value)
+    terms = filter_lookup_terms(value)
+    if key not in indexed_fields or not terms:
+        return regex_filter(key, value)
+
+    # JSON text cast to jsonb (also renders as a literal for EXPLAIN in benchmarks)
+    contains = DirectoryEntry.filter_data.op('@>')(cast(literal(json.dumps({key: terms})), JSONB))
+    if lookup_is_exact(value, terms):
+        return contains
+    # All words via the index; phrase order re-checked on the matching rows only
+    return and_(contains, regex_filter(key, value))
+
+
+def build_filter_data(entry_data: Mapping[str, Any], fields: Iterable[str]) -> Optional[Dict[str, List[str]]]:
+    """
+    Python equivalent of the filter_data trigger (tests, benchmarks and parity checks).
+    """
+    data = {}
+    for field in fields:
+        value = entry_data.get(field)
+        if value is None:
+            continue
+        # ->> renders non-string values as JSON text
+        data[field] = filter_terms(value if isinstance(value, str) else json.dumps(value))
+    return data or None
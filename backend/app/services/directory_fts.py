@@ -0,0 +1,160 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Schema-driven, weighted full-text search vectors for directory entries.
+
+directory_entries.search_vector used to be built from name, tags and the whole
+entry_data::text, which indexed JSON keys, punctuation and fields nobody
+searches, bloated the GIN index and diluted ranking. The vector is now
+composed from the list's schema searchable_fields only, each with a weight
+(trigger-maintained, see migration f7a8b9c0d1e2):
+
+    name                          -> A
+    tags                          -> B
+    searchable string/array field -> C (default)
+    searchable text field         -> D (default; long free text)
+
+Schema (config/directory_schemas/*.yaml):
+    searchable_fields:
+      specialty:
+        type: string
+        search_weight: B      # optional: A, B, C or D
+
+The weights are stored per list in directory_lists.search_weights when the
+list is seeded; the trigger reads them from there. Lists without weights
+index the string values of entry_data at weight C (no keys or punctuation).
+
+Ranking uses ts_rank_cd (cover density: rewards query terms close together)
+with RANK_NORMALIZATION, so long entries no longer win by sheer length.
+
+Existing rows are rebuilt with rebuild_search_vectors() in id-ordered
+batches (scripts/rebuild_directory_search_vectors.py); rows already up to
+date are skipped, so an interrupted rebuild can simply be resumed.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+from uuid import UUID
+
+from sqlalchemy import func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from ..models.directory import DirectoryEntry
+from .directory_filters import searchable_fields
+from .directory_importer import cached_schema
+
+SEARCH_WEIGHTS = ("A", "B", "C", "D")
+DEFAULT_SEARCH_WEIGHT = "C"
+# Long free text ranks below short, descriptive fields
+TEXT_SEARCH_WEIGHT = "D"
+
+# ts_rank_cd normalization bit mask:
+#   1  = divide by 1 + log(document length) (long entries don't dominate)
+#   32 = rank / (rank + 1), scales ranks into [0, 1)
+RANK_NORMALIZATION = 1 | 32
+
+DEFAULT_REBUILD_BATCH_SIZE = 1000
+
+
+def search_weights_from_schema(schema: Optional[Mapping[str, Any]]) -> Dict[str, str]:
+    """
+    Weighted entry_data fields for a schema's search vector.
+
+    Args:
+        schema: Loaded schema YAML
+
+    Returns:
+        {field: weight} for the searchable fields, in schema order
+
+    Raises:
+        ValueError: If a field declares a search_weight other than A-D
+    """
+    weights = {}
+    for name, definition in searchable_fields(schema).items():
+        weight = definition.get("search_weight")
+        if weight is None:
+            weight = TEXT_SEARCH_WEIGHT if definition.get("type") == "text" else DEFAULT_SEARCH_WEIGHT
+        weight = str(weight).upper()
+        if weight not in SEARCH_WEIGHTS:
+            raise ValueError(f"Invalid search_weight for '{name}': {weight} (expected one of A, B, C, D)")
+        weights[name] = weight
+    return weights
+
+
+def search_weights_for_schema_file(schema_file: str) -> tuple:
+    """search_weights_from_schema() for a schema file as (field, weight) pairs."""
+    return tuple(search_weights_from_schema(cached_schema(schema_file)).items())
+
+
+def rank_expression(ts_query: ColumnElement) -> ColumnElement:
+    """Normalized cover-density rank of an entry's search_vector for a tsquery."""
+    return func.ts_rank_cd(DirectoryEntry.search_vector, ts_query, RANK_NORMALIZATION)
+
+
+@dataclass(frozen=True)
+class RebuildBatch:
+    """Outcome of one rebuild_search_vectors() batch."""
+    scanned: int
+    updated: int
+    last_id: Optional[UUID]
+
+
+# Recomputes a batch of vectors with the trigger's function; rows already up
+# to date are not rewritten (no dead tuples on a resumed run)
+_REBUILD_SQL = text("""
+    WITH batch AS (
+        SELECT e.id
+        FROM directory_entries e
+        WHERE (CAST(:after_id AS uuid) IS NULL OR e.id > CAST(:after_id AS uuid))
+          AND (CAST(:list_id AS uuid) IS NULL OR e.directory_list_id = CAST(:list_id AS uuid))
+        ORDER BY e.id
+        LIMIT :batch_size
+    ),
+    updated AS (
+        UPDATE directory_entries e
+        SET search_vector = directory_entry_search_vector(e.name, e.tags, e.entry_data, l.search_weights)
+        FROM batch, directory_lists l
+        WHERE e.id = batch.id
+          AND l.id = e.directory_list_id
+          AND e.search_vector IS DISTINCT FROM
+              directory_entry_search_vector(e.name, e.tags, e.entry_data, l.search_weights)
+        RETURNING e.id
+    )
+    SELECT (SELECT count(*) FROM batch) AS scanned,
+           (SELECT count(*) FROM updated) AS updated,
+           (SELECT id FROM batch ORDER BY id DESC LIMIT 1) AS last_id
+""")
+
+
+async def rebuild_search_vectors(
+    session: AsyncSession,
+    after_id: Optional[UUID] = None,
+    batch_size: int = DEFAULT_REBUILD_BATCH_SIZE,
+    list_id: Optional[UUID] = None
+) -> RebuildBatch:
+    """
+    Rebuild the search vectors of one batch of entries (caller commits).
+
+    Args:
+        session: Database session
+        after_id: Resume after this entry id (None = from the start)
+        batch_size: Entries per batch
+        list_id: Only rebuild this list's entries
+
+    Returns:
+        RebuildBatch; last_id is None once there is nothing left to scan
+    """
+    result = await session.execute(
+        _REBUILD_SQL,
+        {
+            "after_id": str(after_id) if after_id else None,
+            "list_id": str(list_id) if list_id else None,
+            "batch_size": batch_size,
+        }
+    )
+    scanned, updated, last_id = result.one()
+    return RebuildBatch(scanned=scanned, updated=updated, last_id=last_id)
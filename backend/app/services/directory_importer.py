@@ -13,7 +13,8 @@ from __future__ import annotations
 import csv
 import yaml
 import logfire
-from typing import List, Dict, Callable, Optional
+from functools import lru_cache
+from typing import Any, List, Dict, Callable, Mapping, Optional
 from uuid import UUID
 from pathlib import Path
 from ..models.directory import DirectoryEntry
@@ -1012,3 +1013,16 @@ class DirectoryImporter:
             'entry_data': entry_data
         }
 
+
+@lru_cache(maxsize=64)
+def cached_schema(schema_file: str) -> Mapping[str, Any]:
+    """DirectoryImporter.load_schema() parsed once per worker (schemas change on deploy only).
+
+    Shared by the services deriving settings from a list's schema (filter, facet and
+    search weight fields, catalog purpose, projections, synonyms); treat it as read-only.
+
+    Raises:
+        FileNotFoundError: If schema file doesn't exist
+        yaml.YAMLError: If schema file is malformed
+    """
+    return DirectoryImporter.load_schema(schema_file)
@@ -0,0 +1,397 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+In-process search backend for small directory lists.
+
+Most directory lists (contact information, departments, locations, FAQs)
+hold hundreds to a few thousand entries, yet every search_directory call ran
+a ranked SQL query with a selectinload of the list. With the memory index
+enabled, DirectoryService.search() answers those lists from a compact
+inverted index kept in the worker and only falls back to Postgres for large
+lists and fuzzy (trigram) searches.
+
+Key Features:
+- One index per DirectoryList, built from the database on first use
+  (warm-up) and rebuilt when the account's directory data version changes
+  (imports recreate lists, see data_versions)
+- Lists above max_entries are never loaded; their searches go to Postgres
+- Same semantics as the SQL path per search mode:
+    exact / substring  - name equality / case-insensitive containment
+    fts                - every query word must match, ranked with BM25
+                         (field weights as in the search vector: name A,
+                         tags B, schema searchable_fields by search_weight)
+    filters            - word-prefix matches, looked up in filter_data terms
+                         on indexed filter fields, by regex otherwise
+- FTS words are matched after light suffix stripping and as prefixes of
+  indexed words ("urology" finds "Urologic Surgery", like Postgres stemming)
+- Returns the same DirectoryEntry objects (with directory_list loaded) as
+  the SQL path, so result formatting does not change
+
+Configuration (agent config.yaml):
+    tools:
+      directory:
+        memory_index:
+          enabled: false       # true = serve small lists from memory
+          max_entries: 5000    # larger lists always go to Postgres
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+import logfire
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from ..models.directory import DirectoryEntry, DirectoryList
+from .data_versions import VersionedCache, get_data_versions
+from .directory_filters import common_filter_fields, filter_lookup_terms, filter_terms, lookup_is_exact
+from .directory_synonyms import query_words
+
+# Postgres' default ts_rank weights for D, C, B, A
+FIELD_WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Score factor for indexed words that only start with the query word
+PREFIX_MATCH_FACTOR = 0.5
+
+# Cached list indexes per worker
+MAX_CACHED_LISTS = 256
+
+# Words Postgres' english configuration drops from vectors and queries
+STOP_WORDS = frozenset("""
+    a about above after again against all am an and any are as at be because been before being below
+    between both but by can did do does doing down during each few for from further had has have having
+    he her here hers herself him himself his how i if in into is it its itself just me more most my
+    myself no nor not now of off on once only or other our ours ourselves out over own s same she should
+    so some such t than that the their theirs them themselves then there these they this those through
+    to too under until up very was we were what when where which while who whom why will with you your
+    yours yourself yourselves
+""".split())
+
+# Light suffix stripping, longest first (approximates the english stemmer for prefix matching)
+_SUFFIXES = ("ations", "ation", "ically", "ical", "ists", "ist", "ies", "ing", "ed", "es", "ic", "s", "y")
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+@dataclass(frozen=True)
+class MemoryIndexSettings:
+    """Memory index settings from tools.directory.memory_index in an agent config."""
+    enabled: bool = False
+    max_entries: int = 5000
+
+    @classmethod
+    def from_instance_config(cls, instance_config: Optional[Mapping[str, Any]]) -> "MemoryIndexSettings":
+        directory_config = ((instance_config or {}).get("tools") or {}).get("directory") or {}
+        section = directory_config.get("memory_index") or {}
+        return cls(
+            enabled=bool(section.get("enabled", cls.enabled)),
+            max_entries=max(0, int(section.get("max_entries", cls.max_entries)))
+        )
+
+
+def stem(word: str) -> str:
+    """Strip one common suffix, keeping at least four characters."""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: Any) -> List[str]:
+    """Stemmed, lower-cased words of a text, without stop words."""
+    if text is None:
+        return []
+    return [stem(word) for word in _TOKEN.findall(str(text).lower()) if word not in STOP_WORDS]
+
+
+def _leaf_text(value: Any) -> str:
+    """String and number leaves of a JSON value (directory_field_text() in SQL)."""
+    if isinstance(value, Mapping):
+        return " ".join(_leaf_text(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(_leaf_text(item) for item in value)
+    if isinstance(value, bool) or value is None:
+        return ""
+    return str(value)
+
+
+def _json_text(value: Any) -> Optional[str]:
+    """entry_data ->> key: strings as-is, other values as JSON text."""
+    if value is None:
+        return None
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _prefix_regex(value: str) -> re.Pattern:
+    """Python equivalent of regex_filter(): case-insensitive match at a word start."""
+    return re.compile(r"(?<!\w)" + re.escape(value), re.IGNORECASE)
+
+
+@dataclass
+class ListIndex:
+    """Inverted index over one directory list's entries."""
+    entries: List[DirectoryEntry]
+    filter_fields: Set[str]
+    # term -> {entry position: weighted term frequency}
+    postings: Dict[str, Dict[int, float]] = field(default_factory=dict)
+    doc_lengths: List[float] = field(default_factory=list)
+    vocabulary: List[str] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, directory_list: DirectoryList, entries: Sequence[DirectoryEntry]) -> "ListIndex":
+        """Index entries the way the search_vector trigger composes their vectors."""
+        index = cls(entries=list(entries), filter_fields=set(directory_list.filter_fields or ()))
+        postings: Dict[str, Dict[int, float]] = defaultdict(lambda: defaultdict(float))
+        weights = directory_list.search_weights
+        for position, entry in enumerate(index.entries):
+            fields: List[Tuple[str, str]] = [("A", entry.name), ("B", " ".join(entry.tags or ()))]
+            if weights is None:
+                fields.append(("C", _leaf_text(entry.entry_data or {})))
+            else:
+                fields.extend((weight, _leaf_text((entry.entry_data or {}).get(name))) for name, weight in weights.items())
+            length = 0.0
+            for weight, text in fields:
+                factor = FIELD_WEIGHTS[weight]
+                for term in tokenize(text):
+                    postings[term][position] += factor
+                    length += factor
+            index.doc_lengths.append(length)
+        index.postings = {term: dict(docs) for term, docs in postings.items()}
+        index.vocabulary = sorted(index.postings)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _expand(self, term: str) -> List[str]:
+        """Indexed terms equal to or starting with a query term."""
+        start = bisect.bisect_left(self.vocabulary, term)
+        matches = []
+        for candidate in self.vocabulary[start:]:
+            if not candidate.startswith(term):
+                break
+            matches.append(candidate)
+        return matches
+
+    def rank(self, terms: Sequence[str]) -> Dict[int, float]:
+        """BM25 scores of the entries matching every term (prefix matches discounted)."""
+        total = len(self.entries)
+        average_length = (sum(self.doc_lengths) / total) if total else 0.0
+        scores: Optional[Dict[int, float]] = None
+        for term in terms:
+            term_scores: Dict[int, float] = defaultdict(float)
+            for indexed in self._expand(term):
+                docs = self.postings[indexed]
+                idf = math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+                factor = 1.0 if indexed == term else PREFIX_MATCH_FACTOR
+                for position, frequency in docs.items():
+                    norm = 1 - BM25_B + BM25_B * (self.doc_lengths[position] / average_length if average_length else 1)
+                    term_scores[position] += factor * idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+            if scores is None:
+                scores = dict(term_scores)
+            else:
+                scores = {position: score + term_scores[position] for position, score in scores.items()
+                          if position in term_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+
+def _matches_filter(entry: DirectoryEntry, key: str, value: Any, indexed_fields: Set[str]) -> bool:
+    """Python equivalent of compile_filter() for one entry."""
+    value = str(value)
+    text = _json_text((entry.entry_data or {}).get(key))
+    if text is None:
+        return False
+    terms = filter_lookup_terms(value)
+    if key in indexed_fields and terms:
+        if not set(terms) <= set(filter_terms(text)):
+            return False
+        if lookup_is_exact(value, terms):
+            return True
+    return _prefix_regex(value).search(text) is not None
+
+
+def search_lists(
+    indexes: Sequence[ListIndex],
+    name_query: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    jsonb_filters: Optional[dict] = None,
+    search_mode: str = "substring",
+    limit: int = 10,
+    per_list_limit: Optional[int] = None
+) -> List[DirectoryEntry]:
+    """
+    Search list indexes with DirectoryService.build_search_query() semantics.
+
+    Args:
+        indexes: Indexes of the searched lists
+        name_query, tags, jsonb_filters, search_mode, limit, per_list_limit: As in DirectoryService.search()
+
+    Returns:
+        Matching entries; FTS ranked by BM25, other modes in list order
+        (with per_list_limit: merged as in DirectoryService.rank_per_list())
+    """
+    indexed_fields = common_filter_fields(index.filter_fields for index in indexes)
+    fts_terms: List[str] = []
+    if search_mode == "fts":
+        # Name words and filter values form one AND query, as in the SQL path
+        fts_terms = tokenize(name_query) + [term for value in (jsonb_filters or {}).values() for term in tokenize(value)]
+    needle = name_query.lower() if name_query and search_mode not in ("fts", "exact") else None
+    if search_mode == "fts" and name_query and not query_words(name_query):
+        # No words (operators / punctuation only): the SQL path falls back to substring
+        needle = name_query.lower()
+
+    ranked: List[Tuple[float, int, DirectoryEntry]] = []
+    merged: List[Tuple[float, int, int, DirectoryEntry]] = []
+    order = 0
+    for list_order, index in enumerate(indexes):
+        scores = index.rank(fts_terms) if fts_terms else None
+        if per_list_limit is not None:
+            ranked = []
+        for position, entry in enumerate(index.entries):
+            order += 1
+            if scores is not None and position not in scores:
+                continue
+            if search_mode == "exact" and name_query and entry.name != name_query:
+                continue
+            if needle is not None and needle not in entry.name.lower():
+                continue
+            if tags and not set(tags) & set(entry.tags or ()):
+                continue
+            if jsonb_filters and search_mode != "fts" and not all(
+                _matches_filter(entry, key, value, indexed_fields) for key, value in jsonb_filters.items()
+            ):
+                continue
+            ranked.append((-(scores[position]) if scores is not None else 0.0, order, entry))
+        if per_list_limit is not None:
+            # Best per_list_limit of this list; scores relative to the list's best hit
+            ranked.sort(key=lambda item: (item[0], item[1]))
+            best = -ranked[0][0] if ranked and ranked[0][0] < 0 else None
+            for list_position, (score, _, entry) in enumerate(ranked[:per_list_limit]):
+                relative = score / best if best else (0.0 if scores is not None else -1.0)
+                merged.append((relative, list_position, list_order, entry))
+
+    if per_list_limit is not None:
+        merged.sort(key=lambda item: item[:3])
+        return [entry for *_, entry in merged[:limit]]
+    ranked.sort(key=lambda item: (item[0], item[1]))
+    return [entry for _, _, entry in ranked[:limit]]
+
+
+class DirectoryMemoryIndex:
+    """
+    Per-worker cache of list indexes, keyed by list id and directory data version.
+    """
+
+    def __init__(self, max_lists: int = MAX_CACHED_LISTS):
+        # list id -> (entry count, index or None when the list was too large)
+        self._lists: VersionedCache[UUID, Tuple[int, Optional[ListIndex]]] = VersionedCache(max_lists)
+
+    def clear(self) -> None:
+        """Drop all cached indexes."""
+        self._lists.clear()
+
+    async def _load(self, session: AsyncSession, list_id: UUID, max_entries: int) -> Tuple[int, Optional[ListIndex]]:
+        """Entry count and index of one list (no index above max_entries entries)."""
+        directory_list = await session.get(DirectoryList, list_id)
+        if directory_list is None:
+            return 0, None
+        # Trigger-maintained count (no COUNT(*) over the list)
+        count = directory_list.entry_count or 0
+        if count > max_entries:
+            logfire.info('service.directory.memory_index.too_large', list_id=str(list_id), entries=count,
+                         max_entries=max_entries)
+            return count, None
+        entries = (await session.execute(
+            select(DirectoryEntry)
+            .options(selectinload(DirectoryEntry.directory_list))
+            .where(DirectoryEntry.directory_list_id == list_id)
+            .order_by(DirectoryEntry.id)
+        )).scalars().all()
+        index = ListIndex.build(directory_list, entries)
+        logfire.info('service.directory.memory_index.built', list_id=str(list_id), entries=len(index),
+                     terms=len(index.vocabulary))
+        return count, index
+
+    async def get_index(
+        self,
+        session: AsyncSession,
+        list_id: UUID,
+        version: str,
+        max_entries: int
+    ) -> Optional[ListIndex]:
+        """
+        Index for a list at the given data version (built on first use / after a change).
+
+        Returns:
+            ListIndex, or None if the list is served by Postgres
+        """
+        def stale(cached: Tuple[int, Optional[ListIndex]]) -> bool:
+            # Skipped as too large under a lower max_entries (another agent's config)
+            return cached[1] is None and cached[0] <= max_entries
+
+        count, index = await self._lists.get(
+            list_id, version, lambda: self._load(session, list_id, max_entries), stale=stale
+        )
+        return index if count <= max_entries else None
+
+    async def search(
+        self,
+        session: AsyncSession,
+        account_id: UUID,
+        list_ids: Iterable[UUID],
+        settings: MemoryIndexSettings,
+        name_query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        jsonb_filters: Optional[dict] = None,
+        search_mode: str = "substring",
+        limit: int = 10,
+        per_list_limit: Optional[int] = None
+    ) -> Optional[List[DirectoryEntry]]:
+        """
+        Search from memory when every list qualifies.
+
+        Returns:
+            Matching entries, or None when the search must go to Postgres
+            (fuzzy mode, or a list above max_entries)
+        """
+        if search_mode == "fuzzy" and name_query:
+            return None
+        version = await get_data_versions().directory_version(account_id)
+        indexes = []
+        for list_id in list_ids:
+            index = await self.get_index(session, list_id, version, settings.max_entries)
+            if index is None:
+                return None
+            indexes.append(index)
+        return search_lists(indexes, name_query=name_query, tags=tags, jsonb_filters=jsonb_filters,
+                            search_mode=search_mode, limit=limit, per_list_limit=per_list_limit)
+
+
+_directory_memory_index: DirectoryMemoryIndex | None = None
+
+
+def get_directory_memory_index() -> DirectoryMemoryIndex:
+    """
+    Get the process-wide DirectoryMemoryIndex (singleton pattern).
+
+    Returns:
+        DirectoryMemoryIndex shared by all agents in this worker
+    """
+    global _directory_memory_index
+    if _directory_memory_index is None:
+        _directory_memory_index = DirectoryMemoryIndex()
+    return _directory_memory_index
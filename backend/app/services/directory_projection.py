@@ -0,0 +1,234 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Compiled, schema-driven projection of directory search results.
+
+search_directory used to load full DirectoryEntry rows (plus their
+directory_list) and flatten them through a hard-coded chain of
+`if entry_type == ...` blocks. Each schema now declares the entry_data
+fields it returns and their output names:
+
+    result_fields:
+      department: department
+      hours_of_operation: hours                     # renamed in the output
+      price: {as: price, keep_falsy: true}          # also returned when 0 / false
+
+A ResultProjection is compiled once per schema file:
+- columns() selects only name, tags and the needed contact_info / entry_data
+  paths, as JSON text (no full rows, no relationship load)
+- serialize_results() writes the tool's JSON directly from those texts,
+  without building intermediate dicts
+- Output keys: name, entry_type, tags, phone, email, fax, location, url,
+  then the schema's result_fields; empty values are skipped
+
+Multi-list searches select the union of the lists' columns once
+(MergedProjection) and serialize each row with its own list's projection,
+adding the list_name.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from uuid import UUID
+
+import logfire
+from sqlalchemy import Text, cast
+from sqlalchemy.sql.elements import ColumnElement
+
+from ..models.directory import DirectoryEntry
+from .directory_importer import cached_schema
+
+# contact_info key -> output name (returned for every entry type)
+CONTACT_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("phone", "phone"),
+    ("email", "email"),
+    ("fax", "fax"),
+    ("location", "location"),
+    ("product_url", "url"),
+)
+
+# JSON texts of values that are skipped unless keep_falsy
+_FALSY_JSON = frozenset({'""', "[]", "{}", "false"})
+_ZERO_JSON = re.compile(r"-?0(\.0*)?([eE][-+]?\d+)?")
+
+
+@dataclass(frozen=True)
+class ProjectionField:
+    """One entry_data field in search results."""
+    source: str
+    output: str
+    keep_falsy: bool = False
+
+
+def _is_empty(text: Optional[str], keep_falsy: bool = False) -> bool:
+    """Whether a JSON text is left out of the result (missing, null, or falsy)."""
+    if text is None or text == "null":
+        return True
+    if keep_falsy:
+        return False
+    return text in _FALSY_JSON or (text[0] in "-0" and _ZERO_JSON.fullmatch(text) is not None)
+
+
+def _to_json_text(value: Any) -> Optional[str]:
+    """JSON text of a Python value, formatted like Postgres' jsonb::text."""
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+@dataclass(frozen=True)
+class ResultProjection:
+    """Compiled projection for one directory schema."""
+    entry_type: str
+    fields: Tuple[ProjectionField, ...] = ()
+    # Pre-encoded '"key": ' prefixes, in column order after name and tags
+    _prefixes: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    _keep_falsy: Tuple[bool, ...] = field(init=False, repr=False, compare=False)
+    _head: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        outputs = [output for _, output in CONTACT_FIELDS] + [f.output for f in self.fields]
+        object.__setattr__(self, "_prefixes", tuple(f", {json.dumps(output)}: " for output in outputs))
+        object.__setattr__(self, "_keep_falsy", (False,) * len(CONTACT_FIELDS) + tuple(f.keep_falsy for f in self.fields))
+        object.__setattr__(self, "_head", f", \"entry_type\": {json.dumps(self.entry_type, ensure_ascii=False)}")
+
+    def columns(self) -> List[ColumnElement]:
+        """Columns to select: name, tags, then each contact / entry_data path as JSON text."""
+        return (
+            [DirectoryEntry.name, DirectoryEntry.tags]
+            + [cast(DirectoryEntry.contact_info[key], Text) for key, _ in CONTACT_FIELDS]
+            + [cast(DirectoryEntry.entry_data[f.source], Text) for f in self.fields]
+        )
+
+    def entry_values(self, entry: DirectoryEntry) -> Tuple[Any, ...]:
+        """The columns() values of a loaded DirectoryEntry (in-memory search results)."""
+        contact_info = entry.contact_info or {}
+        entry_data = entry.entry_data or {}
+        return (
+            (entry.name, entry.tags)
+            + tuple(_to_json_text(contact_info.get(key)) for key, _ in CONTACT_FIELDS)
+            + tuple(_to_json_text(entry_data.get(f.source)) for f in self.fields)
+        )
+
+    def serialize(self, row: Sequence[Any], list_name: Optional[str] = None) -> str:
+        """One result object as JSON text (list_name is added for multi-list results)."""
+        name, tags = row[0], row[1]
+        parts = ["{\"name\": ", json.dumps(name, ensure_ascii=False), self._head]
+        if list_name is not None:
+            parts.append(", \"list_name\": ")
+            parts.append(json.dumps(list_name, ensure_ascii=False))
+        if tags:
+            parts.append(", \"tags\": ")
+            parts.append(json.dumps(list(tags), ensure_ascii=False))
+        for prefix, keep_falsy, text in zip(self._prefixes, self._keep_falsy, row[2:], strict=True):
+            if not _is_empty(text, keep_falsy):
+                parts.append(prefix)
+                parts.append(text)
+        parts.append("}")
+        return "".join(parts)
+
+    def serialize_results(self, rows: Sequence[Sequence[Any]]) -> str:
+        """The search_directory response for result rows."""
+        return f"{{\"entries\": [{', '.join(self.serialize(row) for row in rows)}], \"total\": {len(rows)}}}"
+
+
+@dataclass(frozen=True)
+class MergedProjection:
+    """
+    Projection for one query over several lists.
+
+    Selects the list id, the base columns and each entry_data path needed by
+    any of the lists once; rows are serialized with their own list's projection.
+    """
+    # (list id, list name, projection), in search order
+    lists: Tuple[Tuple[UUID, str, ResultProjection], ...]
+    _sources: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    # list id -> (list name, projection, row indexes of the projection's fields)
+    _layouts: Dict[UUID, Tuple[str, ResultProjection, Tuple[int, ...]]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        sources: Dict[str, int] = {}
+        for _, _, projection in self.lists:
+            for f in projection.fields:
+                sources.setdefault(f.source, len(sources))
+        offset = 3 + len(CONTACT_FIELDS)
+        object.__setattr__(self, "_sources", tuple(sources))
+        object.__setattr__(self, "_layouts", {
+            list_id: (list_name, projection, tuple(offset + sources[f.source] for f in projection.fields))
+            for list_id, list_name, projection in self.lists
+        })
+
+    def columns(self) -> List[ColumnElement]:
+        """Columns to select: list id, name, tags, contact paths, then every list's entry_data paths."""
+        return (
+            [DirectoryEntry.directory_list_id, DirectoryEntry.name, DirectoryEntry.tags]
+            + [cast(DirectoryEntry.contact_info[key], Text) for key, _ in CONTACT_FIELDS]
+            + [cast(DirectoryEntry.entry_data[source], Text) for source in self._sources]
+        )
+
+    def entry_values(self, entry: DirectoryEntry) -> Tuple[Any, ...]:
+        """The columns() values of a loaded DirectoryEntry (in-memory search results)."""
+        contact_info = entry.contact_info or {}
+        entry_data = entry.entry_data or {}
+        return (
+            (entry.directory_list_id, entry.name, entry.tags)
+            + tuple(_to_json_text(contact_info.get(key)) for key, _ in CONTACT_FIELDS)
+            + tuple(_to_json_text(entry_data.get(source)) for source in self._sources)
+        )
+
+    def serialize(self, row: Sequence[Any]) -> str:
+        """One result object as JSON text, with its list's fields and list_name."""
+        list_name, projection, indexes = self._layouts[row[0]]
+        values = tuple(row[1:3 + len(CONTACT_FIELDS)]) + tuple(row[i] for i in indexes)
+        return projection.serialize(values, list_name=list_name)
+
+    def serialize_results(self, rows: Sequence[Sequence[Any]]) -> str:
+        """The search_directory response for multi-list result rows."""
+        searched = json.dumps([list_name for _, list_name, _ in self.lists], ensure_ascii=False)
+        return (
+            f"{{\"entries\": [{', '.join(self.serialize(row) for row in rows)}], "
+            f"\"total\": {len(rows)}, \"lists_searched\": {searched}}}"
+        )
+
+
+def compile_projection(schema: Optional[Mapping[str, Any]], entry_type: str) -> ResultProjection:
+    """
+    Compile a schema's result_fields.
+
+    Args:
+        schema: Loaded schema YAML (None = base fields only)
+        entry_type: The list's entry_type (reported with every result)
+
+    Returns:
+        ResultProjection
+    """
+    fields = []
+    for source, definition in ((schema or {}).get("result_fields") or {}).items():
+        if isinstance(definition, Mapping):
+            fields.append(ProjectionField(
+                source=source,
+                output=str(definition.get("as") or source),
+                keep_falsy=bool(definition.get("keep_falsy", False))
+            ))
+        else:
+            fields.append(ProjectionField(source=source, output=str(definition or source)))
+    return ResultProjection(entry_type=entry_type, fields=tuple(fields))
+
+
+@lru_cache(maxsize=64)
+def projection_for_list(schema_file: Optional[str], entry_type: str) -> ResultProjection:
+    """
+    Compiled projection for a list's schema file (cached per schema file and entry type).
+
+    Lists without a readable schema get the base fields (name, entry_type, tags, contact details).
+    """
+    schema = None
+    if schema_file:
+        try:
+            schema = cached_schema(schema_file)
+        except Exception as e:
+            logfire.warn('service.directory.projection.schema_load_failed', schema_file=schema_file, error=str(e))
+    return compile_projection(schema, entry_type)
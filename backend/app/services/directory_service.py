@@ -6,21 +6,37 @@ Directory Service for querying multi-purpose directory entries.
 
 Provides database query layer for searching directory entries (doctors, drugs, products, etc.)
 with multi-tenant access control and flexible filtering (name, tags, JSONB fields).
+JSONB field filters use the schema-driven filter_data index where available
+(see directory_filters).
+
+Several lists can be searched in one query: each list is ranked on its own,
+cut to per_list_limit, and the lists' results are merged by normalized score
+(see build_search_query).
+FTS queries expand the searched lists' schema synonyms into OR-groups
+(see directory_synonyms).
 """
 
 from __future__ import annotations
 
-import re
-from typing import List, Optional, Literal
+from typing import Any, Iterable, List, Optional, Literal, Sequence, Set
 from uuid import UUID
-from sqlalchemy import select, and_, func, text
+from sqlalchemy import Float, Select, select, and_, case, func, literal, text
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.sql.elements import ColumnElement
 from ..models.directory import DirectoryList, DirectoryEntry
+from .directory_filters import common_filter_fields, compile_filter
+from .directory_fts import rank_expression
+from .directory_memory_index import MemoryIndexSettings, get_directory_memory_index
+from .directory_projection import MergedProjection, ResultProjection
+from .directory_synonyms import EMPTY_SYNONYMS, SynonymTable, compile_tsquery
 import logfire
 
 # Type alias for search modes
-SearchMode = Literal["exact", "substring", "fts"]
+SearchMode = Literal["exact", "substring", "fts", "fuzzy"]
+
+# Default pg_trgm word similarity threshold for fuzzy mode (pg_trgm's own default is 0.6)
+DEFAULT_FUZZY_THRESHOLD = 0.5
 
 
 class DirectoryService:
@@ -91,6 +107,46 @@ class DirectoryService:
         )
         return list_ids
     
+    @staticmethod
+    async def get_list(session: AsyncSession, account_id: UUID, list_name: str) -> Optional[DirectoryList]:
+        """
+        Get one of an account's directory lists by name (without its entries).
+        
+        Args:
+            session: Database session
+            account_id: Account UUID
+            list_name: Directory list name
+            
+        Returns:
+            DirectoryList, or None if the account has no such list
+        """
+        result = await session.execute(
+            select(DirectoryList).where(
+                DirectoryList.account_id == account_id,
+                DirectoryList.list_name == list_name
+            )
+        )
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_filter_fields(session: AsyncSession, list_ids: List[UUID]) -> Set[str]:
+        """
+        Get the entry_data fields with indexed filter_data in every given list.
+        
+        Args:
+            session: Database session
+            list_ids: Directory list UUIDs that will be searched
+            
+        Returns:
+            Field names filterable via the filter_data index in all lists
+        """
+        if not list_ids:
+            return set()
+        result = await session.execute(
+            select(DirectoryList.filter_fields).where(DirectoryList.id.in_(list_ids))
+        )
+        return common_filter_fields(row[0] for row in result.fetchall())
+    
     @staticmethod
     async def search(
         session: AsyncSession,
@@ -99,16 +155,23 @@ class DirectoryService:
         tags: Optional[List[str]] = None,
         jsonb_filters: Optional[dict] = None,
         search_mode: SearchMode = "substring",
-        limit: int = 10
-    ) -> List[DirectoryEntry]:
+        limit: int = 10,
+        fuzzy_threshold: float = DEFAULT_FUZZY_THRESHOLD,
+        filter_fields: Optional[Iterable[str]] = None,
+        account_id: Optional[UUID] = None,
+        memory_index: Optional[MemoryIndexSettings] = None,
+        projection: Optional[ResultProjection | MergedProjection] = None,
+        per_list_limit: Optional[int] = None,
+        synonyms: Optional[SynonymTable] = None
+    ) -> List[Any]:
         """
         Search directory entries with flexible filters.
         
         Supports:
-        - Name search (exact, substring, or full-text search)
+        - Name search (exact, substring, full-text or fuzzy)
         - Tag filtering (array overlap, e.g., languages)
         - JSONB field filtering (department, specialty, drug_class, etc.)
-        - Relevance ranking (for FTS mode)
+        - Relevance ranking (for FTS and fuzzy modes)
         
         Multi-tenant isolation enforced via accessible_list_ids parameter.
         
@@ -122,12 +185,28 @@ class DirectoryService:
                 - "exact": Exact match (name == query)
                 - "substring": Case-insensitive partial match (default, backward compatible)
                 - "fts": Full-text search with ranking (handles word variations, stemming)
+                - "fuzzy": Trigram similarity, tolerates misspellings ("Dr. Shwartz")
             limit: Maximum number of results (default: 10)
+            fuzzy_threshold: Minimum word similarity (0-1) for "fuzzy" mode
+            filter_fields: Indexed filter fields of the searched lists (resolved with
+                get_filter_fields() when omitted and jsonb_filters are given)
+            account_id: Owner of the lists (required for the memory index)
+            memory_index: Serve small lists from the in-process index when enabled
+                (see directory_memory_index; falls back to SQL otherwise)
+            projection: Select only the projection's columns (see directory_projection)
+            per_list_limit: Rank each list separately and keep its best per_list_limit
+                entries; the lists' results are merged by normalized score (limit applies
+                to the merged results). Use with a MergedProjection for several lists.
+            synonyms: Expansion table of the searched lists' schemas ("fts" mode;
+                see directory_synonyms.synonyms_for_schema_files)
             
         Returns:
             List of DirectoryEntry instances matching filters
-            - For "fts" mode: Sorted by relevance (ts_rank DESC)
+            (with a projection: rows of ResultProjection.columns() values)
+            - For "fts" mode: Sorted by relevance (ts_rank_cd DESC)
+            - For "fuzzy" mode: Sorted by similarity (word_similarity DESC)
             - For other modes: Database order
+            - With per_list_limit: Merged across lists (see build_search_query)
             
         Examples:
             # Substring search (default - backward compatible)
@@ -146,6 +225,15 @@ class DirectoryService:
                 search_mode="fts"
             )
             
+            # Fuzzy match (misspelled names)
+            entries = await DirectoryService.search(
+                session,
+                accessible_list_ids=[list_id],
+                name_query="Dr. Shwartz",  # Matches "Dr. Robert Schwartz, MD"
+                search_mode="fuzzy",
+                fuzzy_threshold=0.5
+            )
+            
             # Exact match
             entries = await DirectoryService.search(
                 session,
@@ -168,38 +256,141 @@ class DirectoryService:
             logfire.warn('service.directory.search_no_lists')
             return []
         
-        # Base query: filter by accessible lists
-        # Using selectinload() prevents N+1 queries if relationships are accessed later
-        query = (
-            select(DirectoryEntry)
-            .options(
-                selectinload(DirectoryEntry.directory_list)  # Eager load directory_list relationship
+        # The memory index has no synonym groups: expanded FTS queries go to Postgres
+        expanded = search_mode == "fts" and synonyms is not None and compile_tsquery(
+            [name_query, *(jsonb_filters or {}).values()], synonyms
+        )[1]
+        
+        if memory_index and memory_index.enabled and account_id and not expanded:
+            entries = await get_directory_memory_index().search(
+                session,
+                account_id,
+                accessible_list_ids,
+                memory_index,
+                name_query=name_query,
+                tags=tags,
+                jsonb_filters=jsonb_filters,
+                search_mode=search_mode,
+                limit=limit,
+                per_list_limit=per_list_limit
             )
-            .where(
-                DirectoryEntry.directory_list_id.in_(accessible_list_ids)
+            if entries is not None:
+                if projection is not None:
+                    entries = [projection.entry_values(entry) for entry in entries]
+                logfire.info(
+                    'service.directory.search.complete',
+                    entries_count=len(entries),
+                    search_mode=search_mode,
+                    backend="memory",
+                    name_query=name_query,
+                    tags=tags,
+                    filter_keys=list(jsonb_filters.keys()) if jsonb_filters else None
+                )
+                return entries
+        
+        if jsonb_filters and search_mode != "fts" and filter_fields is None:
+            filter_fields = await DirectoryService.get_filter_fields(session, accessible_list_ids)
+        
+        query = DirectoryService.build_search_query(
+            accessible_list_ids,
+            name_query=name_query,
+            tags=tags,
+            jsonb_filters=jsonb_filters,
+            search_mode=search_mode,
+            limit=limit,
+            filter_fields=filter_fields,
+            columns=projection.columns() if projection is not None else None,
+            per_list_limit=per_list_limit,
+            synonyms=synonyms
+        )
+        
+        if search_mode == "fuzzy" and name_query:
+            # Threshold for the %> operator, scoped to this transaction
+            await session.execute(
+                text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                {"threshold": str(fuzzy_threshold)}
             )
+        
+        # Execute query
+        result = await session.execute(query)
+        entries = result.all() if projection is not None else result.scalars().all()
+        
+        logfire.info(
+            'service.directory.search.complete',
+            entries_count=len(entries),
+            search_mode=search_mode,
+            backend="postgres",
+            list_count=len(accessible_list_ids),
+            synonyms_expanded=expanded,
+            fuzzy_threshold=fuzzy_threshold if search_mode == "fuzzy" else None,
+            name_query=name_query,
+            tags=tags,
+            filter_keys=list(jsonb_filters.keys()) if jsonb_filters else None
         )
         
+        return entries
+
+    @staticmethod
+    def build_search_query(
+        accessible_list_ids: List[UUID],
+        name_query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        jsonb_filters: Optional[dict] = None,
+        search_mode: SearchMode = "substring",
+        limit: int = 10,
+        filter_fields: Optional[Iterable[str]] = None,
+        columns: Optional[Sequence[ColumnElement]] = None,
+        per_list_limit: Optional[int] = None,
+        synonyms: Optional[SynonymTable] = None
+    ) -> Select:
+        """
+        Build the SELECT for search() (see search() for parameter semantics).
+        
+        Separated from execution so the generated SQL can be inspected (unit tests,
+        EXPLAIN in benchmarks). Fuzzy mode relies on the caller setting
+        pg_trgm.word_similarity_threshold for the transaction.
+        
+        Args:
+            filter_fields: jsonb_filters keys with indexed filter_data in every
+                searched list (see get_filter_fields); other keys use the regex
+            columns: Select only these columns instead of full DirectoryEntry rows
+            per_list_limit: Rank per list and merge (see rank_per_list())
+            synonyms: FTS synonym expansions (see directory_synonyms)
+        """
+        synonyms = synonyms or EMPTY_SYNONYMS
+        if columns is None:
+            query = select(DirectoryEntry)
+            if per_list_limit is None:
+                # Using selectinload() prevents N+1 queries if relationships are accessed later
+                query = query.options(
+                    selectinload(DirectoryEntry.directory_list)  # Eager load directory_list relationship
+                )
+        else:
+            query = select(*columns)
+        # Base query: filter by accessible lists
+        query = query.where(DirectoryEntry.directory_list_id.in_(accessible_list_ids))
+        
         # Track if we've applied FTS ranking (for combining with filter queries)
         fts_rank_expr = None
         fts_ts_query = None
+        # Relevance of fuzzy matches (FTS uses fts_rank_expr)
+        similarity_expr = None
         
         # Name search - behavior depends on search_mode
         if name_query:
             if search_mode == "fts":
                 # Full-text search with relevance ranking
                 try:
-                    # Sanitize query: split words and filter out tsquery operators
-                    # Remove special tsquery characters (&, |, !) that cause syntax errors
-                    # Example: "Oral & Maxillofacial Surgery" -> ["Oral", "Maxillofacial", "Surgery"]
-                    words = [w for w in name_query.strip().split() if w not in ('&', '|', '!')]
+                    # Sanitize query: lower-cased words only, tsquery operators and punctuation dropped
+                    # Example: "Oral & Maxillofacial Surgery" -> "oral & maxillofacial & surgery"
+                    # Schema synonyms become OR-groups: "heart doctor" -> "(heart & doctor | cardiology)"
+                    # Compiled strings are cached per normalized input
+                    tsquery_str, expanded = compile_tsquery([name_query], synonyms)
                     
-                    if not words:
-                        # All words were operators, fallback to substring
+                    if not tsquery_str:
+                        # No words (operators / punctuation only), fallback to substring
                         query = query.where(DirectoryEntry.name.ilike(f"%{name_query}%"))
                     else:
-                        # Convert sanitized words to tsquery (join with & for AND logic)
-                        tsquery_str = ' & '.join(words)
                         
                         # Create tsquery function call
                         fts_ts_query = func.to_tsquery('english', tsquery_str)
@@ -209,15 +400,15 @@ class DirectoryService:
                             DirectoryEntry.search_vector.op('@@')(fts_ts_query)
                         )
                         
-                        # Rank by relevance (higher is better)
-                        fts_rank_expr = func.ts_rank(DirectoryEntry.search_vector, fts_ts_query)
+                        # Rank by relevance (higher is better): normalized cover density, see directory_fts
+                        fts_rank_expr = rank_expression(fts_ts_query)
                         query = query.order_by(fts_rank_expr.desc())
                         
                         logfire.debug(
                             'service.directory.search.fts_query',
                             tsquery_str=tsquery_str,
                             name_query=name_query,
-                            sanitized_words=words
+                            synonyms_expanded=expanded
                         )
                     
                 except Exception as e:
@@ -229,12 +420,24 @@ class DirectoryService:
                     )
                     query = query.where(DirectoryEntry.name.ilike(f"%{name_query}%"))
                     
+            elif search_mode == "fuzzy":
+                # Trigram word similarity: tolerates misspellings ("Dr. Shwartz" -> "Dr. Robert Schwartz")
+                # name %> q  <=>  word_similarity(q, name) >= pg_trgm.word_similarity_threshold
+                # Served by the gin_trgm_ops index on name (no sequential scan)
+                query = query.where(DirectoryEntry.name.op('%>')(name_query))
+                similarity_expr = func.word_similarity(name_query, DirectoryEntry.name)
+                query = query.order_by(
+                    similarity_expr.desc(),
+                    func.similarity(DirectoryEntry.name, name_query).desc()
+                )
+                
             elif search_mode == "exact":
                 # Exact match (case-sensitive)
                 query = query.where(DirectoryEntry.name == name_query)
                 
             else:  # substring (default)
                 # Partial match, case-insensitive (backward compatible)
+                # Leading-wildcard ILIKE is served by the gin_trgm_ops index on name
                 query = query.where(DirectoryEntry.name.ilike(f"%{name_query}%"))
         
         # Tag filtering (array overlap - PostgreSQL && operator)
@@ -249,54 +452,33 @@ class DirectoryService:
                 # BUG-0023-004: Use tsvector for specialty searches when FTS mode enabled
                 # This enables fuzzy matching: "Urology" → "Urologic Surgery" via stemming
                 # Build tsquery from all filter values (combine with AND)
-                # Sanitize filter values: remove tsquery operators (&, |, !) to prevent syntax errors
-                filter_values = []
-                for value in jsonb_filters.values():
-                    # Split multi-word values and filter out special tsquery operators
-                    words = [w for w in value.strip().split() if w not in ('&', '|', '!')]
-                    filter_values.extend(words)
+                # Sanitized like name_query, with the same synonym groups
+                filter_tsquery_str, _ = compile_tsquery(jsonb_filters.values(), synonyms)
                 
-                if filter_values:
-                    # Build combined tsquery from name_query (if exists) and filter values
-                    tsquery_parts = []
+                if filter_tsquery_str:
+                    # Build combined tsquery from name_query (if exists, for combined ranking) and filter values
+                    combined_tsquery_str, _ = compile_tsquery([name_query, *jsonb_filters.values()], synonyms)
+                    combined_ts_query = func.to_tsquery('english', combined_tsquery_str)
                     
-                    # Add name_query parts if it exists (for combined ranking)
-                    if name_query:
-                        # Sanitize name_query parts (remove tsquery operators)
-                        name_parts = [w for w in name_query.strip().split() if w not in ('&', '|', '!')]
-                        tsquery_parts.extend(name_parts)
-                    
-                    # Add sanitized filter values
-                    tsquery_parts.extend(filter_values)
-                    
-                    if tsquery_parts:
-                        # Build combined tsquery string (all parts already sanitized)
-                        combined_tsquery_str = ' & '.join(tsquery_parts)
-                        combined_ts_query = func.to_tsquery('english', combined_tsquery_str)
+                    # Apply tsvector search if not already applied by name_query
+                    if not name_query:
+                        # No name_query, so apply tsvector search for filters only
+                        query = query.where(
+                            DirectoryEntry.search_vector.op('@@')(combined_ts_query)
+                        )
+                        # Add ranking by relevance
+                        fts_rank_expr = rank_expression(combined_ts_query)
+                        query = query.order_by(fts_rank_expr.desc())
                     else:
-                        # All parts were operators, skip tsquery and use substring fallback
-                        combined_ts_query = None
-                    
-                    if combined_ts_query is not None:
-                        # Apply tsvector search if not already applied by name_query
-                        if not name_query:
-                            # No name_query, so apply tsvector search for filters only
-                            query = query.where(
-                                DirectoryEntry.search_vector.op('@@')(combined_ts_query)
-                            )
-                            # Add ranking by relevance
-                            fts_rank_expr = func.ts_rank(DirectoryEntry.search_vector, combined_ts_query)
-                            query = query.order_by(fts_rank_expr.desc())
-                        else:
-                            # name_query already applied tsvector, but use combined query for better ranking
-                            # Replace existing order_by with combined ranking
-                            fts_rank_expr = func.ts_rank(DirectoryEntry.search_vector, combined_ts_query)
-                            # Remove any existing order_by and add new one
-                            # Note: SQLAlchemy will replace order_by if called again
-                            query = query.order_by(fts_rank_expr.desc())
+                        # name_query already applied tsvector, but use combined query for better ranking
+                        # Replace existing order_by with combined ranking
+                        fts_rank_expr = rank_expression(combined_ts_query)
+                        # Remove any existing order_by and add new one
+                        # Note: SQLAlchemy will replace order_by if called again
+                        query = query.order_by(fts_rank_expr.desc())
                     
                     # NOTE: We do NOT apply additional JSONB field filters here
-                    # The tsvector search already handles matching across ALL fields (name, tags, entry_data)
+                    # The tsvector search already handles matching across name, tags and the schema searchable_fields
                     # Additional JSONB substring filters would conflict with tsvector's fuzzy matching
                     # Example: "Urology" → tsvector matches "Urologic Surgery" via stemming
                     # But substring filter "%Urology%" fails because "Urology" is not a substring of "Urologic Surgery"
@@ -308,36 +490,75 @@ class DirectoryService:
                         filter_count=len(jsonb_filters)
                     )
             else:
-                # Non-FTS modes: Use regex word-boundary matching
-                # Uses regex word boundaries to prevent false matches:
-                # - "Urology" matches "Urology" and "Urologic Surgery" but NOT "Neurology"
-                # - Word boundary \m = start of word
-                # - Escapes special regex characters in value to prevent injection
+                # Non-FTS modes: word-level matching, case-insensitive
+                # - "Cardiology" matches "Interventional Cardiology" but NOT "Neurocardiology"
+                # - Fields filterable in every searched list use the filter_data GIN index (@>)
+                # - Other fields fall back to a word-boundary regex over entry_data (per-row scan)
+                indexed_fields = set(filter_fields or ())
                 for key, value in jsonb_filters.items():
-                    # Escape special regex characters in the search value
-                    escaped_value = re.escape(value)
-                    # Pattern: word starts with escaped value (case-insensitive)
-                    # \m = word boundary at start, allows "Urology" to match "Urologic Surgery"
-                    word_boundary_pattern = f"\\m{escaped_value}"
-                    query = query.where(
-                        DirectoryEntry.entry_data[key].astext.op('~*')(word_boundary_pattern)
-                    )
+                    query = query.where(compile_filter(key, value, indexed_fields))
         
-        # Limit results
-        query = query.limit(limit)
+        if per_list_limit is not None:
+            score = fts_rank_expr if fts_rank_expr is not None else similarity_expr
+            return DirectoryService.rank_per_list(
+                query, accessible_list_ids, score, per_list_limit, limit, entities=columns is None
+            )
+        return query.limit(limit)
+
+    @staticmethod
+    def rank_per_list(
+        query: Select,
+        list_ids: List[UUID],
+        score: Optional[ColumnElement],
+        per_list_limit: int,
+        limit: int,
+        entities: bool = False
+    ) -> Select:
+        """
+        Merge a multi-list search into one ranked result set (a single SQL statement).
         
-        # Execute query
-        result = await session.execute(query)
-        entries = result.scalars().all()
+        - Each list is ranked on its own (score, then id) and keeps its best per_list_limit rows
+        - Scores are divided by the list's best score, so the top hit of every list scores 1.0
+          and ranks from lists of different size / vocabulary are comparable
+        - Merged order: normalized score, then position within the list, then list order;
+          without a score (exact / substring / filters only) lists are interleaved round-robin
         
-        logfire.info(
-            'service.directory.search.complete',
-            entries_count=len(entries),
-            search_mode=search_mode,
-            name_query=name_query,
-            tags=tags,
-            filter_keys=list(jsonb_filters.keys()) if jsonb_filters else None
+        Args:
+            query: Filtered search query (its ORDER BY and LIMIT are replaced)
+            list_ids: Searched lists, in priority order
+            score: Relevance expression (higher is better), None for unranked modes
+            per_list_limit: Entries kept per list
+            limit: Entries returned in total
+            entities: The query selects DirectoryEntry rows (else plain columns)
+        """
+        partition = DirectoryEntry.directory_list_id
+        list_order = case(
+            {list_id: position for position, list_id in enumerate(list_ids)},
+            value=partition,
+            else_=len(list_ids)
         )
+        if score is None:
+            list_position = func.row_number().over(partition_by=partition, order_by=DirectoryEntry.id)
+            list_score = literal(1.0, Float)
+        else:
+            list_position = func.row_number().over(partition_by=partition, order_by=(score.desc(), DirectoryEntry.id))
+            list_score = func.coalesce(score / func.nullif(func.max(score).over(partition_by=partition), 0), 0)
         
-        return entries
-
+        selected = len(query.selected_columns)
+        ranked = query.order_by(None).add_columns(
+            list_position.label("list_position"),
+            list_score.label("list_score"),
+            list_order.label("list_order")
+        ).subquery("ranked")
+        
+        if entities:
+            entry = aliased(DirectoryEntry, ranked)
+            merged = select(entry).options(selectinload(entry.directory_list))
+        else:
+            merged = select(*list(ranked.c)[:selected])
+        return (
+            merged
+            .where(ranked.c.list_position <= per_list_limit)
+            .order_by(ranked.c.list_score.desc(), ranked.c.list_position, ranked.c.list_order)
+            .limit(limit)
+        )
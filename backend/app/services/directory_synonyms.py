@@ -0,0 +1,217 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Synonym and abbreviation expansion for directory full-text search.
+
+Users ask for a "heart doctor", "OB", "ENT" or "peds", while entries say
+Cardiology, Obstetrics and Otolaryngology. FTS joined the raw query words
+with &, so those searches found nothing and the LLM retried with reworded
+queries (a full tool round trip each). Each schema's synonyms are now
+compiled into an expansion table, and a matched phrase becomes an OR-group
+in the tsquery:
+
+    "heart doctor"  ->  (heart & doctor | cardiology | interventional & cardiology | cardiac & surgery)
+    "peds surgery"  ->  (peds | pediatrics | pediatric) & surgery
+
+Sources (config/directory_schemas/*.yaml):
+    search_synonyms:                  # abbreviations / short forms
+      peds: [Pediatrics, Pediatric]
+    search_strategy:
+      synonym_mappings:               # the lay -> formal mappings shown in the prompt
+        - lay_terms: ["heart doctor"]
+          formal_terms: ["Cardiology"]
+      # or, as a mapping (classes.yaml): canonical term -> what users say
+      #   class: [course, training]   ("course" -> (course | class))
+
+- Phrases are matched longest first (up to MAX_PHRASE_WORDS words), case-insensitively
+- The original words stay in their group, so entries using the lay term still match
+- Multi-word alternatives are ANDed like the rest of the query (to_tsquery stems them)
+- Tables are compiled once per schema file; compiled tsqueries are cached per
+  normalized input (lower-cased words)
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import logfire
+
+from .directory_importer import cached_schema
+
+# Longest phrase looked up in the table
+MAX_PHRASE_WORDS = 4
+
+COMPILED_QUERY_CACHE_SIZE = 4096
+
+_WORD = re.compile(r"[^\W_]+")
+
+Phrase = Tuple[str, ...]
+
+
+def query_words(text: Optional[str]) -> List[str]:
+    """
+    Lower-cased words of a query (tsquery operators and punctuation dropped).
+
+    Example: "Oral & Maxillofacial Surgery" -> ["oral", "maxillofacial", "surgery"]
+    """
+    return _WORD.findall(text.lower()) if text else []
+
+
+def _phrase(text: Any) -> Phrase:
+    return tuple(query_words(str(text)))
+
+
+@dataclass(frozen=True, eq=False)
+class SynonymTable:
+    """Compiled expansions: phrase -> alternative phrases (hashable by identity, for caching)."""
+    expansions: Mapping[Phrase, Tuple[Phrase, ...]] = field(default_factory=dict)
+    max_words: int = field(init=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "max_words", min(MAX_PHRASE_WORDS, max(map(len, self.expansions), default=0)))
+
+    def __len__(self) -> int:
+        return len(self.expansions)
+
+    def groups(self, words: Sequence[str]) -> List[Tuple[Phrase, ...]]:
+        """
+        Split query words into groups of alternatives (longest phrase match first).
+
+        Returns:
+            One tuple per group; the first alternative is always the original phrase
+        """
+        groups = []
+        position = 0
+        while position < len(words):
+            for size in range(min(self.max_words, len(words) - position), 0, -1):
+                phrase = tuple(words[position:position + size])
+                alternatives = self.expansions.get(phrase)
+                if alternatives:
+                    groups.append((phrase,) + alternatives)
+                    position += size
+                    break
+            else:
+                groups.append(((words[position],),))
+                position += 1
+        return groups
+
+
+EMPTY_SYNONYMS = SynonymTable()
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _add(expansions: Dict[Phrase, List[Phrase]], term: Any, alternatives: Iterable[Any]) -> None:
+    phrase = _phrase(term)
+    if not phrase:
+        return
+    current = expansions.setdefault(phrase, [])
+    for alternative in alternatives:
+        alternative = _phrase(alternative)
+        if alternative and alternative != phrase and alternative not in current:
+            current.append(alternative)
+
+
+def synonyms_from_schema(schema: Optional[Mapping[str, Any]]) -> Dict[Phrase, Tuple[Phrase, ...]]:
+    """
+    Expansion table of a directory schema.
+
+    Args:
+        schema: Loaded schema YAML
+
+    Returns:
+        {phrase: alternative phrases} from search_synonyms and search_strategy.synonym_mappings
+    """
+    schema = schema or {}
+    expansions: Dict[Phrase, List[Phrase]] = {}
+    for term, alternatives in (schema.get("search_synonyms") or {}).items():
+        _add(expansions, term, _as_list(alternatives))
+    mappings = (schema.get("search_strategy") or {}).get("synonym_mappings") or ()
+    if isinstance(mappings, Mapping):
+        for canonical, lay_terms in mappings.items():
+            for lay_term in _as_list(lay_terms):
+                _add(expansions, lay_term, [canonical])
+    else:
+        for mapping in mappings:
+            if not isinstance(mapping, Mapping):
+                continue
+            formal_terms = _as_list(mapping.get("formal_terms"))
+            for lay_term in _as_list(mapping.get("lay_terms")):
+                _add(expansions, lay_term, formal_terms)
+    return {phrase: tuple(alternatives) for phrase, alternatives in expansions.items() if alternatives}
+
+
+@lru_cache(maxsize=64)
+def synonyms_for_schema_file(schema_file: Optional[str]) -> SynonymTable:
+    """Compiled expansion table of a schema file (cached, so searches share one table per file)."""
+    if not schema_file:
+        return EMPTY_SYNONYMS
+    try:
+        schema = cached_schema(schema_file)
+    except Exception as e:
+        logfire.warn('service.directory.synonyms.schema_load_failed', schema_file=schema_file, error=str(e))
+        return EMPTY_SYNONYMS
+    table = SynonymTable(synonyms_from_schema(schema))
+    logfire.info('service.directory.synonyms.compiled', schema_file=schema_file, phrases=len(table))
+    return table
+
+
+@lru_cache(maxsize=64)
+def synonyms_for_schema_files(schema_files: Tuple[Optional[str], ...]) -> SynonymTable:
+    """Merged expansion table of several lists' schema files (multi-list searches)."""
+    tables = [synonyms_for_schema_file(schema_file) for schema_file in dict.fromkeys(schema_files)]
+    if len(tables) == 1:
+        return tables[0]
+    expansions: Dict[Phrase, List[Phrase]] = {}
+    for table in tables:
+        for phrase, alternatives in table.expansions.items():
+            _add(expansions, " ".join(phrase), (" ".join(alternative) for alternative in alternatives))
+    return SynonymTable({phrase: tuple(alternatives) for phrase, alternatives in expansions.items()})
+
+
+def _tsquery_phrase(phrase: Phrase) -> str:
+    return " & ".join(phrase)
+
+
+@lru_cache(maxsize=COMPILED_QUERY_CACHE_SIZE)
+def _compile(words: Tuple[str, ...], synonyms: SynonymTable) -> Tuple[str, bool]:
+    parts = []
+    expanded = False
+    for group in synonyms.groups(words):
+        if len(group) == 1:
+            parts.append(_tsquery_phrase(group[0]))
+        else:
+            expanded = True
+            parts.append("(" + " | ".join(_tsquery_phrase(phrase) for phrase in group) + ")")
+    return " & ".join(parts), expanded
+
+
+def compile_tsquery(texts: Iterable[Optional[str]], synonyms: SynonymTable = EMPTY_SYNONYMS) -> Tuple[str, bool]:
+    """
+    Compile query texts into one to_tsquery() string (texts are ANDed).
+
+    Args:
+        texts: Query texts (e.g. name query and FTS filter values)
+        synonyms: Expansion table of the searched lists
+
+    Returns:
+        (tsquery string, whether any synonym group was added); the string is
+        empty when the texts contain no words
+    """
+    parts = []
+    expanded = False
+    for text in texts:
+        words = tuple(query_words(text))
+        if words:
+            tsquery, group_added = _compile(words, synonyms)
+            parts.append(tsquery)
+            expanded = expanded or group_added
+    return " & ".join(parts), expanded
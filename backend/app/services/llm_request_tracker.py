@@ -67,7 +67,7 @@ class LLMRequestTracker:
         model: str,
         request_body: Dict[str, Any],
         response_body: Dict[str, Any],
-        tokens: Dict[str, int],  # {"prompt": 150, "completion": 75, "total": 225}
+        tokens: Dict[str, int],  # {"prompt": 150, "completion": 75, "total": 225, "cache_read": 120}
         cost_data: Dict[str, float],  # OpenRouter actuals: unit costs + computed total
         latency_ms: int,
         # Denormalized fields for fast billing queries (no JOINs needed)
@@ -91,7 +91,8 @@ class LLMRequestTracker:
             model: Model identifier (e.g., "deepseek/deepseek-chat-v3.1")
             request_body: Sanitized request payload for debugging
             response_body: Response metadata including headers and usage stats
-            tokens: Token usage breakdown from Pydantic AI
+            tokens: Token usage breakdown from Pydantic AI (optional "cache_read" /
+                "cache_write" keys for provider prompt caching)
             cost_data: Cost information from OpenRouter or computed
             latency_ms: Request duration in milliseconds
             agent_instance_id: Optional agent identifier for multi-agent tracking
@@ -181,6 +182,8 @@ class LLMRequestTracker:
                 prompt_tokens=tokens.get("prompt", 0),
                 completion_tokens=tokens.get("completion", 0),
                 total_tokens=tokens.get("total", 0),
+                cache_read_tokens=tokens.get("cache_read"),
+                cache_write_tokens=tokens.get("cache_write"),
                 prompt_cost=cost_data.get("prompt_cost", 0.0),
                 completion_cost=cost_data.get("completion_cost", 0.0),
                 total_cost=cost_data.get("total_cost", 0.0),
@@ -234,6 +237,7 @@ class LLMRequestTracker:
             provider=provider,
             model=model,
             total_tokens=tokens.get("total", 0),
+            cache_read_tokens=tokens.get("cache_read"),
             computed_cost=cost_data.get("total_cost", 0.0),
             latency_ms=latency_ms,
             llm_request_id=str(llm_request.id),
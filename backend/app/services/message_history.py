@@ -0,0 +1,158 @@
+"""
+Lossless storage and replay of Pydantic AI messages for conversation history.
+
+Messages rows only hold the user text and the final assistant text, so a
+follow-up turn used to lose everything the agent learned from its tools
+("the second one" after a directory search meant nothing to the model).
+Each saved turn now also stores its `new_messages()` - tool calls, tool
+returns and the final response - in the assistant row's meta, and history
+loading replays those messages instead of the flat text pair.
+
+Key Features:
+- Serialized with pydantic-ai's ModelMessagesTypeAdapter (JSON mode)
+- Compact: system prompt parts (re-injected every turn), usage and run ids
+  are dropped before storage
+- Tool returns longer than max_tool_return_chars are truncated with a marker
+- Rows without stored messages (older turns, cached/coalesced turns) or
+  with unreadable payloads fall back to the text conversion
+
+Configuration (instance config.yaml):
+    context_management:
+      store_model_messages: true      # false = text only (previous behavior)
+      max_tool_return_chars: 4000     # 0 = never truncate tool returns
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import logfire
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelMessagesTypeAdapter,
+    ModelRequest,
+    ModelResponse,
+    TextPart,
+    UserPromptPart,
+)
+
+# Key in the assistant row's meta holding the serialized turn
+META_KEY = "model_messages"
+
+TRUNCATION_MARKER = "... [truncated {count} chars]"
+
+
+@dataclass(frozen=True)
+class HistoryStorageSettings:
+    """History storage settings from the `context_management` section of an instance config."""
+    store_model_messages: bool = True
+    max_tool_return_chars: int = 4000
+
+    @classmethod
+    def from_instance_config(cls, instance_config: Optional[Mapping[str, Any]]) -> "HistoryStorageSettings":
+        section = (instance_config or {}).get("context_management", {}) or {}
+        return cls(
+            store_model_messages=bool(section.get("store_model_messages", cls.store_model_messages)),
+            max_tool_return_chars=max(0, int(section.get("max_tool_return_chars", cls.max_tool_return_chars)))
+        )
+
+
+def _truncate_tool_return(part: Dict[str, Any], max_chars: int) -> None:
+    """Truncate a serialized tool-return part in place."""
+    content = part.get("content")
+    text = content if isinstance(content, str) else json.dumps(content, default=str)
+    if len(text) <= max_chars:
+        return
+    part["content"] = text[:max_chars] + TRUNCATION_MARKER.format(count=len(text) - max_chars)
+    part.pop("metadata", None)
+
+
+def serialize_turn(messages: Iterable[ModelMessage], max_tool_return_chars: int = 0) -> List[Dict[str, Any]]:
+    """
+    Serialize one turn's messages for storage in Message.meta.
+
+    Args:
+        messages: The turn's messages (result.new_messages())
+        max_tool_return_chars: Truncate longer tool returns (0 = never)
+
+    Returns:
+        JSON-compatible list of message dicts
+    """
+    compact: List[Dict[str, Any]] = []
+    for message in ModelMessagesTypeAdapter.dump_python(list(messages), mode="json", exclude_none=True):
+        message.pop("run_id", None)
+        message.pop("usage", None)
+        parts = [part for part in message.get("parts", []) if part.get("part_kind") != "system-prompt"]
+        if max_tool_return_chars:
+            for part in parts:
+                if part.get("part_kind") == "tool-return":
+                    _truncate_tool_return(part, max_tool_return_chars)
+        if not parts:
+            continue
+        message["parts"] = parts
+        compact.append(message)
+    return compact
+
+
+def deserialize_turn(data: Any) -> Optional[List[ModelMessage]]:
+    """
+    Rehydrate messages stored by serialize_turn.
+
+    Returns:
+        The messages, or None if the payload is missing or unreadable
+    """
+    if not data:
+        return None
+    try:
+        return ModelMessagesTypeAdapter.validate_python(data)
+    except Exception as e:
+        logfire.warn('service.message_history.deserialize_failed', error=str(e))
+        return None
+
+
+def to_model_messages(db_messages: Iterable[Any], model_name: str) -> List[ModelMessage]:
+    """
+    Convert Message rows (oldest first) to Pydantic AI messages.
+
+    An assistant row with stored messages replaces its whole turn: the stored
+    request already carries the user prompt, so the preceding text-only user
+    message is dropped.
+
+    Args:
+        db_messages: Message rows in chronological order
+        model_name: model_name for responses rebuilt from text
+
+    Returns:
+        List of ModelMessage objects in chronological order
+    """
+    converted: List[ModelMessage] = []
+    pending_user = False  # Last converted message came from a user row
+    for msg in db_messages:
+        timestamp = msg.created_at or datetime.now(UTC)
+        if msg.role in ("human", "user"):
+            converted.append(ModelRequest(parts=[UserPromptPart(content=msg.content, timestamp=timestamp)]))
+            pending_user = True
+            continue
+        if msg.role != "assistant":
+            # Skip system messages and unknown roles (Pydantic AI handles system messages)
+            continue
+
+        stored = deserialize_turn((msg.meta or {}).get(META_KEY))
+        if stored:
+            if pending_user and isinstance(stored[0], ModelRequest):
+                converted.pop()
+            converted.extend(stored)
+        else:
+            converted.append(ModelResponse(
+                parts=[TextPart(content=msg.content)],
+                model_name=model_name,
+                timestamp=timestamp
+            ))
+        pending_user = False
+    return converted
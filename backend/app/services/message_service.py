@@ -53,6 +53,7 @@ from sqlalchemy.orm import selectinload
 
 from ..models.message import Message
 from ..database import get_database_service
+from .message_history import META_KEY as MODEL_MESSAGES_KEY, HistoryStorageSettings, serialize_turn
 
 
 class MessageService:
@@ -636,7 +637,8 @@ class MessageService:
         llm_request_id: uuid.UUID | str | None,
         user_message: str,
         assistant_message: str,
-        result: Any = None
+        result: Any = None,
+        history_storage: HistoryStorageSettings | None = None
     ) -> tuple[uuid.UUID, uuid.UUID]:
         """
         Save user + assistant message pair atomically with tool call metadata.
@@ -657,6 +659,8 @@ class MessageService:
             user_message: User's input message content
             assistant_message: Agent's response message content
             result: Optional Pydantic AI result object for tool call extraction
+            history_storage: Stores the turn's new_messages() (tool calls and returns)
+                in the assistant meta for history replay (defaults apply when omitted)
         
         Returns:
             Tuple of (user_message_id, assistant_message_id)
@@ -732,6 +736,18 @@ class MessageService:
         
         # Extract tool calls if result provided
         tool_calls_meta = self.extract_tool_calls(result) if result else []
+        assistant_meta: Dict[str, Any] = {"tool_calls": tool_calls_meta} if tool_calls_meta else {}
+        
+        # Full turn for lossless history replay (tool calls and returns)
+        history_storage = history_storage or HistoryStorageSettings()
+        if result is not None and history_storage.store_model_messages and callable(getattr(result, 'new_messages', None)):
+            try:
+                assistant_meta[MODEL_MESSAGES_KEY] = serialize_turn(
+                    result.new_messages(), history_storage.max_tool_return_chars
+                )
+            except Exception as e:
+                # Text-only history is still usable - never fail the save over this
+                logfire.warn('service.message.model_messages_serialize_failed', error=str(e))
         
         db_service = get_database_service()
         async with db_service.get_session() as session:
@@ -755,7 +771,7 @@ class MessageService:
                     llm_request_id=llm_request_id,
                     role="assistant",
                     content=assistant_message.strip(),
-                    meta={"tool_calls": tool_calls_meta} if tool_calls_meta else None,
+                    meta=assistant_meta or None,
                     created_at=datetime.now(timezone.utc)
                 )
                 session.add(assistant_msg)
@@ -774,7 +790,8 @@ class MessageService:
                     assistant_message_id=str(assistant_msg.id),
                     user_message_length=len(user_message),
                     assistant_message_length=len(assistant_message),
-                    tool_calls_count=len(tool_calls_meta)
+                    tool_calls_count=len(tool_calls_meta),
+                    model_messages_count=len(assistant_meta.get(MODEL_MESSAGES_KEY, []))
                 )
                 
                 return (user_msg.id, assistant_msg.id)
@@ -87,7 +87,32 @@ class PromptBreakdownService:
         total_chars += len(base_prompt)
         position += 1
         
-        # 3. Directory documentation (3-level structure for multi-directory)
+        # 3. Additional modules (file-based, so they precede the data-driven directory docs)
+        # Note: A "\n\n" separator (2 chars) is added before modules,
+        # and "\n\n---\n\n" (7 chars) between each module in simple_chat.py
+        if modules:
+            # Add separator before first module
+            total_chars += 2  # "\n\n" separator before combined modules
+            
+            module_count = 0
+            for module_name, content in modules.items():
+                # Add inter-module separator (except before first module)
+                if module_count > 0:
+                    total_chars += 7  # "\n\n---\n\n" between modules
+                
+                breakdown["sections"].append({
+                    "name": f"{module_name}.md",
+                    "position": position,
+                    "characters": len(content),
+                    "source": f"{module_name}.md",
+                    "content": content,
+                    "type": "module"
+                })
+                total_chars += len(content)
+                position += 1
+                module_count += 1
+        
+        # 4. Directory documentation (3-level structure for multi-directory) - last in the prompt
         # Note: A "\n\n" separator (2 chars) is added before directory_docs in simple_chat.py
         if directory_result:
             # Add separator characters that precede directory content
@@ -108,7 +133,7 @@ class PromptBreakdownService:
                 })
                 position += 1
                 
-                # 3a. Selection hints section (child of container)
+                # 4a. Selection hints section (child of container)
                 hints_position = None
                 if directory_result.selection_hints_section:
                     hints_position = position
@@ -126,7 +151,7 @@ class PromptBreakdownService:
                     total_chars += hints_section.character_count
                     position += 1
                 
-                # 3b. Schema summary section (child of container)
+                # 4b. Schema summary section (child of container)
                 schema_position = None
                 if directory_result.schema_summary_section:
                     schema_position = position
@@ -144,7 +169,7 @@ class PromptBreakdownService:
                     total_chars += schema_section.character_count
                     position += 1
                 
-                # 3c. Individual directory sections (children of schema_summary)
+                # 4c. Individual directory sections (children of schema_summary)
                 for dir_section in directory_result.directory_sections:
                     section_dict = {
                         "name": dir_section.name,
@@ -177,31 +202,6 @@ class PromptBreakdownService:
                     total_chars += dir_section.character_count
                     position += 1
         
-        # 4. Additional modules
-        # Note: A "\n\n" separator (2 chars) is added before modules,
-        # and "\n\n---\n\n" (7 chars) between each module in simple_chat.py
-        if modules:
-            # Add separator before first module
-            total_chars += 2  # "\n\n" separator before combined modules
-            
-            module_count = 0
-            for module_name, content in modules.items():
-                # Add inter-module separator (except before first module)
-                if module_count > 0:
-                    total_chars += 7  # "\n\n---\n\n" between modules
-                
-                breakdown["sections"].append({
-                    "name": f"{module_name}.md",
-                    "position": position,
-                    "characters": len(content),
-                    "source": f"{module_name}.md",
-                    "content": content,
-                    "type": "module"
-                })
-                total_chars += len(content)
-                position += 1
-                module_count += 1
-        
         # Add summary
         breakdown["total_char_count"] = total_chars
         
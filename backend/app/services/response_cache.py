@@ -0,0 +1,476 @@
+"""
+Opt-in per-instance response cache for repeated opening questions.
+
+Public widgets receive the same first questions ("what are your hours",
+"where do I park") over and over, and each one runs the full agent with tool
+calls. When enabled in an instance's config.yaml, answers to first turns are
+cached and replayed for identical (normalized) questions.
+
+Key Features:
+- Key = account/instance + config version + directory data version +
+  normalized message (NFKC, case-folded, whitespace collapsed, trailing
+  punctuation stripped)
+- Config version hashes the instance config (including the system prompt)
+  and the selected prompt modules, so prompt edits invalidate entries
+- Directory version (list count + latest list update) is re-read at most every
+  directory_version_ttl_seconds, so a directory re-import invalidates entries
+- Only first turns (or turns with at most max_history_messages of history)
+  are looked up and stored
+- Only turns whose tool calls are all read-only lookups are stored (no emails)
+- TTL and per-instance size bounds (LRU)
+- Hits are persisted as messages plus a zero-cost llm_requests row
+  (provider "response_cache"), so analytics stay truthful
+
+Configuration (instance config.yaml):
+    response_cache:
+      enabled: true
+      ttl_seconds: 3600
+      max_entries: 500
+      max_history_messages: 0
+      max_response_chars: 8000
+      directory_version_ttl_seconds: 30
+
+Notes:
+- The cache is in-process (one per worker)
+- Vector store (Pinecone) updates are not detected; rely on ttl_seconds
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Tuple
+from uuid import UUID
+
+import logfire
+
+from .data_versions import get_data_versions
+
+if TYPE_CHECKING:
+    from .chat_bootstrap import ChatBootstrap
+
+# Tools that only read data; a turn that called anything else is never cached
+READ_ONLY_TOOLS = frozenset({"get_available_directories", "search_directory", "vector_search"})
+
+# tools.<section> entries of an instance config that register only read-only
+# tools, or no tool at all (settings); any other enabled section (email_summary,
+# profile_capture, ...) may have side effects
+READ_ONLY_TOOL_SECTIONS = frozenset({"directory", "vector_search", "web_search", "router", "conversation_management"})
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = "?!.,;:¿¡\"'`“”‘’ "
+
+
+@dataclass(frozen=True)
+class ResponseCacheSettings:
+    """Response cache settings from the `response_cache` section of an instance config."""
+    enabled: bool = False
+    ttl_seconds: int = 3600
+    max_entries: int = 500
+    max_history_messages: int = 0
+    max_response_chars: int = 8000
+    directory_version_ttl_seconds: int = 30
+
+    @classmethod
+    def from_instance_config(cls, instance_config: Optional[Mapping[str, Any]]) -> "ResponseCacheSettings":
+        section = (instance_config or {}).get("response_cache", {}) or {}
+        return cls(
+            enabled=bool(section.get("enabled", cls.enabled)),
+            ttl_seconds=int(section.get("ttl_seconds", cls.ttl_seconds)),
+            max_entries=int(section.get("max_entries", cls.max_entries)),
+            max_history_messages=int(section.get("max_history_messages", cls.max_history_messages)),
+            max_response_chars=int(section.get("max_response_chars", cls.max_response_chars)),
+            directory_version_ttl_seconds=int(
+                section.get("directory_version_ttl_seconds", cls.directory_version_ttl_seconds)
+            )
+        )
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A cached assistant answer."""
+    response: str
+    model: str
+    source_llm_request_id: Optional[str]
+    stored_at: float
+    expires_at: float
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.stored_at
+
+
+def normalize_message(message: str) -> str:
+    """
+    Normalize a user message for cache keys.
+
+    Example:
+        >>> normalize_message("  What are your HOURS?? ")
+        'what are your hours'
+    """
+    text = unicodedata.normalize("NFKC", message).casefold()
+    text = _WHITESPACE.sub(" ", text)
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def config_version(instance_config: Mapping[str, Any]) -> str:
+    """
+    Hash of everything in the instance config that shapes an answer.
+
+    Includes the instance config itself (model settings, tools, system prompt)
+    and the content of the selected prompt modules.
+    """
+    from ..agents.tools.prompt_modules import load_prompt_module
+
+    digest = hashlib.sha256(json.dumps(dict(instance_config), sort_keys=True, default=str).encode("utf-8"))
+    modules = (instance_config.get("prompting", {}) or {}).get("modules", {}) or {}
+    if modules.get("enabled", False):
+        account_slug = instance_config.get("account")
+        for name in ["tool_selection_hints", *modules.get("selected", [])]:
+            digest.update(name.encode("utf-8"))
+            digest.update((load_prompt_module(name, account_slug) or "").encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+# partition ("account/instance") -> (config content hash, config_version())
+_config_versions: Dict[str, Tuple[str, str]] = {}
+MAX_CONFIG_VERSIONS = 1024
+
+
+async def instance_config_version(partition: str, instance_config: Mapping[str, Any]) -> str:
+    """
+    config_version() of an instance, recomputed only when its config content changes.
+
+    The instance config is re-read for every turn, so the memo is keyed by
+    instance and a hash of the config content. Prompt module files are only
+    read (off the event loop) when that hash changes; module edits ship with
+    a deploy, which restarts the worker.
+
+    Args:
+        partition: "account_slug/instance_slug"
+        instance_config: Instance config with system_prompt merged in
+    """
+    content = hashlib.sha256(
+        json.dumps(dict(instance_config), sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    cached = _config_versions.get(partition)
+    if cached is not None and cached[0] == content:
+        return cached[1]
+    version = await asyncio.to_thread(config_version, instance_config)
+    if len(_config_versions) >= MAX_CONFIG_VERSIONS:
+        _config_versions.clear()
+    _config_versions[partition] = (content, version)
+    return version
+
+
+def tools_read_only(instance_config: Optional[Mapping[str, Any]]) -> bool:
+    """True if every tool section enabled in the instance config is read-only (READ_ONLY_TOOL_SECTIONS)."""
+    tools = (instance_config or {}).get("tools", {}) or {}
+    return all(
+        name in READ_ONLY_TOOL_SECTIONS
+        for name, section in tools.items()
+        if isinstance(section, Mapping) and section.get("enabled", False)
+    )
+
+
+def tool_names_used(result: Any) -> set:
+    """Names of the tools called during an agent run (from result.new_messages())."""
+    from pydantic_ai.messages import ModelResponse, ToolCallPart
+
+    names = set()
+    try:
+        for message in result.new_messages():
+            if isinstance(message, ModelResponse):
+                names.update(part.tool_name for part in message.parts if isinstance(part, ToolCallPart))
+    except Exception:
+        # Unknown run shape - treat as not cacheable
+        names.add("<unknown>")
+    return names
+
+
+async def record_reused_turn(
+    bootstrap: "ChatBootstrap",
+    message: str,
+    response_text: str,
+    *,
+    model: str,
+    provider: str,
+    meta: Dict[str, Any],
+    message_metadata: Dict[str, Any],
+    latency_ms: int = 0
+) -> Optional[UUID]:
+    """
+    Persist a turn answered without its own LLM call (cache hit, shared generation).
+
+    Saves the human/assistant message pair for the session and a zero-cost
+    llm_requests row, so history and analytics look like a normal turn.
+
+    Args:
+        bootstrap: Chat context of the turn
+        message: User message
+        response_text: Assistant answer that was sent
+        model: Model that originally produced the answer
+        provider: Pseudo-provider for the llm_requests row ("response_cache", "singleflight")
+        meta: llm_requests meta (where the answer came from)
+        message_metadata: Assistant message metadata
+        latency_ms: Time to answer
+
+    Returns:
+        ID of the zero-cost LLM request row
+    """
+    from .llm_request_tracker import LLMRequestTracker
+    from .message_service import get_message_service
+
+    instance = bootstrap.instance
+    llm_request_id = await LLMRequestTracker().track_llm_request(
+        session_id=UUID(bootstrap.session_id),
+        provider=provider,
+        model=model,
+        request_body={"messages": [{"role": "user", "content": message}], "model": model},
+        response_body={"content": response_text},
+        tokens={"prompt": 0, "completion": 0, "total": 0},
+        cost_data={"prompt_cost": 0.0, "completion_cost": 0.0, "total_cost": 0.0},
+        latency_ms=latency_ms,
+        agent_instance_id=instance.id,
+        account_id=bootstrap.account_id,
+        account_slug=bootstrap.account_slug,
+        agent_instance_slug=instance.instance_slug,
+        agent_type=instance.agent_type,
+        completion_status="complete",
+        meta=meta
+    )
+
+    message_service = get_message_service()
+    await message_service.save_message(
+        session_id=UUID(bootstrap.session_id),
+        agent_instance_id=instance.id,
+        llm_request_id=llm_request_id,
+        role="human",
+        content=message
+    )
+    await message_service.save_message(
+        session_id=UUID(bootstrap.session_id),
+        agent_instance_id=instance.id,
+        llm_request_id=llm_request_id,
+        role="assistant",
+        content=response_text,
+        metadata=message_metadata
+    )
+    return llm_request_id
+
+
+class ResponseCache:
+    """
+    In-process LRU + TTL cache of first-turn answers, partitioned per instance.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, "OrderedDict[str, CachedResponse]"] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _partition(bootstrap: "ChatBootstrap") -> str:
+        return f"{bootstrap.instance.account_slug}/{bootstrap.instance.instance_slug}"
+
+    async def _directory_version(self, bootstrap: "ChatBootstrap", settings: ResponseCacheSettings) -> str:
+        """Directory data version for the account (re-read at most every directory_version_ttl_seconds)."""
+        tools = (bootstrap.instance_config.get("tools", {}) or {})
+        if not (tools.get("directory", {}) or {}).get("enabled", False):
+            return "-"
+
+        return await get_data_versions().directory_version(
+            bootstrap.instance.account_id, settings.directory_version_ttl_seconds
+        )
+
+    async def _key(self, bootstrap: "ChatBootstrap", message: str, settings: ResponseCacheSettings) -> str:
+        parts = (
+            bootstrap.config_version,
+            await self._directory_version(bootstrap, settings),
+            normalize_message(message)
+        )
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _eligible(bootstrap: Optional["ChatBootstrap"], message: str, settings: ResponseCacheSettings) -> bool:
+        return (
+            bootstrap is not None
+            and settings.enabled
+            and len(bootstrap.history) <= settings.max_history_messages
+            and bool(normalize_message(message))
+        )
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+
+    async def lookup(self, bootstrap: "ChatBootstrap", message: str) -> Optional[CachedResponse]:
+        """
+        Return a cached answer for this turn, or None.
+
+        Args:
+            bootstrap: Chat context of the turn (instance config, history)
+            message: User message
+
+        Returns:
+            CachedResponse on hit; None on miss or when caching doesn't apply
+        """
+        settings = ResponseCacheSettings.from_instance_config(bootstrap.instance_config)
+        if not self._eligible(bootstrap, message, settings):
+            return None
+
+        partition = self._partition(bootstrap)
+        try:
+            key = await self._key(bootstrap, message, settings)
+        except Exception as e:
+            logfire.warn('service.response_cache.key_failed', instance=partition, error=str(e))
+            return None
+
+        entries = self._entries.get(partition)
+        entry = entries.get(key) if entries else None
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del entries[key]
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            logfire.info('service.response_cache.miss', instance=partition)
+            return None
+
+        entries.move_to_end(key)
+        self.hits += 1
+        logfire.info('service.response_cache.hit', instance=partition, age_seconds=round(entry.age_seconds, 1))
+        return entry
+
+    async def store(
+        self,
+        bootstrap: Optional["ChatBootstrap"],
+        message: str,
+        response_text: str,
+        result: Any = None,
+        llm_request_id: Optional[Any] = None
+    ) -> bool:
+        """
+        Cache a completed turn if it qualifies.
+
+        Args:
+            bootstrap: Chat context of the turn (None = not a multi-tenant turn, never cached)
+            message: User message
+            response_text: Complete assistant answer
+            result: Pydantic AI run result (used to check which tools were called)
+            llm_request_id: LLM request that produced the answer (kept for attribution)
+
+        Returns:
+            True if the answer was stored
+        """
+        if bootstrap is None:
+            return False
+        settings = ResponseCacheSettings.from_instance_config(bootstrap.instance_config)
+        if not self._eligible(bootstrap, message, settings):
+            return False
+        if not response_text or len(response_text) > settings.max_response_chars:
+            return False
+
+        partition = self._partition(bootstrap)
+        if result is not None:
+            tools = tool_names_used(result)
+            if not tools <= READ_ONLY_TOOLS:
+                logfire.info('service.response_cache.skipped', instance=partition, reason="side_effect_tools", tools=sorted(tools))
+                return False
+
+        try:
+            key = await self._key(bootstrap, message, settings)
+        except Exception as e:
+            logfire.warn('service.response_cache.key_failed', instance=partition, error=str(e))
+            return False
+
+        now = time.monotonic()
+        entries = self._entries.setdefault(partition, OrderedDict())
+        entries[key] = CachedResponse(
+            response=response_text,
+            model=bootstrap.requested_model,
+            source_llm_request_id=str(llm_request_id) if llm_request_id else None,
+            stored_at=now,
+            expires_at=now + settings.ttl_seconds
+        )
+        entries.move_to_end(key)
+        while len(entries) > settings.max_entries:
+            entries.popitem(last=False)
+
+        logfire.info('service.response_cache.stored', instance=partition, entries=len(entries))
+        return True
+
+    async def record_hit(
+        self,
+        bootstrap: "ChatBootstrap",
+        message: str,
+        cached: CachedResponse,
+        latency_ms: int = 0
+    ) -> Optional[UUID]:
+        """
+        Persist a cache hit like a normal turn: messages plus a zero-cost llm_requests row.
+
+        Returns:
+            ID of the zero-cost LLM request row
+        """
+        return await record_reused_turn(
+            bootstrap,
+            message,
+            cached.response,
+            model=cached.model,
+            provider="response_cache",
+            meta={"response_cache": {
+                "hit": True,
+                "source_llm_request_id": cached.source_llm_request_id,
+                "age_seconds": round(cached.age_seconds, 1)
+            }},
+            message_metadata={"response_cache": "hit", "source_llm_request_id": cached.source_llm_request_id},
+            latency_ms=latency_ms
+        )
+
+    def invalidate(self, account_slug: Optional[str] = None, instance_slug: Optional[str] = None) -> int:
+        """
+        Drop cached answers for an account / instance (all when no arguments).
+
+        Returns:
+            Number of entries removed
+        """
+        removed = 0
+        for partition in list(self._entries):
+            account, _, instance = partition.partition("/")
+            if account_slug and account != account_slug:
+                continue
+            if instance_slug and instance != instance_slug:
+                continue
+            removed += len(self._entries.pop(partition))
+        logfire.info('service.response_cache.invalidated', account=account_slug, instance=instance_slug, removed=removed)
+        return removed
+
+
+_response_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the process-wide ResponseCache (singleton pattern).
+
+    Returns:
+        ResponseCache shared by all chat endpoints in this worker
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
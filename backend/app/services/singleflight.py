@@ -0,0 +1,259 @@
+"""
+Singleflight coalescing of identical in-flight first turns.
+
+When a page with the widget goes viral, many new sessions send the same first
+message to the same instance at the same moment. Instead of one LLM call per
+session, concurrent identical first turns share one upstream generation:
+
+- Key = account/instance + config version + model + normalized message
+  (same normalization/config hash as the response cache); only turns with an
+  empty history are coalesced
+- Only instances whose enabled tools are all read-only lookups are coalesced:
+  a shared run that emails sales or captures a profile would do so for the
+  leader's session only, while followers record its answer as their own
+- The first request (leader) runs the agent in a background task; later
+  requests (followers) subscribe while it is in flight
+- Streaming: every subscriber receives the same events from the beginning
+- Each follower session gets its own message rows plus a zero-cost
+  llm_requests row (provider "singleflight"); the leader's turn is tracked
+  normally by the agent
+- If every subscriber disconnects, the shared generation is cancelled
+
+Configuration:
+    app.yaml:        chat.singleflight.enabled (default false)
+    instance config: singleflight.enabled (opt in per instance)
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+import asyncio
+import hashlib
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+import logfire
+
+from .response_cache import normalize_message, record_reused_turn, tools_read_only
+
+if TYPE_CHECKING:
+    from .chat_bootstrap import ChatBootstrap
+
+
+def singleflight_enabled(app_config: Mapping[str, Any], instance_config: Optional[Mapping[str, Any]]) -> bool:
+    """chat.singleflight.enabled from app.yaml, overridable by the instance config."""
+    default = (((app_config or {}).get("chat", {}) or {}).get("singleflight", {}) or {}).get("enabled", False)
+    override = ((instance_config or {}).get("singleflight", {}) or {})
+    return bool(override.get("enabled", default))
+
+
+class StreamFlight:
+    """
+    One shared streaming generation: buffered events plus live fan-out.
+    """
+
+    def __init__(self, key: str, leader_session_id: str):
+        self.key = key
+        self.leader_session_id = leader_session_id
+        self.events: List[Dict[str, Any]] = []
+        self.done = False
+        self.subscribers = 0
+        self.producer: Optional[asyncio.Task] = None
+        self.started_at = time.monotonic()
+        self._changed = asyncio.Event()
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.events.append(event)
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def finish(self) -> None:
+        self.done = True
+        self._changed.set()
+
+    @property
+    def succeeded(self) -> bool:
+        return self.done and bool(self.events) and self.events[-1].get("event") == "done"
+
+    @property
+    def text(self) -> str:
+        return "".join(e["data"] for e in self.events if e.get("event") == "message")
+
+    async def produce(self, events: AsyncIterator[Dict[str, Any]]) -> None:
+        try:
+            async for event in events:
+                self.publish(event)
+        finally:
+            self.finish()
+
+    async def subscribe(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every event of the flight from the beginning, then live ones."""
+        self.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(self.events):
+                    index += 1
+                    yield self.events[index - 1]
+                if self.done:
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.producer is not None:
+                # Nobody is listening any more - stop paying for the generation
+                self.producer.cancel()
+
+
+class SingleFlight:
+    """
+    Registry of in-flight shared generations for this worker.
+    """
+
+    def __init__(self):
+        self._streams: Dict[str, StreamFlight] = {}
+        self._calls: Dict[str, Tuple["asyncio.Task[Any]", str]] = {}
+        self.coalesced = 0
+
+    @staticmethod
+    def key(bootstrap: "ChatBootstrap", message: str, mode: str) -> Optional[str]:
+        """
+        Singleflight key for a turn, or None if it must run on its own.
+
+        Args:
+            bootstrap: Chat context of the turn
+            message: User message
+            mode: "stream" or "chat"
+        """
+        normalized = normalize_message(message)
+        if bootstrap.history or not normalized:
+            return None
+        if not tools_read_only(bootstrap.instance_config):
+            # Side-effect tools (email, profile capture) must run for each session
+            return None
+        instance = bootstrap.instance
+        parts = (
+            mode,
+            f"{instance.account_slug}/{instance.instance_slug}",
+            bootstrap.config_version,
+            bootstrap.requested_model,
+            normalized
+        )
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def stream(
+        self,
+        key: str,
+        bootstrap: "ChatBootstrap",
+        message: str,
+        leader_events: Callable[[], AsyncIterator[Dict[str, Any]]]
+    ) -> Tuple[AsyncIterator[Dict[str, Any]], bool]:
+        """
+        Join (or start) the shared stream for a key.
+
+        Args:
+            key: Key from SingleFlight.key()
+            bootstrap: Chat context of this turn
+            message: User message of this turn
+            leader_events: Factory for the leader's agent event stream (runs once per flight)
+
+        Returns:
+            (event iterator for this subscriber, True if this turn leads the flight)
+        """
+        flight = self._streams.get(key)
+        if flight is not None and not flight.done:
+            self.coalesced += 1
+            logfire.info('service.singleflight.joined', mode="stream", subscribers=flight.subscribers + 1, leader_session_id=flight.leader_session_id)
+            return self._follow(flight, bootstrap, message, time.monotonic()), False
+
+        flight = StreamFlight(key, bootstrap.session_id)
+        self._streams[key] = flight
+        flight.producer = asyncio.create_task(flight.produce(leader_events()))
+        flight.producer.add_done_callback(lambda _: self._streams.get(key) is flight and self._streams.pop(key))
+        return flight.subscribe(), True
+
+    async def _follow(
+        self,
+        flight: StreamFlight,
+        bootstrap: "ChatBootstrap",
+        message: str,
+        started_at: float
+    ) -> AsyncIterator[Dict[str, Any]]:
+        async for event in flight.subscribe():
+            if event.get("event") == "done":
+                # Persist this session's turn before telling the client it is complete
+                await self._record_follower(bootstrap, message, flight.text, flight.leader_session_id, started_at)
+            yield event
+
+    async def call(
+        self,
+        key: str,
+        bootstrap: "ChatBootstrap",
+        message: str,
+        leader_call: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Share one non-streaming agent run between identical concurrent turns.
+
+        Returns:
+            (agent result dict, True if this turn ran the agent); followers get a
+            result dict with their own llm_request_id and no usage
+        """
+        entry = self._calls.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(leader_call())
+            self._calls[key] = (task, bootstrap.session_id)
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            return await asyncio.shield(task), True
+
+        task, leader_session_id = entry
+        self.coalesced += 1
+        logfire.info('service.singleflight.joined', mode="chat", leader_session_id=leader_session_id)
+        started = time.monotonic()
+        shared = await asyncio.shield(task)
+        llm_request_id = await self._record_follower(bootstrap, message, shared["response"], leader_session_id, started)
+        return {
+            "response": shared["response"],
+            "usage": None,
+            "llm_request_id": str(llm_request_id) if llm_request_id else None,
+            "cost_tracking": {"real_cost": 0.0, "method": "singleflight", "provider": "singleflight", "cost_found": False, "status": "enabled"}
+        }, False
+
+    @staticmethod
+    async def _record_follower(
+        bootstrap: "ChatBootstrap",
+        message: str,
+        response_text: str,
+        leader_session_id: str,
+        started_at: float
+    ) -> Optional[Any]:
+        try:
+            return await record_reused_turn(
+                bootstrap,
+                message,
+                response_text,
+                model=bootstrap.requested_model,
+                provider="singleflight",
+                meta={"singleflight": {"leader_session_id": leader_session_id}},
+                message_metadata={"singleflight": True, "leader_session_id": leader_session_id},
+                latency_ms=int((time.monotonic() - started_at) * 1000)
+            )
+        except Exception as e:
+            logfire.exception('service.singleflight.record_failed', session_id=bootstrap.session_id, error=str(e))
+            return None
+
+
+_singleflight: SingleFlight | None = None
+
+
+def get_singleflight() -> SingleFlight:
+    """
+    Get the process-wide SingleFlight registry (singleton pattern).
+
+    Returns:
+        SingleFlight shared by the chat endpoints in this worker
+    """
+    global _singleflight
+    if _singleflight is None:
+        _singleflight = SingleFlight()
+    return _singleflight
@@ -0,0 +1,268 @@
+"""
+SSE framing and delta coalescing for streaming chat responses.
+
+Agents yield one event per `stream_text(delta=True)` chunk, which for fast
+models means thousands of tiny frames (and socket writes) per answer. This
+module merges consecutive text deltas into larger frames and encodes frames
+straight to bytes.
+
+Key Features:
+- encode_sse(): pre-encoded SSE frame (multi-line data handled per spec)
+- coalesce_sse_events(): merges `message` deltas, flushing every
+  flush_interval_ms or flush_bytes - whichever comes first
+- Non-message events (done, error, progress) flush pending text first and
+  are forwarded immediately, so event ordering is preserved
+- Time-based flush works even when the upstream stalls between deltas
+- cancel_on_disconnect(): polls the client connection and cancels the
+  upstream generator when the client goes away, so the LLM stream is closed
+  instead of being consumed (and billed) to completion
+
+Configuration (app.yaml):
+    chat:
+      stream:
+        coalesce:
+          enabled: true
+          flush_interval_ms: 30
+          flush_bytes: 256
+        cancel_on_disconnect: true
+        disconnect_poll_ms: 500
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import logfire
+
+_EVENT_PREFIX = b"event: "
+_DATA_PREFIX = b"\ndata: "
+_FRAME_END = b"\n\n"
+_MESSAGE_HEAD = b"event: message\ndata: "
+
+# Queue sentinels: upstream finished / flush timer fired
+_END = object()
+_FLUSH_TICK = object()
+
+
+@dataclass(frozen=True)
+class CoalesceSettings:
+    """Flush thresholds for SSE delta coalescing."""
+    enabled: bool = True
+    flush_interval_ms: int = 30
+    flush_bytes: int = 256
+
+    @classmethod
+    def from_config(cls, stream_config: Optional[Dict[str, Any]]) -> "CoalesceSettings":
+        """Build settings from the `chat.stream` section of app.yaml."""
+        coalesce = (stream_config or {}).get("coalesce", {}) or {}
+        return cls(
+            enabled=bool(coalesce.get("enabled", cls.enabled)),
+            flush_interval_ms=int(coalesce.get("flush_interval_ms", cls.flush_interval_ms)),
+            flush_bytes=int(coalesce.get("flush_bytes", cls.flush_bytes))
+        )
+
+
+def encode_sse(event_type: str, data: str) -> bytes:
+    """
+    Encode one SSE frame as UTF-8 bytes.
+
+    Multi-line data gets one `data:` line per line, which EventSource joins
+    back with newlines on the client.
+
+    Args:
+        event_type: SSE event name (message, done, error, ...)
+        data: Event payload
+
+    Returns:
+        Complete frame including the terminating blank line
+
+    Example:
+        >>> encode_sse("message", "a\\nb")
+        b'event: message\\ndata: a\\ndata: b\\n\\n'
+    """
+    payload = data.encode("utf-8")
+    if b"\n" in payload:
+        payload = payload.replace(b"\n", _DATA_PREFIX)
+    if event_type == "message":
+        return _MESSAGE_HEAD + payload + _FRAME_END
+    return _EVENT_PREFIX + event_type.encode("utf-8") + _DATA_PREFIX + payload + _FRAME_END
+
+
+async def coalesce_sse_events(
+    events: AsyncIterator[Dict[str, Any]],
+    settings: CoalesceSettings
+) -> AsyncIterator[bytes]:
+    """
+    Convert agent events into SSE frames, merging consecutive text deltas.
+
+    Args:
+        events: Agent event stream ({"event": ..., "data": ...} dicts)
+        settings: Flush thresholds
+
+    Yields:
+        Encoded SSE frames
+
+    Notes:
+        - With settings.enabled False every event becomes its own frame
+        - The upstream generator is driven by a single pump task feeding a
+          queue, so its whole lifetime (agent context managers, logfire spans,
+          contextvars) stays in one task and a timed flush never interrupts it
+        - The time threshold is a loop timer that enqueues a flush tick, so no
+          per-delta timeout task is created
+        - Closing this generator cancels the pump task, which closes the
+          upstream generator inside that same task
+    """
+    if not settings.enabled:
+        async for event in events:
+            yield encode_sse(event.get("event", "message"), event.get("data", ""))
+        return
+
+    interval = settings.flush_interval_ms / 1000.0
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    pump = asyncio.create_task(_pump(events, queue))
+    pending: list[str] = []
+    pending_bytes = 0
+    first_pending_at = 0.0
+    flush_timer: Optional[asyncio.TimerHandle] = None
+
+    def drain() -> bytes:
+        nonlocal pending_bytes, flush_timer
+        if flush_timer is not None:
+            flush_timer.cancel()
+            flush_timer = None
+        frame = encode_sse("message", "".join(pending))
+        pending.clear()
+        pending_bytes = 0
+        return frame
+
+    try:
+        while True:
+            # Fast path: no await (and no scheduling) while the queue has a backlog
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                item = await queue.get()
+
+            if item is _FLUSH_TICK:
+                # Timer scheduled when the current batch started; stale ticks are ignored
+                if pending and time.monotonic() - first_pending_at >= interval * 0.99:
+                    yield drain()
+                continue
+            if item is _END:
+                break
+            if isinstance(item, _UpstreamError):
+                # Deliver text already received before the upstream error propagates
+                if pending:
+                    yield drain()
+                raise item.error
+
+            event_type = item.get("event", "message")
+            data = item.get("data", "")
+            if event_type == "message":
+                if not pending:
+                    first_pending_at = time.monotonic()
+                    flush_timer = loop.call_later(interval, queue.put_nowait, _FLUSH_TICK)
+                pending.append(data)
+                pending_bytes += len(data)  # Character count is a close enough proxy for bytes
+                if pending_bytes >= settings.flush_bytes:
+                    yield drain()
+            else:
+                if pending:
+                    yield drain()
+                yield encode_sse(event_type, data)
+
+        if pending:
+            yield drain()
+    finally:
+        if flush_timer is not None:
+            flush_timer.cancel()
+        if not pump.done():
+            pump.cancel()
+            try:
+                await pump
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+@dataclass(frozen=True)
+class _UpstreamError:
+    """Queue item carrying an exception raised by the upstream generator."""
+    error: BaseException
+
+
+async def _pump(events: AsyncIterator[Dict[str, Any]], queue: asyncio.Queue) -> None:
+    """Drive the upstream generator in one task, forwarding events to the queue."""
+    try:
+        async for event in events:
+            queue.put_nowait(event)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        queue.put_nowait(_UpstreamError(e))
+        return
+    queue.put_nowait(_END)
+
+
+async def cancel_on_disconnect(
+    frames: AsyncIterator[Any],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    poll_interval_ms: int = 500,
+    log_context: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Any]:
+    """
+    Forward frames until the client disconnects, then cancel the upstream.
+
+    The upstream generator runs in its own pump task (same reasoning as
+    coalesce_sse_events) and a watcher polls `is_disconnected` (typically
+    `request.is_disconnected`). On disconnect the pump task is cancelled:
+    CancelledError is raised inside the upstream at its current await point,
+    which unwinds the agent's run_stream() context and closes the provider
+    connection even while the model is still thinking and no frame is being
+    written.
+
+    Args:
+        frames: Upstream frame generator
+        is_disconnected: Async callable returning True once the client is gone
+        poll_interval_ms: How often to poll the connection
+        log_context: Extra fields for the disconnect log event
+
+    Yields:
+        Upstream frames, unchanged
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    pump = asyncio.create_task(_pump(frames, queue))
+
+    async def _watch() -> None:
+        while not pump.done():
+            if await is_disconnected():
+                logfire.info('service.sse_stream.client_disconnected', **(log_context or {}))
+                pump.cancel()
+                queue.put_nowait(_END)
+                return
+            await asyncio.sleep(poll_interval_ms / 1000.0)
+
+    watcher = asyncio.create_task(_watch())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            if isinstance(item, _UpstreamError):
+                raise item.error
+            yield item
+    finally:
+        watcher.cancel()
+        if not pump.done():
+            pump.cancel()
+        # Let the upstream finish its cancellation handling (e.g. partial persistence)
+        try:
+            await pump
+        except (asyncio.CancelledError, Exception):
+            pass
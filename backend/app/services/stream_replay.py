@@ -0,0 +1,394 @@
+"""
+Resumable SSE streams: numbered frames in a bounded replay buffer.
+
+Each streamed response gets a response id (the request id from the `start`
+event). Every frame is numbered and written with an SSE `id:` field of the
+form `{response_id}:{seq}`. The generation runs in its own task and writes
+into a ReplayBuffer; HTTP connections are just subscribers.
+
+On reconnect the browser (EventSource) sends `Last-Event-ID`. The endpoint
+then replays the frames after that sequence number and, if the generation is
+still running, keeps the connection attached to the live tail.
+
+Key Features:
+- In-memory buffers bounded per stream (max_frames) and globally (max_streams)
+- Finished streams kept for retention_seconds, then evicted
+- Buffers are scoped to the session that started them
+- A generation with no connected subscriber for abandon_grace_seconds is
+  cancelled (the client left and did not come back to resume)
+- Optional Redis mirror (redis.asyncio, only if installed) so another worker
+  can replay a stream it didn't produce
+
+Configuration (app.yaml):
+    chat:
+      stream:
+        replay:
+          enabled: false         # opt in (every stream gets a producer task)
+          backend: memory        # memory | redis
+          max_frames: 2000
+          max_streams: 500
+          retention_seconds: 300
+          abandon_grace_seconds: 10
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+import logfire
+
+from .sse_stream import encode_sse
+
+
+class ReplayGapError(Exception):
+    """Requested frames were already evicted from the replay buffer."""
+
+
+@dataclass(frozen=True)
+class ReplaySettings:
+    """Replay buffer bounds from `chat.stream.replay` in app.yaml."""
+    enabled: bool = False
+    backend: str = "memory"
+    max_frames: int = 2000
+    max_streams: int = 500
+    retention_seconds: int = 300
+    abandon_grace_seconds: float = 10.0
+
+    @classmethod
+    def from_config(cls, stream_config: Optional[Dict[str, Any]]) -> "ReplaySettings":
+        replay = (stream_config or {}).get("replay", {}) or {}
+        return cls(
+            enabled=bool(replay.get("enabled", cls.enabled)),
+            backend=str(replay.get("backend", cls.backend)),
+            max_frames=int(replay.get("max_frames", cls.max_frames)),
+            max_streams=int(replay.get("max_streams", cls.max_streams)),
+            retention_seconds=int(replay.get("retention_seconds", cls.retention_seconds)),
+            abandon_grace_seconds=float(replay.get("abandon_grace_seconds", cls.abandon_grace_seconds))
+        )
+
+
+def format_event_id(response_id: str, seq: int) -> str:
+    """SSE event id for frame `seq` of a response."""
+    return f"{response_id}:{seq}"
+
+
+def parse_event_id(event_id: Optional[str]) -> Optional[Tuple[str, int]]:
+    """
+    Parse a Last-Event-ID value into (response_id, seq).
+
+    Returns:
+        Tuple of response id and sequence number, or None if malformed
+    """
+    if not event_id:
+        return None
+    response_id, sep, seq = event_id.strip().rpartition(":")
+    if not sep or not response_id or not seq.isdigit():
+        return None
+    return response_id, int(seq)
+
+
+class ReplayBuffer:
+    """
+    Numbered frames of one streamed response.
+
+    The producer appends frames (which get an `id:` line prepended) and calls
+    finish() at the end. Any number of subscribers can read from a given
+    sequence number and follow the live tail until the stream finishes.
+    When the last subscriber leaves mid-generation and nobody resumes within
+    abandon_grace seconds, the producer task is cancelled.
+    """
+
+    def __init__(
+        self,
+        response_id: str,
+        session_id: str,
+        max_frames: int,
+        mirror: Optional["RedisReplayMirror"] = None,
+        abandon_grace: float = 10.0
+    ):
+        self.response_id = response_id
+        self.session_id = session_id
+        self.frames: Deque[Tuple[int, bytes]] = deque(maxlen=max_frames)
+        self.last_seq = 0
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self.subscribers = 0
+        self.producer: Optional[asyncio.Task] = None  # Strong reference to the generation task
+        self._changed = asyncio.Condition()
+        self._mirror = mirror
+        self._abandon_grace = abandon_grace
+        self._abandon_timer: Optional[asyncio.TimerHandle] = None
+
+    async def append(self, frame: bytes) -> int:
+        """Number a frame, store it and wake subscribers."""
+        self.last_seq += 1
+        seq = self.last_seq
+        numbered = b"id: " + format_event_id(self.response_id, seq).encode("utf-8") + b"\n" + frame
+        self.frames.append((seq, numbered))
+        if self._mirror is not None:
+            await self._mirror.append(self.response_id, self.session_id, seq, numbered)
+        async with self._changed:
+            self._changed.notify_all()
+        return seq
+
+    async def finish(self) -> None:
+        """Mark the stream complete and wake subscribers."""
+        self.done = True
+        self.finished_at = time.monotonic()
+        if self._mirror is not None:
+            await self._mirror.finish(self.response_id)
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def subscribe(self, after_seq: int = 0) -> AsyncIterator[bytes]:
+        """
+        Yield frames with seq > after_seq, then follow the live tail.
+
+        Raises:
+            ReplayGapError: If frames after `after_seq` were already evicted
+        """
+        if self.frames and after_seq + 1 < self.frames[0][0]:
+            raise ReplayGapError(
+                f"Frames {after_seq + 1}..{self.frames[0][0] - 1} of {self.response_id} were evicted"
+            )
+        self.subscribers += 1
+        if self._abandon_timer is not None:
+            # A client came back (resume) before the grace period ran out
+            self._abandon_timer.cancel()
+            self._abandon_timer = None
+        try:
+            cursor = after_seq
+            while True:
+                # Sequence numbers are contiguous, so the next frame's index is direct
+                while self.frames and cursor < self.last_seq:
+                    first_seq = self.frames[0][0]
+                    if cursor + 1 < first_seq:
+                        raise ReplayGapError(f"Subscriber fell behind the replay buffer of {self.response_id}")
+                    seq, frame = self.frames[cursor + 1 - first_seq]
+                    cursor = seq
+                    yield frame
+                if self.done and cursor >= self.last_seq:
+                    return
+                async with self._changed:
+                    if not self.done and cursor >= self.last_seq:
+                        await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.producer is not None:
+                self._abandon_timer = asyncio.get_running_loop().call_later(self._abandon_grace, self._abandon)
+
+    def _abandon(self) -> None:
+        """Cancel the generation if still nobody is listening."""
+        self._abandon_timer = None
+        if self.subscribers == 0 and not self.done and self.producer is not None and not self.producer.done():
+            logfire.info('service.stream_replay.abandoned', response_id=self.response_id, frames=self.last_seq)
+            self.producer.cancel()
+
+    async def produce(self, frames: AsyncIterator[bytes]) -> None:
+        """Drain a frame generator into the buffer (run as its own task)."""
+        try:
+            async for frame in frames:
+                await self.append(frame)
+        finally:
+            await self.finish()
+
+
+class StreamReplayRegistry:
+    """
+    Process-wide registry of replay buffers, bounded by count and age.
+
+    Buffers are evicted oldest-first once max_streams is exceeded (finished
+    streams first) and finished streams expire after retention_seconds.
+    """
+
+    def __init__(self, settings: ReplaySettings):
+        self.settings = settings
+        self._buffers: "OrderedDict[str, ReplayBuffer]" = OrderedDict()
+        self._mirror: Optional[RedisReplayMirror] = None
+        if settings.backend == "redis":
+            self._mirror = RedisReplayMirror.create(settings)
+
+    def create(self, response_id: str, session_id: str) -> ReplayBuffer:
+        """Register a new buffer for a response."""
+        self._expire()
+        self._enforce_capacity()
+        buffer = ReplayBuffer(
+            response_id,
+            session_id,
+            self.settings.max_frames,
+            self._mirror,
+            abandon_grace=self.settings.abandon_grace_seconds
+        )
+        self._buffers[response_id] = buffer
+        return buffer
+
+    def get(self, response_id: str) -> Optional[ReplayBuffer]:
+        """Return the in-process buffer for a response, if still retained."""
+        self._expire()
+        return self._buffers.get(response_id)
+
+    async def replay_remote(self, response_id: str, session_id: str, after_seq: int) -> Optional[AsyncIterator[bytes]]:
+        """Replay from the Redis mirror when the buffer lives in another worker."""
+        if self._mirror is None:
+            return None
+        return await self._mirror.subscribe(response_id, session_id, after_seq)
+
+    async def resume(self, response_id: str, session_id: Optional[str], after_seq: int) -> AsyncIterator[bytes]:
+        """
+        Frames for a reconnecting client: replayed tail, then the live stream.
+
+        Yields a single SSE `error` frame (status 410) if the stream is unknown,
+        expired, belongs to another session or the requested frames were evicted.
+        """
+        def gone(reason: str) -> bytes:
+            logfire.info('service.stream_replay.resume_failed', response_id=response_id, reason=reason)
+            return encode_sse("error", json.dumps({
+                "message": "Stream is no longer available",
+                "status": 410,
+                "request_id": response_id
+            }))
+
+        buffer = self.get(response_id)
+        if buffer is not None and session_id is not None and buffer.session_id == session_id:
+            frames = buffer.subscribe(after_seq)
+        elif buffer is None and session_id is not None:
+            frames = await self.replay_remote(response_id, session_id, after_seq)
+        else:
+            frames = None
+
+        if frames is None:
+            yield gone("not_found")
+            return
+
+        logfire.info('service.stream_replay.resumed', response_id=response_id, after_seq=after_seq, live=bool(buffer and not buffer.done))
+        try:
+            async for frame in frames:
+                yield frame
+        except ReplayGapError:
+            yield gone("evicted")
+
+    def _expire(self) -> None:
+        """Drop finished streams older than retention_seconds."""
+        now = time.monotonic()
+        expired = [
+            rid for rid, buf in self._buffers.items()
+            if buf.done and buf.finished_at is not None and now - buf.finished_at > self.settings.retention_seconds
+        ]
+        for rid in expired:
+            del self._buffers[rid]
+
+    def _enforce_capacity(self) -> None:
+        """Make room for one more stream under max_streams."""
+        while len(self._buffers) >= self.settings.max_streams:
+            # Prefer dropping finished streams; fall back to the oldest live one
+            victim = next((rid for rid, buf in self._buffers.items() if buf.done), None)
+            if victim is None:
+                victim = next(iter(self._buffers))
+                logfire.warn('service.stream_replay.live_stream_evicted', response_id=victim)
+            del self._buffers[victim]
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+
+class RedisReplayMirror:
+    """
+    Mirror of replay frames in Redis lists (optional, needs the `redis` package).
+
+    Keys:
+        sse:replay:{response_id}        list of "{seq}|" + frame (trimmed to max_frames)
+        sse:replay:{response_id}:meta   hash with session_id and done flag
+    Both expire retention_seconds after the last write.
+    """
+
+    def __init__(self, client, settings: ReplaySettings):
+        self._client = client
+        self._settings = settings
+
+    @classmethod
+    def create(cls, settings: ReplaySettings) -> Optional["RedisReplayMirror"]:
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError:
+            logfire.warn('service.stream_replay.redis_unavailable', fallback="memory")
+            return None
+        from ..config import get_redis_config
+
+        redis_config = get_redis_config()
+        client = redis_asyncio.from_url(redis_config["url"], db=redis_config.get("cache_db", 2))
+        return cls(client, settings)
+
+    def _keys(self, response_id: str) -> Tuple[str, str]:
+        return f"sse:replay:{response_id}", f"sse:replay:{response_id}:meta"
+
+    async def append(self, response_id: str, session_id: str, seq: int, frame: bytes) -> None:
+        frames_key, meta_key = self._keys(response_id)
+        ttl = self._settings.retention_seconds
+        try:
+            pipe = self._client.pipeline()
+            pipe.rpush(frames_key, str(seq).encode() + b"|" + frame)
+            pipe.ltrim(frames_key, -self._settings.max_frames, -1)
+            pipe.hset(meta_key, mapping={"session_id": session_id, "done": "0"})
+            pipe.expire(frames_key, ttl)
+            pipe.expire(meta_key, ttl)
+            await pipe.execute()
+        except Exception as e:
+            # Mirroring is best-effort; the in-memory buffer still serves this worker
+            logfire.warn('service.stream_replay.redis_append_failed', response_id=response_id, error=str(e))
+
+    async def finish(self, response_id: str) -> None:
+        _, meta_key = self._keys(response_id)
+        try:
+            await self._client.hset(meta_key, "done", "1")
+        except Exception as e:
+            logfire.warn('service.stream_replay.redis_finish_failed', response_id=response_id, error=str(e))
+
+    async def subscribe(self, response_id: str, session_id: str, after_seq: int) -> Optional[AsyncIterator[bytes]]:
+        frames_key, meta_key = self._keys(response_id)
+        meta = await self._client.hgetall(meta_key)
+        owner = meta.get(b"session_id") if meta else None
+        if owner is None or owner.decode() != session_id:
+            return None
+
+        async def _follow() -> AsyncIterator[bytes]:
+            cursor = after_seq
+            while True:
+                for raw in await self._client.lrange(frames_key, 0, -1):
+                    seq_raw, _, frame = raw.partition(b"|")
+                    seq = int(seq_raw)
+                    if seq > cursor:
+                        cursor = seq
+                        yield frame
+                done = await self._client.hget(meta_key, "done")
+                if done == b"1" or done is None:
+                    return
+                await asyncio.sleep(0.1)
+
+        return _follow()
+
+
+_stream_replay_registry: StreamReplayRegistry | None = None
+
+
+def get_stream_replay_registry(settings: Optional[ReplaySettings] = None) -> StreamReplayRegistry:
+    """
+    Get the process-wide StreamReplayRegistry (singleton pattern).
+
+    Args:
+        settings: Settings used on first creation (defaults to ReplaySettings())
+
+    Returns:
+        StreamReplayRegistry shared by all streaming requests in this worker
+    """
+    global _stream_replay_registry
+    if _stream_replay_registry is None:
+        _stream_replay_registry = StreamReplayRegistry(settings or ReplaySettings())
+    return _stream_replay_registry
@@ -23,6 +23,7 @@ except ImportError:
 
 from .pinecone_client import PineconeClient, get_pinecone_client
 from .embedding_service import get_embedding_service, EmbeddingService
+from .data_versions import get_data_versions, vector_namespace
 
 
 class VectorDocument(BaseModel):
@@ -137,6 +138,9 @@ class VectorService:
                     namespace=target_namespace
                 )
             
+            # Memoized vector_search results for this namespace are now stale
+            get_data_versions().bump(vector_namespace(self.pinecone_client.config.index_name, target_namespace))
+            
             logfire.info(
                 'service.vector.upsert.success',
                 document_id=document.id,
@@ -227,6 +231,7 @@ class VectorService:
                     )
                 
                 successful_count += len(batch)
+                get_data_versions().bump(vector_namespace(self.pinecone_client.config.index_name, target_namespace))
                 logfire.info(
                     'service.vector.upsert_batch.success',
                     batch_number=batch_number,
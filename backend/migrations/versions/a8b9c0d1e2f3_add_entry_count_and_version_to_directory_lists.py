@@ -0,0 +1,151 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""add_entry_count_and_version_to_directory_lists
+
+Revision ID: a8b9c0d1e2f3
+Revises: f7a8b9c0d1e2
+Create Date: 2025-11-28 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8b9c0d1e2f3'
+down_revision: Union[str, Sequence[str], None] = 'f7a8b9c0d1e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - Maintain entry counts and a change version on directory_lists."""
+    
+    # Version: a new value from a shared sequence on every insert / update of a list
+    # (including entry count changes), so (list count, max version) per account
+    # identifies the account's directory catalog
+    op.execute("CREATE SEQUENCE directory_lists_version_seq")
+    op.add_column('directory_lists',
+                  sa.Column('version',
+                           sa.BigInteger(),
+                           server_default=sa.text("nextval('directory_lists_version_seq')"),
+                           nullable=False,
+                           comment='Change version (directory catalog / cache invalidation)'))
+    op.add_column('directory_lists',
+                  sa.Column('entry_count',
+                           sa.Integer(),
+                           server_default='0',
+                           nullable=False,
+                           comment='Number of directory_entries (trigger-maintained)'))
+    
+    op.execute("""
+        UPDATE directory_lists l
+        SET entry_count = (SELECT count(*) FROM directory_entries e WHERE e.directory_list_id = l.id)
+    """)
+    
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_lists_version_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.version := nextval('directory_lists_version_seq');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER directory_lists_version_update
+        BEFORE UPDATE ON directory_lists
+        FOR EACH ROW
+        EXECUTE FUNCTION directory_lists_version_trigger();
+    """)
+    
+    # Statement-level with transition tables: one UPDATE per list per statement,
+    # however many rows a bulk import inserts or a list delete cascades
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_count_insert_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            UPDATE directory_lists l
+            SET entry_count = l.entry_count + n.added
+            FROM (SELECT directory_list_id, count(*) AS added FROM new_rows GROUP BY directory_list_id) n
+            WHERE l.id = n.directory_list_id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_count_delete_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            UPDATE directory_lists l
+            SET entry_count = greatest(l.entry_count - o.removed, 0)
+            FROM (SELECT directory_list_id, count(*) AS removed FROM old_rows GROUP BY directory_list_id) o
+            WHERE l.id = o.directory_list_id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_count_move_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            UPDATE directory_lists l
+            SET entry_count = greatest(l.entry_count + d.delta, 0)
+            FROM (
+                SELECT list_id, sum(delta) AS delta
+                FROM (
+                    SELECT o.directory_list_id AS list_id, -1 AS delta
+                    FROM old_rows o JOIN new_rows n ON n.id = o.id
+                    WHERE n.directory_list_id <> o.directory_list_id
+                    UNION ALL
+                    SELECT n.directory_list_id, 1
+                    FROM old_rows o JOIN new_rows n ON n.id = o.id
+                    WHERE n.directory_list_id <> o.directory_list_id
+                ) moves
+                GROUP BY list_id
+            ) d
+            WHERE l.id = d.list_id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER directory_entries_count_insert
+        AFTER INSERT ON directory_entries
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION directory_entries_count_insert_trigger();
+    """)
+    op.execute("""
+        CREATE TRIGGER directory_entries_count_delete
+        AFTER DELETE ON directory_entries
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION directory_entries_count_delete_trigger();
+    """)
+    op.execute("""
+        CREATE TRIGGER directory_entries_count_move
+        AFTER UPDATE ON directory_entries
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION directory_entries_count_move_trigger();
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema - Remove directory list entry counts and versions."""
+    
+    op.execute("DROP TRIGGER IF EXISTS directory_entries_count_move ON directory_entries")
+    op.execute("DROP TRIGGER IF EXISTS directory_entries_count_delete ON directory_entries")
+    op.execute("DROP TRIGGER IF EXISTS directory_entries_count_insert ON directory_entries")
+    op.execute("DROP FUNCTION IF EXISTS directory_entries_count_move_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS directory_entries_count_delete_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS directory_entries_count_insert_trigger()")
+    op.execute("DROP TRIGGER IF EXISTS directory_lists_version_update ON directory_lists")
+    op.execute("DROP FUNCTION IF EXISTS directory_lists_version_trigger()")
+    op.drop_column('directory_lists', 'entry_count')
+    op.drop_column('directory_lists', 'version')
+    op.execute("DROP SEQUENCE IF EXISTS directory_lists_version_seq")
@@ -0,0 +1,40 @@
+"""add_cache_token_columns_to_llm_requests
+
+Revision ID: b3c4d5e6f7a8
+Revises: a7b8c9d0e1f2
+Create Date: 2025-11-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3c4d5e6f7a8'
+down_revision: Union[str, Sequence[str], None] = 'a7b8c9d0e1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add prompt-cache token counts to llm_requests so caching savings are visible."""
+    
+    op.add_column('llm_requests',
+                  sa.Column('cache_read_tokens',
+                           sa.Integer(),
+                           nullable=True,
+                           comment='Prompt tokens served from the provider prompt cache'))
+    op.add_column('llm_requests',
+                  sa.Column('cache_write_tokens',
+                           sa.Integer(),
+                           nullable=True,
+                           comment='Prompt tokens written to the provider prompt cache'))
+
+
+def downgrade() -> None:
+    """Remove prompt-cache token columns from llm_requests."""
+    
+    op.drop_column('llm_requests', 'cache_write_tokens')
+    op.drop_column('llm_requests', 'cache_read_tokens')
@@ -0,0 +1,258 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""add_directory_facet_counts
+
+Revision ID: b9c0d1e2f3a4
+Revises: a8b9c0d1e2f3
+Create Date: 2025-11-29 10:00:00.000000
+
+"""
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import yaml
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9c0d1e2f3a4'
+down_revision: Union[str, Sequence[str], None] = 'a8b9c0d1e2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA_DIR = Path(__file__).resolve().parents[2] / "config" / "directory_schemas"
+
+
+def _facet_fields(schema_file: str) -> list:
+    """Facet fields of a schema (same rule as services/directory_facets.facet_fields_from_schema)."""
+    path = SCHEMA_DIR / schema_file
+    if not path.exists():
+        return []
+    try:
+        schema = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    except yaml.YAMLError as e:
+        print(f"Skipping facet fields for {schema_file}: {e}")
+        return []
+    declared = schema.get("searchable_fields") or {}
+    if not isinstance(declared, dict):
+        # Plain list of field names (classes.yaml): no facet declarations
+        declared = {}
+    fields = [name for name, definition in declared.items() if (definition or {}).get("facet")]
+    if (schema.get("tags_usage") or {}).get("facet"):
+        fields.append("tags")
+    return fields
+
+
+def upgrade() -> None:
+    """Upgrade schema - Maintain per-list facet value counts for directory entries."""
+
+    op.add_column('directory_lists',
+                  sa.Column('facet_fields',
+                           postgresql.ARRAY(sa.String()),
+                           nullable=True,
+                           comment='entry_data fields (or "tags") counted in directory_facet_counts'))
+    op.create_table(
+        'directory_facet_counts',
+        sa.Column('directory_list_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('directory_lists.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('field', sa.String(), nullable=False),
+        sa.Column('value', sa.String(), nullable=False),
+        sa.Column('entry_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('directory_list_id', 'field', 'value')
+    )
+
+    # Distinct (field, value) pairs of one entry: "tags" is the tags column,
+    # array fields count each element, scalars their text; blanks are skipped
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entry_facets(tags text[], entry_data jsonb, fields text[])
+        RETURNS TABLE (field text, value text) AS $$
+            SELECT DISTINCT f.field, btrim(v.value)
+            FROM unnest(coalesce(fields, '{}')) AS f(field)
+            CROSS JOIN LATERAL (
+                SELECT t.value
+                FROM unnest(CASE WHEN f.field = 'tags' THEN tags END) AS t(value)
+                UNION ALL
+                SELECT a.value
+                FROM jsonb_array_elements_text(
+                    CASE WHEN f.field <> 'tags' AND jsonb_typeof(entry_data -> f.field) = 'array'
+                         THEN entry_data -> f.field END
+                ) AS a(value)
+                UNION ALL
+                SELECT entry_data ->> f.field
+                WHERE f.field <> 'tags'
+                  AND jsonb_typeof(entry_data -> f.field) IN ('string', 'number', 'boolean')
+            ) AS v(value)
+            WHERE btrim(v.value) <> ''
+        $$ LANGUAGE sql IMMUTABLE;
+    """)
+
+    # Statement-level with transition tables, like the entry counts: one upsert per
+    # statement with the summed deltas, then drop values no entry has any more.
+    # Joining directory_lists skips entries whose list is being deleted (the
+    # list's counts go with it through the foreign key cascade).
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_facets_insert_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO directory_facet_counts (directory_list_id, field, value, entry_count)
+            SELECT n.directory_list_id, f.field, f.value, count(*)
+            FROM new_rows n
+            JOIN directory_lists l ON l.id = n.directory_list_id
+            CROSS JOIN LATERAL directory_entry_facets(n.tags::text[], n.entry_data, l.facet_fields::text[]) f
+            GROUP BY n.directory_list_id, f.field, f.value
+            ON CONFLICT (directory_list_id, field, value)
+            DO UPDATE SET entry_count = directory_facet_counts.entry_count + EXCLUDED.entry_count;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_facets_delete_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            UPDATE directory_facet_counts c
+            SET entry_count = c.entry_count - d.removed
+            FROM (
+                SELECT o.directory_list_id, f.field, f.value, count(*) AS removed
+                FROM old_rows o
+                JOIN directory_lists l ON l.id = o.directory_list_id
+                CROSS JOIN LATERAL directory_entry_facets(o.tags::text[], o.entry_data, l.facet_fields::text[]) f
+                GROUP BY o.directory_list_id, f.field, f.value
+            ) d
+            WHERE c.directory_list_id = d.directory_list_id AND c.field = d.field AND c.value = d.value;
+            DELETE FROM directory_facet_counts c
+            WHERE c.entry_count <= 0
+              AND c.directory_list_id IN (SELECT DISTINCT directory_list_id FROM old_rows);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_facets_update_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            WITH changed AS (
+                SELECT o.directory_list_id AS old_list_id, o.tags AS old_tags, o.entry_data AS old_data,
+                       n.directory_list_id AS new_list_id, n.tags AS new_tags, n.entry_data AS new_data
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE (o.directory_list_id, o.tags, o.entry_data)
+                      IS DISTINCT FROM (n.directory_list_id, n.tags, n.entry_data)
+            ), deltas AS (
+                SELECT c.old_list_id AS list_id, f.field, f.value, -1 AS delta
+                FROM changed c
+                JOIN directory_lists l ON l.id = c.old_list_id
+                CROSS JOIN LATERAL directory_entry_facets(c.old_tags::text[], c.old_data, l.facet_fields::text[]) f
+                UNION ALL
+                SELECT c.new_list_id, f.field, f.value, 1
+                FROM changed c
+                JOIN directory_lists l ON l.id = c.new_list_id
+                CROSS JOIN LATERAL directory_entry_facets(c.new_tags::text[], c.new_data, l.facet_fields::text[]) f
+            )
+            INSERT INTO directory_facet_counts (directory_list_id, field, value, entry_count)
+            SELECT list_id, field, value, sum(delta)
+            FROM deltas
+            GROUP BY list_id, field, value
+            HAVING sum(delta) <> 0
+            ON CONFLICT (directory_list_id, field, value)
+            DO UPDATE SET entry_count = directory_facet_counts.entry_count + EXCLUDED.entry_count;
+            DELETE FROM directory_facet_counts c
+            WHERE c.entry_count <= 0
+              AND c.directory_list_id IN (
+                  SELECT directory_list_id FROM old_rows UNION SELECT directory_list_id FROM new_rows
+              );
+            -- Edited entries leave the entry count alone: bump the list version
+            -- (BEFORE UPDATE trigger) so cached facets and catalogs are reloaded
+            UPDATE directory_lists l
+            SET version = l.version
+            WHERE l.id IN (
+                SELECT n.directory_list_id
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE (o.tags, o.entry_data) IS DISTINCT FROM (n.tags, n.entry_data)
+            );
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER directory_entries_facets_insert
+        AFTER INSERT ON directory_entries
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION directory_entries_facets_insert_trigger();
+    """)
+    op.execute("""
+        CREATE TRIGGER directory_entries_facets_delete
+        AFTER DELETE ON directory_entries
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION directory_entries_facets_delete_trigger();
+    """)
+    op.execute("""
+        CREATE TRIGGER directory_entries_facets_update
+        AFTER UPDATE ON directory_entries
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION directory_entries_facets_update_trigger();
+    """)
+
+    # Full recount of one list (changed facet_fields, or repair)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_directory_facets(p_list_id uuid)
+        RETURNS void AS $$
+            DELETE FROM directory_facet_counts WHERE directory_list_id = p_list_id;
+            INSERT INTO directory_facet_counts (directory_list_id, field, value, entry_count)
+            SELECT e.directory_list_id, f.field, f.value, count(*)
+            FROM directory_entries e
+            JOIN directory_lists l ON l.id = e.directory_list_id
+            CROSS JOIN LATERAL directory_entry_facets(e.tags::text[], e.entry_data, l.facet_fields::text[]) f
+            WHERE e.directory_list_id = p_list_id
+            GROUP BY e.directory_list_id, f.field, f.value;
+        $$ LANGUAGE sql;
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_lists_facet_fields_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            PERFORM refresh_directory_facets(NEW.id);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER directory_lists_facet_fields_update
+        AFTER UPDATE OF facet_fields ON directory_lists
+        FOR EACH ROW
+        WHEN (OLD.facet_fields IS DISTINCT FROM NEW.facet_fields)
+        EXECUTE FUNCTION directory_lists_facet_fields_trigger();
+    """)
+
+    # Backfill: facet fields per existing list from its schema file (the trigger counts the entries)
+    conn = op.get_bind()
+    lists = conn.execute(sa.text("SELECT id, schema_file FROM directory_lists WHERE schema_file IS NOT NULL")).fetchall()
+    for list_id, schema_file in lists:
+        fields = _facet_fields(schema_file)
+        if fields:
+            conn.execute(
+                sa.text("UPDATE directory_lists SET facet_fields = :fields WHERE id = :id"),
+                {"fields": fields, "id": list_id}
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema - Remove directory facet counts."""
+
+    op.execute("DROP TRIGGER IF EXISTS directory_lists_facet_fields_update ON directory_lists")
+    op.execute("DROP FUNCTION IF EXISTS directory_lists_facet_fields_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS refresh_directory_facets(uuid)")
+    op.execute("DROP TRIGGER IF EXISTS directory_entries_facets_update ON directory_entries")
+    op.execute("DROP TRIGGER IF EXISTS directory_entries_facets_delete ON directory_entries")
+    op.execute("DROP TRIGGER IF EXISTS directory_entries_facets_insert ON directory_entries")
+    op.execute("DROP FUNCTION IF EXISTS directory_entries_facets_update_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS directory_entries_facets_delete_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS directory_entries_facets_insert_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS directory_entry_facets(text[], jsonb, text[])")
+    op.drop_table('directory_facet_counts')
+    op.drop_column('directory_lists', 'facet_fields')
@@ -0,0 +1,102 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""add_directory_bulk_import_support
+
+Revision ID: c0d1e2f3a4b5
+Revises: b9c0d1e2f3a4
+Create Date: 2025-11-30 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c0d1e2f3a4b5'
+down_revision: Union[str, Sequence[str], None] = 'b9c0d1e2f3a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - Let set-based bulk imports compute search_vector / filter_data themselves."""
+
+    # filter_data of an entry, shared by the row trigger and the bulk INSERT ... SELECT
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entry_filter_data(entry_data jsonb, fields text[])
+        RETURNS jsonb AS $$
+            SELECT jsonb_object_agg(field, directory_filter_terms(entry_data ->> field))
+            FROM unnest(coalesce(fields, '{}')) AS field
+            WHERE entry_data ->> field IS NOT NULL
+        $$ LANGUAGE sql IMMUTABLE;
+    """)
+
+    # services/directory_bulk_import.py sets directory.bulk_import for its
+    # transaction and inserts rows with both columns already computed, joining
+    # directory_lists once instead of one lookup per row
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_filter_data_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            fields text[];
+        BEGIN
+            IF TG_OP = 'INSERT' AND current_setting('directory.bulk_import', true) = 'on' THEN
+                RETURN NEW;
+            END IF;
+            SELECT filter_fields INTO fields FROM directory_lists WHERE id = NEW.directory_list_id;
+            NEW.filter_data := directory_entry_filter_data(NEW.entry_data, fields);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_search_vector_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            weights jsonb;
+        BEGIN
+            IF TG_OP = 'INSERT' AND current_setting('directory.bulk_import', true) = 'on' THEN
+                RETURN NEW;
+            END IF;
+            SELECT search_weights INTO weights FROM directory_lists WHERE id = NEW.directory_list_id;
+            NEW.search_vector := directory_entry_search_vector(NEW.name, NEW.tags, NEW.entry_data, weights);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema - Restore the per-row trigger functions."""
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_search_vector_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            weights jsonb;
+        BEGIN
+            SELECT search_weights INTO weights FROM directory_lists WHERE id = NEW.directory_list_id;
+            NEW.search_vector := directory_entry_search_vector(NEW.name, NEW.tags, NEW.entry_data, weights);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_filter_data_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            fields text[];
+        BEGIN
+            SELECT filter_fields INTO fields FROM directory_lists WHERE id = NEW.directory_list_id;
+
+            SELECT jsonb_object_agg(field, directory_filter_terms(NEW.entry_data ->> field))
+            INTO NEW.filter_data
+            FROM unnest(coalesce(fields, '{}')) AS field
+            WHERE NEW.entry_data ->> field IS NOT NULL;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("DROP FUNCTION IF EXISTS directory_entry_filter_data(jsonb, text[])")
@@ -0,0 +1,131 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""add_session_stats
+
+Revision ID: c4d5e6f7a8b9
+Revises: b3c4d5e6f7a8
+Create Date: 2025-11-24 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d5e6f7a8b9'
+down_revision: Union[str, Sequence[str], None] = 'b3c4d5e6f7a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - Add trigger-maintained per-session counters."""
+    
+    op.create_table(
+        'session_stats',
+        sa.Column('session_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('sessions.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('message_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('role_counts', postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb"),
+                  comment='Message count by role, e.g. {"human": 3, "assistant": 3}'),
+        sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('llm_request_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_tokens', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('total_cost', sa.Numeric(14, 8), nullable=False, server_default='0'),
+        sa.Column('last_llm_request_at', sa.DateTime(timezone=True), nullable=True),
+        comment='Per-session counters maintained by triggers on messages and llm_requests'
+    )
+    
+    # Messages: count by role on INSERT, decrement on DELETE
+    op.execute("""
+        CREATE OR REPLACE FUNCTION session_stats_messages_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO session_stats AS s (session_id, message_count, role_counts, last_message_at)
+                VALUES (NEW.session_id, 1, jsonb_build_object(NEW.role, 1), NEW.created_at)
+                ON CONFLICT (session_id) DO UPDATE SET
+                    message_count = s.message_count + 1,
+                    role_counts = s.role_counts || jsonb_build_object(
+                        NEW.role, coalesce((s.role_counts ->> NEW.role)::int, 0) + 1),
+                    last_message_at = greatest(s.last_message_at, NEW.created_at);
+                RETURN NEW;
+            END IF;
+            
+            UPDATE session_stats AS s SET
+                message_count = greatest(s.message_count - 1, 0),
+                role_counts = s.role_counts || jsonb_build_object(
+                    OLD.role, greatest(coalesce((s.role_counts ->> OLD.role)::int, 0) - 1, 0))
+            WHERE s.session_id = OLD.session_id;
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    
+    op.execute("""
+        CREATE TRIGGER session_stats_messages_update
+        AFTER INSERT OR DELETE ON messages
+        FOR EACH ROW
+        EXECUTE FUNCTION session_stats_messages_trigger();
+    """)
+    
+    # LLM requests: accumulate tokens and cost on INSERT
+    op.execute("""
+        CREATE OR REPLACE FUNCTION session_stats_llm_requests_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO session_stats AS s (session_id, llm_request_count, total_tokens, total_cost, last_llm_request_at)
+            VALUES (NEW.session_id, 1, coalesce(NEW.total_tokens, 0), coalesce(NEW.total_cost, 0), NEW.created_at)
+            ON CONFLICT (session_id) DO UPDATE SET
+                llm_request_count = s.llm_request_count + 1,
+                total_tokens = s.total_tokens + coalesce(NEW.total_tokens, 0),
+                total_cost = s.total_cost + coalesce(NEW.total_cost, 0),
+                last_llm_request_at = greatest(s.last_llm_request_at, NEW.created_at);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    
+    op.execute("""
+        CREATE TRIGGER session_stats_llm_requests_update
+        AFTER INSERT ON llm_requests
+        FOR EACH ROW
+        EXECUTE FUNCTION session_stats_llm_requests_trigger();
+    """)
+    
+    # Backfill counters for existing sessions
+    op.execute("""
+        INSERT INTO session_stats (session_id, message_count, role_counts, last_message_at)
+        SELECT session_id, sum(n), jsonb_object_agg(role, n), max(last_at)
+        FROM (
+            SELECT session_id, role, count(*) AS n, max(created_at) AS last_at
+            FROM messages
+            GROUP BY session_id, role
+        ) by_role
+        GROUP BY session_id
+    """)
+    op.execute("""
+        INSERT INTO session_stats AS s (session_id, llm_request_count, total_tokens, total_cost, last_llm_request_at)
+        SELECT session_id, count(*), coalesce(sum(total_tokens), 0), coalesce(sum(total_cost), 0), max(created_at)
+        FROM llm_requests
+        GROUP BY session_id
+        ON CONFLICT (session_id) DO UPDATE SET
+            llm_request_count = EXCLUDED.llm_request_count,
+            total_tokens = EXCLUDED.total_tokens,
+            total_cost = EXCLUDED.total_cost,
+            last_llm_request_at = EXCLUDED.last_llm_request_at
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema - Remove per-session counters."""
+    
+    op.execute("DROP TRIGGER IF EXISTS session_stats_llm_requests_update ON llm_requests")
+    op.execute("DROP FUNCTION IF EXISTS session_stats_llm_requests_trigger()")
+    op.execute("DROP TRIGGER IF EXISTS session_stats_messages_update ON messages")
+    op.execute("DROP FUNCTION IF EXISTS session_stats_messages_trigger()")
+    op.drop_table('session_stats')
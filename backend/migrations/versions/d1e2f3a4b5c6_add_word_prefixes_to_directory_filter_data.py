@@ -0,0 +1,65 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""add_word_prefixes_to_directory_filter_data
+
+Revision ID: d1e2f3a4b5c6
+Revises: c0d1e2f3a4b5
+Create Date: 2025-12-02 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1e2f3a4b5c6'
+down_revision: Union[str, Sequence[str], None] = 'c0d1e2f3a4b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Keep in line with FILTER_PREFIX_MIN_LENGTH in app/services/directory_filters.py
+PREFIX_MIN_LENGTH = 3
+
+_REBUILD_FILTER_DATA = """
+    UPDATE directory_entries e
+    SET filter_data = directory_entry_filter_data(e.entry_data, l.filter_fields::text[])
+    FROM directory_lists l
+    WHERE l.id = e.directory_list_id AND e.filter_data IS NOT NULL
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema - Store word prefixes in filter_data so indexed filters keep word-prefix matching."""
+
+    # Distinct lower-cased words of a value and their prefixes of 3+ characters, e.g.
+    # 'Pediatrics' -> ["ped", "pedi", ..., "pediatric", "pediatrics"]
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION directory_filter_terms(value text)
+        RETURNS jsonb AS $$
+            SELECT coalesce(jsonb_agg(DISTINCT term ORDER BY term), '[]'::jsonb)
+            FROM unnest(regexp_split_to_array(lower(value), '[^[:alnum:]]+')) AS word,
+                 LATERAL (
+                     SELECT word
+                     UNION
+                     SELECT left(word, n) FROM generate_series({PREFIX_MIN_LENGTH}, length(word) - 1) AS n
+                 ) AS terms(term)
+            WHERE word <> ''
+        $$ LANGUAGE sql IMMUTABLE;
+    """)
+    op.execute(_REBUILD_FILTER_DATA)
+
+
+def downgrade() -> None:
+    """Downgrade schema - Whole words only in filter_data."""
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_filter_terms(value text)
+        RETURNS jsonb AS $$
+            SELECT coalesce(jsonb_agg(DISTINCT word ORDER BY word), '[]'::jsonb)
+            FROM unnest(regexp_split_to_array(lower(value), '[^[:alnum:]]+')) AS word
+            WHERE word <> ''
+        $$ LANGUAGE sql IMMUTABLE;
+    """)
+    op.execute(_REBUILD_FILTER_DATA)
@@ -0,0 +1,44 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""add_trigram_indexes_to_directory_entries
+
+Revision ID: d5e6f7a8b9c0
+Revises: c4d5e6f7a8b9
+Create Date: 2025-11-25 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e6f7a8b9c0'
+down_revision: Union[str, Sequence[str], None] = 'c4d5e6f7a8b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - Add pg_trgm GIN index on directory_entries.name.
+    
+    Serves substring search (ILIKE '%q%', which a btree index cannot use) and
+    the fuzzy search mode (word similarity, e.g. "Dr. Shwartz" -> "Dr. Schwartz").
+    """
+    
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    op.create_index(
+        'idx_directory_entries_name_trgm',
+        'directory_entries',
+        ['name'],
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - Remove the trigram index (the extension is left installed)."""
+    
+    op.drop_index('idx_directory_entries_name_trgm', table_name='directory_entries')
@@ -0,0 +1,139 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""add_indexed_filters_to_directory_entries
+
+Revision ID: e6f7a8b9c0d1
+Revises: d5e6f7a8b9c0
+Create Date: 2025-11-26 10:00:00.000000
+
+"""
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import yaml
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f7a8b9c0d1'
+down_revision: Union[str, Sequence[str], None] = 'd5e6f7a8b9c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA_DIR = Path(__file__).resolve().parents[2] / "config" / "directory_schemas"
+
+
+def _filter_fields(schema_file: str) -> list:
+    """Filterable fields of a schema (same rule as services/directory_filters.filter_fields_from_schema)."""
+    path = SCHEMA_DIR / schema_file
+    if not path.exists():
+        return []
+    try:
+        schema = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    except yaml.YAMLError as e:
+        print(f"Skipping filter fields for {schema_file}: {e}")
+        return []
+    declared = schema.get("searchable_fields") or {}
+    if not isinstance(declared, dict):
+        # Plain list of field names (classes.yaml)
+        declared = {name: {} for name in declared}
+    fields = []
+    for name, definition in declared.items():
+        definition = definition or {}
+        indexed = definition.get("filter_index")
+        if indexed is None:
+            indexed = definition.get("type", "string") in ("string", "array")
+        if indexed:
+            fields.append(name)
+    return fields
+
+
+def upgrade() -> None:
+    """Upgrade schema - Add schema-driven, GIN-indexed filter_data to directory_entries."""
+    
+    op.add_column('directory_lists',
+                  sa.Column('filter_fields',
+                           postgresql.ARRAY(sa.String()),
+                           nullable=True,
+                           comment='entry_data fields mirrored into directory_entries.filter_data'))
+    op.add_column('directory_entries',
+                  sa.Column('filter_data',
+                           postgresql.JSONB(),
+                           nullable=True,
+                           comment='Normalized filterable fields: {field: [lower-cased words]}'))
+    
+    # Distinct lower-cased words of a value, e.g.
+    # 'Interventional Cardiology' -> ["cardiology", "interventional"]
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_filter_terms(value text)
+        RETURNS jsonb AS $$
+            SELECT coalesce(jsonb_agg(DISTINCT word ORDER BY word), '[]'::jsonb)
+            FROM unnest(regexp_split_to_array(lower(value), '[^[:alnum:]]+')) AS word
+            WHERE word <> ''
+        $$ LANGUAGE sql IMMUTABLE;
+    """)
+    
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_filter_data_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            fields text[];
+        BEGIN
+            SELECT filter_fields INTO fields FROM directory_lists WHERE id = NEW.directory_list_id;
+            
+            SELECT jsonb_object_agg(field, directory_filter_terms(NEW.entry_data ->> field))
+            INTO NEW.filter_data
+            FROM unnest(coalesce(fields, '{}')) AS field
+            WHERE NEW.entry_data ->> field IS NOT NULL;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    
+    op.execute("""
+        CREATE TRIGGER directory_entries_filter_data_update
+        BEFORE INSERT OR UPDATE OF entry_data, directory_list_id
+        ON directory_entries
+        FOR EACH ROW
+        EXECUTE FUNCTION directory_entries_filter_data_trigger();
+    """)
+    
+    # Backfill: filterable fields per existing list from its schema file, then the entries
+    conn = op.get_bind()
+    lists = conn.execute(sa.text("SELECT id, schema_file FROM directory_lists WHERE schema_file IS NOT NULL")).fetchall()
+    for list_id, schema_file in lists:
+        conn.execute(
+            sa.text("UPDATE directory_lists SET filter_fields = :fields WHERE id = :id"),
+            {"fields": _filter_fields(schema_file), "id": list_id}
+        )
+    op.execute("""
+        UPDATE directory_entries e
+        SET filter_data = (
+            SELECT jsonb_object_agg(field, directory_filter_terms(e.entry_data ->> field))
+            FROM directory_lists l, unnest(coalesce(l.filter_fields, '{}')) AS field
+            WHERE l.id = e.directory_list_id AND e.entry_data ->> field IS NOT NULL
+        )
+    """)
+    
+    # jsonb_path_ops: smaller and faster than the default opclass for @> lookups
+    op.create_index(
+        'idx_directory_entries_filter_data',
+        'directory_entries',
+        ['filter_data'],
+        postgresql_using='gin',
+        postgresql_ops={'filter_data': 'jsonb_path_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - Remove indexed filters."""
+    
+    op.drop_index('idx_directory_entries_filter_data', table_name='directory_entries')
+    op.execute("DROP TRIGGER IF EXISTS directory_entries_filter_data_update ON directory_entries")
+    op.execute("DROP FUNCTION IF EXISTS directory_entries_filter_data_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS directory_filter_terms(text)")
+    op.drop_column('directory_entries', 'filter_data')
+    op.drop_column('directory_lists', 'filter_fields')
@@ -0,0 +1,192 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""add_weighted_search_vectors_to_directory_entries
+
+Revision ID: f7a8b9c0d1e2
+Revises: e6f7a8b9c0d1
+Create Date: 2025-11-27 10:00:00.000000
+
+"""
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import yaml
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a8b9c0d1e2'
+down_revision: Union[str, Sequence[str], None] = 'e6f7a8b9c0d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA_DIR = Path(__file__).resolve().parents[2] / "config" / "directory_schemas"
+
+# Larger tables are rebuilt in batches by scripts/rebuild_directory_search_vectors.py
+INLINE_REBUILD_LIMIT = 50_000
+
+
+def _search_weights(schema_file: str) -> dict:
+    """Weighted searchable fields of a schema (same rule as services/directory_fts.search_weights_from_schema)."""
+    path = SCHEMA_DIR / schema_file
+    if not path.exists():
+        return {}
+    try:
+        schema = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    except yaml.YAMLError as e:
+        print(f"Skipping search weights for {schema_file}: {e}")
+        return {}
+    declared = schema.get("searchable_fields") or {}
+    if not isinstance(declared, dict):
+        declared = {name: {} for name in declared}
+    weights = {}
+    for name, definition in declared.items():
+        definition = definition or {}
+        weight = definition.get("search_weight") or ("D" if definition.get("type") == "text" else "C")
+        weights[name] = str(weight).upper()
+    return weights
+
+
+def upgrade() -> None:
+    """Upgrade schema - Build directory search vectors from weighted schema searchable_fields."""
+    
+    op.add_column('directory_lists',
+                  sa.Column('search_weights',
+                           postgresql.JSONB(),
+                           nullable=True,
+                           comment='{entry_data field: A-D} composing directory_entries.search_vector'))
+    
+    # Searchable text of a JSON value: its string and number leaves, space separated
+    # (no keys or JSON punctuation); NULL when there are none
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_field_text(value jsonb)
+        RETURNS text AS $$
+            SELECT string_agg(item #>> '{}', ' ')
+            FROM jsonb_path_query(value, 'strict $.**') AS item
+            WHERE jsonb_typeof(item) IN ('string', 'number')
+        $$ LANGUAGE sql IMMUTABLE;
+    """)
+    
+    # name=A, tags=B, then each weighted field; without weights all entry_data text at C
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entry_search_vector(
+            entry_name text, entry_tags text[], entry_data jsonb, weights jsonb
+        )
+        RETURNS tsvector AS $$
+        DECLARE
+            vector tsvector;
+            field record;
+        BEGIN
+            vector :=
+                setweight(to_tsvector('english', coalesce(entry_name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(array_to_string(entry_tags, ' '), '')), 'B');
+            IF weights IS NULL THEN
+                RETURN vector ||
+                    setweight(to_tsvector('english', coalesce(directory_field_text(entry_data), '')), 'C');
+            END IF;
+            FOR field IN SELECT key, value FROM jsonb_each_text(weights) LOOP
+                vector := vector || setweight(
+                    to_tsvector('english', coalesce(directory_field_text(entry_data -> field.key), '')),
+                    field.value::"char"
+                );
+            END LOOP;
+            RETURN vector;
+        END
+        $$ LANGUAGE plpgsql IMMUTABLE;
+    """)
+    
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_search_vector_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            weights jsonb;
+        BEGIN
+            SELECT search_weights INTO weights FROM directory_lists WHERE id = NEW.directory_list_id;
+            NEW.search_vector := directory_entry_search_vector(NEW.name, NEW.tags, NEW.entry_data, weights);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    
+    # Also recompute when an entry moves to a list with other weights
+    op.execute("DROP TRIGGER IF EXISTS directory_entries_search_vector_update ON directory_entries")
+    op.execute("""
+        CREATE TRIGGER directory_entries_search_vector_update
+        BEFORE INSERT OR UPDATE OF name, tags, entry_data, directory_list_id
+        ON directory_entries
+        FOR EACH ROW
+        EXECUTE FUNCTION directory_entries_search_vector_trigger();
+    """)
+    
+    # Weights per existing list from its schema file
+    conn = op.get_bind()
+    lists = conn.execute(sa.text("SELECT id, schema_file FROM directory_lists WHERE schema_file IS NOT NULL")).fetchall()
+    for list_id, schema_file in lists:
+        weights = _search_weights(schema_file)
+        if weights:
+            conn.execute(
+                sa.text("UPDATE directory_lists SET search_weights = :weights WHERE id = :id")
+                .bindparams(sa.bindparam("weights", type_=postgresql.JSONB())),
+                {"weights": weights, "id": list_id}
+            )
+    
+    entry_count = conn.execute(sa.text("SELECT count(*) FROM directory_entries")).scalar()
+    if entry_count <= INLINE_REBUILD_LIMIT:
+        op.execute("""
+            UPDATE directory_entries e
+            SET search_vector = directory_entry_search_vector(e.name, e.tags, e.entry_data, l.search_weights)
+            FROM directory_lists l
+            WHERE l.id = e.directory_list_id
+        """)
+    else:
+        print(
+            f"{entry_count} directory entries keep their old search vectors until rebuilt: "
+            "run scripts/rebuild_directory_search_vectors.py"
+        )
+    
+    op.execute("""
+        COMMENT ON COLUMN directory_entries.search_vector IS 
+        'Full-text search vector (name=A, tags=B, schema searchable_fields by directory_lists.search_weights)'
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema - Restore the name/tags/entry_data::text search vector."""
+    
+    op.execute("""
+        CREATE OR REPLACE FUNCTION directory_entries_search_vector_trigger() 
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(array_to_string(NEW.tags, ' '), '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(NEW.entry_data::text, '')), 'C');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("DROP TRIGGER IF EXISTS directory_entries_search_vector_update ON directory_entries")
+    op.execute("""
+        CREATE TRIGGER directory_entries_search_vector_update
+        BEFORE INSERT OR UPDATE OF name, tags, entry_data
+        ON directory_entries
+        FOR EACH ROW
+        EXECUTE FUNCTION directory_entries_search_vector_trigger();
+    """)
+    op.execute("""
+        UPDATE directory_entries
+        SET search_vector = 
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(array_to_string(tags, ' '), '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(entry_data::text, '')), 'C')
+    """)
+    op.execute("""
+        COMMENT ON COLUMN directory_entries.search_vector IS 
+        'Full-text search vector (name=A, tags=B, entry_data=C)'
+    """)
+    op.execute("DROP FUNCTION IF EXISTS directory_entry_search_vector(text, text[], jsonb, jsonb)")
+    op.execute("DROP FUNCTION IF EXISTS directory_field_text(jsonb)")
+    op.drop_column('directory_lists', 'search_weights')
@@ -0,0 +1,109 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Rebuild directory_entries.search_vector in batches (weighted schema fields).
+
+Needed once after migration f7a8b9c0d1e2 on databases with more entries than
+the migration rebuilds inline, and after changing a schema's searchable_fields
+or search_weight values (refresh the list's weights with --refresh-weights).
+
+Each batch is committed on its own, so the rebuild never holds long locks.
+It is resumable: pass the last checkpoint printed with --after, or simply
+re-run it - entries whose vector is already current are not rewritten.
+
+Usage:
+    python backend/scripts/rebuild_directory_search_vectors.py
+    python backend/scripts/rebuild_directory_search_vectors.py --batch-size 5000
+    python backend/scripts/rebuild_directory_search_vectors.py --after 0193... --list-id 0192...
+    python backend/scripts/rebuild_directory_search_vectors.py --refresh-weights
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import select
+
+# Add backend to path for imports
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import get_database_service
+from app.models.directory import DirectoryList
+from app.services.directory_fts import (
+    DEFAULT_REBUILD_BATCH_SIZE,
+    rebuild_search_vectors,
+    search_weights_for_schema_file,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s | %(levelname)s | %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+async def refresh_search_weights(session, list_id: uuid.UUID = None) -> None:
+    """Store each list's search_weights from its current schema file."""
+    query = select(DirectoryList).where(DirectoryList.schema_file.is_not(None))
+    if list_id:
+        query = query.where(DirectoryList.id == list_id)
+    for directory_list in (await session.execute(query)).scalars():
+        weights = dict(search_weights_for_schema_file(directory_list.schema_file))
+        if weights != directory_list.search_weights:
+            directory_list.search_weights = weights
+            logger.info(f"   {directory_list.list_name}: {weights}")
+    await session.commit()
+
+
+async def rebuild(after: uuid.UUID = None, batch_size: int = DEFAULT_REBUILD_BATCH_SIZE,
+                  list_id: uuid.UUID = None, refresh_weights: bool = False) -> None:
+    """Rebuild search vectors batch by batch, logging a resume checkpoint after each."""
+    db = get_database_service()
+    await db.initialize()
+    
+    if refresh_weights:
+        logger.info("Refreshing list search weights from schema files")
+        async with db.get_session() as session:
+            await refresh_search_weights(session, list_id)
+    
+    started = time.perf_counter()
+    scanned = updated = 0
+    while True:
+        async with db.get_session() as session:
+            batch = await rebuild_search_vectors(session, after_id=after, batch_size=batch_size, list_id=list_id)
+            await session.commit()
+        if batch.last_id is None:
+            break
+        scanned += batch.scanned
+        updated += batch.updated
+        after = batch.last_id
+        rate = scanned / max(time.perf_counter() - started, 1e-6)
+        logger.info(f"   {scanned:,} scanned, {updated:,} rebuilt ({rate:,.0f} rows/s) - checkpoint --after {after}")
+    
+    logger.info(f"✅ Done: {scanned:,} entries scanned, {updated:,} rebuilt in {time.perf_counter() - started:.1f}s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description='Rebuild directory search vectors in resumable batches',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--after', type=uuid.UUID, help='Resume after this entry id (last checkpoint)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_REBUILD_BATCH_SIZE, help='Entries per batch')
+    parser.add_argument('--list-id', type=uuid.UUID, help='Only rebuild this directory list')
+    parser.add_argument('--refresh-weights', action='store_true',
+                        help='Re-read search weights from the schema files first')
+    args = parser.parse_args()
+    
+    await rebuild(args.after, args.batch_size, args.list_id, args.refresh_weights)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -14,11 +14,16 @@ Usage:
         --csv backend/data/wyckoff/doctors_profile.csv \
         --mapper medical_professional \
         --description "Wyckoff Heights Medical Center - Medical Professionals"
+
+Large lists: add --bulk to load with COPY and one set-based INSERT ... SELECT
+(see app/services/directory_bulk_import.py), and --defer-indexes on full
+reloads to rebuild the directory_entries indexes once after the load.
 """
 
 import asyncio
 import argparse
 import sys
+import time
 from pathlib import Path
 from sqlalchemy import select, delete
 
@@ -29,7 +34,11 @@ sys.path.insert(0, str(backend_dir))
 from app.database import get_database_service
 from app.models.account import Account
 from app.models.directory import DirectoryList, DirectoryEntry
+from app.services.directory_bulk_import import bulk_import_entries
 from app.services.directory_importer import DirectoryImporter
+from app.services.directory_facets import facet_fields_for_schema_file
+from app.services.directory_filters import filter_fields_for_schema_file
+from app.services.directory_fts import search_weights_for_schema_file
 import logging
 
 logging.basicConfig(
@@ -64,7 +73,9 @@ async def seed_directory(
     schema_file: str,
     csv_path: str,
     mapper_name: str,
-    list_description: str = None
+    list_description: str = None,
+    bulk: bool = False,
+    defer_indexes: bool = False
 ):
     """
     Seed a directory list with CSV data using delete-and-replace strategy.
@@ -77,6 +88,9 @@ async def seed_directory(
         csv_path: Path to CSV file
         mapper_name: Field mapper name (must be in MAPPERS dict)
         list_description: Optional description for the list
+        bulk: Load entries with COPY + INSERT ... SELECT instead of ORM inserts
+        defer_indexes: Drop and rebuild the directory_entries indexes around a
+            bulk load (full reloads only: locks the table until commit)
     """
     logger.info("═══════════════════════════════════════════════════════════════════════════════")
     logger.info("  DIRECTORY SEEDING")
@@ -102,6 +116,7 @@ async def seed_directory(
     logger.info(f"   Schema: {schema_file}")
     logger.info(f"   CSV: {csv_file}")
     logger.info(f"   Mapper: {mapper_name}")
+    logger.info(f"   Load: {'bulk COPY' if bulk else 'ORM'}{' (deferred indexes)' if bulk and defer_indexes else ''}")
     
     # Initialize database
     db = get_database_service()
@@ -145,7 +160,13 @@ async def seed_directory(
             list_name=list_name,
             list_description=list_description or f"{entry_type} directory - {list_name}",
             entry_type=entry_type,
-            schema_file=schema_file
+            schema_file=schema_file,
+            # Mirrored into directory_entries.filter_data by trigger (indexed filters)
+            filter_fields=list(filter_fields_for_schema_file(schema_file)),
+            # Weighted searchable fields composing directory_entries.search_vector (trigger)
+            search_weights=dict(search_weights_for_schema_file(schema_file)),
+            # Value counts kept in directory_facet_counts (trigger)
+            facet_fields=list(facet_fields_for_schema_file(schema_file))
         )
         session.add(directory_list)
         await session.commit()
@@ -175,10 +196,21 @@ async def seed_directory(
         
         # Save entries to database
         logger.info(f"\n💾 Saving {len(entries)} entries to database...")
-        session.add_all(entries)
-        await session.commit()
+        started = time.perf_counter()
+        if bulk:
+            outcome = await bulk_import_entries(
+                session, directory_list.id, entries, defer_indexes=defer_indexes
+            )
+            await session.commit()
+            logger.info(f"   COPY: {outcome.copy_seconds:.2f}s, INSERT ... SELECT: {outcome.insert_seconds:.2f}s")
+            if outcome.deferred_indexes:
+                logger.info(f"   Rebuilt {outcome.deferred_indexes} indexes: {outcome.index_seconds:.2f}s")
+        else:
+            session.add_all(entries)
+            await session.commit()
+        elapsed = time.perf_counter() - started
         
-        logger.info(f"✅ Saved {len(entries)} entries")
+        logger.info(f"✅ Saved {len(entries)} entries in {elapsed:.2f}s ({len(entries) / max(elapsed, 1e-6):,.0f} rows/s)")
         
         # Display sample entries
         if entries:
@@ -242,6 +274,15 @@ Examples:
       --csv data/drugs.csv \\
       --mapper pharmaceutical \\
       --description "Prescription drug database"
+  
+  # Full reload of a large list (COPY, indexes rebuilt once after the load)
+  python backend/scripts/seed_directory.py \\
+      --account windriver \\
+      --list doctors \\
+      --entry-type medical_professional \\
+      --csv backend/data/windriver/doctors_profiles.csv \\
+      --mapper medical_professional \\
+      --bulk --defer-indexes
         """
     )
     
@@ -279,6 +320,17 @@ Examples:
         '--description',
         help='Optional list description'
     )
+    parser.add_argument(
+        '--bulk',
+        action='store_true',
+        help='Load entries with COPY + one INSERT ... SELECT (large lists)'
+    )
+    parser.add_argument(
+        '--defer-indexes',
+        action='store_true',
+        help='With --bulk: drop and rebuild the directory_entries indexes around the load '
+             '(full reloads only; locks the table until the import commits)'
+    )
     
     args = parser.parse_args()
     
@@ -292,7 +344,9 @@ Examples:
         schema_file=schema_file,
         csv_path=args.csv,
         mapper_name=args.mapper,
-        list_description=args.description
+        list_description=args.description,
+        bulk=args.bulk or args.defer_indexes,
+        defer_indexes=args.defer_indexes
     )
     
     sys.exit(0 if success else 1)
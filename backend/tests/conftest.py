@@ -11,8 +11,9 @@ import pytest
 import asyncio
 import os
 from pathlib import Path
+from types import SimpleNamespace
 from dotenv import load_dotenv
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 from typing import Dict, Any
 
 
@@ -49,6 +50,14 @@ def mock_database_session():
     return MagicMock()
 
 
+@pytest.fixture
+def directory_versions():
+    """Factory for a DataVersions stand-in whose directory_version() returns the given versions in turn."""
+    def make(*versions):
+        return SimpleNamespace(directory_version=AsyncMock(side_effect=list(versions)))
+    return make
+
+
 @pytest.fixture
 def sample_account_context():
     """Sample account context for testing."""
@@ -0,0 +1,154 @@
+"""
+Benchmark: legacy vs weighted schema-driven directory FTS vectors.
+
+Seeds the same synthetic doctors list as benchmark_directory_search.py, then
+builds two side tables over its entries, each with a GIN index:
+
+    legacy    - name=A, tags=B, entry_data::text=C, ranked with ts_rank
+    weighted  - name=A, tags=B, schema searchable_fields by search_weight,
+                ranked with ts_rank_cd (normalized), as the app now does
+
+and reports, per variant, the GIN index size and average vector size, then
+per query the matched row count and median / p95 EXPLAIN ANALYZE time of
+the top-10 ranked search.
+
+Usage:
+    cd backend
+    python tests/manual/benchmark_directory_fts.py
+    python tests/manual/benchmark_directory_fts.py --entries 250000 --repeat 20
+
+Requires a database migrated to head. The synthetic account and side tables
+are dropped at the end.
+"""
+"""
+Copyright (c) 2025 Ape4, Inc. All rights reserved.
+Unauthorized copying of this file is strictly prohibited.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import uuid
+from pathlib import Path
+
+# Add backend directory to Python path
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmark_directory_search import seed
+from sqlalchemy import delete, text
+
+from app.database import get_database_service
+from app.models.account import Account
+from app.services.directory_fts import RANK_NORMALIZATION
+
+VARIANTS = {
+    "legacy": {
+        "vector": """
+            setweight(to_tsvector('english', coalesce(e.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(array_to_string(e.tags, ' '), '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(e.entry_data::text, '')), 'C')
+        """,
+        "rank": "ts_rank(search_vector, q)",
+    },
+    "weighted": {
+        "vector": "directory_entry_search_vector(e.name, e.tags, e.entry_data, l.search_weights)",
+        "rank": f"ts_rank_cd(search_vector, q, {RANK_NORMALIZATION})",
+    },
+}
+
+# tsquery strings, as DirectoryService builds them (words joined with &)
+QUERIES = [
+    "Cardiology",
+    "Interventional & Cardiology",
+    "Schwartz & Spanish",
+    "specialty",        # a JSON key: only the legacy vector matches it
+    "https",            # a non-searchable field value
+]
+
+
+async def build_variant(db, table: str, list_id: uuid.UUID, vector_sql: str) -> dict:
+    """Create the side table and its GIN index; return size statistics."""
+    async with db.get_session() as session:
+        await session.execute(text(f"""
+            CREATE TABLE {table} AS
+            SELECT e.id, {vector_sql} AS search_vector
+            FROM directory_entries e JOIN directory_lists l ON l.id = e.directory_list_id
+            WHERE e.directory_list_id = '{list_id}'
+        """))  # utility statements take no bind parameters
+        await session.execute(text(f"CREATE INDEX {table}_gin ON {table} USING gin (search_vector)"))
+        await session.execute(text(f"ANALYZE {table}"))
+        await session.commit()
+        row = (await session.execute(text(f"""
+            SELECT pg_relation_size('{table}_gin'), avg(pg_column_size(search_vector)), avg(length(search_vector))
+            FROM {table}
+        """))).one()
+    return {"index_bytes": row[0], "avg_vector_bytes": float(row[1]), "avg_lexemes": float(row[2])}
+
+
+async def run_query(db, table: str, rank_sql: str, tsquery: str, repeat: int) -> dict:
+    """Matched rows, and EXPLAIN ANALYZE timings of the top-10 ranked search."""
+    sql = f"""
+        SELECT id FROM {table}, to_tsquery('english', :tsquery) AS q
+        WHERE search_vector @@ q
+        ORDER BY {rank_sql} DESC
+        LIMIT 10
+    """
+    timings = []
+    async with db.get_session() as session:
+        matched = (await session.execute(
+            text(f"SELECT count(*) FROM {table} WHERE search_vector @@ to_tsquery('english', :tsquery)"),
+            {"tsquery": tsquery}
+        )).scalar()
+        for _ in range(repeat):
+            result = await session.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), {"tsquery": tsquery})
+            explain = result.scalar()
+            explain = json.loads(explain) if isinstance(explain, str) else explain
+            timings.append(explain[0]["Execution Time"])
+    timings.sort()
+    return {
+        "matched": matched,
+        "median_ms": statistics.median(timings),
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    db = get_database_service()
+    await db.initialize()
+
+    account_id, list_id = await seed(db, args.entries, args.batch_size)
+    suffix = uuid.uuid4().hex[:8]
+    tables = {name: f"bench_fts_{name}_{suffix}" for name in VARIANTS}
+    try:
+        print(f"\n{'variant':<10}{'index MB':>10}{'avg vector B':>14}{'avg lexemes':>13}")
+        print("-" * 47)
+        for name, variant in VARIANTS.items():
+            sizes = await build_variant(db, tables[name], list_id, variant["vector"])
+            print(f"{name:<10}{sizes['index_bytes'] / 1e6:>10.2f}{sizes['avg_vector_bytes']:>14.0f}{sizes['avg_lexemes']:>13.1f}")
+
+        print(f"\n{'query':<30}{'variant':<10}{'matched':>9}{'median ms':>11}{'p95 ms':>9}")
+        print("-" * 69)
+        for tsquery in QUERIES:
+            for name, variant in VARIANTS.items():
+                stats = await run_query(db, tables[name], variant["rank"], tsquery, args.repeat)
+                print(f"{tsquery:<30}{name:<10}{stats['matched']:>9}{stats['median_ms']:>11.2f}{stats['p95_ms']:>9.2f}")
+    finally:
+        async with db.get_session() as session:
+            for table in tables.values():
+                await session.execute(text(f"DROP TABLE IF EXISTS {table}"))
+            await session.execute(delete(Account).where(Account.id == account_id))
+            await session.commit()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
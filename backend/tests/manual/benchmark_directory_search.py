@@ -0,0 +1,212 @@
+"""
+Benchmark: directory search plans and latency on a large synthetic list.
+
+Creates a throwaway account with one medical_professional list of N
+synthetic doctors (default 100,000), runs ANALYZE, then for each search case
+runs the query DirectoryService.build_search_query() generates under
+EXPLAIN (ANALYZE, BUFFERS) and reports:
+
+- median / p95 execution time over --repeat runs
+- whether the plan scanned directory_entries sequentially or via an index
+- the rows returned
+
+Cases:
+    substring     - ILIKE '%schw%' (trigram GIN index on name)
+    fuzzy         - misspelled "Dr. Shwartz" (trigram word similarity)
+    filter        - filters={"specialty": "Nephrology"} via the filter_data index
+    filter_regex  - the same filter as a word-boundary regex (pre-index behavior)
+
+Usage:
+    cd backend
+    python tests/manual/benchmark_directory_search.py
+    python tests/manual/benchmark_directory_search.py --entries 250000 --repeat 20 --keep
+
+Requires a database migrated to head (trigram and filter indexes). The synthetic account
+is deleted at the end unless --keep is given.
+"""
+"""
+Copyright (c) 2025 Ape4, Inc. All rights reserved.
+Unauthorized copying of this file is strictly prohibited.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add backend directory to Python path
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import delete, insert, text
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.database import get_database_service
+from app.models.account import Account
+from app.models.directory import DirectoryEntry, DirectoryList
+from app.services.directory_filters import filter_fields_for_schema_file
+from app.services.directory_fts import search_weights_for_schema_file
+from app.services.directory_service import DEFAULT_FUZZY_THRESHOLD, DirectoryService
+
+FIRST_NAMES = ["Robert", "Maria", "James", "Priya", "Wei", "Fatima", "John", "Elena", "Ahmed", "Grace"]
+LAST_NAMES = ["Schwartz", "Smith", "Garcia", "Nguyen", "Patel", "Kowalski", "Okafor", "Rossi", "Cohen", "Tanaka"]
+DEPARTMENTS = {
+    "Cardiology": ["Interventional Cardiology", "Cardiology", "Pediatric Cardiology"],
+    "Surgery": ["Plastic Surgery", "Orthopedic Surgery", "Cardiac Surgery", "Urologic Surgery"],
+    "Internal Medicine": ["Nephrology", "Endocrinology", "Gastroenterology and Hepatology"],
+    "Pediatrics": ["Pediatrics", "Neonatology"],
+    "Neurology": ["Neurology", "Neurosurgery"],
+}
+LANGUAGES = ["English", "Spanish", "Hindi", "Mandarin", "French"]
+
+# name -> search() keyword arguments
+CASES = {
+    "substring": {"name_query": "schw", "search_mode": "substring"},
+    "fuzzy": {"name_query": "Dr. Shwartz", "search_mode": "fuzzy"},
+    "filter": {"jsonb_filters": {"specialty": "Nephrology"}, "search_mode": "substring",
+               "filter_fields": ["department", "specialty", "gender"]},
+    "filter_regex": {"jsonb_filters": {"specialty": "Nephrology"}, "search_mode": "substring"},
+}
+
+
+def synthetic_entry(list_id: uuid.UUID, index: int, rng: random.Random) -> dict:
+    """One synthetic doctor row (unique name suffix keeps names distinct)."""
+    department = rng.choice(list(DEPARTMENTS))
+    specialty = rng.choice(DEPARTMENTS[department])
+    return {
+        "id": uuid.uuid4(),
+        "directory_list_id": list_id,
+        "name": f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}{index:06d}, MD",
+        "tags": rng.sample(LANGUAGES, k=rng.randint(1, 2)),
+        "contact_info": {"phone": f"555-{index % 10000:04d}"},
+        "entry_data": {
+            "department": department,
+            "specialty": specialty,
+            "gender": rng.choice(["male", "female"]),
+            "education": "Synthetic School of Medicine, MD",
+            "board_certifications": f"American Board of {specialty}",
+            # Not searchable (only the old entry_data::text vector indexed these)
+            "profile_url": f"https://example.org/doctors/{index:06d}",
+            "accepting_new_patients": rng.choice([True, False]),
+        },
+    }
+
+
+async def seed(db, entries: int, batch_size: int) -> tuple:
+    """Create the synthetic account and list and insert the entries."""
+    rng = random.Random(42)
+    async with db.get_session() as session:
+        account = Account(slug=f"bench-{uuid.uuid4().hex[:8]}", name="Directory search benchmark")
+        session.add(account)
+        await session.flush()
+        directory_list = DirectoryList(
+            account_id=account.id,
+            list_name="doctors",
+            entry_type="medical_professional",
+            schema_file="medical_professional.yaml",
+            filter_fields=list(filter_fields_for_schema_file("medical_professional.yaml")),
+            search_weights=dict(search_weights_for_schema_file("medical_professional.yaml")),
+        )
+        session.add(directory_list)
+        await session.commit()
+        account_id, list_id = account.id, directory_list.id
+
+    started = time.perf_counter()
+    for offset in range(0, entries, batch_size):
+        rows = [synthetic_entry(list_id, i, rng) for i in range(offset, min(offset + batch_size, entries))]
+        async with db.get_session() as session:
+            await session.execute(insert(DirectoryEntry), rows)
+            await session.commit()
+    print(f"Seeded {entries:,} entries in {time.perf_counter() - started:.1f}s")
+
+    async with db.get_session() as session:
+        await session.execute(text("ANALYZE directory_entries"))
+        await session.commit()
+    return account_id, list_id
+
+
+def plan_nodes(plan: dict) -> list:
+    """Flatten an EXPLAIN JSON plan into its nodes."""
+    nodes = [plan]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def describe_access(plan: dict) -> str:
+    """How directory_entries was read: seq scan or the index names used."""
+    accesses = set()
+    for node in plan_nodes(plan):
+        if node.get("Relation Name") == "directory_entries" or "Index Name" in node:
+            if node["Node Type"] == "Seq Scan":
+                accesses.add("SEQ SCAN")
+            elif "Index Name" in node:
+                accesses.add(node["Index Name"])
+    return ", ".join(sorted(accesses)) or "-"
+
+
+async def run_case(db, list_id: uuid.UUID, kwargs: dict, repeat: int, fuzzy_threshold: float) -> dict:
+    """EXPLAIN ANALYZE one case `repeat` times."""
+    query = DirectoryService.build_search_query([list_id], limit=10, **kwargs)
+    sql = str(query.compile(dialect=asyncpg.dialect(), compile_kwargs={"literal_binds": True}))
+
+    timings = []
+    access = rows = None
+    for _ in range(repeat):
+        async with db.get_session() as session:
+            if kwargs.get("search_mode") == "fuzzy":
+                await session.execute(
+                    text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                    {"threshold": str(fuzzy_threshold)}
+                )
+            result = await session.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"))
+            explain = result.scalar()
+            explain = json.loads(explain) if isinstance(explain, str) else explain
+            timings.append(explain[0]["Execution Time"])
+            access = describe_access(explain[0]["Plan"])
+            rows = explain[0]["Plan"].get("Actual Rows")
+    timings.sort()
+    return {
+        "median_ms": statistics.median(timings),
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "access": access,
+        "rows": rows,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--fuzzy-threshold", type=float, default=DEFAULT_FUZZY_THRESHOLD)
+    parser.add_argument("--cases", nargs="*", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic account for further runs")
+    args = parser.parse_args()
+
+    db = get_database_service()
+    await db.initialize()
+
+    account_id, list_id = await seed(db, args.entries, args.batch_size)
+    try:
+        print(f"\n{'case':<14}{'median ms':>11}{'p95 ms':>10}{'rows':>7}  access")
+        print("-" * 80)
+        for name in args.cases:
+            stats = await run_case(db, list_id, CASES[name], args.repeat, args.fuzzy_threshold)
+            print(f"{name:<14}{stats['median_ms']:>11.2f}{stats['p95_ms']:>10.2f}{stats['rows']:>7}  {stats['access']}")
+    finally:
+        if args.keep:
+            print(f"\nKept synthetic account {account_id} (list {list_id})")
+        else:
+            async with db.get_session() as session:
+                await session.execute(delete(Account).where(Account.id == account_id))
+                await session.commit()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
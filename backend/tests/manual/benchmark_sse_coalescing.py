@@ -0,0 +1,160 @@
+"""
+Benchmark: SSE framing with and without delta coalescing.
+
+Replays a synthetic streamed answer (many small deltas, like a fast model
+produces with stream_text(delta=True)) through:
+
+1. legacy   - one str frame per delta, formatted with split('\\n') (pre-coalescing path)
+2. bytes    - one pre-encoded bytes frame per delta (coalescing disabled)
+3. coalesce - coalesce_sse_events() with the app.yaml defaults (30 ms / 256 bytes)
+
+Every frame is written to a local socket (one sendall per frame, like the
+ASGI server does per body chunk) so syscall cost is included. For each path
+it reports frames per response, frames/sec and CPU time per streamed
+response (time.process_time), so the cost per answer can be compared
+directly.
+
+Usage:
+    python backend/tests/manual/benchmark_sse_coalescing.py
+    python backend/tests/manual/benchmark_sse_coalescing.py --deltas 4000 --delta-chars 4 --tokens-per-sec 400
+"""
+"""
+Copyright (c) 2025 Ape4, Inc. All rights reserved.
+Unauthorized copying of this file is strictly prohibited.
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add backend directory to Python path
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.sse_stream import CoalesceSettings, coalesce_sse_events
+
+
+def legacy_format(event_type: str, event_data: str) -> str:
+    """Frame formatting used by event_generator before coalescing."""
+    if '\n' in event_data:
+        data_lines = event_data.split('\n')
+        formatted_data = '\n'.join(f"data: {line}" for line in data_lines)
+        return f"event: {event_type}\n{formatted_data}\n\n"
+    return f"event: {event_type}\ndata: {event_data}\n\n"
+
+
+async def synthetic_stream(deltas: int, delta_chars: int, delay: float):
+    """Yield agent-style events: many small text deltas, then done."""
+    for i in range(deltas):
+        text = ("word " * delta_chars)[:delta_chars]
+        if i % 40 == 39:
+            text = text[:-1] + "\n"
+        yield {"event": "message", "data": text}
+        if delay:
+            await asyncio.sleep(delay)
+    yield {"event": "done", "data": ""}
+
+
+class SocketSink:
+    """Local socket pair; a background thread drains the read side."""
+
+    def __init__(self):
+        self.writer, self.reader = socket.socketpair()
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while self.reader.recv(65536):
+            pass
+
+    def send(self, frame: bytes) -> None:
+        self.writer.sendall(frame)
+
+    def close(self):
+        self.writer.close()
+        self._thread.join()
+        self.reader.close()
+
+
+async def run_legacy(args, sink: SocketSink) -> tuple[int, int]:
+    frames = 0
+    size = 0
+    async for event in synthetic_stream(args.deltas, args.delta_chars, args.delay):
+        frame = legacy_format(event["event"], event["data"]).encode("utf-8")  # Starlette encodes str frames
+        sink.send(frame)
+        frames += 1
+        size += len(frame)
+    return frames, size
+
+
+async def run_bytes(args, sink: SocketSink) -> tuple[int, int]:
+    frames = 0
+    size = 0
+    settings = CoalesceSettings(enabled=False)
+    async for frame in coalesce_sse_events(synthetic_stream(args.deltas, args.delta_chars, args.delay), settings):
+        sink.send(frame)
+        frames += 1
+        size += len(frame)
+    return frames, size
+
+
+async def run_coalesced(args, sink: SocketSink) -> tuple[int, int]:
+    frames = 0
+    size = 0
+    settings = CoalesceSettings(flush_interval_ms=args.flush_ms, flush_bytes=args.flush_bytes)
+    async for frame in coalesce_sse_events(synthetic_stream(args.deltas, args.delta_chars, args.delay), settings):
+        sink.send(frame)
+        frames += 1
+        size += len(frame)
+    return frames, size
+
+
+async def measure(name: str, runner, args) -> None:
+    cpu_total = 0.0
+    wall_total = 0.0
+    frames = size = 0
+    sink = SocketSink()
+    for _ in range(args.runs):
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        frames, size = await runner(args, sink)
+        wall_total += time.perf_counter() - wall_start
+        cpu_total += time.process_time() - cpu_start
+    sink.close()
+
+    # process_time includes the drain thread, i.e. the receiving side's work too
+    cpu_ms = cpu_total / args.runs * 1000
+    wall = wall_total / args.runs
+    print(
+        f"{name:<10} frames/response={frames:>6}  bytes={size:>8}  "
+        f"frames/sec={frames / wall:>10.0f}  cpu/response={cpu_ms:>8.2f} ms  wall={wall * 1000:>8.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SSE delta coalescing")
+    parser.add_argument("--deltas", type=int, default=2000, help="Text deltas per response")
+    parser.add_argument("--delta-chars", type=int, default=4, help="Characters per delta")
+    parser.add_argument("--tokens-per-sec", type=float, default=0,
+                        help="Simulated model speed (0 = as fast as possible)")
+    parser.add_argument("--flush-ms", type=int, default=30)
+    parser.add_argument("--flush-bytes", type=int, default=256)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    args.delay = 1.0 / args.tokens_per_sec if args.tokens_per_sec else 0.0
+
+    print("=" * 100)
+    print(f" SSE coalescing benchmark: {args.deltas} deltas x {args.delta_chars} chars, "
+          f"{'unthrottled' if not args.delay else f'{args.tokens_per_sec:.0f} deltas/sec'}, {args.runs} runs")
+    print("=" * 100)
+    await measure("legacy", run_legacy, args)
+    await measure("bytes", run_bytes, args)
+    await measure("coalesce", run_coalesced, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,185 @@
+"""
+Unit tests for per-account / per-model admission control.
+
+Tests settings merging, concurrency caps with queueing, token-bucket rate
+limits, fast rejection when the queue is full, Retry-After estimates, and
+the chat endpoint's 429 response.
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+import yaml
+from fastapi import HTTPException
+
+from app.services.admission_control import (
+    AdmissionController,
+    AdmissionRejected,
+    AdmissionSettings,
+    Limits,
+)
+
+
+def _settings(account=None, model=None):
+    return AdmissionSettings(enabled=True, account=Limits.from_dict(account), model=Limits.from_dict(model))
+
+
+def test_instance_overrides_app_defaults():
+    app_config = {"chat": {"admission": {"enabled": True, "account": {"max_concurrent": 8, "burst": 10}}}}
+    settings = AdmissionSettings.resolve(app_config, {"admission": {"account": {"max_concurrent": 2}}})
+
+    assert settings.enabled
+    assert (settings.account.max_concurrent, settings.account.burst) == (2, 10)
+    assert AdmissionSettings.resolve({}, None).enabled is False
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_queues_then_admits():
+    controller = AdmissionController()
+    settings = _settings(account={"max_concurrent": 1, "max_queue": 1, "max_wait_ms": 1000})
+    release = asyncio.Event()
+
+    async def holder():
+        async with controller.admit("acme", "m", settings):
+            await release.wait()
+
+    first = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+
+    async def second():
+        async with controller.admit("acme", "m", settings) as wait_ms:
+            return wait_ms
+
+    queued = asyncio.create_task(second())
+    await asyncio.sleep(0.02)
+    assert not queued.done()
+    release.set()
+
+    assert await asyncio.wait_for(queued, 1) >= 15
+    await first
+    assert controller.snapshot()["account:acme"] == {"active": 0, "waiting": 0}
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_fast_with_retry_after():
+    controller = AdmissionController()
+    settings = _settings(account={"max_concurrent": 1, "max_queue": 0, "max_wait_ms": 3000})
+
+    async with controller.admit("acme", "m", settings):
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.admit("acme", "m", settings):
+                pass
+        with pytest.raises(AdmissionRejected):
+            controller.check("acme", settings)
+
+    assert rejected.value.reason == "queue_full"
+    assert rejected.value.retry_after == 3
+    # Other accounts are unaffected
+    controller.check("other", settings)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    controller = AdmissionController()
+    settings = _settings(model={"rate_per_second": 20, "burst": 1, "max_queue": 5, "max_wait_ms": 1000})
+
+    async with controller.admit("acme", "m", settings) as first_wait:
+        pass
+    async with controller.admit("acme", "m", settings) as second_wait:
+        pass
+
+    assert first_wait < 5
+    assert second_wait >= 30  # next token after ~50ms
+
+
+@pytest.mark.asyncio
+async def test_wait_timeout_releases_account_slot():
+    controller = AdmissionController()
+    settings = _settings(model={"max_concurrent": 1, "max_queue": 5, "max_wait_ms": 20})
+
+    async with controller.admit("acme", "m", settings):
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.admit("other", "m", settings):
+                pass
+
+    assert (rejected.value.scope, rejected.value.reason) == ("model", "wait_timeout")
+    assert controller.snapshot()["account:other"]["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_passes_its_wakeup_on():
+    limiter = AdmissionController()._limiter("account", "acme", Limits(max_concurrent=1, max_queue=5, max_wait_ms=1000))
+    await limiter.acquire()
+    cancelled = asyncio.create_task(limiter.acquire())
+    queued = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    # The slot goes to the first waiter, which is cancelled before it runs
+    limiter.release()
+    cancelled.cancel()
+    await asyncio.gather(cancelled, return_exceptions=True)
+
+    await asyncio.wait_for(queued, 1)
+    assert (limiter.active, limiter.waiting) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_queued_turns_are_admitted_in_arrival_order():
+    limiter = AdmissionController()._limiter("account", "acme", Limits(max_concurrent=1, max_queue=5, max_wait_ms=1000))
+    admitted = []
+
+    async def turn(name):
+        await limiter.acquire()
+        admitted.append(name)
+
+    await limiter.acquire()
+    first = asyncio.create_task(turn("queued"))
+    await asyncio.sleep(0)
+
+    # A newcomer arriving right after the release can't take the handed-off slot
+    limiter.release()
+    newcomer = asyncio.create_task(turn("newcomer"))
+    await asyncio.sleep(0.01)
+    assert admitted == ["queued"]
+
+    limiter.release()
+    await asyncio.wait_for(asyncio.gather(first, newcomer), 1)
+    assert admitted == ["queued", "newcomer"]
+
+
+def test_admission_ships_disabled():
+    app_config = yaml.safe_load((Path(__file__).parents[2] / "config" / "app.yaml").read_text())
+
+    assert AdmissionSettings.resolve(app_config).enabled is False
+
+
+@pytest.mark.asyncio
+async def test_chat_endpoint_returns_429():
+    from app.api import account_agents
+
+    bootstrap = SimpleNamespace(
+        instance=SimpleNamespace(id=uuid4(), account_id=uuid4(), agent_type="simple_chat", config={}),
+        session_id=str(uuid4()), history=(), instance_config={}, requested_model="test/model"
+    )
+    controller = AdmissionController()
+    settings = _settings(account={"max_concurrent": 1, "max_queue": 0})
+    request = SimpleNamespace(state=SimpleNamespace())
+
+    with patch.object(account_agents, 'bootstrap_chat', AsyncMock(return_value=bootstrap)), \
+         patch.object(account_agents, 'get_admission_controller', return_value=controller), \
+         patch.object(account_agents.AdmissionSettings, 'resolve', return_value=settings), \
+         patch('app.config.load_config', return_value={}):
+        async with controller.admit("acme", "test/model", settings):
+            with pytest.raises(HTTPException) as error:
+                await account_agents.chat_endpoint(
+                    account_agents.ChatRequest(message="Hi"), request, account_slug="acme", instance_slug="chat1"
+                )
+
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "5"
@@ -0,0 +1,167 @@
+"""
+Unit tests for chat bootstrap (single-round-trip chat context resolution).
+
+Tests that bootstrap_chat() resolves instance, history and model settings
+concurrently, creates sessions when missing, and that the resulting
+ChatBootstrap is consumed by AgentExecutionService without re-deriving
+history limit or model settings.
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+import asyncio
+import dataclasses
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
+
+import pytest
+from pydantic_ai.messages import ModelRequest, SystemPromptPart, UserPromptPart
+
+from app.agents.instance_loader import AgentInstance
+from app.services import chat_bootstrap
+from app.services.chat_bootstrap import ChatBootstrap, bootstrap_chat
+
+
+def _instance() -> AgentInstance:
+    return AgentInstance(
+        id=uuid4(),
+        account_id=uuid4(),
+        account_slug="acme",
+        instance_slug="chat1",
+        agent_type="simple_chat",
+        display_name="Chat 1",
+        status="active",
+        last_used_at=None,
+        config={"model_settings": {"model": "test/model"}},
+        system_prompt="You are helpful."
+    )
+
+
+def _request(session=None):
+    return SimpleNamespace(state=SimpleNamespace(session=session))
+
+
+@pytest.mark.asyncio
+async def test_existing_session_resolves_concurrently():
+    """Instance, history and model settings loads overlap instead of running sequentially."""
+    instance = _instance()
+    session = SimpleNamespace(id=uuid4(), account_id=instance.account_id, account_slug="acme")
+    history = [ModelRequest(parts=[UserPromptPart(content="hi")])]
+    in_flight = 0
+    max_in_flight = 0
+
+    def tracked(value):
+        async def _call(*args, **kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return value
+        return _call
+
+    with patch.object(chat_bootstrap, 'get_current_session', return_value=session), \
+         patch.object(chat_bootstrap, '_resolve_history_limit', AsyncMock(return_value=7)), \
+         patch.object(chat_bootstrap, 'load_agent_instance', tracked(instance)), \
+         patch('app.services.agent_session.load_agent_conversation', tracked(history)), \
+         patch('app.agents.config_loader.get_agent_model_settings', tracked({"model": "test/model"})):
+        ctx = await bootstrap_chat(_request(session), "acme", "chat1")
+
+    assert max_in_flight == 3
+    assert ctx.session_id == str(session.id)
+    assert ctx.history == tuple(history)
+    assert ctx.history_limit == 7
+    assert ctx.instance_config["system_prompt"] == "You are helpful."
+    assert ctx.requested_model == "test/model"
+
+
+@pytest.mark.asyncio
+async def test_missing_session_is_created_without_history_load():
+    """A new session has no history, so no history query is issued."""
+    instance = _instance()
+    created = SimpleNamespace(id=uuid4(), account_id=instance.account_id, account_slug="acme", agent_instance_id=instance.id)
+    request = _request()
+    history_loader = AsyncMock()
+
+    with patch.object(chat_bootstrap, 'get_current_session', return_value=None), \
+         patch.object(chat_bootstrap, '_resolve_history_limit', AsyncMock(return_value=50)), \
+         patch.object(chat_bootstrap, 'load_agent_instance', AsyncMock(return_value=instance)), \
+         patch.object(chat_bootstrap, '_create_session', AsyncMock(return_value=created)), \
+         patch('app.services.agent_session.load_agent_conversation', history_loader), \
+         patch('app.agents.config_loader.get_agent_model_settings', AsyncMock(return_value={"model": "m"})):
+        ctx = await bootstrap_chat(request, "acme", "chat1")
+
+    history_loader.assert_not_called()
+    assert request.state.session is created
+    assert ctx.history == ()
+
+
+@pytest.mark.asyncio
+async def test_instance_error_takes_precedence():
+    """Instance-not-found surfaces as ValueError even if history loading also failed."""
+    session = SimpleNamespace(id=uuid4(), account_id=uuid4(), account_slug="acme")
+
+    with patch.object(chat_bootstrap, 'get_current_session', return_value=session), \
+         patch.object(chat_bootstrap, '_resolve_history_limit', AsyncMock(return_value=50)), \
+         patch.object(chat_bootstrap, 'load_agent_instance', AsyncMock(side_effect=ValueError("not found"))), \
+         patch('app.services.agent_session.load_agent_conversation', AsyncMock(side_effect=RuntimeError("db"))), \
+         patch('app.agents.config_loader.get_agent_model_settings', AsyncMock(return_value={})):
+        with pytest.raises(ValueError):
+            await bootstrap_chat(_request(session), "acme", "chat1")
+
+
+def test_bootstrap_is_immutable():
+    """ChatBootstrap fields and config mappings cannot be mutated downstream."""
+    ctx = ChatBootstrap(
+        instance=_instance(),
+        session_id=str(uuid4()),
+        account_id=None,
+        account_slug=None,
+        history=(),
+        history_limit=10,
+        instance_config=chat_bootstrap.MappingProxyType({"a": 1}),
+        model_settings=chat_bootstrap.MappingProxyType({"model": "m"})
+    )
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        ctx.history_limit = 20
+    with pytest.raises(TypeError):
+        ctx.instance_config["a"] = 2
+    assert ctx.config_dict() == {"a": 1}
+
+
+@pytest.mark.asyncio
+async def test_execution_context_uses_bootstrap_without_cascade():
+    """setup_execution_context() takes history limit and history from the bootstrap."""
+    from app.services.agent_execution_service import AgentExecutionService
+
+    history = (ModelRequest(parts=[UserPromptPart(content="hi")]),)
+    ctx = ChatBootstrap(
+        instance=_instance(),
+        session_id=str(uuid4()),
+        account_id=None,
+        account_slug=None,
+        history=history,
+        history_limit=12,
+        instance_config=chat_bootstrap.MappingProxyType({"model_settings": {"model": "x/y"}}),
+        model_settings=chat_bootstrap.MappingProxyType({"model": "x/y"})
+    )
+    deps = Mock()
+    history_limit = AsyncMock()
+    create_deps = AsyncMock(return_value=deps)
+
+    with patch('app.agents.config_loader.get_agent_history_limit', history_limit), \
+         patch('app.agents.base.dependencies.SessionDependencies.create', create_deps), \
+         patch('app.agents.simple_chat.get_chat_agent', AsyncMock(return_value=(Mock(), {}, "prompt", []))):
+        _, _, _, _, _, message_history, model = await AgentExecutionService.setup_execution_context(
+            session_id=ctx.session_id,
+            bootstrap=ctx
+        )
+
+    history_limit.assert_not_called()
+    assert create_deps.call_args.kwargs["history_limit"] == 12
+    assert model == "x/y"
+    assert isinstance(message_history[0].parts[0], SystemPromptPart)
+    # The bootstrap's own history is untouched by system prompt injection
+    assert not isinstance(ctx.history[0].parts[0], SystemPromptPart)
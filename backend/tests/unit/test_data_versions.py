@@ -0,0 +1,68 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Unit tests for the versioned per-worker cache shared by the directory services.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.data_versions import VersionedCache
+
+
+@pytest.mark.asyncio
+async def test_reloads_on_version_change_only():
+    cache = VersionedCache(max_size=4)
+    load = AsyncMock(side_effect=["a1", "a2"])
+
+    assert await cache.get("a", "v1", load) == "a1"
+    assert await cache.get("a", "v1", load) == "a1"
+    assert await cache.get("a", "v2", load) == "a2"
+    assert load.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = VersionedCache(max_size=4)
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        return calls
+
+    assert await asyncio.gather(*(cache.get("a", "v1", load) for _ in range(5))) == [1] * 5
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_evicts_least_recently_used():
+    cache = VersionedCache(max_size=2)
+    load = AsyncMock(return_value="value")
+
+    await cache.get("a", "v1", load)
+    await cache.get("b", "v1", load)
+    await cache.get("a", "v1", load)
+    await cache.get("c", "v1", load)
+    assert len(cache) == 2
+    assert load.await_count == 3
+
+    # "b" was evicted, "a" kept as recently used
+    await cache.get("a", "v1", load)
+    assert load.await_count == 3
+    await cache.get("b", "v1", load)
+    assert load.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_stale_predicate_forces_reload():
+    cache = VersionedCache(max_size=2)
+    load = AsyncMock(side_effect=[None, "index"])
+
+    assert await cache.get("a", "v1", load) is None
+    assert await cache.get("a", "v1", load, stale=lambda value: value is None) == "index"
+    assert load.await_count == 2
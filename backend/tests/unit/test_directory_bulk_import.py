@@ -0,0 +1,111 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Unit tests for the COPY-based directory bulk import.
+
+Covers staging records built from parsed entries, the statement sequence
+(bulk mode, staging table, COPY, set-based insert) and index deferral.
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from app.models.directory import DirectoryEntry
+from app.services.directory_bulk_import import (
+    STAGING_COLUMNS,
+    STAGING_TABLE,
+    BulkImportResult,
+    bulk_import_entries,
+    staging_records,
+)
+
+LIST_ID = uuid4()
+INDEXES = [
+    ("idx_directory_entries_filter_data", "CREATE INDEX idx_directory_entries_filter_data ON directory_entries USING gin (filter_data jsonb_path_ops)"),
+    ("idx_directory_entries_search_vector", "CREATE INDEX idx_directory_entries_search_vector ON directory_entries USING gin (search_vector)"),
+]
+
+
+def _entries():
+    return [
+        DirectoryEntry(name="Dr. A", tags=["English"], contact_info={"phone": "555-1000"},
+                       entry_data={"specialty": "Cardiology"}),
+        DirectoryEntry(name="Dr. B", entry_data={"specialty": "Pediatrics"}),
+    ]
+
+
+def _session(rowcount=2, indexes=()):
+    statements = []
+
+    async def execute(statement, params=None):
+        sql = str(statement)
+        statements.append(sql)
+        return SimpleNamespace(rowcount=rowcount, all=lambda: list(indexes))
+
+    driver = MagicMock()
+    driver.copy_records_to_table = AsyncMock()
+    raw = SimpleNamespace(driver_connection=driver)
+    connection = MagicMock()
+    connection.get_raw_connection = AsyncMock(return_value=raw)
+    session = MagicMock()
+    session.execute = execute
+    session.connection = AsyncMock(return_value=connection)
+    return session, statements, driver
+
+
+def test_staging_records_serialize_parsed_entries():
+    records = staging_records(_entries())
+
+    assert [record[1:] for record in records] == [
+        ("Dr. A", ["English"], '{"phone": "555-1000"}', '{"specialty": "Cardiology"}'),
+        ("Dr. B", [], "{}", '{"specialty": "Pediatrics"}'),
+    ]
+    assert records[0][0] != records[1][0]
+    assert json.loads(records[0][4]) == {"specialty": "Cardiology"}
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_copies_then_inserts_set_based():
+    session, statements, driver = _session()
+
+    result = await bulk_import_entries(session, LIST_ID, _entries())
+
+    assert statements[0] == "SET LOCAL directory.bulk_import = 'on'"
+    assert any(f"CREATE TEMP TABLE {STAGING_TABLE}" in sql for sql in statements)
+    kwargs = driver.copy_records_to_table.await_args.kwargs
+    assert driver.copy_records_to_table.await_args.args == (STAGING_TABLE,)
+    assert kwargs["columns"] == STAGING_COLUMNS
+    assert len(kwargs["records"]) == 2
+    insert = statements[-1]
+    assert "INSERT INTO directory_entries" in insert
+    assert "directory_entry_search_vector(s.name, s.tags, s.entry_data::jsonb, l.search_weights)" in insert
+    assert "directory_entry_filter_data(s.entry_data::jsonb, l.filter_fields::text[])" in insert
+    assert not any("INDEX" in sql for sql in statements)
+    assert (result.rows, result.deferred_indexes) == (2, 0)
+
+
+@pytest.mark.asyncio
+async def test_deferred_indexes_are_dropped_before_and_rebuilt_after_insert():
+    session, statements, _ = _session(indexes=INDEXES)
+
+    result = await bulk_import_entries(session, LIST_ID, _entries(), defer_indexes=True)
+
+    insert_at = next(i for i, sql in enumerate(statements) if "INSERT INTO directory_entries" in sql)
+    drops = [i for i, sql in enumerate(statements) if sql.startswith("DROP INDEX")]
+    creates = [i for i, sql in enumerate(statements) if sql.startswith("CREATE INDEX")]
+    assert len(drops) == len(creates) == 2
+    assert max(drops) < insert_at < min(creates)
+    assert statements[drops[0]] == 'DROP INDEX "idx_directory_entries_filter_data"'
+    assert result.deferred_indexes == 2
+
+
+def test_rows_per_second_covers_all_phases():
+    result = BulkImportResult(rows=10_000, copy_seconds=0.5, insert_seconds=1.0, index_seconds=0.5)
+
+    assert result.seconds == 2.0
+    assert result.rows_per_second == 5_000
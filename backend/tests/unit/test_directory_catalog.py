@@ -0,0 +1,131 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Unit tests for the in-process directory catalog behind get_available_directories.
+
+Checks schema purpose parsing, one-query loads keyed by the directory data
+version, skipped lists with broken schemas, and the tool's output.
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.agents.tools.directory_tools import get_available_directories
+from app.services.directory_catalog import (
+    DirectoryCatalog,
+    DirectoryInfo,
+    SchemaPurpose,
+    purpose_for_schema_file,
+)
+
+ACCOUNT_ID = uuid4()
+
+
+def _session(rows):
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=SimpleNamespace(all=lambda: rows))
+    return session
+
+
+def _rows():
+    return [
+        (uuid4(), "doctors", "medical_professional", "medical_professional.yaml", 120, ["specialty"], ["specialty"]),
+        (uuid4(), "classes", "class", "classes.yaml", 8, None, None),
+    ]
+
+
+def test_purpose_for_schema_file_reads_directory_purpose():
+    purpose = purpose_for_schema_file("medical_professional.yaml")
+
+    assert purpose.description
+    assert purpose.use_cases
+    assert "specialty" in purpose.searchable_fields
+
+
+def test_purpose_accepts_list_form_searchable_fields():
+    # classes.yaml declares searchable_fields as a plain list
+    assert purpose_for_schema_file("classes.yaml").searchable_fields
+
+
+@pytest.mark.asyncio
+async def test_catalog_loads_once_per_data_version(directory_versions):
+    catalog = DirectoryCatalog()
+    session = _session(_rows())
+
+    versions = directory_versions("1:2:7", "1:2:7", "1:2:9")
+    with patch('app.services.directory_catalog.get_data_versions', return_value=versions):
+        first = await catalog.get_lists(session, ACCOUNT_ID)
+        assert await catalog.get_lists(session, ACCOUNT_ID) is first
+        assert session.execute.await_count == 1
+
+        await catalog.get_lists(session, ACCOUNT_ID)
+        assert session.execute.await_count == 2
+
+    assert first["doctors"].entry_count == 120
+    assert set(first) == {"doctors", "classes"}
+
+
+@pytest.mark.asyncio
+async def test_catalog_skips_lists_with_unloadable_schema(directory_versions):
+    catalog = DirectoryCatalog()
+    rows = _rows() + [(uuid4(), "broken", "product", "does_not_exist.yaml", 3, None, None)]
+
+    versions = directory_versions("1:3:1")
+    with patch('app.services.directory_catalog.get_data_versions', return_value=versions):
+        lists = await catalog.get_lists(_session(rows), ACCOUNT_ID)
+
+    assert "broken" not in lists
+    assert "doctors" in lists
+
+
+@pytest.mark.asyncio
+async def test_directories_follow_requested_order(directory_versions):
+    catalog = DirectoryCatalog()
+
+    versions = directory_versions("1:2:7")
+    with patch('app.services.directory_catalog.get_data_versions', return_value=versions):
+        directories = await catalog.directories(_session(_rows()), ACCOUNT_ID, ["classes", "missing", "doctors"])
+
+    assert [d.list_name for d in directories] == ["classes", "doctors"]
+
+
+@pytest.mark.asyncio
+async def test_get_available_directories_is_a_catalog_lookup():
+    info = DirectoryInfo(
+        list_id=uuid4(), list_name="doctors", entry_type="medical_professional", entry_count=120,
+        purpose=SchemaPurpose(description="Doctors", use_cases=("find a doctor",),
+                              searchable_fields=("specialty",), example_queries=(), not_for=())
+    )
+    catalog = MagicMock()
+    catalog.directories = AsyncMock(return_value=[info])
+    db = MagicMock()
+    db.get_session.return_value.__aenter__ = AsyncMock(return_value=MagicMock())
+    db.get_session.return_value.__aexit__ = AsyncMock(return_value=False)
+    ctx = SimpleNamespace(deps=SimpleNamespace(
+        account_id=ACCOUNT_ID,
+        agent_config={"tools": {"directory": {"accessible_lists": ["doctors"]}}}
+    ))
+
+    with patch('app.agents.tools.directory_tools.get_directory_catalog', return_value=catalog), \
+            patch('app.agents.tools.directory_tools.get_database_service', return_value=db):
+        result = json.loads(await get_available_directories(ctx))
+
+    assert result == {
+        "directories": [{
+            "list_name": "doctors",
+            "entry_type": "medical_professional",
+            "entry_count": 120,
+            "description": "Doctors",
+            "use_cases": ["find a doctor"],
+            "searchable_fields": ["specialty"],
+            "example_queries": [],
+            "not_for": [],
+        }],
+        "total_count": 1,
+    }
+    catalog.directories.assert_awaited_once()
@@ -0,0 +1,174 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Unit tests for directory facet counts.
+
+Covers facet declarations in schemas, the per-version facet cache, the
+facets endpoint (access checks, field selection, limits) and the optional
+facet values in the generated tool docs.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.agents.tools.prompt_generator import generate_directory_tool_docs
+from app.api import account_agents
+from app.models.directory import DirectoryList
+from app.services.directory_catalog import DirectoryInfo, SchemaPurpose
+from app.services.directory_facets import (
+    DirectoryFacets,
+    facet_fields_for_schema_file,
+    facet_fields_from_schema,
+    facet_values_docs,
+    top_facets,
+)
+
+ACCOUNT_ID, LIST_ID = uuid4(), uuid4()
+FIELDS = ("department", "gender", "tags")
+ROWS = [
+    ("department", "Surgery", 41),
+    ("department", "Cardiology", 18),
+    ("tags", "English", 318),
+    ("tags", "Spanish", 52),
+]
+FACETS = {
+    "department": (("Surgery", 41), ("Cardiology", 18)),
+    "gender": (),
+    "tags": (("English", 318), ("Spanish", 52)),
+}
+
+
+def test_facet_fields_follow_schema_markers():
+    schema = {
+        "searchable_fields": {"department": {"type": "string", "facet": True}, "education": {"type": "string"}},
+        "tags_usage": {"description": "Languages", "facet": True},
+    }
+
+    assert facet_fields_from_schema(schema) == ["department", "tags"]
+    # Plain list form (classes.yaml) declares no facets
+    assert facet_fields_from_schema({"searchable_fields": ["title", "category"]}) == []
+
+
+def test_schema_files_declare_browse_facets():
+    assert facet_fields_for_schema_file("medical_professional.yaml") == ("department", "specialty", "gender", "tags")
+    assert facet_fields_for_schema_file("contact_information.yaml") == ("department_name", "service_type")
+
+
+@pytest.mark.asyncio
+async def test_facets_load_once_per_data_version(directory_versions):
+    facets = DirectoryFacets()
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=SimpleNamespace(all=lambda: ROWS))
+
+    versions = directory_versions("1:2:7", "1:2:7", "1:2:8")
+    with patch('app.services.directory_facets.get_data_versions', return_value=versions):
+        first = await facets.get(session, ACCOUNT_ID, LIST_ID, FIELDS)
+        assert await facets.get(session, ACCOUNT_ID, LIST_ID, FIELDS) is first
+        assert session.execute.await_count == 1
+
+        await facets.get(session, ACCOUNT_ID, LIST_ID, FIELDS)
+        assert session.execute.await_count == 2
+
+    # Declared fields are reported even when no entry has a value
+    assert first == FACETS
+
+
+def test_top_facets_selects_fields_and_limits_values():
+    assert top_facets(FACETS, fields=["tags", "department"], limit=1) == {
+        "tags": (("English", 318),),
+        "department": (("Surgery", 41),),
+    }
+    assert top_facets(FACETS, fields=["unknown"]) == {"unknown": ()}
+
+
+def test_facet_values_docs_lists_most_frequent_values():
+    text = facet_values_docs(FACETS, 1)
+
+    assert '• department: "Surgery" (41)' in text
+    assert '• tag: "English" (318)' in text
+    assert "gender" not in text
+    assert facet_values_docs({"gender": ()}, 5) == ""
+
+
+def _instance(lists):
+    return SimpleNamespace(account_id=ACCOUNT_ID, config={"tools": {"directory": {"accessible_lists": lists}}})
+
+
+def _info():
+    return DirectoryInfo(list_id=LIST_ID, list_name="doctors", entry_type="medical_professional", entry_count=318,
+                         purpose=SchemaPurpose(), schema_file="medical_professional.yaml", facet_fields=FIELDS)
+
+
+async def _call_endpoint(lists, field=None, limit=None, info=None):
+    catalog = MagicMock()
+    catalog.get = AsyncMock(return_value=info)
+    cache = MagicMock()
+    cache.get = AsyncMock(return_value=FACETS)
+    db = MagicMock()
+    db.get_session.return_value.__aenter__ = AsyncMock(return_value=MagicMock())
+    db.get_session.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    with patch.object(account_agents, 'load_agent_instance', AsyncMock(return_value=_instance(lists))), \
+         patch.object(account_agents, 'get_database_service', return_value=db), \
+         patch.object(account_agents, 'get_directory_catalog', return_value=catalog), \
+         patch.object(account_agents, 'get_directory_facets', return_value=cache):
+        return await account_agents.directory_facets_endpoint(
+            account_slug="wyckoff", instance_slug="wyckoff_info_chat1", list_name="doctors", field=field, limit=limit
+        )
+
+
+@pytest.mark.asyncio
+async def test_endpoint_returns_counts_per_field():
+    response = await _call_endpoint(["doctors"], field=["tags", "department"], limit=1, info=_info())
+
+    assert response.entry_count == 318
+    assert list(response.facets) == ["tags", "department"]
+    assert response.facets["department"][0].model_dump() == {"value": "Surgery", "count": 41}
+    assert len(response.facets["tags"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_endpoint_defaults_to_all_facet_fields():
+    response = await _call_endpoint(["doctors"], info=_info())
+
+    assert list(response.facets) == list(FIELDS)
+    assert response.facets["gender"] == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("lists, field, info, status", [
+    (["contact_information"], None, _info(), 404),
+    (["doctors"], None, None, 404),
+    (["doctors"], ["education"], _info(), 400),
+])
+async def test_endpoint_rejects_inaccessible_lists_and_unknown_fields(lists, field, info, status):
+    with pytest.raises(HTTPException) as error:
+        await _call_endpoint(lists, field=field, info=info)
+
+    assert error.value.status_code == status
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prompt_facet_values, expected", [(2, True), (0, False)])
+async def test_tool_docs_include_top_facet_values_when_configured(prompt_facet_values, expected):
+    directory_list = DirectoryList(id=LIST_ID, list_name="doctors", entry_type="medical_professional",
+                                   schema_file="medical_professional.yaml", facet_fields=list(FIELDS))
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = [directory_list]
+    result.scalar_one.return_value = 318
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=result)
+    cache = MagicMock()
+    cache.get = AsyncMock(return_value=FACETS)
+    config = {"tools": {"directory": {"accessible_lists": ["doctors"], "prompt_facet_values": prompt_facet_values}}}
+
+    with patch('app.agents.tools.prompt_generator.get_directory_facets', return_value=cache):
+        docs = await generate_directory_tool_docs(config, ACCOUNT_ID, session)
+
+    assert ('• department: "Surgery" (41), "Cardiology" (18)' in docs.full_text) is expected
+    assert cache.get.await_count == int(expected)
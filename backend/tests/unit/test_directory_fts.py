@@ -0,0 +1,77 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Unit tests for schema-driven, weighted directory FTS vectors.
+
+Covers search weights derived from schema searchable_fields, normalized
+ts_rank_cd ranking in the generated SQL, and the batched rebuild.
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.services.directory_filters import filter_fields_from_schema
+from app.services.directory_fts import (
+    RANK_NORMALIZATION,
+    RebuildBatch,
+    rebuild_search_vectors,
+    search_weights_from_schema,
+)
+from app.services.directory_importer import DirectoryImporter
+from app.services.directory_service import DirectoryService
+
+
+def test_weights_from_schema_searchable_fields():
+    weights = search_weights_from_schema(DirectoryImporter.load_schema("medical_professional.yaml"))
+
+    assert weights == {
+        "department": "B",
+        "specialty": "B",
+        "gender": "C",
+        "education": "C",
+        "board_certifications": "D",
+    }
+
+
+def test_list_form_searchable_fields():
+    schema = DirectoryImporter.load_schema("classes.yaml")
+
+    assert search_weights_from_schema(schema)["description"] == "C"
+    assert "instructor_name" in filter_fields_from_schema(schema)
+
+
+def test_invalid_weight_rejected():
+    assert search_weights_from_schema({"searchable_fields": {"sku": {"search_weight": "a"}}}) == {"sku": "A"}
+    with pytest.raises(ValueError, match="search_weight"):
+        search_weights_from_schema({"searchable_fields": {"sku": {"search_weight": "E"}}})
+
+
+def test_fts_ranks_with_normalized_cover_density():
+    query = DirectoryService.build_search_query([uuid4()], name_query="interventional cardiology", search_mode="fts")
+    compiled = query.compile(dialect=asyncpg.dialect())
+    sql = str(compiled)
+
+    assert "ORDER BY ts_rank_cd(directory_entries.search_vector, to_tsquery(" in sql
+    assert "ts_rank(" not in sql
+    assert "interventional & cardiology" in compiled.params.values()
+    assert RANK_NORMALIZATION in compiled.params.values()
+
+
+@pytest.mark.asyncio
+async def test_rebuild_batch_resumes_after_checkpoint():
+    last_id, after_id, list_id = uuid4(), uuid4(), uuid4()
+    session = MagicMock()
+    result = MagicMock()
+    result.one.return_value = (500, 120, last_id)
+    session.execute = AsyncMock(return_value=result)
+
+    batch = await rebuild_search_vectors(session, after_id=after_id, batch_size=500, list_id=list_id)
+
+    assert batch == RebuildBatch(scanned=500, updated=120, last_id=last_id)
+    statement, params = session.execute.await_args.args
+    assert "directory_entry_search_vector(e.name, e.tags, e.entry_data, l.search_weights)" in str(statement)
+    assert params == {"after_id": str(after_id), "list_id": str(list_id), "batch_size": 500}
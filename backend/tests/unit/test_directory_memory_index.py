@@ -0,0 +1,146 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Unit tests for the in-process directory search backend.
+
+Checks that each search mode, tag and filter behaves like the SQL path
+(see tests/integration/test_directory_memory_parity.py for the comparison
+against Postgres), BM25 ranking, and the version / size-threshold routing.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.models.directory import DirectoryEntry, DirectoryList
+from app.services.directory_memory_index import (
+    DirectoryMemoryIndex,
+    ListIndex,
+    MemoryIndexSettings,
+    search_lists,
+    tokenize,
+)
+from app.services.directory_service import DirectoryService
+
+DOCTORS = [
+    ("Dr. Maria Garcia, MD", ["Spanish"], {"department": "Cardiology", "specialty": "Interventional Cardiology"}),
+    ("Dr. John Smith, MD", ["English"], {"department": "Surgery", "specialty": "Urologic Surgery"}),
+    ("Dr. Wei Chen, MD", ["Mandarin", "English"], {"department": "Internal Medicine", "specialty": "Gastroenterology and Hepatology"}),
+    ("Dr. Sara Cardiff, DO", ["English"], {"department": "Pediatrics", "specialty": "Pediatric Cardiology"}),
+]
+
+
+def _index(filter_fields=("department", "specialty")) -> ListIndex:
+    directory_list = DirectoryList(
+        id=uuid4(),
+        list_name="doctors",
+        entry_type="medical_professional",
+        filter_fields=list(filter_fields),
+        search_weights={"department": "B", "specialty": "B"},
+    )
+    entries = [
+        DirectoryEntry(id=uuid4(), name=name, tags=tags, contact_info={}, entry_data=data, directory_list=directory_list)
+        for name, tags, data in DOCTORS
+    ]
+    return ListIndex.build(directory_list, entries)
+
+
+def _names(entries):
+    return [entry.name for entry in entries]
+
+
+def test_stemming_matches_word_variations():
+    assert tokenize("Urology") == tokenize("Urologic")
+    assert tokenize("the Cardiologists of") == tokenize("cardiology")
+
+
+def test_fts_requires_every_word_and_ranks_by_bm25():
+    index = _index()
+
+    assert _names(search_lists([index], name_query="cardiology", search_mode="fts")) == [
+        "Dr. Maria Garcia, MD",
+        "Dr. Sara Cardiff, DO",
+    ]
+    assert _names(search_lists([index], name_query="pediatric cardiology", search_mode="fts")) == ["Dr. Sara Cardiff, DO"]
+    assert _names(search_lists([index], name_query="urology", search_mode="fts")) == ["Dr. John Smith, MD"]
+    assert _names(search_lists([index], name_query="gastro", search_mode="fts")) == ["Dr. Wei Chen, MD"]
+    assert _names(search_lists([index], jsonb_filters={"specialty": "Urology"}, search_mode="fts")) == ["Dr. John Smith, MD"]
+
+
+def test_substring_and_exact_name_modes():
+    index = _index()
+
+    assert _names(search_lists([index], name_query="card", search_mode="substring")) == ["Dr. Sara Cardiff, DO"]
+    assert _names(search_lists([index], name_query="Dr. Wei Chen, MD", search_mode="exact")) == ["Dr. Wei Chen, MD"]
+    assert search_lists([index], name_query="dr. wei chen, md", search_mode="exact") == []
+
+
+def test_filters_follow_indexed_and_regex_semantics():
+    indexed, unindexed = _index(), _index(filter_fields=())
+
+    # Word prefixes match on indexed fields (filter_data terms) and by regex alike
+    assert _names(search_lists([indexed], jsonb_filters={"specialty": "Urolog"})) == ["Dr. John Smith, MD"]
+    assert _names(search_lists([unindexed], jsonb_filters={"specialty": "Urolog"})) == ["Dr. John Smith, MD"]
+    assert search_lists([indexed], jsonb_filters={"specialty": "rologic"}) == []
+    assert _names(search_lists([indexed], jsonb_filters={"specialty": "Cardiology"})) == [
+        "Dr. Maria Garcia, MD",
+        "Dr. Sara Cardiff, DO",
+    ]
+    # Multi-word values keep phrase order
+    assert search_lists([indexed], jsonb_filters={"specialty": "Cardiology Pediatric"}) == []
+
+
+def test_tags_overlap_and_limit():
+    index = _index()
+
+    assert _names(search_lists([index], tags=["Mandarin", "Spanish"])) == ["Dr. Maria Garcia, MD", "Dr. Wei Chen, MD"]
+    assert len(search_lists([index], tags=["English"], limit=2)) == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_rebuilds_on_new_version_and_skips_large_lists():
+    memory = DirectoryMemoryIndex()
+    memory._load = AsyncMock(return_value=(4, _index()))
+    list_id = uuid4()
+
+    first = await memory.get_index(MagicMock(), list_id, "v1", max_entries=10)
+    assert await memory.get_index(MagicMock(), list_id, "v1", max_entries=10) is first
+    await memory.get_index(MagicMock(), list_id, "v2", max_entries=10)
+    assert memory._load.await_count == 2
+
+    assert await memory.get_index(MagicMock(), list_id, "v2", max_entries=3) is None
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_searches_go_to_postgres():
+    memory = DirectoryMemoryIndex()
+
+    assert await memory.search(MagicMock(), uuid4(), [uuid4()], MemoryIndexSettings(enabled=True),
+                               name_query="Shwartz", search_mode="fuzzy") is None
+
+
+@pytest.mark.asyncio
+async def test_service_serves_small_lists_from_memory():
+    session = MagicMock()
+    session.execute = AsyncMock()
+    memory = MagicMock()
+    memory.search = AsyncMock(return_value=["entry"])
+
+    with patch('app.services.directory_service.get_directory_memory_index', return_value=memory):
+        entries = await DirectoryService.search(
+            session, [uuid4()], name_query="cardiology", search_mode="fts",
+            account_id=uuid4(), memory_index=MemoryIndexSettings(enabled=True)
+        )
+
+    assert entries == ["entry"]
+    session.execute.assert_not_awaited()
+
+
+def test_settings_from_instance_config():
+    assert MemoryIndexSettings.from_instance_config({}).enabled is False
+    settings = MemoryIndexSettings.from_instance_config(
+        {"tools": {"directory": {"memory_index": {"enabled": True, "max_entries": 200}}}}
+    )
+    assert settings == MemoryIndexSettings(enabled=True, max_entries=200)
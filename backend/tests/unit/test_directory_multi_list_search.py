@@ -0,0 +1,223 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Unit tests for searching several directory lists in one query.
+
+Covers the per-list ranked SQL, the merged projection (union of the lists'
+columns, each row serialized with its own list's fields), the in-memory
+merge, tool routing (list_names / all lists) and the generated prompt text.
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.agents.tools import directory_tools
+from app.agents.tools.prompt_generator import generate_directory_tool_docs, multi_list_search_docs
+from app.models.directory import DirectoryEntry, DirectoryList
+from app.services.directory_catalog import DirectoryInfo, SchemaPurpose
+from app.services.directory_memory_index import ListIndex, search_lists
+from app.services.directory_projection import MergedProjection, compile_projection
+from app.services.directory_service import DirectoryService
+
+DOCTORS_ID, CONTACTS_ID = uuid4(), uuid4()
+DOCTORS = compile_projection({"result_fields": {"department": "department", "specialty": "specialty"}}, "medical_professional")
+CONTACTS = compile_projection({"result_fields": {"department": "department", "hours_of_operation": "hours"}}, "contact_information")
+
+
+def _merged():
+    return MergedProjection(((DOCTORS_ID, "doctors", DOCTORS), (CONTACTS_ID, "contact_information", CONTACTS)))
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=asyncpg.dialect()))
+
+
+def test_ranked_query_limits_each_list_and_normalizes_scores():
+    query = DirectoryService.build_search_query(
+        [DOCTORS_ID, CONTACTS_ID], name_query="cardiology", search_mode="fts", limit=8,
+        columns=_merged().columns(), per_list_limit=3
+    )
+    sql = _sql(query)
+    params = query.compile(dialect=asyncpg.dialect()).params
+
+    assert "row_number() OVER (PARTITION BY directory_entries.directory_list_id ORDER BY ts_rank_cd" in sql
+    assert "max(ts_rank_cd(" in sql
+    assert "ranked.list_position <=" in sql
+    assert "ORDER BY ranked.list_score DESC, ranked.list_position, ranked.list_order" in sql
+    assert 3 in params.values() and 8 in params.values()
+
+
+def test_unranked_modes_interleave_lists():
+    sql = _sql(DirectoryService.build_search_query(
+        [DOCTORS_ID, CONTACTS_ID], name_query="card", search_mode="substring", per_list_limit=2,
+        columns=_merged().columns()
+    ))
+
+    assert "ORDER BY directory_entries.id) AS list_position" in sql
+    assert "ts_rank_cd" not in sql
+
+
+def test_merged_projection_selects_shared_fields_once():
+    columns = _merged().columns()
+
+    # list id, name, tags, 5 contact fields, department / specialty / hours_of_operation
+    assert len(columns) == 3 + 5 + 3
+
+
+def test_merged_projection_serializes_rows_with_their_list_fields():
+    merged = _merged()
+    doctor = (DOCTORS_ID, "Dr. A", [], '"555-1000"', None, None, None, None, '"Cardiology"', '"Interventional"', None)
+    contact = (CONTACTS_ID, "Cardiology", None, '"555-2000"', None, None, None, None, '"Cardiology"', None, '"Mon-Fri"')
+
+    result = json.loads(merged.serialize_results([doctor, contact]))
+
+    assert result == {
+        "entries": [
+            {"name": "Dr. A", "entry_type": "medical_professional", "list_name": "doctors", "phone": "555-1000",
+             "department": "Cardiology", "specialty": "Interventional"},
+            {"name": "Cardiology", "entry_type": "contact_information", "list_name": "contact_information",
+             "phone": "555-2000", "department": "Cardiology", "hours": "Mon-Fri"},
+        ],
+        "total": 2,
+        "lists_searched": ["doctors", "contact_information"],
+    }
+
+
+def _index(list_id, list_name, names):
+    directory_list = DirectoryList(id=list_id, list_name=list_name, entry_type="x", filter_fields=[], search_weights={})
+    entries = [
+        DirectoryEntry(id=uuid4(), directory_list_id=list_id, name=name, tags=[], contact_info={}, entry_data={},
+                       directory_list=directory_list)
+        for name in names
+    ]
+    return ListIndex.build(directory_list, entries)
+
+
+def test_memory_search_keeps_per_list_limit_and_interleaves():
+    doctors = _index(DOCTORS_ID, "doctors", ["Cardiology A", "Cardiology B", "Cardiology C"])
+    contacts = _index(CONTACTS_ID, "contact_information", ["Cardiology Desk"])
+
+    entries = search_lists([doctors, contacts], name_query="cardiology", search_mode="substring", limit=10,
+                           per_list_limit=2)
+
+    assert [entry.name for entry in entries] == ["Cardiology A", "Cardiology Desk", "Cardiology B"]
+
+
+def test_memory_search_normalizes_fts_scores_per_list():
+    doctors = _index(DOCTORS_ID, "doctors", ["Cardiology Clinic Cardiology", "Cardiology Lab"])
+    contacts = _index(CONTACTS_ID, "contact_information", ["Cardiology Desk"])
+
+    entries = search_lists([doctors, contacts], name_query="cardiology", search_mode="fts", limit=10,
+                           per_list_limit=5)
+
+    # The best hit of each list scores 1.0, so both lists lead before the doctors' second hit
+    assert {entries[0].name, entries[1].name} == {"Cardiology Clinic Cardiology", "Cardiology Desk"}
+    assert len(entries) == 3
+
+
+def _ctx(lists):
+    return SimpleNamespace(deps=SimpleNamespace(
+        session_id="s1", agent_instance_id=uuid4(), account_id=uuid4(),
+        agent_config={"tools": {"directory": {"accessible_lists": lists, "max_results": 4}}}
+    ))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kwargs", [{"list_names": ["doctors", "contact_information"]}, {}])
+async def test_tool_routes_several_lists_to_one_search(kwargs):
+    multi = AsyncMock(return_value='{"entries": [], "total": 0}')
+    single = AsyncMock()
+    cache = MagicMock()
+
+    async def get_or_call(name, deps, args, data_version, call):
+        return await call()
+
+    cache.get_or_call = get_or_call
+
+    with patch.object(directory_tools, '_execute_multi_list_search', multi), \
+         patch.object(directory_tools, '_execute_directory_search', single), \
+         patch.object(directory_tools, 'get_tool_cache', return_value=cache):
+        await directory_tools.search_directory(_ctx(["doctors", "contact_information"]), query="cardiology", **kwargs)
+
+    single.assert_not_awaited()
+    args = multi.await_args.args
+    assert args[1] == ["doctors", "contact_information"]
+    # max_results per list, merged cap defaults to max_results x lists
+    assert args[6:8] == (4, 8)
+
+
+@pytest.mark.asyncio
+async def test_tool_rejects_inaccessible_list_names():
+    result = await directory_tools.search_directory(_ctx(["doctors"]), list_names=["doctors", "billing"])
+
+    assert result.startswith("List 'billing' not accessible")
+
+
+@pytest.mark.asyncio
+async def test_multi_list_search_resolves_lists_from_catalog():
+    directories = [
+        DirectoryInfo(list_id=DOCTORS_ID, list_name="doctors", entry_type="medical_professional", entry_count=3,
+                      purpose=SchemaPurpose(), schema_file="medical_professional.yaml",
+                      filter_fields=("department", "specialty")),
+        DirectoryInfo(list_id=CONTACTS_ID, list_name="contact_information", entry_type="contact_information",
+                      entry_count=2, purpose=SchemaPurpose(), schema_file="contact_information.yaml",
+                      filter_fields=("department",)),
+    ]
+    catalog = MagicMock()
+    catalog.directories = AsyncMock(return_value=directories)
+    db_service = MagicMock()
+    db_service.get_session.return_value.__aenter__ = AsyncMock(return_value=MagicMock())
+    db_service.get_session.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    with patch.object(directory_tools, 'get_database_service', return_value=db_service), \
+         patch.object(directory_tools, 'get_directory_catalog', return_value=catalog), \
+         patch.object(directory_tools.DirectoryService, 'search', AsyncMock(return_value=[])) as search:
+        output = await directory_tools._execute_multi_list_search(
+            uuid4(), ["doctors", "contact_information"], None, None, {"department": "Cardiology"}, "substring", 3, 6
+        )
+
+    kwargs = search.await_args.kwargs
+    assert kwargs["accessible_list_ids"] == [DOCTORS_ID, CONTACTS_ID]
+    assert kwargs["filter_fields"] == {"department"}
+    assert (kwargs["per_list_limit"], kwargs["limit"]) == (3, 6)
+    assert isinstance(kwargs["projection"], MergedProjection)
+    assert json.loads(output)["lists_searched"] == ["doctors", "contact_information"]
+
+
+def test_prompt_advertises_multi_list_search():
+    text = multi_list_search_docs(["doctors", "contact_information"])
+
+    assert 'search_directory(list_names=["doctors", "contact_information"]' in text
+    assert "ONE call" in text
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("lists, advertised", [
+    (["doctors"], False),
+    (["doctors", "contact_information"], True),
+    # Second list's schema can't be loaded: one directory documented
+    (["doctors", "broken"], False),
+])
+async def test_tool_docs_advertise_multi_list_search_only_for_several_lists(lists, advertised):
+    schema_files = {"doctors": "medical_professional.yaml", "contact_information": "contact_information.yaml",
+                    "broken": "missing.yaml"}
+    directory_lists = [
+        DirectoryList(id=uuid4(), list_name=name, entry_type=schema_files[name][:-5], schema_file=schema_files[name])
+        for name in lists
+    ]
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = directory_lists
+    result.scalar_one.return_value = 10
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=result)
+    config = {"tools": {"directory": {"accessible_lists": lists}}}
+
+    docs = await generate_directory_tool_docs(config, uuid4(), session)
+
+    assert ("Searching several directories" in docs.full_text) is advertised
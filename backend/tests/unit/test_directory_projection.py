@@ -0,0 +1,120 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Unit tests for compiled, schema-driven search_directory result projection.
+
+Covers compiling result_fields from the schema YAMLs, the selected columns,
+direct JSON serialization (renames, skipped empty values, keep_falsy), and
+the search_directory tool output.
+"""
+
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.models.directory import DirectoryEntry
+from app.services.directory_importer import DirectoryImporter
+from app.services.directory_projection import compile_projection, projection_for_list
+
+SCHEMA_DIR = Path(__file__).parent.parent.parent / "config" / "directory_schemas"
+
+
+def _entry(entry_data, contact_info=None, tags=None):
+    return DirectoryEntry(name="Item", tags=tags or [], contact_info=contact_info or {}, entry_data=entry_data)
+
+
+@pytest.mark.parametrize("schema_file", sorted(path.name for path in SCHEMA_DIR.glob("*.yaml")))
+def test_every_schema_declares_result_fields(schema_file):
+    schema = DirectoryImporter.load_schema(schema_file)
+
+    projection = compile_projection(schema, schema["entry_type"])
+
+    outputs = [f.output for f in projection.fields]
+    assert outputs
+    assert len(outputs) == len(set(outputs))
+
+
+def test_columns_select_only_projected_paths():
+    projection = projection_for_list("contact_information.yaml", "contact_information")
+
+    sql = str(select(*projection.columns()).compile(dialect=asyncpg.dialect()))
+
+    assert sql.count("CAST(directory_entries.entry_data") == 3
+    assert "directory_entries.search_vector" not in sql
+    assert "directory_lists" not in sql
+    assert len(projection.columns()) == 2 + 5 + 3
+
+
+def test_serialization_renames_and_skips_empty_values():
+    projection = projection_for_list("contact_information.yaml", "contact_information")
+    entry = _entry(
+        {"service_type": "", "hours_of_operation": "24/7", "description": "Front desk"},
+        contact_info={"phone": "555-0100", "email": None, "product_url": "https://example.org"},
+        tags=["Emergency"]
+    )
+
+    result = json.loads(projection.serialize_results([projection.entry_values(entry)]))
+
+    assert result == {
+        "entries": [{
+            "name": "Item",
+            "entry_type": "contact_information",
+            "tags": ["Emergency"],
+            "phone": "555-0100",
+            "url": "https://example.org",
+            "hours": "24/7",
+            "description": "Front desk",
+        }],
+        "total": 1,
+    }
+
+
+def test_keep_falsy_fields_return_zero_and_false():
+    projection = projection_for_list("product.yaml", "product")
+    row = projection.entry_values(_entry({"price": 0, "in_stock": False, "features": [], "warranty": 0}))
+
+    entry = json.loads(projection.serialize(row))
+
+    assert entry["price"] == 0 and entry["in_stock"] is False
+    assert "features" not in entry and "warranty" not in entry
+
+
+def test_postgres_json_text_is_written_verbatim():
+    projection = projection_for_list("medical_professional.yaml", "medical_professional")
+    row = ("Dr. Émile Roux", ["French"], None, None, None, None, None, '"Cardiology"', '"Interventional Cardiology"', None, None, '"male"')
+
+    assert projection.serialize(row) == (
+        '{"name": "Dr. Émile Roux", "entry_type": "medical_professional", "tags": ["French"], '
+        '"department": "Cardiology", "specialty": "Interventional Cardiology", "gender": "male"}'
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_directory_tool_uses_list_projection():
+    from app.agents.tools import directory_tools
+
+    directory_list = MagicMock(id=uuid4(), schema_file="medical_professional.yaml", entry_type="medical_professional",
+                               filter_fields=["department", "specialty"])
+    rows = [("Dr. A", [], None, None, None, None, None, '"Surgery"', None, None, None, None)]
+    db_service = MagicMock()
+    db_service.get_session.return_value.__aenter__ = AsyncMock(return_value=MagicMock())
+    db_service.get_session.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    with patch.object(directory_tools, 'get_database_service', return_value=db_service), \
+         patch.object(directory_tools.DirectoryService, 'get_list', AsyncMock(return_value=directory_list)), \
+         patch.object(directory_tools.DirectoryService, 'search', AsyncMock(return_value=rows)) as search:
+        output = await directory_tools._execute_directory_search(uuid4(), "doctors", "surgery", None, None, "fts", 5)
+
+    assert search.await_args.kwargs["projection"] is projection_for_list("medical_professional.yaml", "medical_professional")
+    # The list's filter fields come with the list row (no second lookup)
+    assert search.await_args.kwargs["filter_fields"] == ["department", "specialty"]
+    assert json.loads(output) == {
+        "entries": [{"name": "Dr. A", "entry_type": "medical_professional", "department": "Surgery"}],
+        "total": 1,
+    }
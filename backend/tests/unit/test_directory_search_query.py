@@ -0,0 +1,134 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Unit tests for the SQL built by DirectoryService.build_search_query().
+
+Compiles queries with the asyncpg dialect (no database needed) and checks
+that each search mode and schema-declared filter uses index-friendly predicates.
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.services.directory_filters import (
+    build_filter_data,
+    common_filter_fields,
+    filter_fields_from_schema,
+    filter_lookup_terms,
+    filter_terms,
+)
+from app.services.directory_importer import DirectoryImporter
+from app.services.directory_service import DirectoryService
+
+
+def _sql(**kwargs) -> str:
+    query = DirectoryService.build_search_query([uuid4()], **kwargs)
+    return str(query.compile(dialect=asyncpg.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_substring_uses_ilike():
+    sql = _sql(name_query="smith", search_mode="substring")
+
+    assert "directory_entries.name ILIKE '%smith%'" in sql
+
+
+def test_fuzzy_uses_trigram_operator_and_similarity_ranking():
+    sql = _sql(name_query="Dr. Shwartz", search_mode="fuzzy", limit=5)
+
+    assert "directory_entries.name %> 'Dr. Shwartz'" in sql
+    assert "ORDER BY word_similarity('Dr. Shwartz', directory_entries.name) DESC" in sql
+    assert "LIMIT 5" in sql
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_search_sets_threshold_for_the_transaction():
+    session = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    session.execute = AsyncMock(return_value=result)
+
+    await DirectoryService.search(session, [uuid4()], name_query="Shwartz", search_mode="fuzzy", fuzzy_threshold=0.4)
+
+    threshold_call = session.execute.await_args_list[0]
+    assert "pg_trgm.word_similarity_threshold" in str(threshold_call.args[0])
+    assert threshold_call.args[1] == {"threshold": "0.4"}
+    assert session.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_other_modes_do_not_touch_threshold():
+    session = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    session.execute = AsyncMock(return_value=result)
+
+    await DirectoryService.search(session, [uuid4()], name_query="Smith", search_mode="substring")
+
+    assert session.execute.await_count == 1
+
+
+def test_indexed_filter_uses_containment():
+    sql = _sql(jsonb_filters={"specialty": "Cardiology"}, filter_fields=["specialty"])
+
+    assert "directory_entries.filter_data @> CAST('{\"specialty\": [\"cardiology\"]}' AS JSONB)" in sql
+    assert "~*" not in sql
+
+
+def test_indexed_filter_keeps_word_prefix_matching():
+    sql = _sql(jsonb_filters={"specialty": "Pediatric", "department": "Ca"}, filter_fields=["specialty", "department"])
+
+    # Prefix terms are stored in filter_data; too short for a stored prefix -> regex
+    assert "filter_data @> CAST('{\"specialty\": [\"pediatric\"]}' AS JSONB)" in sql
+    assert "(directory_entries.entry_data ->> 'department') ~* '\\\\mCa'" in sql
+    assert filter_terms("Pediatrics")[-2:] == ["pediatric", "pediatrics"]
+    assert filter_lookup_terms("Interventional Ca") == ["interventional"]
+
+
+def test_multi_word_filter_rechecks_phrase_and_unindexed_field_keeps_regex():
+    sql = _sql(
+        jsonb_filters={"specialty": "Family Medicine", "board_certifications": "Surgery"},
+        filter_fields=["specialty"]
+    )
+
+    assert "filter_data @> CAST('{\"specialty\": [\"family\", \"medicine\"]}' AS JSONB)" in sql
+    assert "(directory_entries.entry_data ->> 'specialty') ~* '\\\\mFamily\\\\ Medicine'" in sql
+    assert "(directory_entries.entry_data ->> 'board_certifications') ~* '\\\\mSurgery'" in sql
+
+
+def test_filter_fields_from_schema():
+    fields = filter_fields_from_schema(DirectoryImporter.load_schema("medical_professional.yaml"))
+
+    assert {"department", "specialty", "gender", "education"} <= set(fields)
+    assert "board_certifications" not in fields
+    assert filter_fields_from_schema({"searchable_fields": {"bio": {"type": "text", "filter_index": True}}}) == ["bio"]
+    assert filter_fields_from_schema(None) == []
+    # Plain list of field names (classes.yaml)
+    assert filter_fields_from_schema({"searchable_fields": ["title", "category"]}) == ["title", "category"]
+
+
+def test_filter_data_matches_trigger_normalization():
+    data = build_filter_data({"specialty": "Gastroenterology and Hepatology", "gender": None}, ["specialty", "gender"])
+
+    assert data == {"specialty": sorted({"and", "hepatology", "hep", "hepa", "hepat", "hepato", "hepatol", "hepatolo", "hepatolog"}
+                                        | {"gastroenterology"[:n] for n in range(3, 17)})}
+    assert common_filter_fields([["specialty", "gender"], ["specialty"]]) == {"specialty"}
+    assert common_filter_fields([["specialty"], None]) == set()
+
+
+@pytest.mark.asyncio
+async def test_search_resolves_filter_fields_from_lists():
+    session = MagicMock()
+    fields_result = MagicMock()
+    fields_result.fetchall.return_value = [(["specialty", "gender"],), (["specialty"],)]
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    session.execute = AsyncMock(side_effect=[fields_result, result])
+
+    await DirectoryService.search(session, [uuid4(), uuid4()], jsonb_filters={"specialty": "Cardiology"})
+
+    sql = str(session.execute.await_args_list[1].args[0].compile(dialect=asyncpg.dialect()))
+    assert "directory_entries.filter_data @>" in sql
@@ -0,0 +1,144 @@
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+# Unauthorized copying of this file is strictly prohibited.
+
+"""
+Unit tests for schema synonym / abbreviation expansion in directory FTS.
+
+Covers compiling the schema sections into expansion tables, longest-phrase
+OR-groups in the tsquery, the compiled-query cache, and the search path
+(SQL parameters, memory index bypass for expanded queries).
+"""
+
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.services.directory_memory_index import MemoryIndexSettings
+from app.services.directory_service import DirectoryService
+from app.services.directory_synonyms import (
+    EMPTY_SYNONYMS,
+    SynonymTable,
+    _compile,
+    compile_tsquery,
+    query_words,
+    synonyms_for_schema_file,
+    synonyms_for_schema_files,
+    synonyms_from_schema,
+)
+
+SCHEMA_DIR = Path(__file__).parent.parent.parent / "config" / "directory_schemas"
+
+SCHEMA = {
+    "search_synonyms": {"peds": ["Pediatrics", "Pediatric"], "ob": "Obstetrics"},
+    "search_strategy": {"synonym_mappings": [
+        {"lay_terms": ["heart doctor", "cardiac specialist"], "formal_terms": ["Cardiology", "Cardiac Surgery"]},
+    ]},
+}
+
+
+def test_query_words_drop_operators_and_punctuation():
+    assert query_words("Oral & Maxillofacial Surgery") == ["oral", "maxillofacial", "surgery"]
+    assert query_words("OB/GYN in_person !") == ["ob", "gyn", "in", "person"]
+    assert query_words("& | !") == []
+
+
+def test_schema_sections_compile_to_phrase_table():
+    expansions = synonyms_from_schema(SCHEMA)
+
+    assert expansions[("peds",)] == (("pediatrics",), ("pediatric",))
+    assert expansions[("ob",)] == (("obstetrics",),)
+    assert expansions[("heart", "doctor")] == (("cardiology",), ("cardiac", "surgery"))
+
+
+def test_mapping_form_expands_lay_terms_to_canonical_term():
+    expansions = synonyms_from_schema({"search_strategy": {"synonym_mappings": {"class": ["course", "training"]}}})
+
+    assert expansions == {("course",): (("class",),), ("training",): (("class",),)}
+
+
+def test_matched_phrases_become_or_groups():
+    table = SynonymTable(synonyms_from_schema(SCHEMA))
+
+    assert compile_tsquery(["Heart doctor near Boston"], table) == (
+        "(heart & doctor | cardiology | cardiac & surgery) & near & boston", True
+    )
+    assert compile_tsquery(["peds", "Surgery"], table) == ("(peds | pediatrics | pediatric) & surgery", True)
+    assert compile_tsquery(["interventional cardiology"], table) == ("interventional & cardiology", False)
+    assert compile_tsquery(["&", None], table) == ("", False)
+
+
+def test_compiled_queries_are_cached_per_normalized_input():
+    table = SynonymTable(synonyms_from_schema(SCHEMA))
+    _compile.cache_clear()
+
+    compile_tsquery(["Heart Doctor"], table)
+    compile_tsquery(["  heart   doctor! "], table)
+
+    assert _compile.cache_info().hits == 1
+
+
+@pytest.mark.parametrize("schema_file", sorted(path.name for path in SCHEMA_DIR.glob("*.yaml")))
+def test_every_schema_compiles(schema_file):
+    table = synonyms_for_schema_file(schema_file)
+
+    for phrase, alternatives in table.expansions.items():
+        assert phrase and alternatives
+        assert phrase not in alternatives
+
+
+def test_abbreviations_in_medical_schema():
+    table = synonyms_for_schema_file("medical_professional.yaml")
+
+    assert "pediatrics" in compile_tsquery(["peds"], table)[0]
+    assert "otolaryngology" in compile_tsquery(["ENT"], table)[0]
+    assert "obstetrics" in compile_tsquery(["OB"], table)[0]
+
+
+def test_multi_list_tables_are_merged():
+    merged = synonyms_for_schema_files(("medical_professional.yaml", "contact_information.yaml"))
+
+    assert "emergency" in compile_tsquery(["ER"], merged)[0]
+    assert "cardiology" in compile_tsquery(["heart doctor"], merged)[0]
+    assert synonyms_for_schema_files(("faq.yaml",)) is synonyms_for_schema_file("faq.yaml")
+
+
+def test_fts_query_uses_synonym_groups():
+    table = SynonymTable(synonyms_from_schema(SCHEMA))
+    query = DirectoryService.build_search_query(
+        [uuid4()], name_query="heart doctor", jsonb_filters={"specialty": "peds"}, search_mode="fts", synonyms=table
+    )
+    params = query.compile(dialect=asyncpg.dialect()).params.values()
+
+    assert "(heart & doctor | cardiology | cardiac & surgery)" in params
+    assert "(heart & doctor | cardiology | cardiac & surgery) & (peds | pediatrics | pediatric)" in params
+
+
+def test_without_synonyms_words_are_anded():
+    query = DirectoryService.build_search_query([uuid4()], name_query="Heart Doctor", search_mode="fts",
+                                                synonyms=EMPTY_SYNONYMS)
+
+    assert "heart & doctor" in query.compile(dialect=asyncpg.dialect()).params.values()
+
+
+@pytest.mark.asyncio
+async def test_expanded_queries_bypass_memory_index():
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock(scalars=lambda: MagicMock(all=lambda: []), all=lambda: []))
+    memory = MagicMock()
+    memory.search = AsyncMock(return_value=["entry"])
+    table = SynonymTable(synonyms_from_schema(SCHEMA))
+
+    with patch('app.services.directory_service.get_directory_memory_index', return_value=memory):
+        await DirectoryService.search(session, [uuid4()], name_query="heart doctor", search_mode="fts",
+                                      account_id=uuid4(), memory_index=MemoryIndexSettings(enabled=True),
+                                      synonyms=table)
+        memory.search.assert_not_awaited()
+
+        entries = await DirectoryService.search(session, [uuid4()], name_query="cardiology", search_mode="fts",
+                                                account_id=uuid4(), memory_index=MemoryIndexSettings(enabled=True),
+                                                synonyms=table)
+
+    assert entries == ["entry"]
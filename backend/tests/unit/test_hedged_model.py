@@ -0,0 +1,153 @@
+"""
+Unit tests for hedged requests and latency-based model fallback.
+
+Tests the hedging policy, the first-token race for streams (slow primary
+loses and is cancelled), immediate fallback on errors, non-streaming hedging,
+and llm_requests tracking of the losing attempts.
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from app.agents.hedged_model import HedgedModel, HedgingPolicy, build_hedged_model, hedged_model_of
+
+
+def _model(name, text, delay=0.0, fail=False, cancelled=None):
+    async def stream(messages, info: AgentInfo):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if cancelled is not None:
+                cancelled.set()
+            raise
+        if fail:
+            raise RuntimeError(f"{name} unavailable")
+        for word in text.split(" "):
+            yield word + " "
+
+    async def respond(messages, info: AgentInfo):
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} unavailable")
+        return ModelResponse(parts=[TextPart(text)])
+
+    return FunctionModel(respond, stream_function=stream, model_name=name)
+
+
+def _policy(**overrides):
+    return HedgingPolicy(**{"first_token_timeout_ms": 50, "request_timeout_ms": 50, **overrides})
+
+
+def test_build_hedged_model_only_with_fallbacks():
+    primary = _model("primary", "hi")
+
+    assert build_hedged_model(primary, {"model": "primary"}, lambda name: _model(name, "x")) is primary
+
+    hedged = build_hedged_model(
+        primary,
+        {"fallbacks": ["backup"], "hedging": {"first_token_timeout_ms": 1500, "max_attempts": 3}},
+        lambda name: _model(name, "x")
+    )
+    assert [m.model_name for m in hedged.models] == ["primary", "backup"]
+    assert hedged.policy.first_token_timeout_ms == 1500
+    assert hedged.policy.max_attempts == 3
+    assert hedged_model_of(Agent(hedged)) is hedged
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_stream_is_hedged_and_cancelled():
+    cancelled = asyncio.Event()
+    hedged = HedgedModel([_model("slow", "late answer", delay=1, cancelled=cancelled), _model("fast", "quick answer")], _policy())
+
+    async with Agent(hedged).run_stream("hi") as result:
+        text = "".join([chunk async for chunk in result.stream_text(delta=True)])
+
+    assert text.strip() == "quick answer"
+    assert hedged.served_model == "fast"
+    assert [(a.model_name, a.outcome) for a in hedged.attempts] == [("slow", "cancelled"), ("fast", "won")]
+    assert hedged.attempts[1].started_ms >= 40
+    await asyncio.wait_for(cancelled.wait(), 1)
+
+
+@pytest.mark.asyncio
+async def test_primary_that_streams_first_wins_without_hedging():
+    hedged = HedgedModel([_model("primary", "answer"), _model("backup", "other")], _policy())
+
+    async with Agent(hedged).run_stream("hi") as result:
+        text = "".join([chunk async for chunk in result.stream_text(delta=True)])
+
+    assert text.strip() == "answer"
+    assert [(a.model_name, a.outcome) for a in hedged.attempts] == [("primary", "won")]
+
+
+@pytest.mark.asyncio
+async def test_error_falls_back_immediately():
+    hedged = HedgedModel(
+        [_model("broken", "x", fail=True), _model("backup", "fallback answer")],
+        _policy(first_token_timeout_ms=5000, enabled=False)
+    )
+
+    async with Agent(hedged).run_stream("hi") as result:
+        text = "".join([chunk async for chunk in result.stream_text(delta=True)])
+
+    assert text.strip() == "fallback answer"
+    assert hedged.attempts[0].outcome == "failed"
+    assert "broken unavailable" in hedged.attempts[0].error
+
+
+@pytest.mark.asyncio
+async def test_non_streaming_request_is_hedged():
+    hedged = HedgedModel([_model("slow", "late", delay=1), _model("fast", "quick")], _policy())
+
+    result = await Agent(hedged).run("hi")
+
+    assert result.output == "quick"
+    assert [(a.model_name, a.outcome) for a in hedged.attempts] == [("slow", "cancelled"), ("fast", "won")]
+
+
+@pytest.mark.asyncio
+async def test_losing_attempts_are_tracked():
+    from app.agents import simple_chat as sc
+    from app.agents.hedged_model import HedgeAttempt
+
+    hedged = HedgedModel([_model("slow", "x"), _model("fast", "y"), _model("broken", "z")], _policy())
+    hedged.attempts = [
+        HedgeAttempt("slow", True, started_ms=0, ended_ms=4100, outcome="cancelled"),
+        HedgeAttempt("fast", True, started_ms=4000, ready_ms=4100, ended_ms=4100, outcome="won"),
+        HedgeAttempt("broken", True, started_ms=0, ended_ms=20, outcome="failed", error="HTTP 503"),
+    ]
+    winner_id = uuid4()
+    estimate = {"prompt_tokens": 12, "completion_tokens": 0, "total_tokens": 12,
+                "prompt_cost": 0.001, "completion_cost": 0.0, "total_cost": 0.001}
+
+    with patch.object(sc.LLMRequestTracker, 'track_llm_request', AsyncMock(return_value=uuid4())) as track, \
+         patch('app.agents.cost_calculator.estimate_partial_usage', return_value=estimate) as estimate_usage:
+        await sc._track_hedge_attempts(
+            hedged,
+            session_id=str(uuid4()),
+            agent_instance_id=uuid4(),
+            message="hi",
+            message_history=[],
+            model_settings={"temperature": 0.3},
+            instance_config={"instance_name": "chat1"},
+            bootstrap=SimpleNamespace(account_id=uuid4(), account_slug="acme"),
+            winner_llm_request_id=winner_id
+        )
+
+    calls = [c.kwargs for c in track.await_args_list]
+    assert [(c["model"], c["completion_status"]) for c in calls] == [("slow", "cancelled"), ("broken", "error")]
+    assert calls[0]["tokens"]["prompt"] == 12
+    assert calls[0]["latency_ms"] == 4100
+    assert calls[0]["meta"]["hedge"]["winner_llm_request_id"] == str(winner_id)
+    assert calls[1]["cost_data"]["total_cost"] == 0
+    estimate_usage.assert_called_once()
+    assert hedged.attempts == []
@@ -0,0 +1,103 @@
+"""
+Unit tests for lossless message storage and history replay.
+
+Tests compact serialization of a turn's new_messages() (no system prompt,
+usage or run ids), tool-return truncation, rehydration of stored turns in
+place of the text pair, and the text fallback for older rows.
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, ToolCallPart, ToolReturnPart, UserPromptPart
+from pydantic_ai.models.test import TestModel
+
+from app.services.message_history import (
+    META_KEY,
+    HistoryStorageSettings,
+    deserialize_turn,
+    serialize_turn,
+    to_model_messages,
+)
+
+
+def _turn(tool_output="Dr. Smith, Cardiology"):
+    agent = Agent(TestModel(), system_prompt="You are helpful.")
+
+    @agent.tool_plain
+    def search_directory(query: str) -> str:
+        return tool_output
+
+    return agent.run_sync("Find a cardiologist").new_messages()
+
+
+def _row(role, content, meta=None):
+    return SimpleNamespace(role=role, content=content, meta=meta, created_at=datetime.now(UTC))
+
+
+def test_serialize_is_compact_and_round_trips():
+    stored = serialize_turn(_turn())
+
+    assert all("usage" not in m and "run_id" not in m for m in stored)
+    assert [p["part_kind"] for p in stored[0]["parts"]] == ["user-prompt"]
+
+    messages = deserialize_turn(stored)
+    assert isinstance(messages[1].parts[0], ToolCallPart)
+    assert messages[1].parts[0].tool_name == "search_directory"
+    assert isinstance(messages[2].parts[0], ToolReturnPart)
+    assert messages[2].parts[0].content == "Dr. Smith, Cardiology"
+    assert messages[2].parts[0].tool_call_id == messages[1].parts[0].tool_call_id
+
+
+def test_large_tool_returns_are_truncated():
+    stored = serialize_turn(_turn(tool_output="x" * 500), max_tool_return_chars=100)
+
+    content = deserialize_turn(stored)[2].parts[0].content
+    assert content.startswith("x" * 100)
+    assert content.endswith("[truncated 400 chars]")
+    assert serialize_turn(_turn(tool_output="x" * 500))[2]["parts"][0]["content"] == "x" * 500
+
+
+def test_stored_turn_replaces_text_pair():
+    stored = serialize_turn(_turn())
+    rows = [
+        _row("human", "Find a cardiologist"),
+        _row("assistant", "Dr. Smith is a cardiologist.", meta={"tool_calls": [], META_KEY: stored}),
+        _row("human", "Is the second one available?"),
+    ]
+
+    history = to_model_messages(rows, model_name="simple-chat")
+
+    assert len(history) == len(stored) + 1
+    assert history[0].parts[0].content == "Find a cardiologist"
+    assert any(isinstance(p, ToolReturnPart) for m in history for p in m.parts)
+    assert history[-1].parts[0].content == "Is the second one available?"
+
+
+def test_text_fallback_for_old_and_unreadable_rows():
+    rows = [
+        _row("human", "hi"),
+        _row("assistant", "hello", meta={META_KEY: [{"kind": "bogus"}]}),
+        _row("system", "ignored"),
+        _row("human", "hours?"),
+        _row("assistant", "9-5"),
+    ]
+
+    history = to_model_messages(rows, model_name="agent-session")
+
+    assert [type(m) for m in history] == [ModelRequest, ModelResponse, ModelRequest, ModelResponse]
+    assert isinstance(history[0].parts[0], UserPromptPart)
+    assert isinstance(history[1].parts[0], TextPart)
+    assert history[1].model_name == "agent-session"
+    assert history[3].parts[0].content == "9-5"
+
+
+def test_settings_defaults():
+    assert HistoryStorageSettings.from_instance_config(None) == HistoryStorageSettings(True, 4000)
+    settings = HistoryStorageSettings.from_instance_config(
+        {"context_management": {"store_model_messages": False, "max_tool_return_chars": -5}}
+    )
+    assert (settings.store_model_messages, settings.max_tool_return_chars) == (False, 0)
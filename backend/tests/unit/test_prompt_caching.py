@@ -0,0 +1,87 @@
+"""
+Unit tests for provider prompt caching (OpenRouterModel cache breakpoints).
+
+Tests that Anthropic/Gemini requests get cache_control breakpoints on the
+system prompt and the history prefix, that other models are sent unchanged,
+and that cached-token counts are extracted for llm_requests.
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+import pytest
+from pydantic_ai.messages import ModelRequest, ModelResponse, SystemPromptPart, TextPart, UserPromptPart
+from pydantic_ai.models import ModelRequestParameters
+from pydantic_ai.providers.openrouter import OpenRouterProvider
+from pydantic_ai.usage import RequestUsage
+
+from app.agents.cost_calculator import extract_cache_tokens
+from app.agents.openrouter import OpenRouterModel, apply_cache_breakpoints, supports_cache_breakpoints
+
+
+def _conversation():
+    return [
+        ModelRequest(parts=[SystemPromptPart(content="SYSTEM"), UserPromptPart(content="first question")]),
+        ModelResponse(parts=[TextPart(content="first answer")]),
+        ModelRequest(parts=[UserPromptPart(content="second question")]),
+    ]
+
+
+def _breakpoints(messages):
+    return [
+        (m["role"], part["text"])
+        for m in messages if isinstance(m.get("content"), list)
+        for part in m["content"] if part.get("cache_control")
+    ]
+
+
+def test_supported_model_families():
+    assert supports_cache_breakpoints("anthropic/claude-3.5-sonnet")
+    assert supports_cache_breakpoints("google/gemini-2.5-flash")
+    assert not supports_cache_breakpoints("openai/gpt-4o-mini")
+    assert not supports_cache_breakpoints("moonshotai/kimi-k2-0905")
+
+
+def test_breakpoints_on_system_prompt_and_history_tail():
+    messages = [
+        {"role": "system", "content": "SYSTEM"},
+        {"role": "user", "content": "first question"},
+        {"role": "assistant", "content": "first answer"},
+        {"role": "user", "content": "second question"},
+    ]
+
+    assert apply_cache_breakpoints(messages) == 2
+    assert _breakpoints(messages) == [("system", "SYSTEM"), ("assistant", "first answer")]
+    # The current user message stays a plain string (not part of the cached prefix)
+    assert messages[-1]["content"] == "second question"
+
+
+def test_first_turn_only_marks_system_prompt():
+    messages = [{"role": "system", "content": "SYSTEM"}, {"role": "user", "content": "hi"}]
+
+    assert apply_cache_breakpoints(messages) == 1
+    assert messages[1]["content"] == "hi"
+
+
+@pytest.mark.asyncio
+async def test_model_maps_messages_with_breakpoints_for_anthropic():
+    model = OpenRouterModel("anthropic/claude-3.5-sonnet", provider=OpenRouterProvider(api_key="test"))
+
+    mapped = await model._map_messages(_conversation(), ModelRequestParameters())
+
+    assert _breakpoints(mapped) == [("system", "SYSTEM"), ("assistant", "first answer")]
+
+
+@pytest.mark.asyncio
+async def test_model_leaves_automatic_cache_providers_untouched():
+    for model in (
+        OpenRouterModel("openai/gpt-4o-mini", provider=OpenRouterProvider(api_key="test")),
+        OpenRouterModel("anthropic/claude-3.5-sonnet", provider=OpenRouterProvider(api_key="test"), prompt_cache=False),
+    ):
+        mapped = await model._map_messages(_conversation(), ModelRequestParameters())
+        assert all(isinstance(m.get("content"), str) for m in mapped)
+
+
+def test_extract_cache_tokens():
+    assert extract_cache_tokens(None) == {}
+    usage = RequestUsage(input_tokens=1000, output_tokens=20, cache_read_tokens=800)
+    assert extract_cache_tokens(usage) == {"cache_read": 800, "cache_write": 0}
@@ -0,0 +1,175 @@
+"""
+Unit tests for the opt-in per-instance response cache.
+
+Tests message normalization, hit/miss, first-turn-only eligibility, TTL and
+size bounds, the side-effect tool guard, and invalidation when the instance
+config or directory data version changes.
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart
+
+from app.services import response_cache as rc
+from app.services.response_cache import ResponseCache, ResponseCacheSettings, normalize_message
+
+
+def _bootstrap(history=(), slug="chat1", **cache_settings):
+    config = MappingProxyType({
+        "account": "acme",
+        "system_prompt": "You are helpful.",
+        "response_cache": {"enabled": True, **cache_settings}
+    })
+    return SimpleNamespace(
+        instance=SimpleNamespace(id=uuid4(), account_id=uuid4(), account_slug="acme", instance_slug=slug, agent_type="simple_chat"),
+        session_id=str(uuid4()),
+        account_id=uuid4(),
+        account_slug="acme",
+        history=tuple(history),
+        instance_config=config,
+        requested_model="test/model",
+        config_version=rc.config_version(config)
+    )
+
+
+def _result(*tool_names):
+    parts = [ToolCallPart(tool_name=name, args={}) for name in tool_names] or [TextPart(content="ok")]
+    return MagicMock(new_messages=lambda: [ModelResponse(parts=parts)])
+
+
+def test_normalize_message():
+    assert normalize_message("  What are your   HOURS?? ") == "what are your hours"
+    assert normalize_message("what are your hours") == normalize_message("What are your hours.")
+    assert normalize_message(" ?! ") == ""
+
+
+def test_settings_default_disabled():
+    assert ResponseCacheSettings.from_instance_config({}).enabled is False
+    settings = ResponseCacheSettings.from_instance_config({"response_cache": {"enabled": True, "ttl_seconds": 60}})
+    assert (settings.enabled, settings.ttl_seconds, settings.max_history_messages) == (True, 60, 0)
+
+
+@pytest.mark.asyncio
+async def test_store_then_hit_on_normalized_message():
+    cache = ResponseCache()
+    bootstrap = _bootstrap()
+
+    assert await cache.lookup(bootstrap, "Where do I park?") is None
+    assert await cache.store(bootstrap, "Where do I park?", "Lot B.", _result("search_directory"), "req-1")
+
+    hit = await cache.lookup(bootstrap, "where do i park")
+    assert hit.response == "Lot B."
+    assert hit.source_llm_request_id == "req-1"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_disabled_or_follow_up_turns_are_not_cached():
+    cache = ResponseCache()
+    disabled = _bootstrap(enabled=False)
+    follow_up = _bootstrap(history=[ModelResponse(parts=[TextPart(content="hi")])])
+
+    assert not await cache.store(disabled, "hours", "9-5", _result())
+    assert not await cache.store(follow_up, "hours", "9-5", _result())
+    assert await cache.lookup(follow_up, "hours") is None
+
+
+@pytest.mark.asyncio
+async def test_side_effect_tools_are_not_cached():
+    cache = ResponseCache()
+    bootstrap = _bootstrap()
+
+    assert not await cache.store(bootstrap, "email me", "Sent!", _result("send_conversation_summary"))
+    assert await cache.lookup(bootstrap, "email me") is None
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_size_bounds():
+    cache = ResponseCache()
+    bootstrap = _bootstrap(max_entries=2, ttl_seconds=60)
+    for question in ("a", "b", "c"):
+        await cache.store(bootstrap, question, f"answer {question}", _result())
+
+    assert await cache.lookup(bootstrap, "a") is None
+    assert (await cache.lookup(bootstrap, "c")).response == "answer c"
+
+    with patch.object(rc.time, "monotonic", return_value=rc.time.monotonic() + 61):
+        assert await cache.lookup(bootstrap, "c") is None
+
+
+@pytest.mark.asyncio
+async def test_config_or_directory_change_invalidates():
+    cache = ResponseCache()
+    bootstrap = _bootstrap()
+    await cache.store(bootstrap, "hours", "9-5", _result())
+
+    edited = _bootstrap()
+    edited.instance = bootstrap.instance
+    edited.instance_config = MappingProxyType({**bootstrap.instance_config, "system_prompt": "Be brief."})
+    edited.config_version = rc.config_version(edited.instance_config)
+    assert await cache.lookup(edited, "hours") is None
+
+    with patch.object(ResponseCache, "_directory_version", AsyncMock(return_value="3:2025-10-01")):
+        await cache.store(bootstrap, "hours", "9-5", _result())
+    with patch.object(ResponseCache, "_directory_version", AsyncMock(return_value="3:2025-10-02")):
+        assert await cache.lookup(bootstrap, "hours") is None
+
+
+@pytest.mark.asyncio
+async def test_config_version_memoized_per_instance_and_content():
+    rc._config_versions.clear()
+    config = {"account": "acme", "prompting": {"modules": {"enabled": True, "selected": ["a"]}}}
+
+    with patch("app.agents.tools.prompt_modules.load_prompt_module", return_value="module text") as load:
+        # A new mapping per turn (as built by bootstrap_chat) still hits the memo
+        first = await rc.instance_config_version("acme/chat1", MappingProxyType(dict(config)))
+        assert await rc.instance_config_version("acme/chat1", MappingProxyType(dict(config))) == first
+        assert load.call_count == 2
+
+        edited = await rc.instance_config_version("acme/chat1", {**config, "system_prompt": "Be brief."})
+        assert edited != first
+        assert load.call_count == 4
+
+
+def test_tools_read_only():
+    assert rc.tools_read_only({"tools": {"directory": {"enabled": True}, "vector_search": {"enabled": True}}})
+    assert rc.tools_read_only({"tools": {"email_summary": {"enabled": False}}})
+    assert not rc.tools_read_only({"tools": {"email_summary": {"enabled": True}}})
+    assert not rc.tools_read_only({"tools": {"profile_capture": {"enabled": True}}})
+
+
+@pytest.mark.asyncio
+async def test_invalidate_by_instance():
+    cache = ResponseCache()
+    one, two = _bootstrap(slug="chat1"), _bootstrap(slug="chat2")
+    await cache.store(one, "hours", "9-5", _result())
+    await cache.store(two, "hours", "9-5", _result())
+
+    assert cache.invalidate(account_slug="acme", instance_slug="chat1") == 1
+    assert await cache.lookup(one, "hours") is None
+    assert await cache.lookup(two, "hours") is not None
+
+
+@pytest.mark.asyncio
+async def test_record_hit_tracks_zero_cost_request():
+    cache = ResponseCache()
+    bootstrap = _bootstrap()
+    await cache.store(bootstrap, "hours", "9-5", _result(), "req-1")
+    cached = await cache.lookup(bootstrap, "hours")
+    tracker = MagicMock(track_llm_request=AsyncMock(return_value=uuid4()))
+    message_service = MagicMock(save_message=AsyncMock())
+
+    with patch('app.services.llm_request_tracker.LLMRequestTracker', return_value=tracker), \
+         patch('app.services.message_service.get_message_service', return_value=message_service):
+        await cache.record_hit(bootstrap, "hours", cached)
+
+    tracked = tracker.track_llm_request.call_args.kwargs
+    assert tracked["provider"] == "response_cache"
+    assert tracked["cost_data"]["total_cost"] == 0.0
+    assert tracked["meta"]["response_cache"]["source_llm_request_id"] == "req-1"
+    assert [c.kwargs["role"] for c in message_service.save_message.call_args_list] == ["human", "assistant"]
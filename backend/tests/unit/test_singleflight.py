@@ -0,0 +1,153 @@
+"""
+Unit tests for singleflight coalescing of identical first turns.
+
+Tests key eligibility, shared streams (same events for every subscriber,
+per-session persistence for followers), shared non-streaming runs, and
+cancellation once every subscriber has left.
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.services import singleflight as sf
+from app.services.singleflight import SingleFlight, singleflight_enabled
+
+
+def _bootstrap(history=(), tools=None):
+    return SimpleNamespace(
+        instance=SimpleNamespace(account_slug="acme", instance_slug="chat1"),
+        session_id=str(uuid4()),
+        history=history,
+        instance_config={"model_settings": {"model": "test/model"}, "tools": tools or {}},
+        requested_model="test/model",
+        config_version="v1"
+    )
+
+
+def test_key_requires_first_turn_and_normalizes():
+    first = SingleFlight.key(_bootstrap(), "What are your hours?", "stream")
+
+    assert first == SingleFlight.key(_bootstrap(), "  what are your HOURS ", "stream")
+    assert first != SingleFlight.key(_bootstrap(), "What are your hours?", "chat")
+    assert SingleFlight.key(_bootstrap(history=("earlier",)), "What are your hours?", "stream") is None
+    assert SingleFlight.key(_bootstrap(), "?!", "stream") is None
+
+
+def test_key_requires_read_only_tools():
+    read_only = {"directory": {"enabled": True}, "vector_search": {"enabled": True}, "email_summary": {"enabled": False}}
+
+    assert SingleFlight.key(_bootstrap(tools=read_only), "hours", "stream") is not None
+    assert SingleFlight.key(_bootstrap(tools={**read_only, "email_summary": {"enabled": True}}), "hours", "stream") is None
+    assert SingleFlight.key(_bootstrap(tools={"profile_capture": {"enabled": True}}), "hours", "chat") is None
+
+
+def test_enabled_setting():
+    assert singleflight_enabled({"chat": {"singleflight": {"enabled": True}}}, {}) is True
+    assert singleflight_enabled({"chat": {"singleflight": {"enabled": True}}}, {"singleflight": {"enabled": False}}) is False
+    assert singleflight_enabled({}, None) is False
+
+
+@pytest.mark.asyncio
+async def test_concurrent_streams_share_one_generation():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    runs = []
+
+    async def agent_events():
+        runs.append(1)
+        yield {"event": "message", "data": "Open "}
+        await release.wait()
+        yield {"event": "message", "data": "9-5"}
+        yield {"event": "done", "data": ""}
+
+    leader_bootstrap, follower_bootstrap = _bootstrap(), _bootstrap()
+    key = SingleFlight.key(leader_bootstrap, "hours?", "stream")
+
+    async def collect(events):
+        return [event async for event in events]
+
+    with patch.object(sf, 'record_reused_turn', AsyncMock(return_value=uuid4())) as record:
+        leader_events, leader = flights.stream(key, leader_bootstrap, "hours?", agent_events)
+        leader_task = asyncio.create_task(collect(leader_events))
+        await asyncio.sleep(0.01)
+
+        follower_events, follower = flights.stream(key, follower_bootstrap, "Hours?", agent_events)
+        follower_task = asyncio.create_task(collect(follower_events))
+        await asyncio.sleep(0.01)
+        release.set()
+        leader_result, follower_result = await asyncio.gather(leader_task, follower_task)
+
+    assert (leader, follower) == (True, False)
+    assert len(runs) == 1
+    assert leader_result == follower_result
+    assert [e["data"] for e in follower_result if e["event"] == "message"] == ["Open ", "9-5"]
+    # Only the follower is recorded here (the leader's turn is saved by the agent)
+    record.assert_awaited_once()
+    assert record.await_args.args[0] is follower_bootstrap
+    assert record.await_args.args[1:] == ("Hours?", "Open 9-5")
+    assert record.await_args.kwargs["provider"] == "singleflight"
+    assert flights.coalesced == 1
+
+    # Finished flights are not joined again
+    _, leader_again = flights.stream(key, follower_bootstrap, "hours?", agent_events)
+    assert leader_again is True
+
+
+@pytest.mark.asyncio
+async def test_generation_cancelled_when_all_subscribers_leave():
+    flights = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def agent_events():
+        try:
+            yield {"event": "message", "data": "partial"}
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    bootstrap = _bootstrap()
+    events, _ = flights.stream(SingleFlight.key(bootstrap, "hi there", "stream"), bootstrap, "hi there", agent_events)
+
+    assert (await events.__anext__())["data"] == "partial"
+    await events.aclose()
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_run():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    calls = []
+
+    async def run_agent():
+        calls.append(1)
+        await release.wait()
+        return {"response": "Open 9-5", "usage": object(), "llm_request_id": "leader"}
+
+    leader_bootstrap, follower_bootstrap = _bootstrap(), _bootstrap()
+    key = SingleFlight.key(leader_bootstrap, "hours?", "chat")
+    follower_request_id = uuid4()
+
+    with patch.object(sf, 'record_reused_turn', AsyncMock(return_value=follower_request_id)):
+        leader = asyncio.create_task(flights.call(key, leader_bootstrap, "hours?", run_agent))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.call(key, follower_bootstrap, "hours?", run_agent))
+        await asyncio.sleep(0)
+        release.set()
+        (leader_result, led), (follower_result, followed) = await asyncio.gather(leader, follower)
+
+    assert (led, followed) == (True, False)
+    assert len(calls) == 1
+    assert leader_result["llm_request_id"] == "leader"
+    assert follower_result["response"] == "Open 9-5"
+    assert follower_result["llm_request_id"] == str(follower_request_id)
+    assert follower_result["usage"] is None
+    assert follower_result["cost_tracking"]["method"] == "singleflight"
@@ -0,0 +1,158 @@
+"""
+Unit tests for SSE framing and delta coalescing (sse_stream).
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+import asyncio
+
+import pytest
+
+from app.services.sse_stream import CoalesceSettings, cancel_on_disconnect, coalesce_sse_events, encode_sse
+
+
+async def _events(items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+async def _collect(agen):
+    return [frame async for frame in agen]
+
+
+def _msg(text):
+    return {"event": "message", "data": text}
+
+
+def test_encode_sse_matches_legacy_format():
+    """Byte frames match the previous string formatting, including multi-line data."""
+    assert encode_sse("message", "Hello") == b"event: message\ndata: Hello\n\n"
+    assert encode_sse("done", "") == b"event: done\ndata: \n\n"
+    assert encode_sse("message", "a\nb") == b"event: message\ndata: a\ndata: b\n\n"
+    assert encode_sse("error", '{"message": "x"}') == b'event: error\ndata: {"message": "x"}\n\n'
+
+
+def test_settings_from_config_defaults():
+    settings = CoalesceSettings.from_config({"coalesce": {"flush_bytes": 64}})
+    assert settings.enabled is True
+    assert settings.flush_interval_ms == 30
+    assert settings.flush_bytes == 64
+    assert CoalesceSettings.from_config(None) == CoalesceSettings()
+
+
+@pytest.mark.asyncio
+async def test_fast_deltas_are_merged_and_order_preserved():
+    """Burst deltas become one frame; done is emitted after the flushed text."""
+    items = [_msg("Hel"), _msg("lo"), _msg(" world"), {"event": "done", "data": ""}]
+    frames = await _collect(coalesce_sse_events(_events(items), CoalesceSettings(flush_interval_ms=1000)))
+    assert frames == [b"event: message\ndata: Hello world\n\n", b"event: done\ndata: \n\n"]
+
+
+@pytest.mark.asyncio
+async def test_size_threshold_flushes():
+    items = [_msg("x" * 10) for _ in range(5)]
+    settings = CoalesceSettings(flush_interval_ms=10_000, flush_bytes=20)
+    frames = await _collect(coalesce_sse_events(_events(items), settings))
+    assert frames == [
+        encode_sse("message", "x" * 20),
+        encode_sse("message", "x" * 20),
+        encode_sse("message", "x" * 10),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_time_threshold_flushes_when_upstream_stalls():
+    """Pending text is flushed after the interval even if no new delta arrives."""
+    async def stalled():
+        yield _msg("first")
+        await asyncio.sleep(0.2)
+        yield _msg("second")
+
+    settings = CoalesceSettings(flush_interval_ms=20, flush_bytes=10_000)
+    agen = coalesce_sse_events(stalled(), settings)
+    first = await asyncio.wait_for(agen.__anext__(), timeout=0.15)
+    assert first == encode_sse("message", "first")
+    rest = await _collect(agen)
+    assert rest == [encode_sse("message", "second")]
+
+
+@pytest.mark.asyncio
+async def test_upstream_error_flushes_pending_then_raises():
+    async def failing():
+        yield _msg("partial")
+        raise RuntimeError("boom")
+
+    frames = []
+    with pytest.raises(RuntimeError, match="boom"):
+        async for frame in coalesce_sse_events(failing(), CoalesceSettings(flush_interval_ms=1000)):
+            frames.append(frame)
+    assert frames == [encode_sse("message", "partial")]
+
+
+@pytest.mark.asyncio
+async def test_disabled_passes_events_through():
+    items = [_msg("a"), _msg("b")]
+    frames = await _collect(coalesce_sse_events(_events(items), CoalesceSettings(enabled=False)))
+    assert frames == [encode_sse("message", "a"), encode_sse("message", "b")]
+
+
+@pytest.mark.asyncio
+async def test_closing_consumer_closes_upstream():
+    closed = asyncio.Event()
+
+    async def endless():
+        try:
+            while True:
+                yield _msg("x")
+                await asyncio.sleep(0.001)
+        finally:
+            closed.set()
+
+    agen = coalesce_sse_events(endless(), CoalesceSettings(flush_interval_ms=5, flush_bytes=3))
+    await agen.__anext__()
+    await agen.aclose()
+    await asyncio.wait_for(closed.wait(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_stalled_upstream():
+    """A client disconnect cancels the upstream even while it is waiting on the model."""
+    upstream_cancelled = asyncio.Event()
+    disconnected = False
+
+    async def stalled():
+        yield b"first"
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            upstream_cancelled.set()
+            raise
+        yield b"never"
+
+    async def is_disconnected():
+        return disconnected
+
+    received = []
+
+    async def consume():
+        async for frame in cancel_on_disconnect(stalled(), is_disconnected, poll_interval_ms=5):
+            received.append(frame)
+
+    consumer = asyncio.create_task(consume())
+    await asyncio.sleep(0.02)
+    disconnected = True
+    await asyncio.wait_for(consumer, 1)
+
+    assert received == [b"first"]
+    assert upstream_cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_connected_client_receives_everything():
+    async def connected():
+        return False
+
+    frames = await _collect(cancel_on_disconnect(_events([b"a", b"b"]), connected, poll_interval_ms=5))
+    assert frames == [b"a", b"b"]
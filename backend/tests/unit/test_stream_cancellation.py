@@ -0,0 +1,189 @@
+"""
+Unit tests for cancelling a streaming chat turn on client disconnect.
+
+Tests that cancelling simple_chat_stream() mid-generation leaves the agent's
+run_stream() context (closing the upstream connection), persists the partial
+answer with completion_status="partial", that a cancel while a completed turn
+is being saved doesn't record it twice, and that the token cost of the
+partial answer is estimated locally.
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.agents import simple_chat
+from app.agents.cost_calculator import estimate_partial_usage, estimate_token_count
+
+
+def test_estimate_token_count():
+    assert estimate_token_count("") == 0
+    assert estimate_token_count("abcd") == 1
+    assert estimate_token_count("abcde") == 2
+
+
+def test_estimate_partial_usage_prices_estimated_tokens():
+    """Estimated tokens go through the regular pricing path."""
+    messages = [{"role": "user", "content": "x" * 400}]
+
+    with patch('app.agents.cost_calculator.calculate_streaming_costs', return_value=(0.1, 0.2, 0.3)) as calc:
+        usage = estimate_partial_usage(messages, "y" * 40, "openai/gpt-4o-mini", "s1")
+
+    request_usage = calc.call_args.args[0]
+    assert (request_usage.input_tokens, request_usage.output_tokens) == (100, 10)
+    assert usage["total_tokens"] == 110
+    assert usage["total_cost"] == 0.3
+
+
+def _streaming_agent(exited: asyncio.Event):
+    """Agent double whose stream yields two chunks, then waits on the model forever."""
+    async def stream_text(delta=True):
+        yield "Hel"
+        yield "lo"
+        await asyncio.sleep(3600)
+
+    @asynccontextmanager
+    async def run_stream(*args, **kwargs):
+        try:
+            yield MagicMock(stream_text=stream_text)
+        finally:
+            exited.set()
+
+    return MagicMock(run_stream=run_stream)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_stream_closes_upstream_and_persists_partial():
+    exited = asyncio.Event()
+    execution_service = MagicMock()
+    execution_service.setup_execution_context = AsyncMock(return_value=(
+        _streaming_agent(exited), MagicMock(), {}, "prompt", [], [], "test/model"
+    ))
+    bootstrap = MagicMock(model_settings={"model": "test/model"})
+    persist = AsyncMock()
+    received = []
+
+    async def consume():
+        async for event in simple_chat.simple_chat_stream(
+            message="Hi",
+            session_id=str(uuid4()),
+            agent_instance_id=uuid4(),
+            account_id=uuid4(),
+            instance_config={"model_settings": {"model": "test/model"}},
+            bootstrap=bootstrap
+        ):
+            received.append(event)
+
+    with patch('app.services.agent_execution_service.get_agent_execution_service', return_value=execution_service), \
+         patch.object(simple_chat, '_persist_cancelled_stream', persist):
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert [e["data"] for e in received] == ["Hel", "lo"]
+    assert exited.is_set()
+    kwargs = persist.call_args.kwargs
+    assert kwargs["partial_text"] == "Hello"
+    assert kwargs["reason"] == "client_disconnected"
+    assert kwargs["chunks_sent"] == 2
+
+
+@pytest.mark.asyncio
+async def test_persist_cancelled_stream_records_partial_request():
+    tracker = MagicMock()
+    tracker.track_llm_request = AsyncMock(return_value=uuid4())
+    message_service = MagicMock()
+    message_service.save_message = AsyncMock()
+    usage = {
+        "prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110,
+        "prompt_cost": 0.1, "completion_cost": 0.2, "total_cost": 0.3
+    }
+
+    with patch.object(simple_chat, 'LLMRequestTracker', return_value=tracker), \
+         patch.object(simple_chat, 'get_message_service', return_value=message_service), \
+         patch('app.agents.cost_calculator.estimate_partial_usage', return_value=usage):
+        await simple_chat._persist_cancelled_stream(
+            session_id=str(uuid4()),
+            agent_instance_id=uuid4(),
+            message="Hi",
+            partial_text="Hello",
+            message_history=[],
+            requested_model="test/model",
+            model_settings={"model": "test/model"},
+            instance_config=None,
+            bootstrap=MagicMock(account_id=uuid4(), account_slug="acme"),
+            latency_ms=20,
+            chunks_sent=2,
+            reason="client_disconnected"
+        )
+
+    tracked = tracker.track_llm_request.call_args.kwargs
+    assert tracked["completion_status"] == "partial"
+    assert tracked["tokens"] == {"prompt": 100, "completion": 10, "total": 110}
+    assert tracked["meta"]["usage_estimated"] is True
+    roles = [c.kwargs["role"] for c in message_service.save_message.call_args_list]
+    assert roles == ["human", "assistant"]
+    assert message_service.save_message.call_args.kwargs["metadata"]["completion_status"] == "partial"
+
+
+@pytest.mark.asyncio
+async def test_cancel_while_saving_completed_turn_does_not_persist_twice():
+    async def stream_text(delta=True):
+        yield "Hello"
+
+    @asynccontextmanager
+    async def run_stream(*args, **kwargs):
+        yield MagicMock(stream_text=stream_text, usage=lambda: SimpleNamespace(input_tokens=10, output_tokens=5, total_tokens=15))
+
+    execution_service = MagicMock()
+    execution_service.setup_execution_context = AsyncMock(return_value=(
+        MagicMock(run_stream=run_stream), MagicMock(), {}, "prompt", [], [], "test/model"
+    ))
+    tracker = MagicMock()
+    tracker.track_llm_request = AsyncMock(return_value=uuid4())
+    saving, release = asyncio.Event(), asyncio.Event()
+
+    async def save_message_pair(**kwargs):
+        saving.set()
+        await release.wait()
+        return uuid4(), uuid4()
+
+    message_service = MagicMock(save_message_pair=AsyncMock(side_effect=save_message_pair))
+    persist = AsyncMock()
+
+    async def consume():
+        async for _ in simple_chat.simple_chat_stream(
+            message="Hi",
+            session_id=str(uuid4()),
+            agent_instance_id=uuid4(),
+            account_id=uuid4(),
+            instance_config={"model_settings": {"model": "test/model"}},
+            bootstrap=MagicMock(model_settings={"model": "test/model"})
+        ):
+            pass
+
+    with patch('app.services.agent_execution_service.get_agent_execution_service', return_value=execution_service), \
+         patch.object(simple_chat, 'hedged_model_of', return_value=None), \
+         patch.object(simple_chat, 'LLMRequestTracker', return_value=tracker), \
+         patch.object(simple_chat, 'get_message_service', return_value=message_service), \
+         patch.object(simple_chat, '_persist_cancelled_stream', persist):
+        task = asyncio.create_task(consume())
+        await asyncio.wait_for(saving.wait(), 1)
+        task.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    persist.assert_not_called()
+    assert tracker.track_llm_request.await_count == 1
+    assert message_service.save_message_pair.await_count == 1
+    assert not simple_chat._background_tasks
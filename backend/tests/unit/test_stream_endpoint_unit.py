@@ -177,6 +177,72 @@ async def test_mock_generator_empty():
     assert events[0] == {"event": "done", "data": ""}
 
 
+# Frames without SSE ids (resumable streams are covered in test_stream_replay.py)
+NO_REPLAY_CONFIG = {"chat": {"stream": {"replay": {"enabled": False}}}}
+
+
+async def _collect_stream(response):
+    """Collect SSE frames from a StreamingResponse body iterator (decoded)."""
+    return [frame.decode() async for frame in response.body_iterator]
+
+
+@pytest.mark.asyncio
+async def test_start_event_sent_before_bootstrap(mock_agent_instance, mock_session):
+    """Existing sessions get `start` before instance/history bootstrap runs."""
+    import json
+    from types import SimpleNamespace
+    from app.api import account_agents
+
+    order = []
+    bootstrap = SimpleNamespace(instance=mock_agent_instance, session_id=str(mock_session.id), history=(), instance_config={}, requested_model="test/model")
+
+    async def fake_bootstrap(*args, **kwargs):
+        order.append("bootstrap")
+        return bootstrap
+
+    request = SimpleNamespace(state=SimpleNamespace(session=mock_session), headers={}, is_disconnected=AsyncMock(return_value=False))
+    with patch.object(account_agents, 'get_current_session', return_value=mock_session), \
+         patch.object(account_agents, 'bootstrap_chat', fake_bootstrap), \
+         patch('app.config.load_config', return_value=NO_REPLAY_CONFIG), \
+         patch('app.agents.simple_chat.simple_chat_stream', mock_simple_chat_stream_success):
+        response = await account_agents.stream_endpoint(
+            request, message="Hi", account_slug="test_account", instance_slug="test_chat"
+        )
+        # Endpoint returned without bootstrapping - setup happens inside the stream
+        assert order == []
+        frames = await _collect_stream(response)
+
+    assert frames[0].startswith("event: start\n")
+    start = json.loads(frames[0].split("data: ", 1)[1])
+    assert start["session_id"] == str(mock_session.id)
+    assert start["request_id"] == response.headers["X-Request-ID"]
+    assert order == ["bootstrap"]
+    # Text deltas are coalesced into a single frame ahead of done
+    assert frames[1:] == ["event: message\ndata: Hello world!\n\n", "event: done\ndata: \n\n"]
+
+
+@pytest.mark.asyncio
+async def test_setup_error_becomes_sse_error_event(mock_session):
+    """Instance-not-found during deferred bootstrap is reported as an SSE error event."""
+    import json
+    from types import SimpleNamespace
+    from app.api import account_agents
+
+    request = SimpleNamespace(state=SimpleNamespace(session=mock_session), headers={}, is_disconnected=AsyncMock(return_value=False))
+    with patch.object(account_agents, 'get_current_session', return_value=mock_session), \
+         patch.object(account_agents, 'bootstrap_chat', AsyncMock(side_effect=ValueError("missing"))), \
+         patch('app.config.load_config', return_value=NO_REPLAY_CONFIG):
+        response = await account_agents.stream_endpoint(
+            request, message="Hi", account_slug="test_account", instance_slug="nope"
+        )
+        frames = await _collect_stream(response)
+
+    assert len(frames) == 2
+    assert frames[0].startswith("event: start\n")
+    assert frames[1].startswith("event: error\n")
+    assert json.loads(frames[1].split("data: ", 1)[1])["status"] == 404
+
+
 # ============================================================================
 # INTEGRATION TESTS (SKIPPED - Use manual tests instead)
 # ============================================================================
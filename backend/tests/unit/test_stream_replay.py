@@ -0,0 +1,265 @@
+"""
+Unit tests for resumable SSE streams (replay buffer + Last-Event-ID resume).
+
+Tests frame numbering, replay after a sequence number, attaching to a live
+generation, eviction bounds, the stream endpoint's resume path, and the error
+frame for a live client that falls behind the buffer.
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.services.stream_replay import (
+    ReplayBuffer,
+    ReplayGapError,
+    ReplaySettings,
+    StreamReplayRegistry,
+    format_event_id,
+    parse_event_id,
+)
+
+
+REPLAY_CONFIG = {"chat": {"stream": {"replay": {"enabled": True}}}}
+
+
+async def _frames(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _collect(iterator):
+    return [frame async for frame in iterator]
+
+
+def test_event_id_round_trip():
+    """Event ids encode response id and sequence number; malformed ids are rejected."""
+    rid = str(uuid4())
+    assert parse_event_id(format_event_id(rid, 12)) == (rid, 12)
+    assert parse_event_id(None) is None
+    assert parse_event_id("no-sequence") is None
+    assert parse_event_id(f"{rid}:abc") is None
+
+
+@pytest.mark.asyncio
+async def test_replay_after_sequence_number():
+    """A subscriber resuming at seq N receives only frames N+1.. with id lines."""
+    buffer = ReplayBuffer("r1", "s1", max_frames=10)
+    await buffer.produce(_frames(b"event: start\ndata: {}\n\n", b"data: a\n\n", b"data: b\n\n"))
+
+    frames = await _collect(buffer.subscribe(1))
+
+    assert frames == [b"id: r1:2\ndata: a\n\n", b"id: r1:3\ndata: b\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_subscriber_attaches_to_live_generation():
+    """A reconnect during generation gets the missed tail and then live frames."""
+    buffer = ReplayBuffer("r1", "s1", max_frames=10)
+    release = asyncio.Event()
+
+    async def slow_frames():
+        yield b"data: 1\n\n"
+        yield b"data: 2\n\n"
+        await release.wait()
+        yield b"data: 3\n\n"
+
+    producer = asyncio.create_task(buffer.produce(slow_frames()))
+    await asyncio.sleep(0)
+    reader = asyncio.create_task(_collect(buffer.subscribe(1)))
+    await asyncio.sleep(0.01)
+    assert not reader.done()
+    release.set()
+
+    frames = await asyncio.wait_for(reader, 1)
+    await producer
+    assert [f.split(b"\n", 1)[0] for f in frames] == [b"id: r1:2", b"id: r1:3"]
+
+
+@pytest.mark.asyncio
+async def test_gap_raises_when_frames_evicted():
+    """Resuming before the oldest retained frame is reported, not silently skipped."""
+    buffer = ReplayBuffer("r1", "s1", max_frames=2)
+    await buffer.produce(_frames(b"data: 1\n\n", b"data: 2\n\n", b"data: 3\n\n"))
+
+    with pytest.raises(ReplayGapError):
+        await _collect(buffer.subscribe(0))
+    assert len(await _collect(buffer.subscribe(1))) == 2
+
+
+@pytest.mark.asyncio
+async def test_abandoned_generation_is_cancelled_after_grace():
+    """With no subscriber left, the producer is cancelled after the grace period."""
+    buffer = ReplayBuffer("r1", "s1", max_frames=10, abandon_grace=0.02)
+
+    async def endless():
+        yield b"data: 1\n\n"
+        await asyncio.sleep(3600)
+        yield b"data: never\n\n"
+
+    buffer.producer = asyncio.create_task(buffer.produce(endless()))
+    subscription = buffer.subscribe(0)
+    assert await subscription.__anext__() == b"id: r1:1\ndata: 1\n\n"
+    await subscription.aclose()
+
+    await asyncio.sleep(0.05)
+    assert buffer.producer.cancelled()
+    assert buffer.done
+
+
+@pytest.mark.asyncio
+async def test_resume_within_grace_keeps_generation_alive():
+    """A client that reattaches before the grace period ends keeps the generation running."""
+    buffer = ReplayBuffer("r1", "s1", max_frames=10, abandon_grace=0.03)
+    release = asyncio.Event()
+
+    async def slow():
+        yield b"data: 1\n\n"
+        await release.wait()
+        yield b"data: 2\n\n"
+
+    buffer.producer = asyncio.create_task(buffer.produce(slow()))
+    first = buffer.subscribe(0)
+    await first.__anext__()
+    await first.aclose()
+
+    resumed = asyncio.create_task(_collect(buffer.subscribe(1)))
+    await asyncio.sleep(0.06)
+    assert not buffer.producer.done()
+    release.set()
+
+    assert await asyncio.wait_for(resumed, 1) == [b"id: r1:2\ndata: 2\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_registry_bounds_and_retention():
+    """Finished streams are dropped first when full and expire after retention."""
+    registry = StreamReplayRegistry(ReplaySettings(max_streams=2, retention_seconds=60))
+    done = registry.create("done", "s")
+    await done.finish()
+    registry.create("live", "s")
+    registry.create("new", "s")
+
+    assert registry.get("done") is None
+    assert registry.get("live") is not None
+
+    expiring = registry.get("new")
+    await expiring.finish()
+    expiring.finished_at -= 120
+    assert registry.get("new") is None
+
+
+@pytest.mark.asyncio
+async def test_resume_rejects_other_session_and_unknown_stream():
+    """Another session's stream (or an expired one) yields a 410 error frame."""
+    registry = StreamReplayRegistry(ReplaySettings())
+    buffer = registry.create("r1", "owner")
+    await buffer.produce(_frames(b"data: secret\n\n"))
+
+    for session_id, rid in (("intruder", "r1"), ("owner", "unknown")):
+        frames = await _collect(registry.resume(rid, session_id, 0))
+        assert len(frames) == 1
+        assert frames[0].startswith(b"event: error\n")
+        assert json.loads(frames[0].split(b"data: ", 1)[1])["status"] == 410
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_resumes_from_last_event_id():
+    """Reconnecting with Last-Event-ID replays the tail without re-running the agent."""
+    from app.api import account_agents
+
+    session = SimpleNamespace(id=uuid4(), account_id=uuid4(), account_slug="acme")
+    registry = StreamReplayRegistry(ReplaySettings())
+    buffer = registry.create("r1", str(session.id))
+    await buffer.produce(_frames(b"event: start\ndata: {}\n\n", b"event: message\ndata: Hi\n\n", b"event: done\ndata: \n\n"))
+
+    async def must_not_run(*args, **kwargs):
+        raise AssertionError("agent re-run on resume")
+        yield
+
+    request = SimpleNamespace(state=SimpleNamespace(session=session), headers={"last-event-id": "r1:1"}, is_disconnected=AsyncMock(return_value=False))
+    with patch.object(account_agents, 'get_current_session', return_value=session), \
+         patch.object(account_agents, 'get_stream_replay_registry', return_value=registry), \
+         patch('app.config.load_config', return_value=REPLAY_CONFIG), \
+         patch('app.agents.simple_chat.simple_chat_stream', must_not_run):
+        response = await account_agents.stream_endpoint(
+            request, message="Hi", account_slug="acme", instance_slug="chat1", last_event_id=None
+        )
+        frames = [frame async for frame in response.body_iterator]
+
+    assert response.headers["X-Request-ID"] == "r1"
+    assert frames == [b"id: r1:2\nevent: message\ndata: Hi\n\n", b"id: r1:3\nevent: done\ndata: \n\n"]
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_numbers_frames_when_enabled():
+    """New streams are produced into the registry and every frame carries an id."""
+    from app.api import account_agents
+
+    session = SimpleNamespace(id=uuid4(), account_id=uuid4(), account_slug="acme")
+    registry = StreamReplayRegistry(ReplaySettings())
+    bootstrap = SimpleNamespace(instance=SimpleNamespace(id=uuid4(), account_id=session.account_id, agent_type="simple_chat"), session_id=str(session.id), history=(), instance_config={}, requested_model="test/model")
+
+    async def fake_bootstrap(*args, **kwargs):
+        return bootstrap
+
+    async def agent_stream(*args, **kwargs):
+        yield {"event": "message", "data": "Hello"}
+        yield {"event": "done", "data": ""}
+
+    request = SimpleNamespace(state=SimpleNamespace(session=session), headers={}, is_disconnected=AsyncMock(return_value=False))
+    with patch.object(account_agents, 'get_current_session', return_value=session), \
+         patch.object(account_agents, 'bootstrap_chat', fake_bootstrap), \
+         patch.object(account_agents, 'get_stream_replay_registry', return_value=registry), \
+         patch('app.config.load_config', return_value=REPLAY_CONFIG), \
+         patch('app.agents.simple_chat.simple_chat_stream', agent_stream):
+        response = await account_agents.stream_endpoint(
+            request, message="Hi", account_slug="acme", instance_slug="chat1", last_event_id=None
+        )
+        frames = [frame async for frame in response.body_iterator]
+
+    rid = response.headers["X-Request-ID"]
+    assert [f.split(b"\n", 1)[0] for f in frames] == [f"id: {rid}:{n}".encode() for n in (1, 2, 3)]
+    assert registry.get(rid).done
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_reports_live_client_falling_behind():
+    """A first connection that falls behind max_frames gets an error frame, not a cut stream."""
+    from app.api import account_agents
+
+    session = SimpleNamespace(id=uuid4(), account_id=uuid4(), account_slug="acme")
+    registry = StreamReplayRegistry(ReplaySettings(enabled=True, max_frames=2))
+    bootstrap = SimpleNamespace(instance=SimpleNamespace(id=uuid4(), account_id=session.account_id, agent_type="simple_chat"), session_id=str(session.id), history=(), instance_config={}, requested_model="test/model")
+
+    async def fake_bootstrap(*args, **kwargs):
+        return bootstrap
+
+    async def agent_stream(*args, **kwargs):
+        for n in range(10):
+            yield {"event": "progress", "data": str(n)}
+        yield {"event": "done", "data": ""}
+
+    request = SimpleNamespace(state=SimpleNamespace(session=session), headers={}, is_disconnected=AsyncMock(return_value=False))
+    with patch.object(account_agents, 'get_current_session', return_value=session), \
+         patch.object(account_agents, 'bootstrap_chat', fake_bootstrap), \
+         patch.object(account_agents, 'get_stream_replay_registry', return_value=registry), \
+         patch('app.config.load_config', return_value=REPLAY_CONFIG), \
+         patch('app.agents.simple_chat.simple_chat_stream', agent_stream):
+        response = await account_agents.stream_endpoint(
+            request, message="Hi", account_slug="acme", instance_slug="chat1", last_event_id=None
+        )
+        frames = [frame async for frame in response.body_iterator]
+
+    assert frames[-1].startswith(b"event: error\n")
+    assert json.loads(frames[-1].split(b"data: ", 1)[1])["status"] == 410
+
+
+def test_replay_ships_disabled():
+    assert ReplaySettings.from_config(None).enabled is False
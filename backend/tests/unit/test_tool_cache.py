@@ -0,0 +1,139 @@
+"""
+Unit tests for tool result memoization (search_directory, vector_search).
+
+Tests key normalization, per-instance vs per-session scope, TTL expiry,
+data-version invalidation (directory import, vector upsert) and that
+uncacheable results are not stored.
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.agents.tools import tool_cache as tc
+from app.agents.tools.tool_cache import ToolCacheSettings, ToolResultCache, normalize_filters, normalize_text
+from app.services.data_versions import DataVersions, vector_namespace
+
+APP_CONFIG = {"tools": {"cache": {"enabled": True, "scope": "instance", "search_directory": {"ttl_seconds": 60}}}}
+
+
+def _deps(session_id="s1", instance_id=1, **cache):
+    tools = {"directory": {"cache": cache}} if cache else {}
+    return SimpleNamespace(session_id=session_id, agent_instance_id=instance_id, agent_config={"tools": tools})
+
+
+async def _version():
+    return "v1"
+
+
+@pytest.fixture(autouse=True)
+def app_config():
+    with patch('app.config.load_config', return_value=APP_CONFIG):
+        yield
+
+
+def test_normalization():
+    assert normalize_text("  Heart   Doctor ") == "heart doctor"
+    assert normalize_text("Dr. Smith", casefold=False) == "Dr. Smith"
+    assert normalize_filters({"b": " Spanish", "a": "Cardiology "}) == (("a", "cardiology"), ("b", "spanish"))
+
+
+def test_cache_ships_disabled():
+    with patch('app.config.load_config', return_value={}):
+        assert ToolCacheSettings.for_tool("vector_search", {}).enabled is False
+
+
+def test_settings_cascade():
+    assert ToolCacheSettings.for_tool("search_directory", {}).ttl_seconds == 60
+    assert ToolCacheSettings.for_tool("vector_search", {}).ttl_seconds == 600
+    agent = {"tools": {"directory": {"cache": {"scope": "session", "enabled": False}}}}
+    settings = ToolCacheSettings.for_tool("search_directory", agent)
+    assert (settings.scope, settings.enabled) == ("session", False)
+
+
+@pytest.mark.asyncio
+async def test_instance_scope_shared_across_sessions():
+    cache = ToolResultCache()
+    call = AsyncMock(return_value="result")
+    args = {"query": normalize_text("Cardiology")}
+
+    await cache.get_or_call("search_directory", _deps("s1"), args, _version, call)
+    result = await cache.get_or_call("search_directory", _deps("s2"), {"query": normalize_text(" cardiology")}, _version, call)
+
+    assert result == "result"
+    assert call.await_count == 1
+    assert cache.stats["search_directory"] == {"hit": 1, "miss": 1, "bypass": 0}
+
+
+@pytest.mark.asyncio
+async def test_session_scope_and_disabled():
+    cache = ToolResultCache()
+    call = AsyncMock(return_value="result")
+
+    await cache.get_or_call("search_directory", _deps("s1", scope="session"), {}, _version, call)
+    await cache.get_or_call("search_directory", _deps("s2", scope="session"), {}, _version, call)
+    assert call.await_count == 2
+
+    await cache.get_or_call("search_directory", _deps("s1", enabled=False), {}, _version, call)
+    await cache.get_or_call("search_directory", _deps("s1", enabled=False), {}, _version, call)
+    assert call.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry_and_uncacheable_results():
+    cache = ToolResultCache()
+    call = AsyncMock(return_value="result")
+
+    await cache.get_or_call("search_directory", _deps(), {}, _version, call)
+    with patch.object(tc.time, "monotonic", return_value=tc.time.monotonic() + 61):
+        await cache.get_or_call("search_directory", _deps(), {}, _version, call)
+    assert call.await_count == 2
+
+    failing = AsyncMock(return_value="error")
+    for _ in range(2):
+        await cache.get_or_call("vector_search", _deps(), {}, _version, failing, cacheable=lambda r: r != "error")
+    assert failing.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_data_version_change_invalidates():
+    cache = ToolResultCache()
+    versions = DataVersions()
+    namespace = vector_namespace("index", None)
+    call = AsyncMock(return_value="result")
+
+    async def version():
+        return str(versions.get(namespace))
+
+    await cache.get_or_call("vector_search", _deps(), {"query": "q"}, version, call)
+    await cache.get_or_call("vector_search", _deps(), {"query": "q"}, version, call)
+    versions.bump(namespace)
+    await cache.get_or_call("vector_search", _deps(), {"query": "q"}, version, call)
+
+    assert call.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_search_directory_tool_memoizes_db_search():
+    """Repeated identical search_directory calls hit the database once."""
+    from app.agents.tools import directory_tools
+
+    account_id = uuid4()
+    ctx = SimpleNamespace(deps=SimpleNamespace(
+        session_id="s1", agent_instance_id=uuid4(), account_id=account_id,
+        agent_config={"tools": {"directory": {"accessible_lists": ["doctors"], "search_mode": "fts"}}}
+    ))
+    execute = AsyncMock(return_value='{"entries": [], "total": 0}')
+    versions = SimpleNamespace(directory_version=AsyncMock(return_value="1:2025-10-01"))
+
+    with patch.object(directory_tools, '_execute_directory_search', execute), \
+         patch.object(directory_tools, 'get_tool_cache', return_value=ToolResultCache()), \
+         patch.object(directory_tools, 'get_data_versions', return_value=versions):
+        await directory_tools.search_directory(ctx, "doctors", query="Cardiology")
+        await directory_tools.search_directory(ctx, "doctors", query="  cardiology ")
+
+    assert execute.await_count == 1
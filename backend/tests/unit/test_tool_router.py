@@ -0,0 +1,117 @@
+"""
+Unit tests for the per-turn tool / directory router.
+
+Tests candidate phrases from schema YAMLs, routing decisions (confident,
+narrowing only, fallback), the disabled default, and that a routed turn
+drops the unselected tools and directory sections when creating the agent.
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.agents.tools.tool_router import (
+    RouteDecision,
+    RouterSettings,
+    ToolRouter,
+    cosine,
+    directory_candidate,
+    local_embedding,
+    vector_search_candidate,
+)
+from app.services.directory_importer import DirectoryImporter
+
+INSTANCE_CONFIG = {
+    "tools": {
+        "router": {"enabled": True},
+        "vector_search": {"enabled": True},
+        "directory": {"enabled": True, "accessible_lists": ["doctors", "contact_information"]},
+    }
+}
+
+
+def _router():
+    router = ToolRouter()
+    candidates = [
+        directory_candidate("doctors", DirectoryImporter.load_schema("medical_professional.yaml")),
+        directory_candidate("contact_information", DirectoryImporter.load_schema("contact_information.yaml")),
+    ]
+    router._load_directory_candidates = AsyncMock(return_value=candidates)
+    return router
+
+
+def test_local_embedding_similarity():
+    assert cosine(local_embedding("I need a cardiologist"), local_embedding("I need a cardiologist")) == pytest.approx(1.0)
+    assert cosine(local_embedding("cardiologist"), local_embedding("cardiology")) > 0.2
+    assert cosine(local_embedding("cardiologist"), local_embedding("parking garage")) < 0.1
+    assert local_embedding("the a of") == {}
+
+
+def test_candidate_phrases_from_schema():
+    candidate = directory_candidate("doctors", DirectoryImporter.load_schema("medical_professional.yaml"))
+
+    assert candidate.key == "directory:doctors"
+    assert "I need a cardiologist" in candidate.phrases
+    assert vector_search_candidate({"purpose": "visiting hours"}).phrases[-1] == "visiting hours"
+
+
+@pytest.mark.asyncio
+async def test_confident_route_exposes_only_matching_list():
+    decision = await _router().route("I need a cardiologist", INSTANCE_CONFIG, uuid4())
+
+    assert decision.routed
+    assert decision.tools == {"directory"}
+    assert decision.directory_lists == ("doctors",)
+    assert decision.list_filter == ["doctors"]
+    assert not decision.allows("vector_search")
+
+
+@pytest.mark.asyncio
+async def test_medium_confidence_only_narrows_directory_sections():
+    decision = await _router().route("What are your visiting hours?", INSTANCE_CONFIG, uuid4())
+
+    assert decision.routed
+    assert decision.tools == {"directory", "vector_search"}
+    assert decision.directory_lists == ("contact_information",)
+
+
+@pytest.mark.asyncio
+async def test_low_confidence_falls_back_to_everything():
+    router = _router()
+
+    decision = await router.route("tell me more", INSTANCE_CONFIG, uuid4())
+
+    assert decision.routed is False
+    assert decision.allows("vector_search") and decision.allows("directory")
+    assert decision.list_filter is None
+    assert await router.route("I need a cardiologist", {"tools": {"vector_search": {"enabled": True}}}) is None
+
+
+def test_settings_defaults():
+    assert RouterSettings.from_instance_config({}).enabled is False
+    settings = RouterSettings.from_instance_config({"tools": {"router": {"enabled": True, "embedder": "bogus", "min_confidence": 0.5}}})
+    assert (settings.embedder, settings.min_confidence) == ("local", 0.5)
+
+
+@pytest.mark.asyncio
+async def test_routed_agent_drops_unselected_tools():
+    from app.agents import simple_chat
+
+    config = {
+        "model_settings": {"model": "openai/gpt-4o-mini"},
+        "system_prompt": "You are helpful.",
+        "tools": INSTANCE_CONFIG["tools"],
+    }
+    route = RouteDecision(routed=True, tools=frozenset({"directory"}), directory_lists=("doctors",))
+    docs = AsyncMock(return_value=None)
+
+    with patch.dict('os.environ', {'OPENROUTER_API_KEY': 'test-key'}), \
+         patch('app.agents.tools.prompt_generator.generate_directory_tool_docs', docs), \
+         patch('app.database.get_database_service'):
+        _, _, _, tools = await simple_chat.create_simple_chat_agent(config, account_id=uuid4(), route=route)
+
+    assert [tool.__name__ for tool in tools] == ["get_available_directories", "search_directory"]
+    assert docs.await_args.kwargs["only_lists"] == ["doctors"]
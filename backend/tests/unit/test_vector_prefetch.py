@@ -0,0 +1,111 @@
+"""
+Unit tests for speculative vector search prefetch.
+
+Tests query matching, serving a vector_search call from the prefetch,
+injecting results into the first prompt, and used-vs-wasted outcomes.
+"""
+
+# Copyright (c) 2025 Ape4, Inc. All rights reserved.
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.agents.tools import vector_prefetch as vp
+from app.agents.tools.vector_prefetch import VectorPrefetch, VectorPrefetchSettings, query_match
+from app.services.vector_service import VectorQueryResponse, VectorQueryResult
+
+
+def _response(count=2):
+    results = [VectorQueryResult(id=f"d{i}", score=0.9 - i / 10, text=f"Visiting hours text {i}", metadata={}, namespace="ns") for i in range(count)]
+    return VectorQueryResponse(results=results, total_results=count, query_time_ms=5.0, namespace="ns")
+
+
+async def _prefetch(mode="serve", response=None, delay=0.0, top_k=5):
+    async def query():
+        await asyncio.sleep(delay)
+        return response or _response()
+
+    task = asyncio.create_task(query())
+    return VectorPrefetch("What are your visiting hours?", VectorPrefetchSettings(enabled=True, mode=mode), task, top_k, 0.5)
+
+
+def test_query_match():
+    assert query_match("What are your visiting hours?", "visiting hours") == 1.0
+    assert query_match("What are your visiting hours?", "hospital visiting hours policy") == 0.5
+    assert query_match("What are your visiting hours?", "the") == 0.0
+
+
+def test_settings_require_vector_search_enabled():
+    config = {"tools": {"vector_search": {"enabled": False, "prefetch": {"enabled": True}}}}
+    assert VectorPrefetchSettings.from_instance_config(config).enabled is False
+    config["tools"]["vector_search"]["enabled"] = True
+    assert VectorPrefetchSettings.from_instance_config(config).enabled is True
+    assert vp.start_vector_prefetch("hi", config, history_length=3) is None  # first turn only
+
+
+@pytest.mark.asyncio
+async def test_serve_matching_query_from_prefetch():
+    prefetch = await _prefetch()
+
+    served = await prefetch.serve("visiting hours", top_k=1, similarity_threshold=0.5)
+
+    assert "Found 1 relevant result(s)" in served
+    assert prefetch.finish() == "served"
+    # Only the first matching call is served
+    assert await prefetch.serve("visiting hours", top_k=1, similarity_threshold=0.5) is None
+
+
+@pytest.mark.asyncio
+async def test_mismatched_or_larger_queries_fall_through():
+    prefetch = await _prefetch(response=_response(5), top_k=5)
+
+    assert await prefetch.serve("parking garage rates", 5, 0.5) is None
+    assert await prefetch.serve("visiting hours", 10, 0.5) is None  # prefetch may have cut results off
+    assert prefetch.finish() == "wasted"
+
+
+@pytest.mark.asyncio
+async def test_inject_adds_context_to_prompt():
+    prefetch = await _prefetch(mode="inject")
+
+    prompt = await prefetch.prompt("What are your visiting hours?")
+
+    assert prompt[0] == "What are your visiting hours?"
+    assert "Visiting hours text 0" in prompt[1]
+    assert prefetch.finish() == "injected"
+
+
+@pytest.mark.asyncio
+async def test_late_and_cancelled_outcomes():
+    late = await _prefetch(mode="inject", delay=1)
+    late.settings = VectorPrefetchSettings(enabled=True, mode="inject", max_wait_ms=10)
+    assert await late.prompt("q") == "q"
+    assert late.finish() == "late"
+    assert late.task.cancelled() or late.task.cancelling()
+
+    unused = await _prefetch(delay=1)
+    assert unused.finish() == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_vector_search_tool_uses_prefetch():
+    from app.agents.tools import vector_tools
+
+    prefetch = await _prefetch()
+    ctx = SimpleNamespace(deps=SimpleNamespace(
+        session_id="s1",
+        agent_config={"tools": {"vector_search": {"enabled": True, "max_results": 5, "similarity_threshold": 0.5}}},
+        vector_prefetch=prefetch
+    ))
+    pinecone_config = SimpleNamespace(index_name="idx", namespace="ns")
+
+    with patch.object(vector_tools, 'load_agent_pinecone_config', return_value=pinecone_config), \
+         patch('app.config.load_config', return_value={}), \
+         patch.object(vector_tools, 'get_cached_pinecone_client', side_effect=AssertionError("Pinecone queried")):
+        result = await vector_tools.vector_search(ctx, "visiting hours")
+
+    assert "Visiting hours text 0" in result
+    assert prefetch.outcome == "served"
@@ -490,6 +490,7 @@
           debugLog('SSE', sseUrl.toString());
           const es = new EventSource(sseUrl.toString(), { withCredentials: true });
           activeSSE = es;
+          let sseResumes = 0;
           // Accumulate chunks without rendering during streaming (render once when done)
           es.onmessage = (ev)=>{ 
             accumulated += ev.data;
@@ -521,6 +522,13 @@
       setBusy(false);
     });
           es.onerror = ()=>{ 
+            // Dropped connection after the stream started: the browser reconnects with
+            // Last-Event-ID and the server replays the missed tail (no duplicate turn)
+            if (es.readyState === EventSource.CONNECTING && accumulated.length > 0 && sseResumes < 3){
+              sseResumes++;
+              debugLog('SSE connection dropped, resuming', sseResumes);
+              return;
+            }
             if (typingTimeout) clearTimeout(typingTimeout);
             hideTypingIndicator(activeBotDiv);
             try{ es.close(); }catch{}; activeSSE=null; // fallback to POST